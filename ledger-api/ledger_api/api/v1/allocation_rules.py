@@ -6,9 +6,10 @@ Manages allocation rules for automatic fund distribution.
 import logging
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ledger_api.db import get_db
+from ledger_api.db import get_async_db
 from ledger_api.models.ledger_models import AllocationRule
 from ledger_api.schemas.allocation_schemas import (
     AllocationRuleCreate,
@@ -16,6 +17,7 @@ from ledger_api.schemas.allocation_schemas import (
 )
 from ledger_api.services.allocation import validate_allocation_rule
 from ledger_api.services.audit import create_audit_log
+from ledger_api.services.rule_cache import allocation_rule_cache, bump_config_version
 from ledger_api.utils.jwt_auth import require_guardian
 
 logger = logging.getLogger(__name__)
@@ -26,7 +28,7 @@ router = APIRouter(prefix="/allocation_rules", tags=["allocation_rules"])
 @router.get("/", response_model=List[AllocationRuleResponse])
 async def list_allocation_rules(
     include_inactive: bool = Query(False, description="Include inactive rules"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all allocation rules.
@@ -40,15 +42,15 @@ async def list_allocation_rules(
         List of allocation rules
     """
     try:
-        query = db.query(AllocationRule)
+        query = select(AllocationRule)
         
         if not include_inactive:
-            query = query.filter(AllocationRule.is_active == True)
+            query = query.where(AllocationRule.is_active == True)
         
-        rules = query.order_by(
+        rules = (await db.scalars(query.order_by(
             AllocationRule.priority.desc(),
             AllocationRule.created_at.desc()
-        ).all()
+        ))).all()
         
         return rules
         
@@ -63,16 +65,14 @@ async def list_allocation_rules(
 @router.get("/{rule_id}", response_model=AllocationRuleResponse)
 async def get_allocation_rule(
     rule_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific allocation rule by ID.
     
     Public endpoint (no authentication required).
     """
-    rule = db.query(AllocationRule).filter(
-        AllocationRule.id == rule_id
-    ).first()
+    rule = await db.get(AllocationRule, rule_id)
     
     if not rule:
         raise HTTPException(
@@ -86,7 +86,7 @@ async def get_allocation_rule(
 @router.post("/", response_model=AllocationRuleResponse, status_code=status.HTTP_201_CREATED)
 async def create_allocation_rule(
     rule: AllocationRuleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(require_guardian)
 ):
     """
@@ -104,9 +104,9 @@ async def create_allocation_rule(
     """
     try:
         # Check if rule name already exists
-        existing_rule = db.query(AllocationRule).filter(
-            AllocationRule.rule_name == rule.rule_name
-        ).first()
+        existing_rule = await db.scalar(
+            select(AllocationRule).where(AllocationRule.rule_name == rule.rule_name)
+        )
         
         if existing_rule:
             raise HTTPException(
@@ -120,7 +120,7 @@ async def create_allocation_rule(
             for entry in rule.allocations
         ]
         
-        validate_allocation_rule(allocations_dict, db)
+        await db.run_sync(lambda session: validate_allocation_rule(allocations_dict, session))
         
         # Create rule
         created_by = current_user.get("sub", "guardian")
@@ -136,11 +136,11 @@ async def create_allocation_rule(
         )
         
         db.add(db_rule)
-        db.flush()
+        await db.flush()
         
         # Create audit log
-        create_audit_log(
-            db=db,
+        await db.run_sync(
+            create_audit_log,
             table_name="allocation_rules",
             record_id=db_rule.id,
             operation="CREATE",
@@ -153,8 +153,12 @@ async def create_allocation_rule(
             changed_by=created_by
         )
         
-        db.commit()
-        db.refresh(db_rule)
+        # Make every worker recompile its cached rules
+        await db.run_sync(bump_config_version)
+        
+        await db.commit()
+        allocation_rule_cache.invalidate()
+        await db.refresh(db_rule)
         
         logger.info(f"Allocation rule created: {db_rule.rule_name} by {created_by}")
         
@@ -168,7 +172,7 @@ async def create_allocation_rule(
             detail=str(e)
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating allocation rule: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -180,7 +184,7 @@ async def create_allocation_rule(
 async def update_allocation_rule(
     rule_id: int,
     rule_update: AllocationRuleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(require_guardian)
 ):
     """
@@ -197,9 +201,7 @@ async def update_allocation_rule(
     """
     try:
         # Get existing rule
-        db_rule = db.query(AllocationRule).filter(
-            AllocationRule.id == rule_id
-        ).first()
+        db_rule = await db.get(AllocationRule, rule_id)
         
         if not db_rule:
             raise HTTPException(
@@ -221,7 +223,7 @@ async def update_allocation_rule(
             for entry in rule_update.allocations
         ]
         
-        validate_allocation_rule(allocations_dict, db)
+        await db.run_sync(lambda session: validate_allocation_rule(allocations_dict, session))
         
         # Update rule
         db_rule.rule_name = rule_update.rule_name
@@ -233,8 +235,8 @@ async def update_allocation_rule(
         
         # Create audit log
         changed_by = current_user.get("sub", "guardian")
-        create_audit_log(
-            db=db,
+        await db.run_sync(
+            create_audit_log,
             table_name="allocation_rules",
             record_id=db_rule.id,
             operation="UPDATE",
@@ -248,8 +250,12 @@ async def update_allocation_rule(
             changed_by=changed_by
         )
         
-        db.commit()
-        db.refresh(db_rule)
+        # Make every worker recompile its cached rules
+        await db.run_sync(bump_config_version)
+        
+        await db.commit()
+        allocation_rule_cache.invalidate()
+        await db.refresh(db_rule)
         
         logger.info(f"Allocation rule updated: {db_rule.rule_name} by {changed_by}")
         
@@ -263,7 +269,7 @@ async def update_allocation_rule(
             detail=str(e)
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating allocation rule: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -274,7 +280,7 @@ async def update_allocation_rule(
 @router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_allocation_rule(
     rule_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(require_guardian)
 ):
     """
@@ -285,9 +291,7 @@ async def delete_allocation_rule(
     Note: This sets is_active to False rather than deleting the record.
     """
     try:
-        db_rule = db.query(AllocationRule).filter(
-            AllocationRule.id == rule_id
-        ).first()
+        db_rule = await db.get(AllocationRule, rule_id)
         
         if not db_rule:
             raise HTTPException(
@@ -305,8 +309,8 @@ async def delete_allocation_rule(
         
         # Create audit log
         changed_by = current_user.get("sub", "guardian")
-        create_audit_log(
-            db=db,
+        await db.run_sync(
+            create_audit_log,
             table_name="allocation_rules",
             record_id=db_rule.id,
             operation="UPDATE",
@@ -315,14 +319,18 @@ async def delete_allocation_rule(
             changed_by=changed_by
         )
         
-        db.commit()
+        # Make every worker recompile its cached rules
+        await db.run_sync(bump_config_version)
+        
+        await db.commit()
+        allocation_rule_cache.invalidate()
         
         logger.info(f"Allocation rule deactivated: {db_rule.rule_name} by {changed_by}")
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting allocation rule: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
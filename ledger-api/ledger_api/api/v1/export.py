@@ -0,0 +1,94 @@
+"""
+Export API endpoints.
+Streams ledger transactions and the audit log for accounting.
+"""
+
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ledger_api.db import get_async_sessionmaker
+from ledger_api.services.export import (
+    ARROW_AVAILABLE,
+    DATASETS,
+    DEFAULT_BATCH_SIZE,
+    ENCODERS,
+    get_export_watermark,
+    stream_export
+)
+from ledger_api.utils.jwt_auth import require_guardian
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str,
+    export_format: str = Query("ndjson", alias="format", description="ndjson, csv or arrow"),
+    since_id: int = Query(0, ge=0, description="Export rows with id greater than this (resume checkpoint)"),
+    until_id: Optional[int] = Query(None, ge=0, description="Export rows with id up to this (capped at the commit watermark)"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10000, description="Rows fetched per round trip"),
+    session_factory: async_sessionmaker = Depends(get_async_sessionmaker),
+    current_user: dict = Depends(require_guardian)
+):
+    """
+    Stream a full export of `transactions` or `audit_log`.
+    
+    Requires Guardian authentication.
+    
+    Rows are streamed in id order with constant memory. The id range is
+    fixed when the export starts (X-Export-Until-Id header), so a nightly
+    job can pass that value as since_id next time, and an interrupted
+    download resumes with since_id set to the last id received.
+    
+    The range ends at the commit watermark, behind rows whose transactions
+    may still be open, so a row committed late is never skipped by the
+    next since_id run.
+    
+    Returns:
+        Streaming NDJSON, CSV or Arrow IPC stream
+    """
+    if dataset not in DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown export dataset '{dataset}'. Available: {sorted(DATASETS)}"
+        )
+    
+    if export_format not in ENCODERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown export format '{export_format}'. Available: {sorted(ENCODERS)}"
+        )
+    
+    if export_format == "arrow" and not ARROW_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Arrow export requires pyarrow to be installed"
+        )
+    
+    export = DATASETS[dataset]
+    async with session_factory() as db:
+        watermark = await get_export_watermark(db, export)
+    until_id = watermark if until_id is None else min(until_id, watermark)
+    
+    encoder = ENCODERS[export_format]
+    filename = f"{dataset}_{since_id + 1}-{until_id}.{encoder.extension}"
+    
+    logger.info(
+        f"Export of {dataset} as {export_format} (ids {since_id + 1}..{until_id}) "
+        f"started by {current_user.get('sub', 'guardian')}"
+    )
+    
+    return StreamingResponse(
+        stream_export(session_factory, export, export_format, since_id, until_id, batch_size=batch_size),
+        media_type=encoder.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Since-Id": str(since_id),
+            "X-Export-Until-Id": str(until_id)
+        }
+    )
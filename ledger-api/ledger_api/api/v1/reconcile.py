@@ -6,18 +6,22 @@ Handles reconciliation between internal ledger and external wallets.
 import logging
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ledger_api.db import get_db
-from ledger_api.models.ledger_models import ReconciliationLog
+from ledger_api.db import get_async_db
+from ledger_api.models.ledger_models import LogicalAccount, ReconciliationLog
 from ledger_api.schemas.reconciliation_schemas import (
     ReconciliationCreate,
-    ReconciliationResponse
+    ReconciliationResponse,
+    MultiWalletReconciliationCreate,
+    MultiWalletReconciliationResponse
 )
 from ledger_api.services.reconciliation import (
     create_reconciliation,
     get_latest_reconciliation,
-    get_unresolved_discrepancies
+    get_unresolved_discrepancies,
+    reconcile_wallets
 )
 from ledger_api.utils.jwt_auth import require_guardian
 
@@ -29,7 +33,7 @@ router = APIRouter(prefix="/treasury", tags=["reconciliation"])
 @router.post("/reconcile", response_model=ReconciliationResponse)
 async def reconcile_treasury(
     reconciliation: ReconciliationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(require_guardian)
 ):
     """
@@ -45,12 +49,13 @@ async def reconcile_treasury(
     try:
         reconciled_by = current_user.get("sub", "guardian")
         
-        reconciliation_record = create_reconciliation(
-            db=db,
+        reconciliation_record = await db.run_sync(
+            create_reconciliation,
             external_wallet_address=reconciliation.external_wallet_address,
             external_wallet_balance=reconciliation.external_wallet_balance,
             notes=reconciliation.notes,
-            reconciled_by=reconciled_by
+            reconciled_by=reconciled_by,
+            as_of=reconciliation.as_of
         )
         
         logger.info(
@@ -69,12 +74,63 @@ async def reconcile_treasury(
         )
 
 
+@router.post("/reconcile/wallets", response_model=MultiWalletReconciliationResponse)
+async def reconcile_treasury_wallets(
+    request: MultiWalletReconciliationCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(require_guardian)
+):
+    """
+    Reconcile several treasury wallets, each against its own account group.
+    
+    Requires Guardian authentication.
+    
+    External balances are fetched concurrently from the wallet balance
+    service; internal balances are computed for every group in one query,
+    and one reconciliation record per wallet is written in one transaction.
+    A wallet whose balance cannot be fetched is reported as FETCH_FAILED
+    without failing the others.
+    
+    Returns:
+        - Per-wallet results with status and fetch timing
+        - Overall fetch, database and total timings
+    """
+    account_ids = {account_id for wallet in request.wallets for account_id in wallet.account_ids}
+    found = set((await db.scalars(
+        select(LogicalAccount.id).where(LogicalAccount.id.in_(account_ids))
+    )).all())
+    missing = sorted(account_ids - found)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Accounts not found: {missing}"
+        )
+    
+    try:
+        reconciled_by = current_user.get("sub", "guardian")
+        
+        return await reconcile_wallets(
+            db,
+            [(wallet.wallet_address, wallet.account_ids) for wallet in request.wallets],
+            notes=request.notes,
+            reconciled_by=reconciled_by,
+            as_of=request.as_of
+        )
+        
+    except Exception as e:
+        logger.error(f"Error reconciling wallets: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to reconcile wallets: {str(e)}"
+        )
+
+
 @router.get("/reconciliations", response_model=List[ReconciliationResponse])
 async def list_reconciliations(
     limit: int = Query(100, ge=1, le=1000, description="Maximum results"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
     status: str = Query(None, description="Filter by status"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List reconciliation records.
@@ -85,14 +141,14 @@ async def list_reconciliations(
     Results are paginated.
     """
     try:
-        query = db.query(ReconciliationLog)
+        query = select(ReconciliationLog)
         
         if status:
-            query = query.filter(ReconciliationLog.status == status)
+            query = query.where(ReconciliationLog.status == status)
         
-        reconciliations = query.order_by(
+        reconciliations = (await db.scalars(query.order_by(
             ReconciliationLog.reconciliation_date.desc()
-        ).offset(offset).limit(limit).all()
+        ).offset(offset).limit(limit))).all()
         
         return reconciliations
         
@@ -105,11 +161,11 @@ async def list_reconciliations(
 
 
 @router.get("/reconciliations/latest", response_model=ReconciliationResponse)
-async def get_latest_reconciliation_record(db: Session = Depends(get_db)):
+async def get_latest_reconciliation_record(db: AsyncSession = Depends(get_async_db)):
     """
     Get the most recent reconciliation record.
     """
-    reconciliation = get_latest_reconciliation(db)
+    reconciliation = await db.run_sync(get_latest_reconciliation)
     
     if not reconciliation:
         raise HTTPException(
@@ -122,7 +178,7 @@ async def get_latest_reconciliation_record(db: Session = Depends(get_db)):
 
 @router.get("/reconciliations/unresolved", response_model=List[ReconciliationResponse])
 async def get_unresolved_reconciliations(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(require_guardian)
 ):
     """
@@ -133,7 +189,7 @@ async def get_unresolved_reconciliations(
     Returns reconciliations with status DISCREPANCY or INVESTIGATING.
     """
     try:
-        reconciliations = get_unresolved_discrepancies(db)
+        reconciliations = await db.run_sync(get_unresolved_discrepancies)
         return reconciliations
         
     except Exception as e:
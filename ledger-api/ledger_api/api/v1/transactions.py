@@ -6,19 +6,21 @@ Handles creating and querying ledger transactions.
 import logging
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select, tuple_
 
-from ledger_api.db import get_db
+from ledger_api.db import get_async_db
 from ledger_api.models.ledger_models import LedgerTransaction, LogicalAccount
 from ledger_api.schemas.transaction_schemas import (
     TransactionCreate,
+    BulkTransactionCreate,
     TransactionResponse,
     AllocationResult
 )
-from ledger_api.services.allocation import apply_allocations
-from ledger_api.services.audit import create_audit_log
+from ledger_api.services.allocation import apply_allocations, allocate_transactions
+from ledger_api.services.audit import create_audit_log, create_audit_logs
+from ledger_api.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +30,7 @@ router = APIRouter(prefix="/transactions", tags=["transactions"])
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     transaction: TransactionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new ledger transaction.
@@ -43,9 +45,7 @@ async def create_transaction(
     try:
         # Validate accounts exist if specified
         if transaction.from_account_id:
-            from_account = db.query(LogicalAccount).filter(
-                LogicalAccount.id == transaction.from_account_id
-            ).first()
+            from_account = await db.get(LogicalAccount, transaction.from_account_id)
             if not from_account:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -53,9 +53,7 @@ async def create_transaction(
                 )
         
         if transaction.to_account_id:
-            to_account = db.query(LogicalAccount).filter(
-                LogicalAccount.id == transaction.to_account_id
-            ).first()
+            to_account = await db.get(LogicalAccount, transaction.to_account_id)
             if not to_account:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -80,11 +78,11 @@ async def create_transaction(
             db_transaction.completed_at = datetime.utcnow()
         
         db.add(db_transaction)
-        db.flush()
+        await db.flush()
         
         # Create audit log
-        create_audit_log(
-            db=db,
+        await db.run_sync(
+            create_audit_log,
             table_name="ledger_transactions",
             record_id=db_transaction.id,
             operation="CREATE",
@@ -96,8 +94,8 @@ async def create_transaction(
             changed_by="api"
         )
         
-        db.commit()
-        db.refresh(db_transaction)
+        await db.commit()
+        await db.refresh(db_transaction)
         
         # Check if allocations should be applied
         allocation_result = None
@@ -107,8 +105,8 @@ async def create_transaction(
             logger.info(f"Applying allocations for COMPLETED EXTERNAL_DEPOSIT {db_transaction.id}")
             
             try:
-                allocation_result = apply_allocations(
-                    db=db,
+                allocation_result = await db.run_sync(
+                    apply_allocations,
                     parent_transaction=db_transaction,
                     changed_by="api"
                 )
@@ -131,7 +129,7 @@ async def create_transaction(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating transaction: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -139,17 +137,121 @@ async def create_transaction(
         )
 
 
+@router.post("/bulk", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_transactions_bulk(
+    batch: BulkTransactionCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create a batch of ledger transactions in a single DB transaction.
+    
+    COMPLETED EXTERNAL_DEPOSIT transactions are allocated in the same DB
+    transaction using the batched allocation engine. The batch is all or
+    nothing: if any transaction or allocation fails, nothing is written.
+    
+    Returns:
+        - transactions: The created transactions, in request order
+        - allocation_results: Allocation details for each allocated deposit
+    """
+    try:
+        # Validate every referenced account with one query
+        account_ids = {
+            account_id
+            for transaction in batch.transactions
+            for account_id in (transaction.from_account_id, transaction.to_account_id)
+            if account_id
+        }
+        if account_ids:
+            found = set((await db.scalars(
+                select(LogicalAccount.id).where(LogicalAccount.id.in_(account_ids))
+            )).all())
+            missing = sorted(account_ids - found)
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Accounts not found: {missing}"
+                )
+        
+        now = datetime.utcnow()
+        db_transactions = [
+            LedgerTransaction(
+                transaction_hash=transaction.transaction_hash,
+                transaction_type=transaction.transaction_type,
+                from_account_id=transaction.from_account_id,
+                to_account_id=transaction.to_account_id,
+                amount=transaction.amount,
+                status=transaction.status,
+                purpose=transaction.purpose,
+                meta_data=transaction.meta_data,
+                created_at=now,
+                completed_at=now if transaction.status == "COMPLETED" else None
+            )
+            for transaction in batch.transactions
+        ]
+        
+        # One batched INSERT for all parent transactions
+        db.add_all(db_transactions)
+        await db.flush()
+        
+        await db.run_sync(create_audit_logs, [
+            {
+                "table_name": "ledger_transactions",
+                "record_id": db_transaction.id,
+                "operation": "CREATE",
+                "new_values": {
+                    "transaction_type": db_transaction.transaction_type,
+                    "amount": float(db_transaction.amount),
+                    "status": db_transaction.status
+                },
+                "changed_by": "api"
+            }
+            for db_transaction in db_transactions
+        ])
+        
+        deposits = [
+            db_transaction for db_transaction in db_transactions
+            if db_transaction.status == "COMPLETED"
+            and db_transaction.transaction_type == "EXTERNAL_DEPOSIT"
+        ]
+        allocation_results = await db.run_sync(allocate_transactions, deposits, changed_by="api")
+        
+        response = {
+            "transactions": [TransactionResponse.from_orm(t) for t in db_transactions],
+            "allocation_results": allocation_results
+        }
+        
+        await db.commit()
+        
+        logger.info(
+            f"Bulk created {len(db_transactions)} transactions, "
+            f"allocated {len(deposits)} deposits"
+        )
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error creating transactions in bulk: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create transactions: {str(e)}"
+        )
+
+
 @router.get("/", response_model=List[TransactionResponse])
 async def list_transactions(
+    response: Response,
     transaction_type: Optional[str] = Query(None, description="Filter by transaction type"),
-    status: Optional[str] = Query(None, description="Filter by status"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by status"),
     from_account_id: Optional[int] = Query(None, description="Filter by from account"),
     to_account_id: Optional[int] = Query(None, description="Filter by to account"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum results"),
-    offset: int = Query(0, ge=0, description="Offset for pagination"),
-    db: Session = Depends(get_db)
+    offset: int = Query(0, ge=0, description="Offset for pagination (prefer cursor)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List transactions with optional filters.
@@ -161,10 +263,28 @@ async def list_transactions(
     - to_account_id
     - date range (start_date, end_date)
     
-    Results are paginated using limit and offset.
+    Results are ordered newest first by (created_at, id). When more results
+    exist, the X-Next-Cursor response header holds an opaque cursor; pass it
+    back as `cursor` (with the same filters) to get the next page. Cursor
+    pages cost the same at any depth; `offset` is kept for compatibility but
+    gets linearly slower on deep pages.
     """
+    if cursor is not None and offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either cursor or offset, not both"
+        )
+    
+    try:
+        after = decode_cursor(cursor) if cursor is not None else None
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     try:
-        query = db.query(LedgerTransaction)
+        query = select(LedgerTransaction)
         
         # Apply filters
         filters = []
@@ -172,8 +292,8 @@ async def list_transactions(
         if transaction_type:
             filters.append(LedgerTransaction.transaction_type == transaction_type)
         
-        if status:
-            filters.append(LedgerTransaction.status == status)
+        if status_filter:
+            filters.append(LedgerTransaction.status == status_filter)
         
         if from_account_id:
             filters.append(LedgerTransaction.from_account_id == from_account_id)
@@ -187,14 +307,26 @@ async def list_transactions(
         if end_date:
             filters.append(LedgerTransaction.created_at <= end_date)
         
+        # Keyset: continue strictly after the last row of the previous page
+        if after is not None:
+            filters.append(
+                tuple_(LedgerTransaction.created_at, LedgerTransaction.id) < tuple_(*after)
+            )
+        
         if filters:
-            query = query.filter(and_(*filters))
+            query = query.where(and_(*filters))
+        
+        # Order by created_at descending (most recent first); id breaks ties
+        # so the order is total and cursors never skip or repeat rows
+        query = query.order_by(LedgerTransaction.created_at.desc(), LedgerTransaction.id.desc())
         
-        # Order by created_at descending (most recent first)
-        query = query.order_by(LedgerTransaction.created_at.desc())
+        # Apply pagination, fetching one extra row to detect a next page
+        transactions = (await db.scalars(query.offset(offset).limit(limit + 1))).all()
         
-        # Apply pagination
-        transactions = query.offset(offset).limit(limit).all()
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            last = transactions[-1]
+            response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
         
         return transactions
         
@@ -209,14 +341,12 @@ async def list_transactions(
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific transaction by ID.
     """
-    transaction = db.query(LedgerTransaction).filter(
-        LedgerTransaction.id == transaction_id
-    ).first()
+    transaction = await db.get(LedgerTransaction, transaction_id)
     
     if not transaction:
         raise HTTPException(
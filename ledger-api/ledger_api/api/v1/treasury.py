@@ -4,19 +4,20 @@ Provides treasury status and balance information.
 """
 
 import logging
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from decimal import Decimal
 
-from ledger_api.db import get_db
+from ledger_api.db import get_async_db
 from ledger_api.models.ledger_models import LogicalAccount
 from ledger_api.schemas.account_schemas import (
     LogicalAccountResponse,
     TreasuryStatusResponse
 )
+from ledger_api.services.balance_snapshots import get_balances_as_of
 
 logger = logging.getLogger(__name__)
 
@@ -24,26 +25,41 @@ router = APIRouter(prefix="/treasury", tags=["treasury"])
 
 
 @router.get("/status", response_model=TreasuryStatusResponse)
-async def get_treasury_status(db: Session = Depends(get_db)):
+async def get_treasury_status(
+    as_of: Optional[datetime] = Query(None, description="Report balances as of this time instead of now"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Get current treasury status.
     
+    With `as_of`, balances come from the account balance snapshots (one
+    lookup per account) and show the treasury at that point in time.
+    Snapshots older than a day are rolled up hourly, and older than 30 days
+    daily, so historical balances resolve to the enclosing bucket's close.
+    
     Returns:
         - total_balance: Sum of all active account balances
         - accounts: List of all active logical accounts
         - reserve_status: Status of reserve account
-        - last_updated: Current timestamp
+        - last_updated: Current timestamp (or as_of)
     """
     try:
         # Get all active accounts
-        accounts = db.query(LogicalAccount).filter(
-            LogicalAccount.is_active == True
-        ).order_by(LogicalAccount.allocation_percentage.desc()).all()
+        accounts = (await db.scalars(
+            select(LogicalAccount).where(
+                LogicalAccount.is_active == True
+            ).order_by(LogicalAccount.allocation_percentage.desc())
+        )).all()
+        
+        if as_of is None:
+            balances = {account.id: account.current_balance for account in accounts}
+        else:
+            balances = await db.run_sync(
+                get_balances_as_of, as_of, [account.id for account in accounts]
+            )
         
         # Calculate total balance
-        total_balance = sum(
-            account.current_balance for account in accounts
-        ) or Decimal("0")
+        total_balance = sum(balances.values()) or Decimal("0")
         
         # Find reserve account
         reserve_account = next(
@@ -53,15 +69,16 @@ async def get_treasury_status(db: Session = Depends(get_db)):
         
         # Calculate reserve status
         if reserve_account and total_balance > 0:
+            reserve_balance = balances[reserve_account.id]
             reserve_status = {
                 "reserve_percentage": float(reserve_account.allocation_percentage),
-                "reserve_balance": float(reserve_account.current_balance),
+                "reserve_balance": float(reserve_balance),
                 "actual_reserve_percentage": float(
-                    (reserve_account.current_balance / total_balance) * 100
+                    (reserve_balance / total_balance) * 100
                 ),
                 "is_healthy": (
-                    reserve_account.current_balance / total_balance * 100
-                ) >= (reserve_account.allocation_percentage * 0.9)  # 90% of target
+                    reserve_balance / total_balance * 100
+                ) >= (reserve_account.allocation_percentage * Decimal("0.9"))  # 90% of target
             }
         else:
             reserve_status = {
@@ -73,9 +90,14 @@ async def get_treasury_status(db: Session = Depends(get_db)):
         
         return TreasuryStatusResponse(
             total_balance=total_balance,
-            accounts=[LogicalAccountResponse.from_orm(acc) for acc in accounts],
+            accounts=[
+                LogicalAccountResponse.model_validate(acc).model_copy(
+                    update={"current_balance": balances[acc.id]}
+                )
+                for acc in accounts
+            ],
             reserve_status=reserve_status,
-            last_updated=datetime.utcnow()
+            last_updated=as_of or datetime.utcnow()
         )
         
     except Exception as e:
@@ -89,7 +111,7 @@ async def get_treasury_status(db: Session = Depends(get_db)):
 @router.get("/accounts", response_model=List[LogicalAccountResponse])
 async def list_accounts(
     include_inactive: bool = False,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all logical accounts.
@@ -101,14 +123,14 @@ async def list_accounts(
         List of logical accounts
     """
     try:
-        query = db.query(LogicalAccount)
+        query = select(LogicalAccount)
         
         if not include_inactive:
-            query = query.filter(LogicalAccount.is_active == True)
+            query = query.where(LogicalAccount.is_active == True)
         
-        accounts = query.order_by(
+        accounts = (await db.scalars(query.order_by(
             LogicalAccount.allocation_percentage.desc()
-        ).all()
+        ))).all()
         
         return accounts
         
@@ -123,14 +145,12 @@ async def list_accounts(
 @router.get("/accounts/{account_id}", response_model=LogicalAccountResponse)
 async def get_account(
     account_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific logical account by ID.
     """
-    account = db.query(LogicalAccount).filter(
-        LogicalAccount.id == account_id
-    ).first()
+    account = await db.get(LogicalAccount, account_id)
     
     if not account:
         raise HTTPException(
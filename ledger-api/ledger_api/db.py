@@ -1,11 +1,17 @@
 """
 Database connection and session management for Ledger API.
 Supports both PostgreSQL (production) and SQLite (development/testing).
+
+API handlers use the async engine (asyncpg / aiosqlite) so database I/O
+does not block the event loop. The sync engine remains for scripts,
+migrations and the allocation services (called through AsyncSession.run_sync).
 """
 
 import os
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
@@ -43,6 +49,62 @@ else:
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def to_async_url(url: str) -> str:
+    """
+    Convert a sync database URL to its async driver equivalent.
+    
+    Args:
+        url: Database URL (sqlite://, postgresql://, postgresql+psycopg2://)
+    
+    Returns:
+        str: URL using aiosqlite or asyncpg
+    
+    Raises:
+        ValueError: If the backend has no supported async driver
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend in ("postgresql", "postgres"):
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    
+    raise ValueError(f"No async driver configured for database backend '{backend}'")
+
+
+ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=os.environ.get("DEBUG", "false").lower() == "true"
+    )
+    
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_async_sqlite_pragma(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=int(os.environ.get("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        echo=os.environ.get("DEBUG", "false").lower() == "true"
+    )
+
+# Async session factory. Objects stay loaded after commit: lazy refreshes
+# cannot run implicitly under asyncio.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for SQLAlchemy models
 Base = declarative_base()
 
@@ -62,6 +124,30 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function to get an async database session.
+    Use with FastAPI Depends in async handlers.
+    
+    Yields:
+        AsyncSession: Async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """
+    Dependency function to get the async session factory.
+    Use for streaming responses, which outlive request-scoped sessions
+    and open their own short-lived sessions.
+    
+    Returns:
+        async_sessionmaker: Async session factory
+    """
+    return AsyncSessionLocal
+
+
 @contextmanager
 def get_db_context():
     """
@@ -111,3 +197,13 @@ def get_engine():
         Engine: SQLAlchemy engine
     """
     return engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Get the async database engine instance.
+    
+    Returns:
+        AsyncEngine: SQLAlchemy async engine
+    """
+    return async_engine
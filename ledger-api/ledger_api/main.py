@@ -10,8 +10,12 @@ from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from ledger_api.db import init_db, get_engine
-from ledger_api.api.v1 import transactions, treasury, reconcile, allocation_rules
+from sqlalchemy import text
+
+from ledger_api.db import init_db, get_async_engine, get_async_sessionmaker, SessionLocal
+from ledger_api.api.v1 import transactions, treasury, reconcile, allocation_rules, export
+from ledger_api.services.audit import AuditLogWriter, set_audit_writer
+from ledger_api.services.balance_snapshots import BalanceSnapshotCompactor
 
 # Configure logging
 logging.basicConfig(
@@ -25,6 +29,11 @@ APP_ENVIRONMENT = os.environ.get("APP_ENVIRONMENT", "testnet")
 NFT_MINT_VALUE = int(os.environ.get("NFT_MINT_VALUE", "0"))
 SERVICE_NAME = os.environ.get("SERVICE_NAME", "ledger-api")
 API_VERSION = os.environ.get("API_VERSION", "v1")
+SNAPSHOT_COMPACTION_INTERVAL_SECONDS = float(
+    os.environ.get("SNAPSHOT_COMPACTION_INTERVAL_SECONDS", "3600")
+)
+AUDIT_LOG_MODE = os.environ.get("AUDIT_LOG_MODE", "sync")
+AUDIT_SPILL_PATH = os.environ.get("AUDIT_SPILL_PATH", "./audit_spill.jsonl")
 
 # Safety checks
 if NFT_MINT_VALUE != 0:
@@ -60,10 +69,33 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Database initialization failed: {e}")
         raise
     
+    # Write audit entries from a background writer instead of in each
+    # request's transaction
+    audit_writer = None
+    if AUDIT_LOG_MODE == "async":
+        audit_writer = AuditLogWriter(SessionLocal, AUDIT_SPILL_PATH)
+        audit_writer.start()
+        set_audit_writer(audit_writer)
+        logger.info(f"✅ Async audit logging enabled (spill file: {AUDIT_SPILL_PATH})")
+    
+    # Roll balance snapshots up hourly/daily in the background (0 disables)
+    compactor = None
+    if SNAPSHOT_COMPACTION_INTERVAL_SECONDS > 0:
+        compactor = BalanceSnapshotCompactor(
+            get_async_sessionmaker(), interval_seconds=SNAPSHOT_COMPACTION_INTERVAL_SECONDS
+        )
+        compactor.start()
+    
     yield
     
     # Shutdown
     logger.info("🛑 Ledger API shutting down...")
+    if compactor is not None:
+        await compactor.stop()
+    if audit_writer is not None:
+        set_audit_writer(None)
+        audit_writer.stop()
+    await get_async_engine().dispose()
 
 
 # Create FastAPI application
@@ -77,7 +109,7 @@ app = FastAPI(
     ### Features
     - **Transactions**: Create and query ledger transactions
     - **Allocation Engine**: Automatic fund distribution based on rules
-    - **Treasury Status**: Real-time treasury balance and account information
+    - **Treasury Status**: Real-time and point-in-time (as_of) treasury balances
     - **Reconciliation**: Compare internal ledger with external blockchain state
     - **Allocation Rules**: Configure automatic fund allocation (Guardian only)
     - **Audit Trail**: Complete audit logging of all changes
@@ -104,6 +136,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include API routers
@@ -111,6 +144,7 @@ app.include_router(transactions.router, prefix="/api/v1")
 app.include_router(treasury.router, prefix="/api/v1")
 app.include_router(reconcile.router, prefix="/api/v1")
 app.include_router(allocation_rules.router, prefix="/api/v1")
+app.include_router(export.router, prefix="/api/v1")
 
 
 @app.get("/", tags=["health"])
@@ -134,9 +168,8 @@ async def health_check():
     """
     try:
         # Test database connection
-        engine = get_engine()
-        with engine.connect() as conn:
-            conn.execute("SELECT 1")
+        async with get_async_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
         
         db_status = "connected"
     except Exception as e:
@@ -4,7 +4,9 @@ from ledger_api.models.ledger_models import (
     LedgerTransaction,
     AllocationRule,
     AuditLog,
-    ReconciliationLog
+    ReconciliationLog,
+    ConfigVersion,
+    AccountBalanceSnapshot
 )
 
 __all__ = [
@@ -12,5 +14,7 @@ __all__ = [
     'LedgerTransaction',
     'AllocationRule',
     'AuditLog',
-    'ReconciliationLog'
+    'ReconciliationLog',
+    'ConfigVersion',
+    'AccountBalanceSnapshot'
 ]
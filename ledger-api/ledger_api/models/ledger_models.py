@@ -101,6 +101,12 @@ class LedgerTransaction(Base):
             "transaction_type IN ('EXTERNAL_DEPOSIT', 'EXTERNAL_WITHDRAWAL', 'INTERNAL_ALLOCATION', 'INTERNAL_TRANSFER')",
             name='valid_transaction_type'
         ),
+        # Keyset pagination: ORDER BY created_at DESC, id DESC, optionally
+        # after an equality filter (see migration 0003)
+        Index('idx_transactions_created_id', 'created_at', 'id'),
+        Index('idx_transactions_status_created', 'status', 'created_at', 'id'),
+        Index('idx_transactions_to_account_created', 'to_account_id', 'created_at', 'id'),
+        Index('idx_transactions_type_created', 'transaction_type', 'created_at', 'id'),
     )
     
     def __repr__(self):
@@ -190,3 +196,48 @@ class ReconciliationLog(Base):
     
     def __repr__(self):
         return f"<ReconciliationLog(id={self.id}, status='{self.status}', discrepancy={self.discrepancy})>"
+
+
+class ConfigVersion(Base):
+    """
+    Version counters for configuration cached in-process by API workers.
+    Bumped in the same transaction as the change, so every worker notices it.
+    """
+    __tablename__ = "config_versions"
+    
+    name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ConfigVersion(name='{self.name}', version={self.version})>"
+
+
+class AccountBalanceSnapshot(Base):
+    """
+    Append-only history of logical account balances.
+    One RAW row per account per allocation batch; older rows are rolled up
+    to one HOUR and then one DAY row per account (the closing balance).
+    """
+    __tablename__ = "account_balance_snapshots"
+    
+    id = Column(Integer, primary_key=True)
+    account_id = Column(Integer, ForeignKey("logical_accounts.id"), nullable=False)
+    balance = Column(Numeric(20, 8), nullable=False)
+    as_of = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    granularity = Column(String(10), nullable=False, default="RAW")
+    transaction_id = Column(Integer, ForeignKey("ledger_transactions.id"))
+    
+    __table_args__ = (
+        CheckConstraint(
+            "granularity IN ('RAW', 'HOUR', 'DAY')",
+            name='valid_snapshot_granularity'
+        ),
+        # Point-in-time lookups: latest row per account at or before as_of
+        Index('idx_balance_snapshots_account_as_of', 'account_id', 'as_of', 'id'),
+        # Compaction scans one granularity below a cutoff
+        Index('idx_balance_snapshots_granularity_as_of', 'granularity', 'as_of'),
+    )
+    
+    def __repr__(self):
+        return f"<AccountBalanceSnapshot(account_id={self.account_id}, balance={self.balance}, as_of={self.as_of}, granularity='{self.granularity}')>"
@@ -3,7 +3,7 @@ Pydantic schemas for reconciliation requests and responses.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -13,6 +13,9 @@ class ReconciliationCreate(BaseModel):
     external_wallet_address: Optional[str] = Field(None, description="External wallet address")
     external_wallet_balance: Decimal = Field(..., description="Balance from external wallet")
     notes: Optional[str] = Field(None, description="Reconciliation notes")
+    as_of: Optional[datetime] = Field(
+        None, description="Time the external balance was observed (defaults to now)"
+    )
     
     class Config:
         json_schema_extra = {
@@ -53,3 +56,53 @@ class ReconciliationResponse(BaseModel):
                 "resolved_at": None
             }
         }
+
+
+class WalletAccountGroup(BaseModel):
+    """A treasury wallet and the logical accounts it holds funds for."""
+    wallet_address: str = Field(..., description="External wallet address")
+    account_ids: List[int] = Field(..., min_length=1, description="Logical accounts backed by this wallet")
+
+
+class MultiWalletReconciliationCreate(BaseModel):
+    """Schema for reconciling several wallets at once."""
+    wallets: List[WalletAccountGroup] = Field(..., min_length=1, max_length=100)
+    notes: Optional[str] = Field(None, description="Reconciliation notes")
+    as_of: Optional[datetime] = Field(
+        None, description="Time the external balances are compared at (defaults to now)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "wallets": [
+                    {"wallet_address": "GRESERVE...", "account_ids": [1]},
+                    {"wallet_address": "GOPS...", "account_ids": [2, 3, 4]}
+                ],
+                "notes": "Nightly multi-wallet reconciliation"
+            }
+        }
+
+
+class WalletReconciliationResult(BaseModel):
+    """Reconciliation result for one wallet."""
+    wallet_address: str
+    account_ids: List[int]
+    external_wallet_balance: Optional[Decimal]
+    internal_ledger_balance: Decimal
+    discrepancy: Optional[Decimal]
+    status: str = Field(..., description="MATCHED, DISCREPANCY or FETCH_FAILED")
+    reconciliation_id: Optional[int] = Field(None, description="Recorded reconciliation_log id")
+    fetch_ms: float = Field(..., description="Time spent fetching this wallet's balance")
+    error: Optional[str] = None
+
+
+class MultiWalletReconciliationResponse(BaseModel):
+    """Schema for multi-wallet reconciliation response."""
+    results: List[WalletReconciliationResult]
+    matched: int
+    discrepancies: int
+    failed: int
+    fetch_ms: float = Field(..., description="Wall-clock time fetching all balances concurrently")
+    db_ms: float = Field(..., description="Time comparing and recording in the database")
+    total_ms: float
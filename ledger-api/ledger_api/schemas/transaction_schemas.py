@@ -47,6 +47,36 @@ class TransactionCreate(BaseModel):
         }
 
 
+class BulkTransactionCreate(BaseModel):
+    """Schema for creating a batch of transactions in one DB transaction."""
+    transactions: List[TransactionCreate] = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="Transactions to create (all or nothing)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "transactions": [
+                    {
+                        "transaction_type": "EXTERNAL_DEPOSIT",
+                        "to_account_id": 1,
+                        "amount": 100.50,
+                        "status": "COMPLETED"
+                    },
+                    {
+                        "transaction_type": "EXTERNAL_DEPOSIT",
+                        "to_account_id": 1,
+                        "amount": 42.0,
+                        "status": "COMPLETED"
+                    }
+                ]
+            }
+        }
+
+
 class TransactionResponse(BaseModel):
     """Schema for transaction response."""
     id: int
@@ -4,188 +4,293 @@ Applies allocation rules atomically when triggered by transactions.
 """
 
 import logging
-from typing import List, Dict, Any
+from collections import defaultdict
+from typing import List, Dict, Any, Sequence, Set, Tuple
 from decimal import Decimal
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import insert
 
 from ledger_api.models.ledger_models import (
     LedgerTransaction,
-    AllocationRule,
     LogicalAccount
 )
-from ledger_api.services.audit import create_audit_log
+from ledger_api.services.audit import create_audit_logs
+from ledger_api.services.balance_snapshots import record_balance_snapshots
+from ledger_api.services.rule_cache import allocation_rule_cache
 
 logger = logging.getLogger(__name__)
 
 
-def apply_allocations(
+ALLOCATION_PRECISION = Decimal("0.00000001")  # 8 decimal places
+
+
+def _empty_allocation_result(parent_transaction_id: int, message: str) -> Dict[str, Any]:
+    """Result for a transaction that produced no allocations."""
+    return {
+        "parent_transaction_id": parent_transaction_id,
+        "child_transaction_ids": [],
+        "total_allocated": Decimal("0"),
+        "allocations": [],
+        "message": message
+    }
+
+
+def _lock_accounts(db: Session, account_ids: Set[int]) -> Dict[int, LogicalAccount]:
+    """
+    Load target accounts in one query, locking them in id order.
+    
+    Rows are locked with SELECT ... FOR UPDATE (a no-op on SQLite, which
+    locks the whole database) in ascending id order, so concurrent batches
+    touching overlapping accounts always acquire locks in the same order
+    and cannot deadlock.
+    
+    Args:
+        db: Database session
+        account_ids: Account ids to load
+    
+    Returns:
+        Dict mapping account id to account
+    """
+    if not account_ids:
+        return {}
+    
+    accounts = db.query(LogicalAccount).filter(
+        LogicalAccount.id.in_(sorted(account_ids))
+    ).order_by(LogicalAccount.id).with_for_update().all()
+    
+    return {account.id: account for account in accounts}
+
+
+def allocate_transactions(
     db: Session,
-    parent_transaction: LedgerTransaction,
+    parent_transactions: Sequence[LedgerTransaction],
     changed_by: str = "system"
-) -> Dict[str, Any]:
+) -> List[Dict[str, Any]]:
     """
-    Apply allocation rules to a parent transaction.
-    Creates child allocation transactions and updates account balances atomically.
+    Apply allocation rules to a batch of parent transactions without committing.
+    
+    The number of database round trips does not depend on the number of
+    deposits or allocation targets: one idempotency check, one rule version
+    check (rules are compiled once per version, see rule_cache), one account
+    lookup, one bulk insert of child transactions (with RETURNING), one bulk
+    insert of audit rows, one bulk insert of balance snapshots and one
+    batched balance update.
     
     Args:
         db: Database session
-        parent_transaction: The transaction that triggers allocations
+        parent_transactions: Transactions that trigger allocations
         changed_by: User/system that triggered the allocation
     
     Returns:
-        Dict containing parent_transaction_id, child_transaction_ids, and allocation details
+        One result dict per parent transaction, in input order
     
     Raises:
-        ValueError: If allocations are invalid or already applied
+        ValueError: If a matching allocation rule is invalid
     """
-    try:
-        # Check if allocations already exist for this transaction (idempotency)
-        existing_allocations = db.query(LedgerTransaction).filter(
-            LedgerTransaction.parent_transaction_id == parent_transaction.id
-        ).count()
-        
-        if existing_allocations > 0:
+    if not parent_transactions:
+        return []
+    
+    parent_ids = [parent.id for parent in parent_transactions]
+    
+    # Check which transactions already have allocations (idempotency)
+    already_allocated = {
+        parent_id for (parent_id,) in db.query(LedgerTransaction.parent_transaction_id).filter(
+            LedgerTransaction.parent_transaction_id.in_(parent_ids)
+        ).distinct()
+    }
+    
+    # Find the compiled active allocation rule for each transaction type
+    rules = allocation_rule_cache.get_rules(
+        db, {parent.transaction_type for parent in parent_transactions}
+    )
+    
+    account_ids = set()
+    for rule in rules.values():
+        account_ids |= rule.account_ids
+    accounts = _lock_accounts(db, account_ids)
+    
+    results: List[Dict[str, Any]] = []
+    child_rows: List[Dict[str, Any]] = []
+    pending: List[Tuple[Dict[str, Any], LogicalAccount, Decimal, Decimal]] = []
+    completed_at = datetime.utcnow()
+    seen: Set[int] = set()
+    
+    for parent_transaction in parent_transactions:
+        if parent_transaction.id in already_allocated or parent_transaction.id in seen:
             logger.info(f"Allocations already applied for transaction {parent_transaction.id}")
-            return {
-                "parent_transaction_id": parent_transaction.id,
-                "child_transaction_ids": [],
-                "total_allocated": Decimal("0"),
-                "allocations": [],
-                "message": "Allocations already applied (idempotent)"
-            }
+            results.append(_empty_allocation_result(
+                parent_transaction.id, "Allocations already applied (idempotent)"
+            ))
+            continue
+        seen.add(parent_transaction.id)
         
-        # Find active allocation rules for this transaction type
-        allocation_rules = db.query(AllocationRule).filter(
-            and_(
-                AllocationRule.trigger_transaction_type == parent_transaction.transaction_type,
-                AllocationRule.is_active == True
-            )
-        ).order_by(AllocationRule.priority.desc()).all()
-        
-        if not allocation_rules:
+        rule = rules.get(parent_transaction.transaction_type)
+        if rule is None:
             logger.warning(f"No active allocation rules found for {parent_transaction.transaction_type}")
-            return {
-                "parent_transaction_id": parent_transaction.id,
-                "child_transaction_ids": [],
-                "total_allocated": Decimal("0"),
-                "allocations": [],
-                "message": "No allocation rules found"
-            }
+            results.append(_empty_allocation_result(parent_transaction.id, "No allocation rules found"))
+            continue
         
-        # Use the highest priority rule
-        rule = allocation_rules[0]
         logger.info(f"Applying allocation rule '{rule.rule_name}' to transaction {parent_transaction.id}")
         
-        # Validate allocations
-        allocations = rule.allocations
-        if not allocations:
-            raise ValueError(f"Allocation rule '{rule.rule_name}' has no allocations defined")
-        
-        # Verify allocations sum to 100% (within tolerance)
-        total_percentage = sum(Decimal(str(a.get("percentage", 0))) for a in allocations)
-        if abs(total_percentage - 100) > Decimal("0.01"):
-            raise ValueError(f"Allocation percentages sum to {total_percentage}%, must be 100%")
-        
-        # Create child allocation transactions
-        child_transaction_ids = []
-        allocation_details = []
-        total_allocated = Decimal("0")
+        result = {
+            "parent_transaction_id": parent_transaction.id,
+            "child_transaction_ids": [],
+            "total_allocated": Decimal("0"),
+            "allocations": []
+        }
+        results.append(result)
         
-        for allocation in allocations:
-            account_id = allocation.get("account_id")
-            percentage = Decimal(str(allocation.get("percentage")))
-            
-            # Get target account
-            account = db.query(LogicalAccount).filter(
-                LogicalAccount.id == account_id
-            ).first()
-            
-            if not account:
-                logger.error(f"Account {account_id} not found in allocation rule")
-                continue
-            
-            if not account.is_active:
-                logger.warning(f"Skipping inactive account {account.account_name}")
+        for allocation in rule.allocations:
+            # The plan only holds accounts that were active when it was
+            # compiled; re-check the locked row in case that changed since
+            account = accounts.get(allocation.account_id)
+            if not account or not account.is_active:
+                logger.warning(f"Skipping missing or inactive account {allocation.account_id}")
                 continue
             
             # Calculate allocation amount
-            allocation_amount = (parent_transaction.amount * percentage / 100).quantize(
-                Decimal("0.00000001")  # 8 decimal places
+            allocation_amount = (parent_transaction.amount * allocation.fraction).quantize(
+                ALLOCATION_PRECISION
             )
             
-            # Create child transaction
-            child_transaction = LedgerTransaction(
-                transaction_type="INTERNAL_ALLOCATION",
-                from_account_id=parent_transaction.to_account_id,  # From deposit target
-                to_account_id=account_id,
-                amount=allocation_amount,
-                status="COMPLETED",
-                purpose=f"Auto-allocation: {percentage}% to {account.account_name}",
-                parent_transaction_id=parent_transaction.id,
-                completed_at=datetime.utcnow(),
-                meta_data={
-                    "allocation_rule_id": rule.id,
-                    "allocation_rule_name": rule.rule_name,
-                    "allocation_percentage": float(percentage)
-                }
-            )
-            
-            db.add(child_transaction)
-            db.flush()  # Get the ID
-            
-            # Update account balance
-            account.current_balance += allocation_amount
-            
-            child_transaction_ids.append(child_transaction.id)
-            total_allocated += allocation_amount
-            
-            allocation_details.append({
-                "account_id": account.id,
-                "account_name": account.account_name,
-                "amount": float(allocation_amount),
-                "percentage": float(percentage),
-                "transaction_id": child_transaction.id
+            child_rows.append({
+                "transaction_type": "INTERNAL_ALLOCATION",
+                "from_account_id": parent_transaction.to_account_id,  # From deposit target
+                "to_account_id": allocation.account_id,
+                "amount": allocation_amount,
+                "status": "COMPLETED",
+                "purpose": allocation.purpose,
+                "parent_transaction_id": parent_transaction.id,
+                "completed_at": completed_at,
+                "meta_data": dict(allocation.meta_data)
             })
-            
-            # Create audit log for balance update
-            create_audit_log(
-                db=db,
-                table_name="logical_accounts",
-                record_id=account.id,
-                operation="UPDATE",
-                old_values={"current_balance": float(account.current_balance - allocation_amount)},
-                new_values={"current_balance": float(account.current_balance)},
-                changed_by=changed_by
-            )
-            
-            logger.info(
-                f"Created allocation: {allocation_amount} to {account.account_name} "
-                f"(transaction {child_transaction.id})"
-            )
+            pending.append((result, account, allocation_amount, allocation.percentage))
+    
+    if not child_rows:
+        return results
+    
+    # Insert every child transaction in one statement. RETURNING row order
+    # is not guaranteed, so ids are matched back to rows by content
+    returned = db.execute(
+        insert(LedgerTransaction).returning(
+            LedgerTransaction.id,
+            LedgerTransaction.parent_transaction_id,
+            LedgerTransaction.to_account_id,
+            LedgerTransaction.amount
+        ),
+        child_rows
+    ).all()
+    
+    ids_by_row: Dict[Tuple[int, int, Decimal], List[int]] = defaultdict(list)
+    for child_id, parent_id, account_id, amount in sorted(returned):
+        ids_by_row[(parent_id, account_id, Decimal(amount).quantize(ALLOCATION_PRECISION))].append(child_id)
+    child_ids = [
+        ids_by_row[(row["parent_transaction_id"], row["to_account_id"], row["amount"])].pop(0)
+        for row in child_rows
+    ]
+    
+    audit_rows = []
+    snapshots: Dict[int, Tuple[int, Decimal, int]] = {}
+    for (result, account, allocation_amount, percentage), child_id in zip(pending, child_ids):
+        # Update account balance
+        old_balance = account.current_balance
+        account.current_balance = old_balance + allocation_amount
+        snapshots[account.id] = (account.id, account.current_balance, child_id)
+        
+        result["child_transaction_ids"].append(child_id)
+        result["total_allocated"] += allocation_amount
+        result["allocations"].append({
+            "account_id": account.id,
+            "account_name": account.account_name,
+            "amount": float(allocation_amount),
+            "percentage": float(percentage),
+            "transaction_id": child_id
+        })
+        
+        # Audit log for balance update
+        audit_rows.append({
+            "table_name": "logical_accounts",
+            "record_id": account.id,
+            "operation": "UPDATE",
+            "old_values": {"current_balance": float(old_balance)},
+            "new_values": {"current_balance": float(account.current_balance)},
+            "changed_by": changed_by
+        })
+    
+    create_audit_logs(db, audit_rows)
+    
+    # Closing balance of every touched account, for as-of queries
+    record_balance_snapshots(db, snapshots.values(), completed_at)
+    db.flush()
+    
+    for result in results:
+        if "message" not in result:
+            result["total_allocated"] = float(result["total_allocated"])
+    
+    return results
+
+
+def apply_allocations_batch(
+    db: Session,
+    parent_transactions: Sequence[LedgerTransaction],
+    changed_by: str = "system"
+) -> List[Dict[str, Any]]:
+    """
+    Apply allocation rules to a batch of parent transactions in one DB transaction.
+    
+    Args:
+        db: Database session
+        parent_transactions: Transactions that trigger allocations
+        changed_by: User/system that triggered the allocation
+    
+    Returns:
+        One result dict per parent transaction, in input order
+    
+    Raises:
+        ValueError: If a matching allocation rule is invalid
+    """
+    try:
+        results = allocate_transactions(db, parent_transactions, changed_by)
         
         # Commit all changes atomically
         db.commit()
         
         logger.info(
-            f"Successfully applied allocations for transaction {parent_transaction.id}: "
-            f"{len(child_transaction_ids)} allocations totaling {total_allocated}"
+            f"Successfully applied allocations for {len(parent_transactions)} transactions: "
+            f"{sum(len(r['child_transaction_ids']) for r in results)} allocations"
         )
-        
-        return {
-            "parent_transaction_id": parent_transaction.id,
-            "child_transaction_ids": child_transaction_ids,
-            "total_allocated": float(total_allocated),
-            "allocations": allocation_details
-        }
-        
+        return results
+    
     except Exception as e:
         db.rollback()
         logger.error(f"Error applying allocations: {e}", exc_info=True)
         raise
 
 
+def apply_allocations(
+    db: Session,
+    parent_transaction: LedgerTransaction,
+    changed_by: str = "system"
+) -> Dict[str, Any]:
+    """
+    Apply allocation rules to a parent transaction.
+    Creates child allocation transactions and updates account balances atomically.
+    
+    Args:
+        db: Database session
+        parent_transaction: The transaction that triggers allocations
+        changed_by: User/system that triggered the allocation
+    
+    Returns:
+        Dict containing parent_transaction_id, child_transaction_ids, and allocation details
+    
+    Raises:
+        ValueError: If allocations are invalid or already applied
+    """
+    return apply_allocations_batch(db, [parent_transaction], changed_by)[0]
+
+
 def validate_allocation_rule(allocations: List[Dict[str, Any]], db: Session) -> bool:
     """
     Validate allocation rule configuration.
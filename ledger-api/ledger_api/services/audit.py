@@ -1,16 +1,69 @@
 """
 Audit logging service for tracking changes to critical data.
+
+Audit entries are buffered on the session and written with one bulk insert
+per unit of work, just before the session commits. By default they are
+inserted in the same DB transaction as the change they describe. When an
+AuditLogWriter is installed (AUDIT_LOG_MODE=async), committed entries are
+instead handed to a background writer, which spills them to a durable file
+and inserts them in large batches off the request path. Entries that keep
+failing are moved to a dead-letter file instead of blocking the rest.
 """
 
+import json
 import logging
+import os
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Optional, Dict, Any
-from sqlalchemy.orm import Session
+from typing import Optional, Dict, Any, List
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session, sessionmaker
 
 from ledger_api.models.ledger_models import AuditLog
 
 logger = logging.getLogger(__name__)
 
+# Session.info keys: entries buffered in the current transaction, and
+# entries of a committing transaction waiting for after_commit
+_BUFFER_KEY = "audit_entries"
+_COMMITTING_KEY = "audit_entries_committing"
+
+# Seconds get_audit_trail waits for the background writer to catch up
+AUDIT_TRAIL_FLUSH_TIMEOUT = 2.0
+
+_audit_writer: Optional["AuditLogWriter"] = None
+
+
+def _audit_row(entry: Dict[str, Any], changed_at: datetime) -> Dict[str, Any]:
+    """Normalize create_audit_log arguments to an audit_log row."""
+    return {
+        "table_name": entry["table_name"],
+        "record_id": entry["record_id"],
+        "operation": entry["operation"],
+        "old_values": entry.get("old_values") or {},
+        "new_values": entry.get("new_values") or {},
+        "changed_by": entry.get("changed_by", "system"),
+        "changed_at": changed_at,
+        "ip_address": entry.get("ip_address"),
+        "user_agent": entry.get("user_agent")
+    }
+
+
+def _buffer(db: Session) -> List[Dict[str, Any]]:
+    """Audit entries buffered in the session's current transaction."""
+    # Tie the entries to a transaction, so a rollback discards them
+    if not db.in_transaction():
+        db.begin()
+    return db.info.setdefault(_BUFFER_KEY, [])
+
+
+def _write_audit_rows(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Insert audit rows with a single executemany."""
+    if rows:
+        db.execute(insert(AuditLog), rows)
+    return len(rows)
+
 
 def create_audit_log(
     db: Session,
@@ -22,10 +75,13 @@ def create_audit_log(
     changed_by: str = "system",
     ip_address: Optional[str] = None,
     user_agent: Optional[str] = None
-) -> AuditLog:
+) -> Dict[str, Any]:
     """
     Create an audit log entry.
     
+    The entry is buffered and written when the session commits, together
+    with every other entry of the same unit of work.
+    
     Args:
         db: Database session
         table_name: Name of the table being audited
@@ -38,53 +94,468 @@ def create_audit_log(
         user_agent: User agent of requester
     
     Returns:
-        AuditLog: Created audit log entry
+        Dict[str, Any]: The buffered audit log row
+    """
+    row = _audit_row(
+        {
+            "table_name": table_name,
+            "record_id": record_id,
+            "operation": operation,
+            "old_values": old_values,
+            "new_values": new_values,
+            "changed_by": changed_by,
+            "ip_address": ip_address,
+            "user_agent": user_agent
+        },
+        datetime.utcnow()
+    )
+    _buffer(db).append(row)
+    # Note: Don't commit here - let the caller manage the transaction
+    
+    logger.debug(
+        f"Audit log created: {operation} on {table_name}[{record_id}] by {changed_by}"
+    )
+    
+    return row
+
+
+def create_audit_logs(
+    db: Session,
+    entries: List[Dict[str, Any]]
+) -> int:
+    """
+    Create many audit log entries.
+    
+    Like create_audit_log, the entries are buffered and written with the
+    rest of the unit of work when the session commits.
+    
+    Args:
+        db: Database session
+        entries: Dicts with the same keys as create_audit_log's arguments
+            (table_name, record_id, operation, old_values, new_values,
+            changed_by, ip_address, user_agent)
+    
+    Returns:
+        int: Number of audit log entries created
     """
+    if not entries:
+        return 0
+    
+    changed_at = datetime.utcnow()
+    _buffer(db).extend(
+        _audit_row(entry, changed_at) for entry in entries
+    )
+    
+    logger.debug(f"Audit logs created: {len(entries)} entries")
+    return len(entries)
+
+
+def flush_audit_logs(db: Session) -> int:
+    """
+    Write the session's buffered audit entries into its current transaction.
+    
+    Called automatically before commit; call it directly to read back
+    entries of a unit of work that has not committed yet.
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        int: Number of audit log entries written
+    """
+    rows = db.info.pop(_BUFFER_KEY, None)
+    if not rows:
+        return 0
+    
     try:
-        audit_entry = AuditLog(
-            table_name=table_name,
-            record_id=record_id,
-            operation=operation,
-            old_values=old_values or {},
-            new_values=new_values or {},
-            changed_by=changed_by,
-            changed_at=datetime.utcnow(),
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
+        return _write_audit_rows(db, rows)
+    except Exception as e:
+        logger.error(f"Error creating audit logs: {e}", exc_info=True)
+        raise
+
+
+@event.listens_for(Session, "before_commit")
+def _audit_before_commit(session: Session):
+    if _audit_writer is None:
+        flush_audit_logs(session)
+    elif session.info.get(_BUFFER_KEY):
+        session.info[_COMMITTING_KEY] = session.info.pop(_BUFFER_KEY)
+
+
+@event.listens_for(Session, "after_commit")
+def _audit_after_commit(session: Session):
+    rows = session.info.pop(_COMMITTING_KEY, None)
+    if rows and _audit_writer is not None:
+        try:
+            _audit_writer.submit(rows)
+        except Exception as e:
+            # The change is committed: failing the request now would invite
+            # a retry that duplicates it, so the entries go to the log instead
+            logger.error(
+                f"Could not queue {len(rows)} committed audit log entries: {e}\n{_spill_lines(rows)}",
+                exc_info=True
+            )
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _audit_after_transaction_end(session: Session, transaction):
+    # Entries of a rolled back (or abandoned) unit of work are discarded
+    if transaction.parent is None:
+        session.info.pop(_BUFFER_KEY, None)
+        session.info.pop(_COMMITTING_KEY, None)
+
+
+def _spill_lines(rows: List[Dict[str, Any]]) -> str:
+    """Serialize audit rows as JSON lines."""
+    return "".join(
+        json.dumps({**row, "changed_at": row["changed_at"].isoformat()}, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+class AuditLogWriter:
+    """
+    Background writer for committed audit entries.
+    
+    submit() appends entries to a spill file before returning, so they
+    survive a process crash; the worker thread fsyncs the file before each
+    batch insert, keeping fsync off the committing thread (the event loop,
+    for async sessions). Batches of up to batch_size rows are inserted and
+    the writer records its progress next to the spill file. On start,
+    entries left over from a previous process (or that could not be written
+    before stop) are queued again. Delivery is at least once: a crash
+    between a batch insert and its checkpoint replays that batch.
+    
+    A batch that fails max_attempts times, with exponential backoff between
+    attempts, is moved to a dead-letter file (``<spill_path>.dead``, same
+    JSON lines format) so it cannot hold up later entries.
+    """
+    
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        spill_path: str,
+        batch_size: int = 1000,
+        flush_interval: float = 0.2,
+        fsync: bool = True,
+        max_attempts: int = 10,
+        max_backoff: float = 30.0
+    ):
+        self.session_factory = session_factory
+        self.spill_path = spill_path
+        self.offset_path = f"{spill_path}.offset"
+        self.dead_letter_path = f"{spill_path}.dead"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.stats = {"submitted": 0, "written": 0, "batches": 0, "replayed": 0, "dead_lettered": 0}
         
-        db.add(audit_entry)
-        # Note: Don't commit here - let the caller manage the transaction
+        self._pending: deque = deque()
+        self._in_flight = 0
+        self._written_lines = 0
+        self._unsynced = False
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._spill = None
+    
+    def start(self):
+        """Queue leftover spilled entries and start the writer thread."""
+        self._replay()
+        # Unbuffered, so a failed write leaves nothing behind to flush later
+        self._spill = open(self.spill_path, "ab", buffering=0)
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Write everything pending, then stop the writer thread."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._spill is not None:
+            self._sync_spill()
+            self._spill.close()
+            self._spill = None
+    
+    @property
+    def lag(self) -> int:
+        """Submitted entries not written yet."""
+        with self._condition:
+            return len(self._pending) + self._in_flight
+    
+    def submit(self, rows: List[Dict[str, Any]]):
+        """
+        Queue committed audit rows for writing.
         
-        logger.debug(
-            f"Audit log created: {operation} on {table_name}[{record_id}] by {changed_by}"
-        )
+        The rows are in the spill file when this returns; the writer thread
+        fsyncs it before inserting them.
         
-        return audit_entry
+        Args:
+            rows: Audit log rows (see create_audit_log)
         
-    except Exception as e:
-        logger.error(f"Error creating audit log: {e}", exc_info=True)
-        raise
+        Raises:
+            RuntimeError: If the writer is not running
+            OSError: If the spill file could not be written (it is truncated
+                back, so no partial entry is left)
+        """
+        data = memoryview(_spill_lines(rows).encode("utf-8"))
+        with self._condition:
+            if self._spill is None:
+                raise RuntimeError("AuditLogWriter is not running")
+            size = os.fstat(self._spill.fileno()).st_size
+            try:
+                while data:
+                    data = data[self._spill.write(data):]
+            except OSError:
+                try:
+                    self._spill.truncate(size)
+                except OSError:
+                    # Replay moves the torn line to the dead-letter file
+                    pass
+                raise
+            self._unsynced = True
+            self._pending.extend(rows)
+            self.stats["submitted"] += len(rows)
+            self._condition.notify_all()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every submitted entry has been written.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+        
+        Returns:
+            bool: True if all entries were written
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._in_flight, timeout
+            )
+    
+    def _replay(self):
+        if not os.path.exists(self.spill_path):
+            return
+        
+        skip = 0
+        if os.path.exists(self.offset_path):
+            with open(self.offset_path, encoding="utf-8") as f:
+                skip = int(f.read().strip() or 0)
+        
+        with open(self.spill_path, encoding="utf-8") as f:
+            lines = f.readlines()
+        
+        rows, kept, unreadable = [], [], []
+        for line in lines[skip:]:
+            # A torn last line was never acknowledged to a caller
+            if not line.endswith("\n"):
+                break
+            try:
+                row = json.loads(line)
+                row["changed_at"] = datetime.fromisoformat(row["changed_at"])
+            except (ValueError, KeyError, TypeError):
+                # A write torn mid-file, e.g. when the disk filled up
+                unreadable.append(line)
+                continue
+            rows.append(row)
+            kept.append(line)
+        
+        if unreadable:
+            self._write_dead_letters("".join(unreadable))
+            self.stats["dead_lettered"] += len(unreadable)
+            logger.error(f"Moved {len(unreadable)} unreadable spilled audit lines to {self.dead_letter_path}")
+        
+        # Keep only the entries still to write. The offset is reset first:
+        # a crash in between replays written entries again, never skips any
+        self._written_lines = 0
+        self._checkpoint()
+        tmp_path = f"{self.spill_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(kept))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.spill_path)
+        
+        if rows:
+            self._pending.extend(rows)
+            self.stats["replayed"] += len(rows)
+            logger.warning(f"Replaying {len(rows)} audit log entries from {self.spill_path}")
+    
+    def _insert(self, rows: List[Dict[str, Any]]):
+        db = self.session_factory()
+        try:
+            _write_audit_rows(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def _sync_spill(self):
+        if not self.fsync:
+            return
+        try:
+            os.fsync(self._spill.fileno())
+        except OSError as e:
+            logger.error(f"Error syncing audit spill file {self.spill_path}: {e}")
+    
+    def _write_dead_letters(self, lines: str):
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+    
+    def _dead_letter(self, rows: List[Dict[str, Any]], error: Exception) -> bool:
+        """Move a batch that keeps failing to the dead-letter file."""
+        try:
+            self._write_dead_letters(_spill_lines(rows))
+        except OSError as e:
+            logger.error(f"Error moving audit log entries to {self.dead_letter_path}: {e}")
+            return False
+        logger.error(
+            f"Moved {len(rows)} audit log entries to {self.dead_letter_path} "
+            f"after {self.max_attempts} failed attempts: {error}"
+        )
+        return True
+    
+    def _checkpoint(self):
+        # Atomically record how many spilled lines are in the database
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(self._written_lines))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.offset_path)
+    
+    def _truncate(self):
+        # Everything spilled has been written: start both files afresh
+        self._spill.truncate(0)
+        self._written_lines = 0
+        self._checkpoint()
+    
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        attempts = 0
+        while True:
+            with self._condition:
+                if not batch:
+                    self._condition.wait_for(
+                        lambda: self._stopping or len(self._pending) >= self.batch_size,
+                        self.flush_interval
+                    )
+                    if not self._pending:
+                        if self._stopping:
+                            return
+                        continue
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                    self._in_flight = len(batch)
+                unsynced, self._unsynced = self._unsynced, False
+            
+            if unsynced:
+                self._sync_spill()
+            
+            dead_lettered = False
+            try:
+                self._insert(batch)
+            except Exception as e:
+                attempts += 1
+                if attempts < self.max_attempts or not self._dead_letter(batch, e):
+                    backoff = min(self.max_backoff, self.flush_interval * 2 ** (attempts - 1))
+                    logger.error(
+                        f"Error writing {len(batch)} audit log entries (attempt {attempts}), "
+                        f"will retry in {backoff:.1f}s: {e}",
+                        exc_info=True
+                    )
+                    with self._condition:
+                        if self._condition.wait_for(lambda: self._stopping, backoff):
+                            # Left in the spill file for the next start
+                            self._pending.extendleft(reversed(batch))
+                            self._in_flight = 0
+                            self._condition.notify_all()
+                            return
+                    continue
+                dead_lettered = True
+            
+            with self._condition:
+                self._in_flight = 0
+                self._written_lines += len(batch)
+                if dead_lettered:
+                    self.stats["dead_lettered"] += len(batch)
+                else:
+                    self.stats["written"] += len(batch)
+                    self.stats["batches"] += 1
+                if self._pending:
+                    self._checkpoint()
+                else:
+                    self._truncate()
+                self._condition.notify_all()
+            batch = []
+            attempts = 0
+
+
+def set_audit_writer(writer: Optional[AuditLogWriter]):
+    """
+    Install (or with None, remove) the background audit writer.
+    
+    Args:
+        writer: Started AuditLogWriter, or None for synchronous writes
+    """
+    global _audit_writer
+    _audit_writer = writer
+
+
+def get_audit_writer() -> Optional[AuditLogWriter]:
+    """
+    Get the installed background audit writer, if any.
+    
+    Returns:
+        AuditLogWriter or None
+    """
+    return _audit_writer
 
 
 def get_audit_trail(
     db: Session,
     table_name: Optional[str] = None,
     record_id: Optional[int] = None,
-    limit: int = 100
+    limit: int = 100,
+    flush_timeout: float = AUDIT_TRAIL_FLUSH_TIMEOUT
 ) -> list:
     """
     Get audit trail for a table or specific record.
     
+    Entries buffered by this session are written first, so the trail always
+    includes them. Entries queued in the background writer are waited for
+    up to flush_timeout seconds; if the writer is still behind (e.g. the
+    database is failing), its lag is logged and the trail may miss them.
+    
     Args:
         db: Database session
         table_name: Filter by table name
         record_id: Filter by record ID
         limit: Maximum number of records to return
+        flush_timeout: Seconds to wait for the background writer
     
     Returns:
         List[AuditLog]: Audit log entries
     """
+    flush_audit_logs(db)
+    if _audit_writer is not None and not _audit_writer.flush(timeout=flush_timeout):
+        logger.warning(
+            f"Audit writer is {_audit_writer.lag} entries behind; "
+            f"the audit trail may be missing recent entries"
+        )
+    
     query = db.query(AuditLog)
     
     if table_name:
@@ -0,0 +1,278 @@
+"""
+Materialized account balance history.
+
+The allocation engine appends one RAW snapshot per touched account per
+batch, in the same DB transaction as the balance change, so the history is
+always consistent with logical_accounts.current_balance. A point-in-time
+balance is then the latest snapshot at or before the requested time: one
+index probe per account, independent of the number of transactions.
+
+A background compactor keeps the table small by rolling RAW snapshots up to
+one HOUR snapshot per account per hour, and HOUR snapshots up to one DAY
+snapshot, each keeping the closing balance of its bucket. Once rolled up,
+as-of queries inside a bucket resolve to the previous bucket's close.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+
+from ledger_api.models.ledger_models import AccountBalanceSnapshot, LogicalAccount
+
+logger = logging.getLogger(__name__)
+
+
+RAW_RETENTION = timedelta(days=1)
+HOURLY_RETENTION = timedelta(days=30)
+COMPACTION_CHUNK_SIZE = 1000
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC (datetime.utcnow)."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _bucket_start(value: datetime, granularity: str) -> datetime:
+    """Start of the HOUR or DAY bucket containing value."""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == "DAY":
+        value = value.replace(hour=0)
+    return value
+
+
+def record_balance_snapshots(
+    db: Session,
+    balances: Iterable[Tuple[int, Decimal, Optional[int]]],
+    as_of: datetime
+) -> int:
+    """
+    Append RAW balance snapshots without committing.
+    
+    Args:
+        db: Database session
+        balances: (account_id, balance, transaction_id) tuples, where
+            transaction_id is the last transaction that moved the balance
+        as_of: Time the balances took effect
+    
+    Returns:
+        int: Number of snapshots written
+    """
+    rows = [
+        {
+            "account_id": account_id,
+            "balance": balance,
+            "as_of": as_of,
+            "granularity": "RAW",
+            "transaction_id": transaction_id
+        }
+        for account_id, balance, transaction_id in balances
+    ]
+    if rows:
+        db.execute(insert(AccountBalanceSnapshot), rows)
+    return len(rows)
+
+
+def get_balances_as_of(
+    db: Session,
+    as_of: datetime,
+    account_ids: Optional[Sequence[int]] = None
+) -> Dict[int, Decimal]:
+    """
+    Get account balances at a point in time.
+    
+    Each balance is the latest snapshot at or before as_of, found with one
+    (account_id, as_of) index probe per account. Accounts without a
+    snapshot by then had not received any allocation and report zero.
+    
+    Args:
+        db: Database session
+        as_of: Point in time
+        account_ids: Accounts to include (None for all accounts)
+    
+    Returns:
+        Dict mapping account id to balance
+    """
+    as_of = _naive_utc(as_of)
+    
+    latest_balance = select(AccountBalanceSnapshot.balance).where(
+        AccountBalanceSnapshot.account_id == LogicalAccount.id,
+        AccountBalanceSnapshot.as_of <= as_of
+    ).order_by(
+        AccountBalanceSnapshot.as_of.desc(), AccountBalanceSnapshot.id.desc()
+    ).limit(1).correlate(LogicalAccount).scalar_subquery()
+    
+    query = select(LogicalAccount.id, latest_balance)
+    if account_ids is not None:
+        query = query.where(LogicalAccount.id.in_(account_ids))
+    
+    return {
+        account_id: Decimal(balance) if balance is not None else Decimal("0")
+        for account_id, balance in db.execute(query)
+    }
+
+
+def _roll_up(db: Session, granularity: str, finer: List[str], cutoff: datetime) -> int:
+    """
+    Roll snapshots finer than granularity before cutoff into one per bucket.
+    
+    The last snapshot of each account in each bucket is kept and relabelled;
+    the others are deleted. Re-running over the same window is a no-op.
+    
+    Returns:
+        int: Number of snapshots deleted
+    """
+    earliest = db.scalar(
+        select(AccountBalanceSnapshot.as_of).where(
+            AccountBalanceSnapshot.granularity.in_(finer),
+            AccountBalanceSnapshot.as_of < cutoff
+        ).order_by(AccountBalanceSnapshot.as_of).limit(1)
+    )
+    if earliest is None:
+        return 0
+    
+    # Rows already rolled up in the same buckets take part, so a bucket
+    # keeps exactly one row however compaction runs were interleaved
+    rows = db.execute(
+        select(
+            AccountBalanceSnapshot.id,
+            AccountBalanceSnapshot.account_id,
+            AccountBalanceSnapshot.as_of
+        ).where(
+            AccountBalanceSnapshot.granularity.in_(finer + [granularity]),
+            AccountBalanceSnapshot.as_of >= _bucket_start(earliest, granularity),
+            AccountBalanceSnapshot.as_of < cutoff
+        ).order_by(
+            AccountBalanceSnapshot.account_id,
+            AccountBalanceSnapshot.as_of,
+            AccountBalanceSnapshot.id
+        )
+    ).all()
+    
+    keep: List[int] = []
+    drop: List[int] = []
+    previous_key = None
+    for snapshot_id, account_id, as_of in rows:
+        key = (account_id, _bucket_start(as_of, granularity))
+        if key == previous_key:
+            drop.append(keep.pop())
+        keep.append(snapshot_id)
+        previous_key = key
+    
+    for start in range(0, len(drop), COMPACTION_CHUNK_SIZE):
+        db.execute(
+            delete(AccountBalanceSnapshot).where(
+                AccountBalanceSnapshot.id.in_(drop[start:start + COMPACTION_CHUNK_SIZE])
+            )
+        )
+    for start in range(0, len(keep), COMPACTION_CHUNK_SIZE):
+        db.execute(
+            update(AccountBalanceSnapshot).where(
+                AccountBalanceSnapshot.id.in_(keep[start:start + COMPACTION_CHUNK_SIZE])
+            ).values(granularity=granularity)
+        )
+    
+    return len(drop)
+
+
+def compact_balance_snapshots(
+    db: Session,
+    now: Optional[datetime] = None,
+    raw_retention: timedelta = RAW_RETENTION,
+    hourly_retention: timedelta = HOURLY_RETENTION
+) -> Dict[str, int]:
+    """
+    Roll old snapshots up to hourly and daily closing balances.
+    
+    RAW snapshots older than raw_retention become one HOUR snapshot per
+    account per hour; snapshots older than hourly_retention become one DAY
+    snapshot per account per day. Only complete buckets are compacted.
+    
+    Args:
+        db: Database session
+        now: Current time (defaults to utcnow)
+        raw_retention: How long RAW snapshots are kept
+        hourly_retention: How long HOUR snapshots are kept
+    
+    Returns:
+        Dict mapping target granularity to the number of snapshots removed
+    """
+    now = _naive_utc(now or datetime.utcnow())
+    
+    try:
+        removed = {
+            "HOUR": _roll_up(db, "HOUR", ["RAW"], _bucket_start(now - raw_retention, "HOUR")),
+            "DAY": _roll_up(db, "DAY", ["RAW", "HOUR"], _bucket_start(now - hourly_retention, "DAY")),
+        }
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error compacting balance snapshots: {e}", exc_info=True)
+        raise
+    
+    if any(removed.values()):
+        logger.info(
+            f"Compacted balance snapshots: {removed['HOUR']} rolled up hourly, "
+            f"{removed['DAY']} rolled up daily"
+        )
+    return removed
+
+
+class BalanceSnapshotCompactor:
+    """
+    Background task running compact_balance_snapshots periodically.
+    """
+    
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        interval_seconds: float = 3600.0,
+        raw_retention: timedelta = RAW_RETENTION,
+        hourly_retention: timedelta = HOURLY_RETENTION
+    ):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.raw_retention = raw_retention
+        self.hourly_retention = hourly_retention
+        self._task: Optional[asyncio.Task] = None
+    
+    async def run_once(self) -> Dict[str, int]:
+        """Run one compaction pass."""
+        async with self.session_factory() as db:
+            return await db.run_sync(
+                compact_balance_snapshots,
+                raw_retention=self.raw_retention,
+                hourly_retention=self.hourly_retention
+            )
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                # Already logged; try again next interval
+                pass
+            await asyncio.sleep(self.interval_seconds)
+    
+    def start(self):
+        """Start compacting in the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Cancel the background task and wait for it to finish."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
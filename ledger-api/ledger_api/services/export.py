@@ -0,0 +1,344 @@
+"""
+Streaming export of ledger tables for accounting.
+
+Rows are read in id order in bounded chunks, each in its own short-lived
+session, and streamed from a server-side cursor (yield_per), so an export
+of millions of rows uses constant memory and never holds one connection
+for the whole download. Exports are resumable: every row carries its id,
+and a client restarts with since_id set to the last id it stored.
+
+Ids are assigned when a row is inserted, not when its transaction commits,
+so a row with an id below the highest committed id may still be in flight.
+Exports therefore stop at a watermark: the highest id among rows older than
+EXPORT_COMMIT_LAG_SECONDS. As long as no transaction stays open longer than
+that, every id up to the watermark is committed and resuming after it skips
+nothing.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ledger_api.models.ledger_models import AuditLog, LedgerTransaction
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    ARROW_AVAILABLE = False
+
+DEFAULT_CHUNK_SIZE = 50000
+DEFAULT_BATCH_SIZE = 1000
+
+# Longer than any ledger transaction stays open
+EXPORT_COMMIT_LAG_SECONDS = float(os.environ.get("EXPORT_COMMIT_LAG_SECONDS", "60"))
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    """A table that can be exported."""
+    name: str
+    table: Table
+    columns: Sequence[str]
+    timestamp_column: str
+    json_columns: frozenset = frozenset()
+    
+    def select_columns(self):
+        return [self.table.c[name] for name in self.columns]
+
+
+DATASETS: Dict[str, ExportDataset] = {
+    "transactions": ExportDataset(
+        name="transactions",
+        table=LedgerTransaction.__table__,
+        columns=(
+            "id", "transaction_hash", "transaction_type", "from_account_id", "to_account_id",
+            "amount", "status", "purpose", "parent_transaction_id", "meta_data",
+            "created_at", "updated_at", "completed_at"
+        ),
+        timestamp_column="created_at",
+        json_columns=frozenset({"meta_data"})
+    ),
+    "audit_log": ExportDataset(
+        name="audit_log",
+        table=AuditLog.__table__,
+        columns=(
+            "id", "table_name", "record_id", "operation", "old_values", "new_values",
+            "changed_by", "changed_at", "ip_address", "user_agent"
+        ),
+        timestamp_column="changed_at",
+        json_columns=frozenset({"old_values", "new_values"})
+    ),
+}
+
+
+def _scalar(value: Any) -> Any:
+    """Lossless text-friendly form of a column value (Decimals as strings)."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class NDJSONEncoder:
+    """One JSON object per line"""
+    
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+    
+    def __init__(self, dataset: ExportDataset):
+        self.columns = dataset.columns
+    
+    def header(self) -> bytes:
+        return b""
+    
+    def encode(self, rows: Sequence[Any]) -> bytes:
+        columns = self.columns
+        lines = [
+            json.dumps({c: _scalar(v) for c, v in zip(columns, row)}, separators=(",", ":"))
+            for row in rows
+        ]
+        return ("\n".join(lines) + "\n").encode()
+    
+    def footer(self) -> bytes:
+        return b""
+
+
+class CSVEncoder:
+    """RFC 4180 CSV with a header row; JSON columns are embedded as JSON text"""
+    
+    media_type = "text/csv"
+    extension = "csv"
+    
+    def __init__(self, dataset: ExportDataset):
+        self.columns = dataset.columns
+        self.json_indexes = [i for i, c in enumerate(dataset.columns) if c in dataset.json_columns]
+    
+    def _write(self, rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+    
+    def header(self) -> bytes:
+        return self._write([self.columns])
+    
+    def encode(self, rows: Sequence[Any]) -> bytes:
+        out = []
+        for row in rows:
+            values = [_scalar(v) for v in row]
+            for i in self.json_indexes:
+                if values[i] is not None:
+                    values[i] = json.dumps(values[i], separators=(",", ":"))
+            out.append(values)
+        return self._write(out)
+    
+    def footer(self) -> bytes:
+        return b""
+
+
+class ArrowEncoder:
+    """Arrow IPC stream: one record batch message per fetched partition"""
+    
+    media_type = "application/vnd.apache.arrow.stream"
+    extension = "arrow"
+    
+    # IPC end-of-stream marker: continuation token followed by a zero length
+    END_OF_STREAM = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+    
+    def __init__(self, dataset: ExportDataset):
+        if not ARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is not installed")
+        
+        self.json_columns = dataset.json_columns
+        self.schema = pa.schema([
+            pa.field(column.name, self._arrow_type(column))
+            for column in dataset.select_columns()
+        ])
+    
+    def _arrow_type(self, column):
+        if column.name in self.json_columns:
+            return pa.string()
+        python_type = column.type.python_type
+        if python_type is int:
+            return pa.int64()
+        if python_type is Decimal:
+            return pa.decimal128(column.type.precision or 38, column.type.scale or 0)
+        if python_type is datetime:
+            return pa.timestamp("us", tz="UTC" if column.type.timezone else None)
+        if python_type is bool:
+            return pa.bool_()
+        return pa.string()
+    
+    def header(self) -> bytes:
+        return self.schema.serialize().to_pybytes()
+    
+    def encode(self, rows: Sequence[Any]) -> bytes:
+        arrays = []
+        for i, field in enumerate(self.schema):
+            values = [row[i] for row in rows]
+            if field.name in self.json_columns:
+                values = [None if v is None else json.dumps(v, separators=(",", ":")) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema).serialize().to_pybytes()
+    
+    def footer(self) -> bytes:
+        return self.END_OF_STREAM
+
+
+ENCODERS = {
+    "ndjson": NDJSONEncoder,
+    "csv": CSVEncoder,
+    "arrow": ArrowEncoder,
+}
+
+
+async def get_max_id(db: AsyncSession, dataset: ExportDataset) -> int:
+    """
+    Highest id currently in a dataset.
+    
+    Args:
+        db: Async database session
+        dataset: Dataset to inspect
+    
+    Returns:
+        int: Highest id (0 if the table is empty)
+    """
+    return (await db.scalar(select(func.max(dataset.table.c.id)))) or 0
+
+
+async def get_export_watermark(
+    db: AsyncSession,
+    dataset: ExportDataset,
+    commit_lag: Optional[float] = None
+) -> int:
+    """
+    Highest id an export can include without skipping in-flight rows.
+    
+    Rows inserted more than commit_lag seconds ago belong to committed
+    transactions, and so do all rows with lower ids, which were inserted
+    earlier still.
+    
+    Args:
+        db: Async database session
+        dataset: Dataset to inspect
+        commit_lag: Seconds a transaction may stay open
+            (defaults to EXPORT_COMMIT_LAG_SECONDS)
+    
+    Returns:
+        int: Highest safe id (0 if no row is old enough)
+    """
+    if commit_lag is None:
+        commit_lag = EXPORT_COMMIT_LAG_SECONDS
+    if commit_lag <= 0:
+        return await get_max_id(db, dataset)
+    
+    cutoff = datetime.utcnow() - timedelta(seconds=commit_lag)
+    stmt = select(func.max(dataset.table.c.id)).where(dataset.table.c[dataset.timestamp_column] <= cutoff)
+    return (await db.scalar(stmt)) or 0
+
+
+async def iter_export_rows(
+    session_factory: async_sessionmaker,
+    dataset: ExportDataset,
+    since_id: int = 0,
+    until_id: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> AsyncIterator[List[Any]]:
+    """
+    Stream rows with since_id < id <= until_id in id order.
+    
+    Each chunk of up to chunk_size rows is read in its own session with a
+    server-side cursor delivering batch_size rows at a time, so neither
+    memory nor connection hold time grows with the size of the export.
+    
+    Args:
+        session_factory: Async session factory
+        dataset: Dataset to export
+        since_id: Exclusive lower id bound (resume checkpoint)
+        until_id: Inclusive upper id bound (None for no bound)
+        chunk_size: Rows read per session
+        batch_size: Rows fetched from the cursor at a time
+    
+    Yields:
+        Lists of rows (tuples in dataset.columns order)
+    """
+    id_column = dataset.table.c.id
+    last_id = since_id
+    
+    while True:
+        stmt = select(*dataset.select_columns()).where(id_column > last_id)
+        if until_id is not None:
+            stmt = stmt.where(id_column <= until_id)
+        stmt = stmt.order_by(id_column).limit(chunk_size).execution_options(yield_per=batch_size)
+        
+        fetched = 0
+        async with session_factory() as db:
+            result = await db.stream(stmt)
+            async for partition in result.partitions():
+                fetched += len(partition)
+                last_id = partition[-1][0]
+                yield partition
+        
+        if fetched < chunk_size:
+            return
+
+
+async def stream_export(
+    session_factory: async_sessionmaker,
+    dataset: ExportDataset,
+    export_format: str,
+    since_id: int = 0,
+    until_id: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Encode a dataset export as a byte stream.
+    
+    Args:
+        session_factory: Async session factory
+        dataset: Dataset to export
+        export_format: One of ENCODERS
+        since_id: Exclusive lower id bound (resume checkpoint)
+        until_id: Inclusive upper id bound (None for no bound)
+        chunk_size: Rows read per session
+        batch_size: Rows fetched from the cursor at a time
+    
+    Yields:
+        Encoded bytes, one piece per fetched batch
+    """
+    encoder = ENCODERS[export_format](dataset)
+    exported = 0
+    
+    header = encoder.header()
+    if header:
+        yield header
+    
+    async for rows in iter_export_rows(
+        session_factory, dataset, since_id, until_id, chunk_size, batch_size
+    ):
+        exported += len(rows)
+        yield encoder.encode(rows)
+    
+    footer = encoder.footer()
+    if footer:
+        yield footer
+    
+    logger.info(
+        f"Exported {exported} {dataset.name} rows as {export_format} "
+        f"(since_id={since_id}, until_id={until_id})"
+    )
@@ -2,27 +2,45 @@
 Reconciliation service for comparing internal ledger with external blockchain state.
 """
 
+import asyncio
 import logging
+import time
+from collections import defaultdict
 from decimal import Decimal
 from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Integer, func, insert, literal, select, union_all
 
 from ledger_api.models.ledger_models import (
     ReconciliationLog,
     LogicalAccount
 )
-from ledger_api.services.audit import create_audit_log
+from ledger_api.services.audit import create_audit_log, create_audit_logs
+from ledger_api.services.balance_snapshots import get_balances_as_of
+from ledger_api.utils.pi_auth import PI_WALLET_BALANCE_TIMEOUT, get_pi_wallet_balance_async
 
 logger = logging.getLogger(__name__)
 
 
+MATCH_TOLERANCE = Decimal("0.00000001")  # 8 decimal places precision
+DEFAULT_MAX_CONCURRENCY = 10
+
+
+def _reconciliation_status(discrepancy: Decimal) -> str:
+    """MATCHED within ledger precision, DISCREPANCY otherwise."""
+    return "MATCHED" if abs(discrepancy) < MATCH_TOLERANCE else "DISCREPANCY"
+
+
 def create_reconciliation(
     db: Session,
     external_wallet_address: str,
     external_wallet_balance: Decimal,
     notes: str = None,
-    reconciled_by: str = "system"
+    reconciled_by: str = "system",
+    as_of: Optional[datetime] = None
 ) -> ReconciliationLog:
     """
     Create a reconciliation record comparing external and internal balances.
@@ -33,17 +51,27 @@ def create_reconciliation(
         external_wallet_balance: Balance reported by external wallet
         notes: Optional notes
         reconciled_by: User/system performing reconciliation
+        as_of: Time the external balance was observed; the internal balance
+            is then read from balance snapshots at that time (default: now)
     
     Returns:
         ReconciliationLog: Created reconciliation record
     """
     try:
         # Calculate total internal ledger balance
-        internal_balance_result = db.query(
-            func.sum(LogicalAccount.current_balance)
-        ).filter(
-            LogicalAccount.is_active == True
-        ).scalar()
+        if as_of is None:
+            internal_balance_result = db.query(
+                func.sum(LogicalAccount.current_balance)
+            ).filter(
+                LogicalAccount.is_active == True
+            ).scalar()
+        else:
+            active_ids = [
+                account_id for (account_id,) in db.query(LogicalAccount.id).filter(
+                    LogicalAccount.is_active == True
+                )
+            ]
+            internal_balance_result = sum(get_balances_as_of(db, as_of, active_ids).values())
         
         internal_ledger_balance = internal_balance_result or Decimal("0")
         
@@ -51,10 +79,7 @@ def create_reconciliation(
         discrepancy = external_wallet_balance - internal_ledger_balance
         
         # Determine status based on discrepancy
-        if abs(discrepancy) < Decimal("0.00000001"):  # 8 decimal places precision
-            status = "MATCHED"
-        else:
-            status = "DISCREPANCY"
+        status = _reconciliation_status(discrepancy)
         
         # Create reconciliation record
         reconciliation = ReconciliationLog(
@@ -81,7 +106,8 @@ def create_reconciliation(
                 "external_wallet_balance": float(external_wallet_balance),
                 "internal_ledger_balance": float(internal_ledger_balance),
                 "discrepancy": float(discrepancy),
-                "status": status
+                "status": status,
+                "as_of": as_of.isoformat() if as_of else None
             },
             changed_by=reconciled_by
         )
@@ -131,3 +157,291 @@ def get_unresolved_discrepancies(db: Session) -> list:
     ).order_by(
         ReconciliationLog.reconciliation_date.desc()
     ).all()
+
+
+def get_group_balances(
+    db: Session,
+    account_groups: Sequence[Sequence[int]],
+    as_of: Optional[datetime] = None
+) -> List[Decimal]:
+    """
+    Total balance of the active accounts in each group, in one query.
+    
+    Groups are joined to logical_accounts as an inline (group, account)
+    mapping and summed with a single GROUP BY. With as_of, the balances
+    come from balance snapshots instead (also one query).
+    
+    Args:
+        db: Database session
+        account_groups: Account ids of each group (groups may overlap)
+        as_of: Point in time (None for current balances)
+    
+    Returns:
+        List[Decimal]: Total per group, in input order
+    """
+    pairs = [
+        (index, account_id)
+        for index, account_ids in enumerate(account_groups)
+        for account_id in sorted(set(account_ids))
+    ]
+    if not pairs:
+        return [Decimal("0")] * len(account_groups)
+    
+    if as_of is not None:
+        balances = get_balances_as_of(db, as_of, sorted({account_id for _, account_id in pairs}))
+        active = {
+            account_id for (account_id,) in db.query(LogicalAccount.id).filter(
+                LogicalAccount.id.in_(balances), LogicalAccount.is_active == True
+            )
+        }
+        totals: Dict[int, Decimal] = {}
+        for index, account_id in pairs:
+            if account_id in active:
+                totals[index] = totals.get(index, Decimal("0")) + balances[account_id]
+    else:
+        # (group_index, account_id) rows as a derived table; portable
+        # across SQLite and PostgreSQL, unlike a column-aliased VALUES list
+        mapping = union_all(*(
+            select(
+                literal(index, Integer).label("group_index"),
+                literal(account_id, Integer).label("account_id")
+            )
+            for index, account_id in pairs
+        )).subquery("wallet_accounts")
+        
+        totals = dict(db.execute(
+            select(mapping.c.group_index, func.sum(LogicalAccount.current_balance)).join(
+                LogicalAccount, LogicalAccount.id == mapping.c.account_id
+            ).where(
+                LogicalAccount.is_active == True
+            ).group_by(mapping.c.group_index)
+        ).all())
+    
+    return [Decimal(totals.get(index) or 0) for index in range(len(account_groups))]
+
+
+async def fetch_wallet_balances(
+    wallet_addresses: Sequence[str],
+    fetch_balance: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch external wallet balances concurrently.
+    
+    A failed wallet does not fail the others: its entry carries the error.
+    
+    Args:
+        wallet_addresses: Wallets to query (duplicates are fetched once)
+        fetch_balance: Async balance lookup (defaults to
+            get_pi_wallet_balance_async with one shared HTTP client)
+        max_concurrency: Maximum requests in flight
+    
+    Returns:
+        Dict mapping wallet address to {"balance": Decimal or None,
+        "fetch_ms": float, "error": str or None}
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def fetch_one(wallet_address: str, fetch) -> Tuple[str, Dict[str, Any]]:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await fetch(wallet_address)
+                balance, error = Decimal(str(result["balance"])), None
+            except Exception as e:
+                logger.warning(f"Failed to fetch balance of wallet {wallet_address}: {e}")
+                balance, error = None, f"{type(e).__name__}: {e}"
+            return wallet_address, {
+                "balance": balance,
+                "fetch_ms": (time.perf_counter() - started) * 1000,
+                "error": error
+            }
+    
+    addresses = list(dict.fromkeys(wallet_addresses))
+    if fetch_balance is not None:
+        results = await asyncio.gather(*(fetch_one(a, fetch_balance) for a in addresses))
+    else:
+        async with httpx.AsyncClient(
+            timeout=PI_WALLET_BALANCE_TIMEOUT,
+            limits=httpx.Limits(max_connections=max_concurrency)
+        ) as client:
+            fetch = lambda wallet_address: get_pi_wallet_balance_async(wallet_address, client=client)
+            results = await asyncio.gather(*(fetch_one(a, fetch) for a in addresses))
+    
+    return dict(results)
+
+
+def record_wallet_reconciliations(
+    db: Session,
+    wallets: Sequence[Tuple[str, Sequence[int]]],
+    external_balances: Dict[str, Dict[str, Any]],
+    notes: Optional[str] = None,
+    reconciled_by: str = "system",
+    as_of: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Compare fetched wallet balances with their account groups and record them.
+    
+    Internal balances come from one grouped aggregate query; the
+    reconciliation rows and their audit entries are each written with one
+    bulk insert, in one transaction. Wallets whose balance could not be
+    fetched are reported but not recorded.
+    
+    Args:
+        db: Database session
+        wallets: (wallet_address, account_ids) pairs
+        external_balances: Result of fetch_wallet_balances
+        notes: Optional notes
+        reconciled_by: User/system performing reconciliation
+        as_of: Time the external balances were observed (default: now)
+    
+    Returns:
+        One result dict per wallet, in input order
+    """
+    try:
+        internal_balances = get_group_balances(db, [account_ids for _, account_ids in wallets], as_of)
+        reconciliation_date = datetime.utcnow()
+        
+        results = []
+        rows = []
+        for (wallet_address, account_ids), internal_balance in zip(wallets, internal_balances):
+            fetched = external_balances[wallet_address]
+            result = {
+                "wallet_address": wallet_address,
+                "account_ids": list(account_ids),
+                "external_wallet_balance": fetched["balance"],
+                "internal_ledger_balance": internal_balance,
+                "discrepancy": None,
+                "status": "FETCH_FAILED",
+                "reconciliation_id": None,
+                "fetch_ms": fetched["fetch_ms"],
+                "error": fetched["error"]
+            }
+            results.append(result)
+            if fetched["balance"] is None:
+                continue
+            
+            result["discrepancy"] = fetched["balance"] - internal_balance
+            result["status"] = _reconciliation_status(result["discrepancy"])
+            rows.append({
+                "external_wallet_address": wallet_address,
+                "external_wallet_balance": fetched["balance"],
+                "internal_ledger_balance": internal_balance,
+                "discrepancy": result["discrepancy"],
+                "status": result["status"],
+                "notes": notes,
+                "reconciled_by": reconciled_by,
+                "reconciliation_date": reconciliation_date
+            })
+        
+        if rows:
+            # RETURNING row order is not guaranteed, so ids are matched
+            # back to rows by content
+            returned = db.execute(
+                insert(ReconciliationLog).returning(
+                    ReconciliationLog.id,
+                    ReconciliationLog.external_wallet_address,
+                    ReconciliationLog.internal_ledger_balance
+                ),
+                rows
+            ).all()
+            
+            ids_by_row: Dict[Tuple[str, Decimal], List[int]] = defaultdict(list)
+            for reconciliation_id, wallet_address, internal_balance in sorted(returned):
+                ids_by_row[(wallet_address, Decimal(internal_balance).quantize(MATCH_TOLERANCE))].append(
+                    reconciliation_id
+                )
+            
+            recorded = [result for result in results if result["status"] != "FETCH_FAILED"]
+            for result in recorded:
+                result["reconciliation_id"] = ids_by_row[(
+                    result["wallet_address"], result["internal_ledger_balance"].quantize(MATCH_TOLERANCE)
+                )].pop(0)
+            
+            create_audit_logs(db, [
+                {
+                    "table_name": "reconciliation_log",
+                    "record_id": result["reconciliation_id"],
+                    "operation": "CREATE",
+                    "new_values": {
+                        "external_wallet_address": result["wallet_address"],
+                        "account_ids": result["account_ids"],
+                        "external_wallet_balance": float(result["external_wallet_balance"]),
+                        "internal_ledger_balance": float(result["internal_ledger_balance"]),
+                        "discrepancy": float(result["discrepancy"]),
+                        "status": result["status"],
+                        "as_of": as_of.isoformat() if as_of else None
+                    },
+                    "changed_by": reconciled_by
+                }
+                for result in recorded
+            ])
+        
+        db.commit()
+        return results
+    
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recording wallet reconciliations: {e}", exc_info=True)
+        raise
+
+
+async def reconcile_wallets(
+    db: AsyncSession,
+    wallets: Sequence[Tuple[str, Sequence[int]]],
+    notes: Optional[str] = None,
+    reconciled_by: str = "system",
+    as_of: Optional[datetime] = None,
+    fetch_balance: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Reconcile several treasury wallets against their account groups.
+    
+    External balances are fetched concurrently, then every wallet is
+    compared and recorded in one DB transaction.
+    
+    Args:
+        db: Async database session
+        wallets: (wallet_address, account_ids) pairs
+        notes: Optional notes
+        reconciled_by: User/system performing reconciliation
+        as_of: Time the external balances were observed (default: now)
+        fetch_balance: Async balance lookup (see fetch_wallet_balances)
+        max_concurrency: Maximum balance requests in flight
+    
+    Returns:
+        Dict with per-wallet results and fetch_ms, db_ms and total_ms timings
+    """
+    started = time.perf_counter()
+    external_balances = await fetch_wallet_balances(
+        [wallet_address for wallet_address, _ in wallets], fetch_balance, max_concurrency
+    )
+    fetched = time.perf_counter()
+    
+    results = await db.run_sync(
+        record_wallet_reconciliations,
+        wallets,
+        external_balances,
+        notes=notes,
+        reconciled_by=reconciled_by,
+        as_of=as_of
+    )
+    finished = time.perf_counter()
+    
+    report = {
+        "results": results,
+        "matched": sum(1 for r in results if r["status"] == "MATCHED"),
+        "discrepancies": sum(1 for r in results if r["status"] == "DISCREPANCY"),
+        "failed": sum(1 for r in results if r["status"] == "FETCH_FAILED"),
+        "fetch_ms": (fetched - started) * 1000,
+        "db_ms": (finished - fetched) * 1000,
+        "total_ms": (finished - started) * 1000
+    }
+    
+    logger.info(
+        f"Reconciled {len(results)} wallets: {report['matched']} matched, "
+        f"{report['discrepancies']} discrepancies, {report['failed']} failed "
+        f"(fetch {report['fetch_ms']:.0f}ms, db {report['db_ms']:.0f}ms)"
+    )
+    return report
@@ -0,0 +1,259 @@
+"""
+In-process cache of compiled allocation rules.
+Avoids re-querying and re-validating allocation rules on every allocation.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import and_, update
+from sqlalchemy.orm import Session
+
+from ledger_api.models.ledger_models import AllocationRule, ConfigVersion, LogicalAccount
+
+logger = logging.getLogger(__name__)
+
+ALLOCATION_RULES_VERSION = "allocation_rules"
+
+
+@dataclass(frozen=True)
+class CompiledAllocation:
+    """One validated allocation target with its precomputed values."""
+    account_id: int
+    account_name: str
+    percentage: Decimal
+    fraction: Decimal  # percentage / 100
+    purpose: str
+    meta_data: Tuple[Tuple[str, Any], ...]
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """The active allocation rule for one trigger type, ready to apply."""
+    rule_id: int
+    rule_name: str
+    trigger_transaction_type: str
+    allocations: Tuple[CompiledAllocation, ...]
+    # False when targets were dropped as missing or inactive
+    complete: bool = True
+    
+    @property
+    def account_ids(self) -> Set[int]:
+        return {allocation.account_id for allocation in self.allocations}
+
+
+def compile_rule(rule: AllocationRule, accounts: Dict[int, LogicalAccount]) -> CompiledRule:
+    """
+    Validate an allocation rule and precompute its allocation plan.
+    
+    Targets that do not exist or are inactive are dropped from the plan.
+    
+    Args:
+        rule: Allocation rule
+        accounts: Target accounts by id
+    
+    Returns:
+        CompiledRule: Compiled plan
+    
+    Raises:
+        ValueError: If the rule is empty or does not sum to 100%
+    """
+    if not rule.allocations:
+        raise ValueError(f"Allocation rule '{rule.rule_name}' has no allocations defined")
+    
+    # Verify allocations sum to 100% (within tolerance)
+    total_percentage = sum(Decimal(str(a.get("percentage", 0))) for a in rule.allocations)
+    if abs(total_percentage - 100) > Decimal("0.01"):
+        raise ValueError(f"Allocation percentages sum to {total_percentage}%, must be 100%")
+    
+    compiled = []
+    for allocation in rule.allocations:
+        account_id = allocation.get("account_id")
+        percentage = Decimal(str(allocation.get("percentage")))
+        
+        account = accounts.get(account_id)
+        if not account:
+            logger.error(f"Account {account_id} not found in allocation rule")
+            continue
+        
+        if not account.is_active:
+            logger.warning(f"Skipping inactive account {account.account_name}")
+            continue
+        
+        compiled.append(CompiledAllocation(
+            account_id=account_id,
+            account_name=account.account_name,
+            percentage=percentage,
+            fraction=percentage / 100,
+            purpose=f"Auto-allocation: {percentage}% to {account.account_name}",
+            meta_data=(
+                ("allocation_rule_id", rule.id),
+                ("allocation_rule_name", rule.rule_name),
+                ("allocation_percentage", float(percentage))
+            )
+        ))
+    
+    return CompiledRule(
+        rule_id=rule.id,
+        rule_name=rule.rule_name,
+        trigger_transaction_type=rule.trigger_transaction_type,
+        allocations=tuple(compiled),
+        complete=len(compiled) == len(rule.allocations)
+    )
+
+
+def get_config_version(db: Session, name: str = ALLOCATION_RULES_VERSION) -> int:
+    """
+    Read a configuration version counter.
+    
+    Args:
+        db: Database session
+        name: Counter name
+    
+    Returns:
+        int: Current version (0 if the counter row does not exist yet)
+    """
+    version = db.query(ConfigVersion.version).filter(ConfigVersion.name == name).scalar()
+    return version or 0
+
+
+def bump_config_version(db: Session, name: str = ALLOCATION_RULES_VERSION) -> None:
+    """
+    Increment a configuration version counter.
+    
+    Call in the same transaction as the configuration change; other
+    workers see the new version (and drop their caches) once it commits.
+    
+    Args:
+        db: Database session
+        name: Counter name
+    """
+    bumped = db.execute(
+        update(ConfigVersion)
+        .where(ConfigVersion.name == name)
+        .values(version=ConfigVersion.version + 1)
+    ).rowcount
+    
+    if not bumped:
+        db.add(ConfigVersion(name=name, version=1))
+        db.flush()
+
+
+class AllocationRuleCache:
+    """
+    Compiled allocation rules keyed by trigger transaction type.
+    
+    Each lookup reads the ``allocation_rules`` version counter (a primary
+    key lookup) and discards every compiled plan when it changed, so rule
+    edits made by any worker take effect on the next allocation.
+    
+    Plans that dropped a missing or inactive target are not cached. Creating
+    or re-activating that account then takes effect on the next allocation
+    without a version bump, which only PostgreSQL's triggers provide.
+    """
+    
+    def __init__(self, check_interval: float = 0.0, clock=time.monotonic):
+        """
+        Initialize rule cache
+        
+        Args:
+            check_interval: Seconds to trust the cached version before
+                re-reading the counter (0 reads it on every lookup)
+            clock: Monotonic time source
+        """
+        self.check_interval = check_interval
+        self.clock = clock
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._plans: Dict[str, Optional[CompiledRule]] = {}
+        
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "invalidations": 0
+        }
+    
+    def invalidate(self) -> None:
+        """Drop every compiled plan"""
+        self._version = None
+        self._plans = {}
+        self.stats["invalidations"] += 1
+    
+    def _sync_version(self, db: Session) -> None:
+        now = self.clock()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return
+        
+        version = get_config_version(db)
+        self._checked_at = now
+        if version != self._version:
+            if self._version is not None:
+                logger.info(f"Allocation rules changed (version {self._version} -> {version}), recompiling")
+            self._version = version
+            self._plans = {}
+    
+    def get_rules(self, db: Session, transaction_types: Iterable[str]) -> Dict[str, CompiledRule]:
+        """
+        Get the compiled highest priority active rule for each transaction type.
+        
+        Args:
+            db: Database session
+            transaction_types: Trigger transaction types to look up
+        
+        Returns:
+            Dict mapping transaction type to its compiled rule (types
+            without an active rule are omitted)
+        
+        Raises:
+            ValueError: If a selected rule is empty or does not sum to 100%
+        """
+        self._sync_version(db)
+        plans = self._plans
+        
+        found = {t: plans[t] for t in transaction_types if t in plans}
+        missing = {t for t in transaction_types if t not in plans}
+        if missing:
+            self.stats["misses"] += len(missing)
+            compiled = self._compile(db, missing)
+            plans.update({t: plan for t, plan in compiled.items() if plan is None or plan.complete})
+            found.update(compiled)
+        else:
+            self.stats["hits"] += 1
+        
+        return {
+            t: found[t] for t in transaction_types if found.get(t) is not None
+        }
+    
+    def _compile(self, db: Session, transaction_types: Set[str]) -> Dict[str, Optional[CompiledRule]]:
+        allocation_rules = db.query(AllocationRule).filter(
+            and_(
+                AllocationRule.trigger_transaction_type.in_(transaction_types),
+                AllocationRule.is_active == True
+            )
+        ).order_by(AllocationRule.priority.desc()).all()
+        
+        rules: Dict[str, AllocationRule] = {}
+        for rule in allocation_rules:
+            rules.setdefault(rule.trigger_transaction_type, rule)
+        
+        account_ids = {
+            allocation.get("account_id")
+            for rule in rules.values()
+            for allocation in rule.allocations or ()
+        }
+        accounts = {}
+        if account_ids:
+            accounts = {
+                account.id: account
+                for account in db.query(LogicalAccount).filter(LogicalAccount.id.in_(account_ids))
+            }
+        
+        compiled: Dict[str, Optional[CompiledRule]] = {t: None for t in transaction_types}
+        for transaction_type, rule in rules.items():
+            compiled[transaction_type] = compile_rule(rule, accounts)
+        return compiled
+
+
+allocation_rule_cache = AllocationRuleCache()
@@ -6,7 +6,9 @@ Sets up in-memory SQLite database for testing.
 import os
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
 
 # Set test environment
@@ -14,20 +16,41 @@ os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["GUARDIAN_JWT_SECRET"] = "test-secret-key-min-32-characters-long"
 os.environ["NFT_MINT_VALUE"] = "0"
 os.environ["APP_ENVIRONMENT"] = "testnet"
+# Export rows as soon as they are committed; the watermark has its own tests
+os.environ["EXPORT_COMMIT_LAG_SECONDS"] = "0"
 
-from ledger_api.db import Base, get_db
+from ledger_api.db import Base, get_db, get_async_db, get_async_sessionmaker
 from ledger_api.main import app
 from ledger_api.models.ledger_models import LogicalAccount, AllocationRule
+from ledger_api.services.rule_cache import allocation_rule_cache
 
 
 @pytest.fixture(scope="function")
-def test_engine():
+def test_db_path(tmp_path):
+    """Path of the per-test SQLite database file."""
+    # A file (not :memory:) so the sync and async engines share one database
+    return tmp_path / "ledger_test.db"
+
+
+@pytest.fixture(scope="function")
+def test_engine(test_db_path):
     """Create a test database engine."""
     engine = create_engine(
-        "sqlite:///:memory:",
+        f"sqlite:///{test_db_path}",
         connect_args={"check_same_thread": False}
     )
-    return engine
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def test_async_engine(test_db_path):
+    """Create an async engine on the test database."""
+    # NullPool: connections are opened in the TestClient's event loop and
+    # must not be reused from another loop
+    engine = create_async_engine(f"sqlite+aiosqlite:///{test_db_path}", poolclass=NullPool)
+    yield engine
+    engine.sync_engine.dispose()
 
 
 @pytest.fixture(scope="function")
@@ -48,6 +71,9 @@ def test_db(test_engine):
     # Seed with default accounts
     seed_test_data(db)
     
+    # Every test starts from a fresh database
+    allocation_rule_cache.invalidate()
+    
     yield db
     
     db.close()
@@ -55,11 +81,11 @@ def test_db(test_engine):
 
 
 @pytest.fixture(scope="function")
-def client(test_db):
+def client(test_db, test_async_engine):
     """Create test client with test database."""
     # Create test app without lifespan
     from fastapi import FastAPI
-    from ledger_api.api.v1 import transactions, treasury, reconcile, allocation_rules
+    from ledger_api.api.v1 import transactions, treasury, reconcile, allocation_rules, export
     
     test_app = FastAPI(title="Test Ledger API")
     
@@ -68,6 +94,7 @@ def client(test_db):
     test_app.include_router(treasury.router, prefix="/api/v1")
     test_app.include_router(reconcile.router, prefix="/api/v1")
     test_app.include_router(allocation_rules.router, prefix="/api/v1")
+    test_app.include_router(export.router, prefix="/api/v1")
     
     # Add health endpoints
     @test_app.get("/")
@@ -84,7 +111,20 @@ def client(test_db):
         finally:
             pass
     
+    TestingAsyncSessionLocal = async_sessionmaker(
+        test_async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+    
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+    
     test_app.dependency_overrides[get_db] = override_get_db
+    test_app.dependency_overrides[get_async_db] = override_get_async_db
+    test_app.dependency_overrides[get_async_sessionmaker] = lambda: TestingAsyncSessionLocal
     
     with TestClient(test_app) as test_client:
         yield test_client
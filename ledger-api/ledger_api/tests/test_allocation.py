@@ -5,8 +5,14 @@ Tests atomic allocation creation and balance updates.
 
 import pytest
 from decimal import Decimal
-from ledger_api.models.ledger_models import LedgerTransaction, LogicalAccount
-from ledger_api.services.allocation import apply_allocations, validate_allocation_rule
+from sqlalchemy import event
+from ledger_api.models.ledger_models import LedgerTransaction, LogicalAccount, AllocationRule, AuditLog
+from ledger_api.services.allocation import (
+    apply_allocations,
+    apply_allocations_batch,
+    validate_allocation_rule
+)
+from ledger_api.services.rule_cache import AllocationRuleCache, allocation_rule_cache, bump_config_version
 
 
 def test_apply_allocations_creates_child_transactions(test_db):
@@ -216,3 +222,177 @@ def test_validate_allocation_rule_account_active(test_db):
     
     with pytest.raises(ValueError, match="not active"):
         validate_allocation_rule(allocations, test_db)
+
+
+def _create_deposits(db, amounts):
+    """Create committed COMPLETED deposits."""
+    deposits = [
+        LedgerTransaction(
+            transaction_type="EXTERNAL_DEPOSIT",
+            to_account_id=1,
+            amount=Decimal(str(amount)),
+            status="COMPLETED",
+            purpose="Test deposit"
+        )
+        for amount in amounts
+    ]
+    db.add_all(deposits)
+    db.commit()
+    return deposits
+
+
+def test_apply_allocations_batch(test_db):
+    """Test a batch of deposits is allocated in one DB transaction."""
+    deposits = _create_deposits(test_db, [100, 200, 300])
+    apply_allocations(test_db, deposits[0], changed_by="test")
+    
+    results = apply_allocations_batch(test_db, deposits, changed_by="test")
+    
+    # First deposit was already allocated, the rest are allocated now
+    assert results[0]["child_transaction_ids"] == []
+    assert [r["total_allocated"] for r in results[1:]] == [200.0, 300.0]
+    
+    test_db.expire_all()
+    reserve = test_db.query(LogicalAccount).filter(LogicalAccount.id == 1).first()
+    assert reserve.current_balance == Decimal("240")
+    
+    audit_rows = test_db.query(AuditLog).filter(AuditLog.table_name == "logical_accounts").all()
+    assert len(audit_rows) == 12
+    # Audit trail chains balances across deposits in the same batch
+    reserve_audit = [a for a in audit_rows if a.record_id == 1]
+    assert [a.new_values["current_balance"] for a in reserve_audit] == [40.0, 120.0, 240.0]
+
+
+def test_apply_allocations_round_trips_do_not_grow_with_rule_width(test_db):
+    """Test a 10-way rule costs the same number of statements as a 4-way rule."""
+    for i in range(6):
+        test_db.add(LogicalAccount(account_name=f"Extra {i}", account_type="RESERVE", current_balance=0))
+    test_db.commit()
+    
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, params, context, executemany: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        # The first deposit compiles the rule, the second uses the cached plan
+        warmup, deposit = _create_deposits(test_db, [100, 100])
+        apply_allocations(test_db, warmup, changed_by="test")
+        statements.clear()
+        apply_allocations(test_db, deposit, changed_by="test")
+        four_way = len(statements)
+        
+        rule = test_db.query(AllocationRule).first()
+        rule.allocations = [{"account_id": i, "percentage": 10.0} for i in range(1, 11)]
+        bump_config_version(test_db)
+        test_db.commit()
+        
+        warmup, deposit = _create_deposits(test_db, [100, 100])
+        apply_allocations(test_db, warmup, changed_by="test")
+        statements.clear()
+        result = apply_allocations(test_db, deposit, changed_by="test")
+        ten_way = len(statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    
+    assert len(result["child_transaction_ids"]) == 10
+    assert ten_way == four_way
+    # ... of which one appends the balance snapshots
+    assert ten_way <= 8
+
+
+def test_rule_cache_compiles_once_per_version(test_db):
+    """Test rules are compiled once and reused until the version changes."""
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, params, context, executemany: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        rules = allocation_rule_cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"})
+        cold = len(statements)
+        statements.clear()
+        assert allocation_rule_cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"}) == rules
+        warm = statements[:]
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    
+    # Warm lookups only read the version counter
+    assert len(warm) == 1
+    assert "config_versions" in warm[0]
+    assert cold > len(warm)
+    
+    plan = rules["EXTERNAL_DEPOSIT"]
+    assert [a.fraction for a in plan.allocations] == [
+        Decimal("0.4"), Decimal("0.25"), Decimal("0.2"), Decimal("0.15")
+    ]
+    assert plan.allocations[0].purpose == "Auto-allocation: 40.0% to Reserve Treasury"
+
+
+def test_rule_cache_invalidated_by_other_worker(test_db):
+    """Test a version bump committed elsewhere makes the cache recompile."""
+    other_worker = AllocationRuleCache()
+    assert len(other_worker.get_rules(test_db, {"EXTERNAL_DEPOSIT"})["EXTERNAL_DEPOSIT"].allocations) == 4
+    
+    # Deactivating a target account only takes effect after a version bump
+    account = test_db.query(LogicalAccount).filter(LogicalAccount.id == 4).first()
+    account.is_active = False
+    test_db.commit()
+    assert len(other_worker.get_rules(test_db, {"EXTERNAL_DEPOSIT"})["EXTERNAL_DEPOSIT"].allocations) == 4
+    
+    bump_config_version(test_db)
+    test_db.commit()
+    plan = other_worker.get_rules(test_db, {"EXTERNAL_DEPOSIT"})["EXTERNAL_DEPOSIT"]
+    assert [a.account_id for a in plan.allocations] == [1, 2, 3]
+    assert other_worker.stats["misses"] == 2
+
+
+def test_rule_cache_does_not_keep_plans_missing_accounts(test_db):
+    """Test adding or re-activating a target takes effect without a version bump."""
+    cache = AllocationRuleCache()
+    rule = test_db.query(AllocationRule).first()
+    rule.allocations = [
+        {"account_id": 1, "percentage": 50.0},
+        {"account_id": 99, "percentage": 50.0}
+    ]
+    bump_config_version(test_db)
+    test_db.commit()
+    
+    plan = cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"})["EXTERNAL_DEPOSIT"]
+    assert [a.account_id for a in plan.allocations] == [1]
+    assert not plan.complete
+    
+    # Without triggers nothing bumps the version when the account appears
+    test_db.add(LogicalAccount(id=99, account_name="Late Account", account_type="RESERVE", current_balance=0))
+    test_db.commit()
+    plan = cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"})["EXTERNAL_DEPOSIT"]
+    assert [a.account_id for a in plan.allocations] == [1, 99]
+    
+    # ... nor when an inactive one is re-activated
+    account = test_db.query(LogicalAccount).filter(LogicalAccount.id == 99).first()
+    account.is_active = False
+    bump_config_version(test_db)
+    test_db.commit()
+    assert len(cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"})["EXTERNAL_DEPOSIT"].allocations) == 1
+    account.is_active = True
+    test_db.commit()
+    assert len(cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"})["EXTERNAL_DEPOSIT"].allocations) == 2
+    
+    # Complete plans are cached again
+    misses = cache.stats["misses"]
+    cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"})
+    assert cache.stats["misses"] == misses
+
+
+def test_rule_cache_check_interval(test_db):
+    """Test the version counter is not re-read within the check interval."""
+    now = [0.0]
+    cache = AllocationRuleCache(check_interval=5.0, clock=lambda: now[0])
+    cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"})
+    
+    rule = test_db.query(AllocationRule).first()
+    rule.is_active = False
+    bump_config_version(test_db)
+    test_db.commit()
+    
+    assert "EXTERNAL_DEPOSIT" in cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"})
+    now[0] = 5.0
+    assert cache.get_rules(test_db, {"EXTERNAL_DEPOSIT"}) == {}
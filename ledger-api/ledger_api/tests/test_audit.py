@@ -0,0 +1,300 @@
+"""
+Tests for the audit log sink.
+Tests per-unit-of-work batching and the background writer's spill file.
+"""
+
+import json
+import logging
+import threading
+import time
+import pytest
+from decimal import Decimal
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from ledger_api.models.ledger_models import AuditLog, LedgerTransaction
+from ledger_api.services.allocation import apply_allocations_batch
+from ledger_api.services import audit as audit_service
+from ledger_api.services.audit import (
+    AuditLogWriter,
+    create_audit_log,
+    get_audit_trail,
+    set_audit_writer
+)
+
+
+def _audit_inserts(statements):
+    return [s for s in statements if s.startswith("INSERT INTO audit_log")]
+
+
+def _entry(record_id):
+    return {"table_name": "ledger_transactions", "record_id": record_id, "operation": "CREATE",
+            "new_values": {"n": record_id}, "changed_by": "test"}
+
+
+@pytest.fixture
+def session_factory(test_engine, test_db):
+    return sessionmaker(bind=test_engine, autoflush=False)
+
+
+@pytest.fixture
+def failing_session_factory():
+    def factory():
+        raise ConnectionError("database unavailable")
+    return factory
+
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / "audit_spill.jsonl")
+
+
+@pytest.fixture
+def writer(session_factory, spill_path):
+    writer = AuditLogWriter(session_factory, spill_path, flush_interval=0.01)
+    writer.start()
+    set_audit_writer(writer)
+    yield writer
+    set_audit_writer(None)
+    writer.stop()
+
+
+def test_unit_of_work_writes_audit_rows_in_one_insert(test_db):
+    """Test every audit entry of a unit of work is written by one bulk insert."""
+    deposits = [
+        LedgerTransaction(transaction_type="EXTERNAL_DEPOSIT", to_account_id=1,
+                          amount=Decimal("100"), status="COMPLETED")
+        for _ in range(3)
+    ]
+    test_db.add_all(deposits)
+    test_db.commit()
+    
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, params, context, executemany: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for deposit in deposits:
+            create_audit_log(test_db, "ledger_transactions", deposit.id, "UPDATE", changed_by="test")
+        apply_allocations_batch(test_db, deposits, changed_by="test")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    
+    assert len(_audit_inserts(statements)) == 1
+    # 3 explicit entries + 3 deposits x 4 balance updates
+    assert test_db.query(AuditLog).count() == 15
+
+
+def test_rolled_back_audit_entries_are_discarded(test_db):
+    """Test entries of a rolled back unit of work are never written."""
+    create_audit_log(test_db, "ledger_transactions", 1, "CREATE")
+    test_db.rollback()
+    test_db.commit()
+    
+    assert test_db.query(AuditLog).count() == 0
+
+
+def test_audit_trail_includes_uncommitted_entries(test_db):
+    """Test get_audit_trail sees entries buffered by the same session."""
+    create_audit_log(test_db, "ledger_transactions", 7, "CREATE", changed_by="test")
+    
+    trail = get_audit_trail(test_db, table_name="ledger_transactions", record_id=7)
+    assert [entry.record_id for entry in trail] == [7]
+    
+    # Written once, not again at commit
+    test_db.commit()
+    assert test_db.query(AuditLog).count() == 1
+
+
+def test_async_writer_writes_after_commit(test_db, session_factory, writer):
+    """Test the background writer inserts committed entries outside the caller's transaction."""
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, params, context, executemany: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        create_audit_log(test_db, "ledger_transactions", 1, "CREATE", changed_by="test")
+        test_db.commit()
+        # Nothing is written in the caller's transaction
+        caller_statements = statements[:]
+        assert writer.flush(timeout=5)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    
+    assert _audit_inserts(caller_statements) == []
+    assert writer.stats["written"] == 1
+    assert [entry.record_id for entry in get_audit_trail(test_db)] == [1]
+    
+    # Rolled back entries never reach the writer
+    create_audit_log(test_db, "ledger_transactions", 2, "CREATE")
+    test_db.rollback()
+    assert writer.stats["submitted"] == 1
+
+
+def test_async_writer_with_api_requests(client, test_db, writer):
+    """Test async audit logging for transactions created through the API."""
+    response = client.post("/api/v1/transactions/bulk", json={"transactions": [
+        {"transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 10.0, "status": "COMPLETED"}
+        for _ in range(5)
+    ]})
+    assert response.status_code == 201
+    assert writer.flush(timeout=5)
+    
+    # 5 transactions + 5 deposits x 4 balance updates, from one commit
+    assert writer.stats["submitted"] == 25
+    assert test_db.query(AuditLog).count() == 25
+
+
+def test_async_writer_batches_bursts(test_db, session_factory, spill_path):
+    """Test a burst of committed units of work is written in a few large batches."""
+    writer = AuditLogWriter(session_factory, spill_path, batch_size=100, flush_interval=1.0)
+    writer.start()
+    set_audit_writer(writer)
+    try:
+        for record_id in range(300):
+            create_audit_log(test_db, "ledger_transactions", record_id, "CREATE")
+            test_db.commit()
+        assert writer.flush(timeout=10)
+    finally:
+        set_audit_writer(None)
+        writer.stop()
+    
+    assert test_db.query(AuditLog).count() == 300
+    assert writer.stats["batches"] <= 4
+    # Drained: the spill file is emptied
+    with open(spill_path) as f:
+        assert f.read() == ""
+
+
+def test_spilled_entries_survive_crash(test_db, session_factory, failing_session_factory, spill_path):
+    """Test entries spilled while the database was down are replayed on the next start."""
+    crashed = AuditLogWriter(failing_session_factory, spill_path, flush_interval=0.01)
+    crashed.start()
+    crashed.submit([dict(row, changed_at=row_time) for row, row_time in _rows(3)])
+    crashed.stop(timeout=5)
+    
+    with open(spill_path) as f:
+        assert len(f.readlines()) == 3
+    
+    recovered = AuditLogWriter(session_factory, spill_path)
+    recovered.start()
+    recovered.stop()
+    
+    assert recovered.stats["replayed"] == 3
+    assert sorted(entry.record_id for entry in test_db.query(AuditLog)) == [0, 1, 2]
+    with open(spill_path) as f:
+        assert f.read() == ""
+
+
+def test_replay_skips_checkpointed_and_torn_entries(test_db, session_factory, failing_session_factory, spill_path):
+    """Test replay resumes after the checkpoint and ignores an unacknowledged torn line."""
+    crashed = AuditLogWriter(failing_session_factory, spill_path, flush_interval=0.01)
+    crashed.start()
+    crashed.submit([dict(row, changed_at=row_time) for row, row_time in _rows(3)])
+    crashed.stop(timeout=5)
+    
+    # Two entries were inserted before the crash; a fourth was half-written
+    with open(f"{spill_path}.offset", "w") as f:
+        f.write("2")
+    with open(spill_path, "a") as f:
+        f.write(json.dumps({"table_name": "ledger_transactions"})[:20])
+    
+    recovered = AuditLogWriter(session_factory, spill_path)
+    recovered.start()
+    recovered.stop()
+    
+    assert [entry.record_id for entry in test_db.query(AuditLog)] == [2]
+
+
+def test_fsync_runs_on_writer_thread(test_db, writer, monkeypatch):
+    """Test committing does not fsync; the writer thread syncs the spill file before inserting."""
+    synced_by = []
+    monkeypatch.setattr(audit_service.os, "fsync", lambda fd: synced_by.append(threading.current_thread().name))
+    
+    create_audit_log(test_db, "ledger_transactions", 1, "CREATE")
+    test_db.commit()
+    committed_syncs = synced_by[:]
+    assert writer.flush(timeout=5)
+    
+    assert committed_syncs == []
+    assert synced_by and set(synced_by) == {"audit-log-writer"}
+
+
+def test_submit_failure_does_not_fail_commit(test_db, session_factory, spill_path, caplog):
+    """Test a writer that cannot queue entries logs them instead of failing the committed request."""
+    stopped = AuditLogWriter(session_factory, spill_path)
+    set_audit_writer(stopped)
+    try:
+        create_audit_log(test_db, "ledger_transactions", 7, "CREATE")
+        with caplog.at_level(logging.ERROR, logger=audit_service.__name__):
+            test_db.commit()
+    finally:
+        set_audit_writer(None)
+    
+    assert "Could not queue 1 committed audit log entries" in caplog.text
+    assert '"record_id":7' in caplog.text
+
+
+def test_failing_batch_is_dead_lettered(test_db, session_factory, spill_path):
+    """Test a row that can never be inserted is moved aside instead of blocking later rows."""
+    writer = AuditLogWriter(session_factory, spill_path, batch_size=1, flush_interval=0.01, max_attempts=3)
+    writer.start()
+    try:
+        rows = [dict(row, changed_at=row_time) for row, row_time in _rows(3)]
+        rows[0]["table_name"] = None
+        for row in rows:
+            writer.submit([row])
+        assert writer.flush(timeout=5)
+    finally:
+        writer.stop()
+    
+    assert writer.stats["dead_lettered"] == 1
+    assert sorted(entry.record_id for entry in test_db.query(AuditLog)) == [1, 2]
+    with open(writer.dead_letter_path) as f:
+        assert [json.loads(line)["record_id"] for line in f] == [0]
+    with open(spill_path) as f:
+        assert f.read() == ""
+
+
+def test_audit_trail_does_not_wait_for_failing_writer(test_db, failing_session_factory, spill_path, caplog):
+    """Test the audit trail returns after its flush timeout while the database is failing."""
+    writer = AuditLogWriter(failing_session_factory, spill_path, flush_interval=0.01)
+    writer.start()
+    set_audit_writer(writer)
+    try:
+        create_audit_log(test_db, "ledger_transactions", 1, "CREATE")
+        test_db.commit()
+        started = time.monotonic()
+        with caplog.at_level(logging.WARNING, logger=audit_service.__name__):
+            assert get_audit_trail(test_db, flush_timeout=0.1) == []
+        assert time.monotonic() - started < 2
+    finally:
+        set_audit_writer(None)
+        writer.stop(timeout=5)
+    
+    assert "Audit writer is 1 entries behind" in caplog.text
+
+
+def test_replay_dead_letters_unreadable_lines(test_db, session_factory, spill_path):
+    """Test a line torn mid-file is moved to the dead-letter file and the rest replayed."""
+    good = [json.dumps({**row, "changed_at": row_time.isoformat()}) for row, row_time in _rows(2)]
+    with open(spill_path, "w") as f:
+        f.write(good[0] + "\n" + '{"table_name": "ledger' + "\n" + good[1] + "\n")
+    
+    recovered = AuditLogWriter(session_factory, spill_path)
+    recovered.start()
+    recovered.stop()
+    
+    assert recovered.stats["replayed"] == 2
+    assert sorted(entry.record_id for entry in test_db.query(AuditLog)) == [0, 1]
+    with open(recovered.dead_letter_path) as f:
+        assert f.read() == '{"table_name": "ledger\n'
+
+
+def _rows(count):
+    from datetime import datetime
+    now = datetime.utcnow()
+    for record_id in range(count):
+        row = _entry(record_id)
+        row.update(old_values={}, ip_address=None, user_agent=None)
+        yield row, now
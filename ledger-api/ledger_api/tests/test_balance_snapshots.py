@@ -0,0 +1,207 @@
+"""
+Tests for account balance snapshots.
+Tests incremental maintenance, point-in-time balances and compaction.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ledger_api.models.ledger_models import AccountBalanceSnapshot, LedgerTransaction, LogicalAccount
+from ledger_api.services.allocation import apply_allocations_batch
+from ledger_api.services.balance_snapshots import (
+    BalanceSnapshotCompactor,
+    compact_balance_snapshots,
+    get_balances_as_of,
+    record_balance_snapshots
+)
+
+NOW = datetime(2024, 3, 10, 12, 30)
+
+
+def _record(db, account_id, balance, as_of):
+    record_balance_snapshots(db, [(account_id, Decimal(str(balance)), None)], as_of)
+    db.commit()
+
+
+def _snapshots(db, account_id):
+    return [
+        (s.as_of.replace(tzinfo=None), s.balance, s.granularity)
+        for s in db.query(AccountBalanceSnapshot).filter(
+            AccountBalanceSnapshot.account_id == account_id
+        ).order_by(AccountBalanceSnapshot.as_of)
+    ]
+
+
+def test_allocation_appends_closing_balance_snapshots(test_db):
+    """Test one snapshot per touched account per batch, matching current_balance."""
+    deposits = [
+        LedgerTransaction(transaction_type="EXTERNAL_DEPOSIT", to_account_id=1,
+                          amount=Decimal(amount), status="COMPLETED")
+        for amount in ("100", "200")
+    ]
+    test_db.add_all(deposits)
+    test_db.commit()
+    
+    results = apply_allocations_batch(test_db, deposits, changed_by="test")
+    
+    snapshots = test_db.query(AccountBalanceSnapshot).order_by(AccountBalanceSnapshot.account_id).all()
+    assert [s.account_id for s in snapshots] == [1, 2, 3, 4]
+    assert all(s.granularity == "RAW" for s in snapshots)
+    
+    accounts = {a.id: a for a in test_db.query(LogicalAccount)}
+    for snapshot in snapshots:
+        assert snapshot.balance == accounts[snapshot.account_id].current_balance
+    assert snapshots[0].balance == Decimal("120")
+    
+    # Each snapshot points at the last child transaction that moved the balance
+    assert snapshots[0].transaction_id == results[1]["child_transaction_ids"][0]
+
+
+def test_balances_as_of(test_db):
+    """Test point-in-time balances take the latest snapshot at or before the time."""
+    _record(test_db, 1, 10, NOW - timedelta(hours=2))
+    _record(test_db, 1, 25, NOW - timedelta(hours=1))
+    _record(test_db, 2, 5, NOW - timedelta(hours=1))
+    
+    assert get_balances_as_of(test_db, NOW - timedelta(hours=3), [1, 2]) == {1: 0, 2: 0}
+    assert get_balances_as_of(test_db, NOW - timedelta(hours=2), [1, 2]) == {1: 10, 2: 0}
+    assert get_balances_as_of(test_db, NOW, [1, 2]) == {1: 25, 2: 5}
+    assert set(get_balances_as_of(test_db, NOW)) == {1, 2, 3, 4}
+
+
+def test_balances_as_of_is_one_query_regardless_of_history(test_db):
+    """Test a point-in-time lookup costs one statement however many snapshots exist."""
+    for minute in range(200):
+        record_balance_snapshots(
+            test_db,
+            [(account_id, Decimal(minute), None) for account_id in (1, 2, 3, 4)],
+            NOW - timedelta(minutes=minute)
+        )
+    test_db.commit()
+    
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, params, context, executemany: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        balances = get_balances_as_of(test_db, NOW - timedelta(minutes=50))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    
+    assert len(statements) == 1
+    assert balances == {1: 50, 2: 50, 3: 50, 4: 50}
+
+
+def test_compaction_rolls_up_hourly_then_daily(test_db):
+    """Test old snapshots collapse to each bucket's closing balance."""
+    # Two days ago: four snapshots in two hours
+    two_days_ago = datetime(2024, 3, 8, 10, 0)
+    for minutes, balance in [(5, 1), (40, 2), (65, 3), (90, 4)]:
+        _record(test_db, 1, balance, two_days_ago + timedelta(minutes=minutes))
+    # Within the raw retention window: kept as is
+    _record(test_db, 1, 5, NOW - timedelta(minutes=10))
+    _record(test_db, 1, 6, NOW - timedelta(minutes=5))
+    
+    removed = compact_balance_snapshots(test_db, now=NOW)
+    
+    assert removed == {"HOUR": 2, "DAY": 0}
+    assert _snapshots(test_db, 1) == [
+        (datetime(2024, 3, 8, 10, 40), Decimal("2"), "HOUR"),
+        (datetime(2024, 3, 8, 11, 30), Decimal("4"), "HOUR"),
+        (NOW - timedelta(minutes=10), Decimal("5"), "RAW"),
+        (NOW - timedelta(minutes=5), Decimal("6"), "RAW"),
+    ]
+    
+    # Balances at bucket boundaries are unchanged by compaction
+    assert get_balances_as_of(test_db, datetime(2024, 3, 8, 11, 0), [1]) == {1: 2}
+    assert get_balances_as_of(test_db, datetime(2024, 3, 8, 12, 0), [1]) == {1: 4}
+    
+    # Re-running is a no-op
+    assert compact_balance_snapshots(test_db, now=NOW) == {"HOUR": 0, "DAY": 0}
+    
+    # A month later every day has rolled up to its daily close
+    removed = compact_balance_snapshots(test_db, now=NOW + timedelta(days=31))
+    assert removed == {"HOUR": 1, "DAY": 1}
+    assert _snapshots(test_db, 1) == [
+        (datetime(2024, 3, 8, 11, 30), Decimal("4"), "DAY"),
+        (NOW - timedelta(minutes=5), Decimal("6"), "DAY"),
+    ]
+
+
+def test_compaction_keeps_accounts_separate(test_db):
+    """Test each account keeps its own closing balance per bucket."""
+    old = datetime(2024, 3, 1, 8, 0)
+    for account_id in (1, 2):
+        _record(test_db, account_id, account_id * 10, old + timedelta(minutes=1))
+        _record(test_db, account_id, account_id * 10 + 1, old + timedelta(minutes=2))
+    
+    compact_balance_snapshots(test_db, now=NOW)
+    
+    assert _snapshots(test_db, 1) == [(old + timedelta(minutes=2), Decimal("11"), "HOUR")]
+    assert _snapshots(test_db, 2) == [(old + timedelta(minutes=2), Decimal("21"), "HOUR")]
+
+
+@pytest.mark.asyncio
+async def test_compactor_runs_in_background(test_db, test_async_engine):
+    """Test the background compactor runs a pass on start and stops cleanly."""
+    old = datetime.utcnow() - timedelta(days=3)
+    _record(test_db, 1, 1, old.replace(minute=1))
+    _record(test_db, 1, 2, old.replace(minute=2))
+    
+    session_factory = async_sessionmaker(test_async_engine, class_=AsyncSession, expire_on_commit=False)
+    compactor = BalanceSnapshotCompactor(session_factory, interval_seconds=3600)
+    assert await compactor.run_once() == {"HOUR": 1, "DAY": 0}
+    
+    compactor.start()
+    await compactor.stop()
+    
+    test_db.expire_all()
+    assert [granularity for _, _, granularity in _snapshots(test_db, 1)] == ["HOUR"]
+
+
+def test_treasury_status_as_of(client):
+    """Test treasury status reports historical balances."""
+    before = datetime.utcnow()
+    client.post("/api/v1/transactions/", json={
+        "transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 100.0, "status": "COMPLETED"
+    })
+    
+    now_status = client.get("/api/v1/treasury/status").json()
+    assert float(now_status["total_balance"]) == 100.0
+    
+    past_status = client.get("/api/v1/treasury/status", params={"as_of": before.isoformat()}).json()
+    assert float(past_status["total_balance"]) == 0.0
+    assert all(float(a["current_balance"]) == 0.0 for a in past_status["accounts"])
+    
+    later = client.get(
+        "/api/v1/treasury/status", params={"as_of": (datetime.utcnow() + timedelta(minutes=1)).isoformat()}
+    ).json()
+    assert later["total_balance"] == now_status["total_balance"]
+    assert later["reserve_status"] == now_status["reserve_status"]
+    assert later["reserve_status"]["is_healthy"] is True
+
+
+def test_reconciliation_as_of(client, guardian_token):
+    """Test reconciliation compares against the ledger balance at the observation time."""
+    before = datetime.utcnow()
+    client.post("/api/v1/transactions/", json={
+        "transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 100.0, "status": "COMPLETED"
+    })
+    
+    response = client.post(
+        "/api/v1/treasury/reconcile",
+        json={"external_wallet_balance": 0.0, "as_of": before.isoformat()},
+        headers={"Authorization": f"Bearer {guardian_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "MATCHED"
+    
+    response = client.post(
+        "/api/v1/treasury/reconcile",
+        json={"external_wallet_balance": 0.0},
+        headers={"Authorization": f"Bearer {guardian_token}"}
+    )
+    assert response.json()["status"] == "DISCREPANCY"
@@ -0,0 +1,194 @@
+"""
+Tests for streaming ledger exports.
+Tests formats, since-id resumption and constant-memory streaming.
+"""
+
+import csv
+import io
+import json
+import tracemalloc
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from ledger_api.models.ledger_models import LedgerTransaction
+from ledger_api.services import export as export_service
+from ledger_api.services.export import DATASETS, get_export_watermark, iter_export_rows, stream_export
+
+
+@pytest.fixture
+def auth(guardian_token):
+    return {"Authorization": f"Bearer {guardian_token}"}
+
+
+def _create_deposits(client, count):
+    response = client.post("/api/v1/transactions/bulk", json={"transactions": [
+        {"transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 10.5 + i, "status": "COMPLETED"}
+        for i in range(count)
+    ]})
+    assert response.status_code == 201
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_requires_auth(client):
+    """Test exports are Guardian-only."""
+    response = client.get("/api/v1/export/transactions")
+    # 403 on older FastAPI releases, 401 on newer ones
+    assert response.status_code in (401, 403)
+
+
+def test_export_unknown_dataset_and_format(client, auth):
+    """Test unknown datasets and formats are rejected."""
+    assert client.get("/api/v1/export/accounts", headers=auth).status_code == 404
+    assert client.get("/api/v1/export/transactions?format=xml", headers=auth).status_code == 400
+
+
+def test_export_transactions_ndjson(client, auth):
+    """Test NDJSON export keeps Decimal precision and id order."""
+    _create_deposits(client, 3)
+    
+    response = client.get("/api/v1/export/transactions", headers=auth)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    
+    rows = _ndjson(response)
+    # 3 deposits, each allocated to 4 accounts
+    assert len(rows) == 15
+    assert [row["id"] for row in rows] == list(range(1, 16))
+    assert rows[0]["amount"] == "10.50000000"
+    assert response.headers["X-Export-Until-Id"] == "15"
+
+
+def test_export_resumes_from_since_id(client, auth):
+    """Test a resumed export continues after the checkpoint without overlap."""
+    _create_deposits(client, 2)
+    
+    full = _ndjson(client.get("/api/v1/export/transactions", headers=auth))
+    checkpoint = full[3]["id"]
+    resumed = _ndjson(client.get(
+        f"/api/v1/export/transactions?since_id={checkpoint}&until_id={full[-1]['id']}", headers=auth
+    ))
+    
+    assert full[:4] + resumed == full
+    
+    # Rows created after the export's until_id are left for the next run
+    _create_deposits(client, 1)
+    bounded = _ndjson(client.get(f"/api/v1/export/transactions?until_id={full[-1]['id']}", headers=auth))
+    assert bounded == full
+
+
+@pytest.mark.asyncio
+async def test_export_watermark_holds_back_recent_rows(tmp_path):
+    """Test the watermark stops before rows that may belong to open transactions."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'export.db'}", poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    now = datetime.utcnow()
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(LedgerTransaction.metadata.create_all)
+        # Ids 1-3 are settled; id 4 is recent, so id 3 could still be followed
+        # by a lower id committing late in a real database
+        await conn.execute(insert(LedgerTransaction), [
+            {"transaction_type": "EXTERNAL_DEPOSIT", "amount": 1, "status": "COMPLETED",
+             "created_at": now - timedelta(seconds=age)}
+            for age in (300, 200, 100, 5)
+        ])
+    
+    try:
+        dataset = DATASETS["transactions"]
+        async with session_factory() as db:
+            assert await get_export_watermark(db, dataset, commit_lag=60) == 3
+            assert await get_export_watermark(db, dataset, commit_lag=150) == 2
+            assert await get_export_watermark(db, dataset, commit_lag=1000) == 0
+            assert await get_export_watermark(db, dataset, commit_lag=0) == 4
+    finally:
+        await engine.dispose()
+
+
+def test_export_stops_at_commit_watermark(client, auth, monkeypatch):
+    """Test the endpoint caps until_id at the watermark and resumes cleanly."""
+    _create_deposits(client, 1)
+    monkeypatch.setattr(export_service, "EXPORT_COMMIT_LAG_SECONDS", 60)
+    
+    # Every row is younger than the lag: nothing is exported yet
+    response = client.get("/api/v1/export/transactions?until_id=100", headers=auth)
+    assert response.headers["X-Export-Until-Id"] == "0"
+    assert _ndjson(response) == []
+    
+    # Once the rows age past the lag, the next run picks all of them up
+    monkeypatch.setattr(export_service, "EXPORT_COMMIT_LAG_SECONDS", 0)
+    resumed = _ndjson(client.get("/api/v1/export/transactions?since_id=0", headers=auth))
+    assert [row["id"] for row in resumed] == list(range(1, 6))
+
+
+def test_export_audit_log_csv(client, auth):
+    """Test CSV export has a header row and JSON-encoded JSON columns."""
+    _create_deposits(client, 1)
+    
+    response = client.get("/api/v1/export/audit_log?format=csv", headers=auth)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0].keys()) == list(DATASETS["audit_log"].columns)
+    assert rows[0]["table_name"] == "ledger_transactions"
+    assert json.loads(rows[0]["new_values"])["status"] == "COMPLETED"
+
+
+def test_export_arrow(client, auth):
+    """Test the Arrow IPC stream reads back with the exported rows."""
+    pa = pytest.importorskip("pyarrow")
+    _create_deposits(client, 2)
+    
+    response = client.get("/api/v1/export/transactions?format=arrow&batch_size=4", headers=auth)
+    assert response.status_code == 200
+    
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 10
+    assert table.column("id").to_pylist() == list(range(1, 11))
+    assert str(table.column("amount")[0].as_py()) == "10.50000000"
+
+
+@pytest.mark.asyncio
+async def test_export_streams_in_chunks_with_constant_memory(tmp_path):
+    """Test memory stays flat while exporting many rows across chunk sessions."""
+    rows = 60000
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'export.db'}", poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(LedgerTransaction.metadata.create_all)
+        now = datetime.utcnow()
+        await conn.execute(insert(LedgerTransaction), [
+            {"transaction_type": "EXTERNAL_DEPOSIT", "amount": 1, "status": "COMPLETED",
+             "meta_data": {"n": i}, "created_at": now}
+            for i in range(rows)
+        ])
+    
+    try:
+        dataset = DATASETS["transactions"]
+        
+        # Chunks are read in separate sessions and together cover every row once
+        ids = []
+        async for batch in iter_export_rows(session_factory, dataset, chunk_size=7000, batch_size=500):
+            assert len(batch) <= 500
+            ids.extend(row[0] for row in batch)
+        assert ids == list(range(1, rows + 1))
+        
+        tracemalloc.start()
+        exported = 0
+        async for piece in stream_export(session_factory, dataset, "ndjson", chunk_size=7000, batch_size=500):
+            exported += len(piece)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        await engine.dispose()
+    
+    # Peak memory is a small fraction of the exported size
+    assert exported > 10 * 1024 * 1024
+    assert peak < exported / 5
@@ -0,0 +1,146 @@
+"""
+Benchmark for keyset pagination of GET /api/v1/transactions.
+Measures page 1 vs page 10,000 latency with OFFSET and with cursors.
+
+Seeds LEDGER_BENCHMARK_TRANSACTIONS rows (default 300,000; the reference
+run uses 5,000,000) into a file-backed SQLite database, and also into
+LEDGER_BENCHMARK_POSTGRES_URL when set; its tables are dropped and recreated.
+"""
+
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from ledger_api.api.v1 import transactions
+from ledger_api.db import Base, get_async_db, to_async_url
+from ledger_api.models.ledger_models import LedgerTransaction
+from ledger_api.tests.conftest import seed_test_data
+from ledger_api.utils.pagination import encode_cursor
+
+ROWS = int(os.environ.get("LEDGER_BENCHMARK_TRANSACTIONS", "300000"))
+PAGE_SIZE = 20
+DEEP_PAGE = 10000
+REPEAT = 5
+STATUSES = ["COMPLETED", "COMPLETED", "COMPLETED", "PENDING"]
+
+
+def _seed(engine) -> None:
+    """Insert ROWS transactions, several per second so created_at has ties."""
+    start = datetime(2024, 1, 1)
+    chunk = 50000
+    with engine.begin() as conn:
+        for first in range(0, ROWS, chunk):
+            conn.execute(insert(LedgerTransaction), [
+                {
+                    "transaction_type": "EXTERNAL_DEPOSIT",
+                    "to_account_id": 1 + i % 4,
+                    "amount": 1 + i % 100,
+                    "status": STATUSES[i % len(STATUSES)],
+                    "meta_data": {},
+                    "created_at": start + timedelta(seconds=i // 3)
+                }
+                for i in range(first, min(first + chunk, ROWS))
+            ])
+
+
+@pytest.fixture(scope="module", params=["sqlite", "postgres"])
+def bench_urls(request, tmp_path_factory):
+    """Sync and async URLs of a freshly seeded benchmark database."""
+    if request.param == "sqlite":
+        url = f"sqlite:///{tmp_path_factory.mktemp('pagination') / 'ledger.db'}"
+    else:
+        url = os.environ.get("LEDGER_BENCHMARK_POSTGRES_URL")
+        if not url:
+            pytest.skip("LEDGER_BENCHMARK_POSTGRES_URL not set")
+    
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed_test_data(db)
+    db.close()
+    _seed(engine)
+    
+    yield request.param, engine, to_async_url(url)
+    
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _deep_cursor(engine, status=None) -> str:
+    """Cursor for the last row of page DEEP_PAGE - 1 (untimed setup)."""
+    query = select(LedgerTransaction.created_at, LedgerTransaction.id)
+    if status:
+        query = query.where(LedgerTransaction.status == status)
+    query = query.order_by(
+        LedgerTransaction.created_at.desc(), LedgerTransaction.id.desc()
+    ).offset((DEEP_PAGE - 1) * PAGE_SIZE - 1).limit(1)
+    with engine.connect() as conn:
+        created_at, record_id = conn.execute(query).one()
+    return encode_cursor(created_at, record_id)
+
+
+async def _latency_ms(client, params) -> float:
+    """Median latency of one list request."""
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        response = await client.get("/api/v1/transactions/", params=params)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+        assert len(response.json()) == PAGE_SIZE
+    return statistics.median(samples)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [None, "COMPLETED"])
+async def test_deep_page_latency(bench_urls, status):
+    """Benchmark page 1 vs page 10,000: OFFSET grows with depth, cursors do not."""
+    backend, engine, async_url = bench_urls
+    if ROWS < DEEP_PAGE * PAGE_SIZE * 4 // 3:
+        pytest.skip(f"Need at least {DEEP_PAGE * PAGE_SIZE * 4 // 3} rows for page {DEEP_PAGE}")
+    
+    async_engine = create_async_engine(async_url)
+    session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    
+    app = FastAPI()
+    app.include_router(transactions.router, prefix="/api/v1")
+    
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+    
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    
+    base = {"limit": PAGE_SIZE}
+    if status:
+        base["status"] = status
+    deep_cursor = _deep_cursor(engine, status)
+    
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            first_page = await _latency_ms(client, base)
+            offset_deep = await _latency_ms(client, {**base, "offset": (DEEP_PAGE - 1) * PAGE_SIZE})
+            cursor_deep = await _latency_ms(client, {**base, "cursor": deep_cursor})
+            
+            # Both strategies land on the same rows
+            by_offset = await client.get("/api/v1/transactions/", params={**base, "offset": (DEEP_PAGE - 1) * PAGE_SIZE})
+            by_cursor = await client.get("/api/v1/transactions/", params={**base, "cursor": deep_cursor})
+            assert [tx["id"] for tx in by_offset.json()] == [tx["id"] for tx in by_cursor.json()]
+    finally:
+        await async_engine.dispose()
+    
+    print(
+        f"\n[{backend}] {ROWS} rows, status={status}: page 1 {first_page:.1f}ms, "
+        f"page {DEEP_PAGE} offset {offset_deep:.1f}ms, cursor {cursor_deep:.1f}ms"
+    )
+    
+    assert cursor_deep < offset_deep
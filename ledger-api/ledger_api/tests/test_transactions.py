@@ -126,6 +126,46 @@ def test_list_transactions_with_filters(client):
         assert tx["status"] == "COMPLETED"
 
 
+def test_list_transactions_cursor_pagination(client):
+    """Test walking every page with cursors returns each row exactly once."""
+    client.post("/api/v1/transactions/bulk", json={"transactions": [
+        {"transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 10.0 + i, "status": "PENDING"}
+        for i in range(7)
+    ]})
+    
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3, "status": "PENDING"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/transactions/", params=params)
+        assert response.status_code == 200
+        seen.extend(tx["id"] for tx in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    
+    assert pages == 3
+    # All rows share created_at, so order falls back to id descending
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_list_transactions_rejects_bad_cursor(client):
+    """Test malformed cursors and cursor+offset are client errors."""
+    response = client.get("/api/v1/transactions/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    
+    from ledger_api.utils.pagination import encode_cursor
+    from datetime import datetime
+    cursor = encode_cursor(datetime.utcnow(), 10)
+    response = client.get("/api/v1/transactions/", params={"cursor": cursor, "offset": 5})
+    assert response.status_code == 400
+
+
 def test_get_transaction_by_id(client):
     """Test getting a specific transaction."""
     # Create transaction
@@ -284,6 +324,39 @@ def test_create_allocation_rule_with_auth(client, guardian_token):
     assert data["rule_name"] == "Test Rule 2"
 
 
+def test_update_allocation_rule_invalidates_cached_plan(client, guardian_token):
+    """Test a rule update takes effect on the next deposit."""
+    deposit = {
+        "transaction_type": "EXTERNAL_DEPOSIT",
+        "to_account_id": 1,
+        "amount": 100.0,
+        "status": "COMPLETED"
+    }
+    response = client.post("/api/v1/transactions/", json=deposit)
+    assert len(response.json()["allocation_result"]["child_transaction_ids"]) == 4
+    
+    rule_update = {
+        "rule_name": "Default Deposit Allocation",
+        "trigger_transaction_type": "EXTERNAL_DEPOSIT",
+        "allocations": [
+            {"account_id": 1, "percentage": 50.0},
+            {"account_id": 2, "percentage": 50.0}
+        ],
+        "is_active": True,
+        "priority": 1
+    }
+    response = client.put(
+        "/api/v1/allocation_rules/1",
+        json=rule_update,
+        headers={"Authorization": f"Bearer {guardian_token}"}
+    )
+    assert response.status_code == 200
+    
+    response = client.post("/api/v1/transactions/", json=deposit)
+    allocations = response.json()["allocation_result"]["allocations"]
+    assert [(a["account_id"], a["amount"]) for a in allocations] == [(1, 50.0), (2, 50.0)]
+
+
 def test_reconciliation_requires_auth(client):
     """Test that reconciliation requires authentication."""
     reconciliation_data = {
@@ -315,3 +388,47 @@ def test_reconciliation_with_auth(client, guardian_token):
     assert "discrepancy" in data
     assert "status" in data
     assert data["status"] == "MATCHED"  # Both are 0
+
+
+def test_bulk_create_allocates_deposits(client):
+    """Test bulk endpoint creates transactions and allocates deposits in one go."""
+    batch = {
+        "transactions": [
+            {"transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 100.0, "status": "COMPLETED"},
+            {"transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 50.0, "status": "PENDING"},
+            {"transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 10.0, "status": "COMPLETED"}
+        ]
+    }
+    
+    response = client.post("/api/v1/transactions/bulk", json=batch)
+    assert response.status_code == 201
+    
+    data = response.json()
+    assert len(data["transactions"]) == 3
+    assert [float(t["amount"]) for t in data["transactions"]] == [100.0, 50.0, 10.0]
+    
+    # Only the two COMPLETED deposits are allocated
+    results = data["allocation_results"]
+    assert len(results) == 2
+    assert [r["total_allocated"] for r in results] == [100.0, 10.0]
+    assert all(len(r["child_transaction_ids"]) == 4 for r in results)
+    
+    status_response = client.get("/api/v1/treasury/accounts/1")
+    assert float(status_response.json()["current_balance"]) == pytest.approx(44.0)
+
+
+def test_bulk_create_is_all_or_nothing(client):
+    """Test a batch referencing a missing account writes nothing."""
+    batch = {
+        "transactions": [
+            {"transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 100.0, "status": "COMPLETED"},
+            {"transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 999, "amount": 10.0, "status": "COMPLETED"}
+        ]
+    }
+    
+    response = client.post("/api/v1/transactions/bulk", json=batch)
+    assert response.status_code == 404
+    assert "999" in response.json()["detail"]
+    
+    response = client.get("/api/v1/transactions/")
+    assert response.json() == []
@@ -0,0 +1,187 @@
+"""
+Tests for multi-wallet reconciliation.
+Runs against a local stub of the wallet balance service.
+"""
+
+import json
+import threading
+import time
+import pytest
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sqlalchemy import event
+
+from ledger_api.models.ledger_models import AuditLog, ReconciliationLog
+from ledger_api.services.reconciliation import get_group_balances, record_wallet_reconciliations
+from ledger_api.utils import pi_auth
+
+LATENCY = 0.2
+
+
+class StubBalanceHandler(BaseHTTPRequestHandler):
+    """GET /wallets/{address}/balance with fixed latency; unknown wallets get a 503."""
+    
+    balances = {}
+    lock = threading.Lock()
+    in_flight = 0
+    peak_in_flight = 0
+    
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak_in_flight = max(cls.peak_in_flight, cls.in_flight)
+        try:
+            time.sleep(LATENCY)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+        address = self.path.split("/")[2]
+        if address not in self.balances:
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = json.dumps({"balance": self.balances[address]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class StubBalanceServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 makes parallel clients wait on connect
+    request_queue_size = 64
+
+
+@pytest.fixture
+def balance_service(monkeypatch):
+    """Wallet balance service stub; tests set StubBalanceHandler.balances."""
+    server = StubBalanceServer(("127.0.0.1", 0), StubBalanceHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(pi_auth, "PI_WALLET_BALANCE_API_URL", f"http://127.0.0.1:{server.server_port}")
+    StubBalanceHandler.balances = {}
+    StubBalanceHandler.in_flight = StubBalanceHandler.peak_in_flight = 0
+    yield StubBalanceHandler.balances
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def auth(guardian_token):
+    return {"Authorization": f"Bearer {guardian_token}"}
+
+
+@pytest.fixture
+def funded(client):
+    """Allocate a 100.0 deposit: accounts 1-4 hold 40, 25, 20 and 15."""
+    response = client.post("/api/v1/transactions/", json={
+        "transaction_type": "EXTERNAL_DEPOSIT", "to_account_id": 1, "amount": 100.0, "status": "COMPLETED"
+    })
+    assert response.status_code == 201
+
+
+def test_reconcile_wallets_per_account_group(client, auth, funded, balance_service, test_db):
+    """Test each wallet is compared with its own account group and recorded."""
+    balance_service.update({"GRESERVE": "40.0", "GOPS": "59.5"})
+    
+    response = client.post("/api/v1/treasury/reconcile/wallets", headers=auth, json={"wallets": [
+        {"wallet_address": "GRESERVE", "account_ids": [1]},
+        {"wallet_address": "GOPS", "account_ids": [2, 3, 4]},
+        {"wallet_address": "GOFFLINE", "account_ids": [2]}
+    ]})
+    assert response.status_code == 200
+    
+    data = response.json()
+    reserve, ops, offline = data["results"]
+    assert reserve["status"] == "MATCHED"
+    assert Decimal(reserve["internal_ledger_balance"]) == Decimal("40")
+    assert ops["status"] == "DISCREPANCY"
+    assert Decimal(ops["discrepancy"]) == Decimal("-0.5")
+    assert offline["status"] == "FETCH_FAILED"
+    assert "503" in offline["error"]
+    assert offline["reconciliation_id"] is None
+    assert (data["matched"], data["discrepancies"], data["failed"]) == (1, 1, 1)
+    
+    records = test_db.query(ReconciliationLog).order_by(ReconciliationLog.id).all()
+    assert [r.id for r in records] == [reserve["reconciliation_id"], ops["reconciliation_id"]]
+    assert [r.external_wallet_address for r in records] == ["GRESERVE", "GOPS"]
+    assert test_db.query(AuditLog).filter(AuditLog.table_name == "reconciliation_log").count() == 2
+
+
+def test_reconcile_wallets_fetches_concurrently(client, auth, balance_service):
+    """Test wallet balances are fetched in parallel and timed per wallet."""
+    wallets = [f"GWALLET{i}" for i in range(10)]
+    balance_service.update({address: "0" for address in wallets})
+    
+    response = client.post("/api/v1/treasury/reconcile/wallets", headers=auth, json={"wallets": [
+        {"wallet_address": address, "account_ids": [1 + i % 4]} for i, address in enumerate(wallets)
+    ]})
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["matched"] == 10
+    assert all(r["fetch_ms"] >= LATENCY * 1000 for r in data["results"])
+    # The stub saw the requests overlap, rather than one after another
+    assert StubBalanceHandler.peak_in_flight >= 5
+    # Sequential fetching would take at least 10 x LATENCY
+    assert data["fetch_ms"] < 10 * LATENCY * 1000
+
+
+def test_reconcile_wallets_stubbed_without_balance_service(client, auth):
+    """Test the testnet stub (zero balances) is used when no service is configured."""
+    response = client.post("/api/v1/treasury/reconcile/wallets", headers=auth, json={"wallets": [
+        {"wallet_address": "GSTUB", "account_ids": [1, 2]}
+    ]})
+    assert response.status_code == 200
+    assert response.json()["results"][0]["status"] == "MATCHED"
+
+
+def test_reconcile_wallets_unknown_account(client, auth):
+    """Test wallets mapped to unknown accounts are rejected."""
+    response = client.post("/api/v1/treasury/reconcile/wallets", headers=auth, json={"wallets": [
+        {"wallet_address": "GX", "account_ids": [1, 999]}
+    ]})
+    assert response.status_code == 404
+    assert "999" in response.json()["detail"]
+
+
+def test_group_balances_in_one_query(test_db):
+    """Test overlapping groups are summed by one grouped aggregate query."""
+    from ledger_api.models.ledger_models import LogicalAccount
+    for account_id, balance in [(1, "40"), (2, "25"), (3, "20"), (4, "15")]:
+        test_db.get(LogicalAccount, account_id).current_balance = Decimal(balance)
+    test_db.get(LogicalAccount, 4).is_active = False
+    test_db.commit()
+    
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, params, context, executemany: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        totals = get_group_balances(test_db, [[1], [1, 2, 3], [3, 4], [4]])
+        group_statements = statements[:]
+        statements.clear()
+        record_wallet_reconciliations(
+            test_db,
+            [("A", [1]), ("B", [2, 3])],
+            {
+                "A": {"balance": Decimal("40"), "fetch_ms": 1.0, "error": None},
+                "B": {"balance": Decimal("45"), "fetch_ms": 1.0, "error": None}
+            }
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    
+    assert len(group_statements) == 1
+    # Inactive accounts are excluded
+    assert totals == [Decimal("40"), Decimal("85"), Decimal("20"), Decimal("0")]
+    
+    # One aggregate, one bulk insert of reconciliations, one of audit rows
+    assert len([s for s in statements if s.startswith("SELECT")]) == 1
+    assert len([s for s in statements if s.startswith("INSERT INTO reconciliation_log")]) == 1
+    assert len([s for s in statements if s.startswith("INSERT INTO audit_log")]) == 1
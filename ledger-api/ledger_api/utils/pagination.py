@@ -0,0 +1,55 @@
+"""
+Opaque keyset pagination cursors.
+
+A cursor encodes the sort key (created_at, id) of the last row of a page;
+the next page starts strictly after it, so page N costs the same as page 1
+instead of scanning and discarding N * limit rows as OFFSET does.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """
+    Encode a (created_at, id) sort key as an opaque cursor token.
+    
+    Args:
+        created_at: Sort timestamp of the last row on the page
+        record_id: ID of the last row on the page
+    
+    Returns:
+        str: URL-safe cursor token
+    """
+    payload = json.dumps([created_at.isoformat(), record_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor token produced by encode_cursor.
+    
+    Args:
+        cursor: Cursor token
+    
+    Returns:
+        Tuple of (created_at, id)
+    
+    Raises:
+        InvalidCursorError: If the token is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(record_id, int):
+            raise TypeError("cursor id must be an integer")
+        return datetime.fromisoformat(created_at), record_id
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {cursor!r}") from e
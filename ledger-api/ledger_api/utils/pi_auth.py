@@ -10,12 +10,19 @@ import os
 import logging
 from typing import Dict, Any, Optional
 
+import httpx
+
 logger = logging.getLogger(__name__)
 
 # Enforce testnet-only operation
 NFT_MINT_VALUE = int(os.environ.get("NFT_MINT_VALUE", "0"))
 APP_ENVIRONMENT = os.environ.get("APP_ENVIRONMENT", "testnet")
 
+# Wallet balance service: GET {url}/wallets/{address}/balance -> {"balance": "..."}
+# Unset: balances are stubbed
+PI_WALLET_BALANCE_API_URL = os.environ.get("PI_WALLET_BALANCE_API_URL", "")
+PI_WALLET_BALANCE_TIMEOUT = float(os.environ.get("PI_WALLET_BALANCE_TIMEOUT", "10"))
+
 # Safety check
 if NFT_MINT_VALUE != 0:
     raise RuntimeError(
@@ -76,22 +83,8 @@ def verify_pi_signature(
     }
 
 
-def get_pi_wallet_balance(wallet_address: str) -> Dict[str, Any]:
-    """
-    Get Pi wallet balance from blockchain.
-    
-    TODO: Implement actual Pi Network API call.
-    This is a stub for testnet development.
-    
-    Args:
-        wallet_address: Pi wallet address
-    
-    Returns:
-        Dict with balance information
-    
-    Raises:
-        NotImplementedError: In production environment
-    """
+def _stub_wallet_balance(wallet_address: str) -> Dict[str, Any]:
+    """Stubbed balance when no wallet balance service is configured."""
     if APP_ENVIRONMENT == "production":
         raise NotImplementedError(
             "❌ Pi wallet balance check is not implemented for production. "
@@ -111,6 +104,72 @@ def get_pi_wallet_balance(wallet_address: str) -> Dict[str, Any]:
     }
 
 
+def _balance_url(wallet_address: str) -> str:
+    return f"{PI_WALLET_BALANCE_API_URL.rstrip('/')}/wallets/{wallet_address}/balance"
+
+
+def _parse_balance_response(wallet_address: str, response: httpx.Response) -> Dict[str, Any]:
+    response.raise_for_status()
+    data = response.json()
+    return {
+        "wallet_address": wallet_address,
+        "balance": str(data["balance"])
+    }
+
+
+def get_pi_wallet_balance(wallet_address: str) -> Dict[str, Any]:
+    """
+    Get Pi wallet balance from blockchain.
+    
+    Queries the wallet balance service at PI_WALLET_BALANCE_API_URL; when
+    it is not configured, returns a stubbed zero balance (testnet only).
+    
+    Args:
+        wallet_address: Pi wallet address
+    
+    Returns:
+        Dict with balance information (balance as a decimal string)
+    
+    Raises:
+        NotImplementedError: In production without a balance service
+        httpx.HTTPError: If the balance service request fails
+    """
+    if not PI_WALLET_BALANCE_API_URL:
+        return _stub_wallet_balance(wallet_address)
+    
+    response = httpx.get(_balance_url(wallet_address), timeout=PI_WALLET_BALANCE_TIMEOUT)
+    return _parse_balance_response(wallet_address, response)
+
+
+async def get_pi_wallet_balance_async(
+    wallet_address: str,
+    client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """
+    Async variant of get_pi_wallet_balance, for fetching many wallets concurrently.
+    
+    Args:
+        wallet_address: Pi wallet address
+        client: Shared HTTP client (a temporary one is used if omitted)
+    
+    Returns:
+        Dict with balance information (balance as a decimal string)
+    
+    Raises:
+        NotImplementedError: In production without a balance service
+        httpx.HTTPError: If the balance service request fails
+    """
+    if not PI_WALLET_BALANCE_API_URL:
+        return _stub_wallet_balance(wallet_address)
+    
+    if client is None:
+        async with httpx.AsyncClient(timeout=PI_WALLET_BALANCE_TIMEOUT) as client:
+            response = await client.get(_balance_url(wallet_address))
+    else:
+        response = await client.get(_balance_url(wallet_address))
+    return _parse_balance_response(wallet_address, response)
+
+
 def initiate_pi_payment(
     recipient_address: str,
     amount: float,
@@ -0,0 +1,71 @@
+"""Configuration version counters
+
+Revision ID: 0002_config_versions
+Revises: 0001_initial_ledger
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_config_versions'
+down_revision = '0001_initial_ledger'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Create the config_versions table used to invalidate in-process caches.
+    
+    On PostgreSQL, triggers also bump the allocation_rules counter for
+    changes made outside the API (manual SQL, seed scripts) and for account
+    inserts, renames and (de)activations, which affect compiled allocation
+    plans. Other backends have no triggers; there the cache does not keep
+    plans that dropped a missing or inactive account.
+    """
+    op.create_table(
+        'config_versions',
+        sa.Column('name', sa.String(100), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now())
+    )
+    op.execute("INSERT INTO config_versions (name, version) VALUES ('allocation_rules', 0)")
+    
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_allocation_rules_version()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            UPDATE config_versions
+            SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE name = 'allocation_rules';
+            RETURN NULL;
+        END;
+        $$ language 'plpgsql'
+    """)
+    op.execute("""
+        CREATE TRIGGER bump_allocation_rules_version AFTER INSERT OR UPDATE OR DELETE ON allocation_rules
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_allocation_rules_version()
+    """)
+    op.execute("""
+        CREATE TRIGGER bump_allocation_rules_version_accounts
+            AFTER INSERT OR UPDATE OF is_active, account_name OR DELETE ON logical_accounts
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_allocation_rules_version()
+    """)
+
+
+def downgrade() -> None:
+    """
+    Remove the version counters and their triggers.
+    """
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS bump_allocation_rules_version_accounts ON logical_accounts")
+        op.execute("DROP TRIGGER IF EXISTS bump_allocation_rules_version ON allocation_rules")
+        op.execute("DROP FUNCTION IF EXISTS bump_allocation_rules_version()")
+    
+    op.drop_table('config_versions')
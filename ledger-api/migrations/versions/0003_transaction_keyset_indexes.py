@@ -0,0 +1,61 @@
+"""Composite indexes for keyset pagination of ledger transactions
+
+Revision ID: 0003_transaction_keyset_indexes
+Revises: 0002_config_versions
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_transaction_keyset_indexes'
+down_revision = '0002_config_versions'
+branch_labels = None
+depends_on = None
+
+
+# (index name, columns): each matches a common list_transactions filter
+# followed by its ORDER BY created_at DESC, id DESC sort key
+INDEXES = [
+    ('idx_transactions_created_id', ['created_at', 'id']),
+    ('idx_transactions_status_created', ['status', 'created_at', 'id']),
+    ('idx_transactions_to_account_created', ['to_account_id', 'created_at', 'id']),
+    ('idx_transactions_type_created', ['transaction_type', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """
+    Create the keyset pagination indexes on ledger_transactions.
+    
+    On PostgreSQL the indexes are built CONCURRENTLY (outside the migration
+    transaction) so writes to the ledger are not blocked during the build.
+    """
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES:
+                op.create_index(
+                    name, 'ledger_transactions', columns,
+                    postgresql_concurrently=True, if_not_exists=True
+                )
+    else:
+        for name, columns in INDEXES:
+            op.create_index(name, 'ledger_transactions', columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """
+    Drop the keyset pagination indexes.
+    """
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, _ in reversed(INDEXES):
+                op.drop_index(
+                    name, table_name='ledger_transactions',
+                    postgresql_concurrently=True, if_exists=True
+                )
+    else:
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name='ledger_transactions', if_exists=True)
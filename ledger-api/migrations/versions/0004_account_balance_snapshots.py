@@ -0,0 +1,61 @@
+"""Account balance snapshots for point-in-time treasury balances
+
+Revision ID: 0004_account_balance_snapshots
+Revises: 0003_transaction_keyset_indexes
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_account_balance_snapshots'
+down_revision = '0003_transaction_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Create the append-only account_balance_snapshots table.
+    
+    Every account gets an opening snapshot of its current balance, so
+    point-in-time queries from now on see the balances carried over.
+    History before the migration is not reconstructed.
+    """
+    op.create_table(
+        'account_balance_snapshots',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('account_id', sa.Integer(), sa.ForeignKey('logical_accounts.id'), nullable=False),
+        sa.Column('balance', sa.Numeric(20, 8), nullable=False),
+        sa.Column('as_of', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('granularity', sa.String(10), nullable=False, server_default='RAW'),
+        sa.Column('transaction_id', sa.Integer(), sa.ForeignKey('ledger_transactions.id')),
+        sa.CheckConstraint(
+            "granularity IN ('RAW', 'HOUR', 'DAY')",
+            name='valid_snapshot_granularity'
+        )
+    )
+    op.create_index(
+        'idx_balance_snapshots_account_as_of', 'account_balance_snapshots',
+        ['account_id', 'as_of', 'id']
+    )
+    op.create_index(
+        'idx_balance_snapshots_granularity_as_of', 'account_balance_snapshots',
+        ['granularity', 'as_of']
+    )
+    
+    op.execute("""
+        INSERT INTO account_balance_snapshots (account_id, balance, as_of, granularity)
+        SELECT id, current_balance, CURRENT_TIMESTAMP, 'RAW' FROM logical_accounts
+    """)
+
+
+def downgrade() -> None:
+    """
+    Drop the account balance snapshots.
+    """
+    op.drop_index('idx_balance_snapshots_granularity_as_of', table_name='account_balance_snapshots')
+    op.drop_index('idx_balance_snapshots_account_as_of', table_name='account_balance_snapshots')
+    op.drop_table('account_balance_snapshots')
@@ -12,16 +12,21 @@ import json
 import logging
 from datetime import datetime, timezone
 from types import TracebackType
-from typing import Any, Dict, List, Optional, Type, cast
+from typing import Any, Dict, Optional, Type, cast
 
 import aiohttp
 
+from concurrent_query_runner import (DEFAULT_COMPONENT_CONCURRENCY,
+                                     DEFAULT_REQUEST_TIMEOUT, DEFAULT_RETRIES,
+                                     ConcurrentQueryRunner,
+                                     create_pooled_session, iter_queries)
+
 # Import tracing system
 try:
     from tracing_system import (get_tracing_system, trace_fastapi_operation,
                                 trace_flask_operation, trace_gradio_operation)
     tracing_enabled = True
-    tracing_system = get_tracing_system()
+    tracing_system = get_tracing_system()[0]
 except ImportError:
     tracing_enabled = False
     tracing_system = None
@@ -33,16 +38,38 @@ logger = logging.getLogger(__name__)
 class QuantumAgentRunner:
     """Sacred Trinity Agent Runner for automated evaluation"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: int = DEFAULT_COMPONENT_CONCURRENCY,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        retries: int = DEFAULT_RETRIES
+    ):
+        """
+        Initialize runner
+
+        Args:
+            concurrency: Per-component limits on queries in flight
+            default_concurrency: Limit for components not listed
+            timeout: Timeout per query attempt in seconds
+            retries: Retries (with jittered backoff) after a failed attempt
+        """
         self.base_urls = {
             "fastapi": "http://localhost:8000",
             "flask": "http://localhost:5000",
             "gradio": "http://localhost:7860"
         }
+        self.concurrency = concurrency
+        self.default_concurrency = default_concurrency
+        self.timeout = timeout
+        self.retries = retries
         self.session: Optional[aiohttp.ClientSession] = None
+        self.last_report: Optional[Dict[str, Any]] = None
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        self.session = create_pooled_session(
+            self.concurrency, self.default_concurrency, self.timeout
+        )
         return self
 
     async def __aexit__(
@@ -59,8 +86,8 @@ class QuantumAgentRunner:
         if tracing_enabled and tracing_system:
             with tracing_system.create_quantum_span(
                 tracing_system.get_tracer("agent-runner"),
-                "run_quantum_queries",
-                {"queries_file": queries_file}
+                "run_quantum_queries", "agent_runner",
+                queries_file=queries_file
             ) as span:
                 return await self._run_quantum_queries_impl(queries_file)
         else:
@@ -71,59 +98,58 @@ class QuantumAgentRunner:
             "🌌 Quantum Agent Runner - Collecting Sacred Trinity Responses"
         )
 
-        # Load test queries
-        queries = self._load_queries(queries_file)
-        responses: List[Dict[str, Any]] = []
-
-        for query_data in queries:
-            try:
-                response = await self._execute_query(query_data)
-                responses.append({
-                    **query_data,
-                    "response": response["response"],
-                    "execution_time": response["execution_time"],
-                    "component_status": response["component_status"],
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                })
-                logger.info(f"✅ Query executed: {query_data['component']}")
-
-            except Exception as e:
-                logger.error(
-                    f"❌ Query failed: {query_data['component']} - {e}"
-                )
-                responses.append({
-                    **query_data,
-                    "response": f"Error: {str(e)}",
-                    "execution_time": 0,
-                    "component_status": "failed",
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                })
-
-        # Save responses
         timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
         responses_file = f"quantum_responses_{timestamp}.jsonl"
-        self._save_responses(responses, responses_file)
 
+        # Queries are read lazily and responses streamed to the file as
+        # they complete, so memory does not grow with the query count
+        runner = ConcurrentQueryRunner(
+            self._collect_response,
+            on_error=self._error_response,
+            concurrency=self.concurrency,
+            default_concurrency=self.default_concurrency,
+            timeout=self.timeout,
+            retries=self.retries
+        )
+        self.last_report = await runner.run(
+            iter_queries(queries_file), output_path=responses_file
+        )
+
+        for component, summary in self.last_report["components"].items():
+            logger.info(
+                f"⏱️ {component}: {summary['succeeded']}/{summary['total']} ok, "
+                f"p50 {summary['p50_ms']:.1f}ms, p95 {summary['p95_ms']:.1f}ms"
+            )
         logger.info(
-            f"📊 Collected {len(responses)} responses saved to {responses_file}"
+            f"📊 Collected {self.last_report['total']} responses saved to {responses_file}"
         )
         return responses_file
 
-    def _load_queries(self, filepath: str) -> List[Dict[str, Any]]:
-        """Load test queries from file"""
-        queries: List[Dict[str, Any]] = []
-        with open(filepath, 'r') as f:
-            for line in f:
-                queries.append(json.loads(line.strip()))
-        return queries
+    async def _collect_response(
+        self, query_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Execute one query and build its response record"""
+        response = await self._execute_query(query_data)
+        logger.info(f"✅ Query executed: {query_data['component']}")
+        return {
+            **query_data,
+            "response": response["response"],
+            "execution_time": response["execution_time"],
+            "component_status": response["component_status"],
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
 
-    def _save_responses(
-        self, responses: List[Dict[str, Any]], filepath: str
-    ):
-        """Save responses to JSONL file"""
-        with open(filepath, 'w') as f:
-            for response in responses:
-                f.write(json.dumps(response) + "\n")
+    def _error_response(
+        self, query_data: Dict[str, Any], error: BaseException
+    ) -> Dict[str, Any]:
+        """Response record for a query whose attempts all failed"""
+        return {
+            **query_data,
+            "response": f"Error: {str(error)}",
+            "execution_time": 0,
+            "component_status": "failed",
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
 
     async def _execute_query(
         self, query_data: Dict[str, Any]
@@ -134,8 +160,8 @@ class QuantumAgentRunner:
         if tracing_enabled and tracing_system:
             with tracing_system.create_quantum_span(
                 tracing_system.get_tracer("agent-runner"),
-                "execute_query",
-                {"component": component, "query": query_data.get("query", "")}
+                "execute_query", "agent_runner",
+                target_component=component, query=query_data.get("query", "")
             ) as span:
                 return await self._execute_query_impl(query_data)
         else:
@@ -180,8 +206,8 @@ class QuantumAgentRunner:
         if tracing_enabled and tracing_system:
             with tracing_system.create_quantum_span(
                 tracing_system.get_tracer("fastapi-client"),
-                "query_fastapi",
-                {"query": query}
+                "query_fastapi", "fastapi",
+                query=query
             ) as span:
                 return await self._query_fastapi_impl(query, query_data)
         else:
@@ -222,8 +248,8 @@ class QuantumAgentRunner:
         if tracing_enabled and tracing_system:
             with tracing_system.create_quantum_span(
                 tracing_system.get_tracer("flask-client"),
-                "query_flask",
-                {"query": query}
+                "query_flask", "flask",
+                query=query
             ) as span:
                 return await self._query_flask_impl(query, query_data)
         else:
@@ -269,8 +295,8 @@ class QuantumAgentRunner:
         if tracing_enabled and tracing_system:
             with tracing_system.create_quantum_span(
                 tracing_system.get_tracer("gradio-client"),
-                "query_gradio",
-                {"query": query}
+                "query_gradio", "gradio",
+                query=query
             ) as span:
                 return self._query_gradio_impl(query, query_data)
         else:
@@ -0,0 +1,396 @@
+"""
+Async Scheduler
+Asyncio-native job scheduling for the automation system.
+
+Jobs sit in a timer heap keyed by their next fire time and the scheduler
+sleeps exactly until the earliest one is due (or until a job is added), so
+runs start on time instead of on the next poll. Interval jobs stay on a
+fixed grid (next = previous slot + interval), so run time never shifts the
+schedule.
+
+Every run is a tracked task: exceptions are logged and counted, durations
+are recorded, and a job that is still running when it comes due again is
+handled by its overlap policy (skip, queue, or cancel the previous run).
+Per-job run state is persisted to JSON so schedules resume after restarts.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RECENT_DURATIONS = 100
+
+
+class OverlapPolicy(str, Enum):
+    """What to do when a job comes due while max_concurrency runs are active"""
+    SKIP = "skip"
+    QUEUE = "queue"
+    CANCEL_PREVIOUS = "cancel_previous"
+
+
+def _next_daily(at: str, after: float) -> float:
+    """Next local-time occurrence of HH:MM strictly after a timestamp"""
+    hour, minute = (int(part) for part in at.split(":"))
+    current = datetime.fromtimestamp(after)
+    target = current.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target.timestamp() <= after:
+        target += timedelta(days=1)
+    return target.timestamp()
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+@dataclass
+class JobStats:
+    """Run counters and durations for one job (persisted across restarts)"""
+    runs: int = 0
+    failures: int = 0
+    cancelled: int = 0
+    skipped: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    last_duration: Optional[float] = None
+    last_started: Optional[float] = None
+    last_finished: Optional[float] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+    recent_durations: Deque[float] = field(default_factory=lambda: deque(maxlen=RECENT_DURATIONS))
+    
+    PERSISTED = (
+        "runs", "failures", "cancelled", "skipped", "total_duration", "max_duration",
+        "last_duration", "last_started", "last_finished", "last_status", "last_error"
+    )
+    
+    def record(self, status: str, started: float, duration: float, error: Optional[str] = None):
+        """Record a finished run"""
+        if status == "cancelled":
+            self.cancelled += 1
+        else:
+            self.runs += 1
+            if status == "failed":
+                self.failures += 1
+            self.total_duration += duration
+            self.max_duration = max(self.max_duration, duration)
+            self.recent_durations.append(duration)
+        self.last_duration = duration
+        self.last_started = started
+        self.last_finished = started + duration
+        self.last_status = status
+        self.last_error = error
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.PERSISTED}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "JobStats":
+        return cls(**{name: data[name] for name in cls.PERSISTED if name in data})
+
+
+@dataclass
+class ScheduledJob:
+    """A coroutine function run on an interval or at a daily time"""
+    name: str
+    func: Callable[[], Awaitable[Any]]
+    interval: Optional[float] = None
+    daily_at: Optional[str] = None
+    overlap: OverlapPolicy = OverlapPolicy.SKIP
+    max_concurrency: int = 1
+    max_queued: int = 1
+    jitter: float = 0.0
+    next_run: float = 0.0
+    queued: int = 0
+    running: Dict[asyncio.Task, float] = field(default_factory=dict)
+    stats: JobStats = field(default_factory=JobStats)
+    
+    def following(self, now: float) -> float:
+        """Next scheduled time after now, keeping interval jobs on their grid"""
+        if self.interval is None:
+            return _next_daily(self.daily_at, max(now, self.next_run))
+        next_run = self.next_run + self.interval
+        if next_run <= now:
+            # Slots missed while the event loop was blocked are skipped
+            next_run += ((now - next_run) // self.interval + 1) * self.interval
+        return next_run
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Run counts and duration metrics"""
+        stats = self.stats
+        durations = sorted(stats.recent_durations)
+        return {
+            "schedule": f"every {self.interval}s" if self.interval is not None else f"daily at {self.daily_at}",
+            "overlap_policy": self.overlap.value,
+            "next_run": self.next_run,
+            "running": len(self.running),
+            "queued": self.queued,
+            "runs": stats.runs,
+            "failures": stats.failures,
+            "cancelled": stats.cancelled,
+            "skipped": stats.skipped,
+            "last_status": stats.last_status,
+            "last_error": stats.last_error,
+            "last_started": stats.last_started,
+            "duration_seconds": {
+                "last": stats.last_duration,
+                "avg": stats.total_duration / stats.runs if stats.runs else None,
+                "max": stats.max_duration if stats.runs else None,
+                "p50": _percentile(durations, 0.50),
+                "p95": _percentile(durations, 0.95)
+            }
+        }
+
+
+class AsyncScheduler:
+    """
+    Timer-heap scheduler running jobs as tracked asyncio tasks
+    
+    Jobs can be added before or after ``start``; ``start`` must be called
+    from a running event loop.
+    """
+    
+    def __init__(self, state_path: Optional[str] = None):
+        """
+        Initialize scheduler
+        
+        Args:
+            state_path: JSON file for per-job run state (None to keep it in memory)
+        """
+        self.state_path = Path(state_path) if state_path else None
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._heap: List[Tuple[float, int, ScheduledJob]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._saved_state = self._load_state()
+    
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load scheduler state: {e}")
+            return {}
+    
+    def _save_state(self):
+        if self.state_path is None:
+            return
+        state = dict(self._saved_state)
+        state.update({name: job.stats.to_dict() for name, job in self.jobs.items()})
+        temp_path = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            logger.error(f"Failed to save scheduler state: {e}")
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        every: Optional[float] = None,
+        daily_at: Optional[str] = None,
+        overlap: OverlapPolicy = OverlapPolicy.SKIP,
+        max_concurrency: int = 1,
+        max_queued: int = 1,
+        jitter: float = 0.0,
+        run_immediately: bool = False
+    ) -> ScheduledJob:
+        """
+        Schedule a coroutine function
+        
+        An interval job whose persisted last run is more than one interval
+        ago runs as soon as the scheduler starts; otherwise it resumes one
+        interval after its last run.
+        
+        Args:
+            name: Unique job name (also the key of its persisted state)
+            func: Coroutine function to run
+            every: Interval in seconds
+            daily_at: Local time "HH:MM" to run once a day
+            overlap: Policy when max_concurrency runs are already active
+            max_concurrency: Runs of this job allowed at the same time
+            max_queued: Runs held back under the QUEUE policy
+            jitter: Random delay of up to this many seconds added to each run
+            run_immediately: Run once as soon as the scheduler starts
+            
+        Returns:
+            The scheduled job
+            
+        Raises:
+            ValueError: If the schedule is missing, ambiguous or invalid, or
+                the name is taken
+        """
+        if (every is None) == (daily_at is None):
+            raise ValueError("Specify exactly one of every or daily_at")
+        if every is not None and every <= 0:
+            raise ValueError("Job interval must be positive")
+        if daily_at is not None:
+            _next_daily(daily_at, time.time())
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if name in self.jobs:
+            raise ValueError(f"Job already scheduled: {name}")
+        
+        job = ScheduledJob(
+            name=name,
+            func=func,
+            interval=every,
+            daily_at=daily_at,
+            overlap=OverlapPolicy(overlap),
+            max_concurrency=max_concurrency,
+            max_queued=max_queued,
+            jitter=jitter
+        )
+        if name in self._saved_state:
+            job.stats = JobStats.from_dict(self._saved_state[name])
+        
+        now = time.time()
+        if run_immediately:
+            job.next_run = now
+        elif every is not None:
+            last_started = job.stats.last_started
+            job.next_run = max(now, last_started + every) if last_started else now + every
+        else:
+            job.next_run = _next_daily(daily_at, now)
+        
+        self.jobs[name] = job
+        self._push(job)
+        return job
+    
+    def _push(self, job: ScheduledJob):
+        fire_at = job.next_run + (random.uniform(0, job.jitter) if job.jitter else 0.0)
+        heapq.heappush(self._heap, (fire_at, next(self._sequence), job))
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    def start(self):
+        """Start dispatching jobs in the running event loop"""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="async-scheduler")
+        logger.info(f"📅 Scheduler started with {len(self.jobs)} jobs")
+    
+    async def wait(self):
+        """Wait until the scheduler is stopped"""
+        if self._task is not None:
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+    
+    async def stop(self):
+        """Stop dispatching, cancel running jobs and persist their state"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        
+        tasks = [task for job in self.jobs.values() for task in job.running]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            job.queued = 0
+        self._save_state()
+        logger.info("🛑 Scheduler stopped")
+    
+    async def _run(self):
+        while True:
+            if not self._heap:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            
+            fire_at, _, job = self._heap[0]
+            delay = fire_at - time.time()
+            if delay > 0:
+                # Sleep until the earliest job is due or the heap changes
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            
+            heapq.heappop(self._heap)
+            self._dispatch(job)
+            job.next_run = job.following(time.time())
+            self._push(job)
+            self._wakeup.clear()
+    
+    def _dispatch(self, job: ScheduledJob):
+        """Start a due job, applying its overlap policy if it is busy"""
+        if len(job.running) < job.max_concurrency:
+            self._start_run(job)
+        elif job.overlap is OverlapPolicy.QUEUE and job.queued < job.max_queued:
+            job.queued += 1
+            logger.info(f"⏳ Job {job.name} still running, run queued")
+        elif job.overlap is OverlapPolicy.CANCEL_PREVIOUS:
+            previous = next(iter(job.running))
+            job.running.pop(previous)
+            previous.cancel()
+            logger.warning(f"⏹️ Job {job.name} still running, previous run cancelled")
+            self._start_run(job)
+        else:
+            job.stats.skipped += 1
+            logger.warning(f"⏭️ Job {job.name} still running, run skipped")
+    
+    def _start_run(self, job: ScheduledJob):
+        task = asyncio.create_task(self._execute(job), name=f"job:{job.name}")
+        job.running[task] = time.time()
+        task.add_done_callback(lambda finished: self._run_finished(job, finished))
+    
+    def _run_finished(self, job: ScheduledJob, task: asyncio.Task):
+        job.running.pop(task, None)
+        if job.queued and self.running and len(job.running) < job.max_concurrency:
+            job.queued -= 1
+            self._start_run(job)
+    
+    async def _execute(self, job: ScheduledJob):
+        started = time.time()
+        timer = time.perf_counter()
+        status, error = "success", None
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+            logger.error(f"❌ Job {job.name} failed: {error}", exc_info=True)
+        finally:
+            duration = time.perf_counter() - timer
+            job.stats.record(status, started, duration, error)
+            self._save_state()
+            logger.debug(f"Job {job.name} {status} in {duration:.3f}s")
+    
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-job run counts and duration metrics"""
+        return {name: job.metrics() for name, job in self.jobs.items()}
@@ -14,7 +14,6 @@ import os
 import json
 import asyncio
 import logging
-import schedule
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -23,7 +22,7 @@ from typing import Dict, List, Any, Optional
 # Import quantum systems
 from evaluation_system import QuantumLatticeEvaluator
 from agent_runner import QuantumAgentRunner, run_agent_evaluation_pipeline
-from tracing_system import tracing_system
+from async_scheduler import AsyncScheduler, OverlapPolicy
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,6 +33,9 @@ class QuantumAutomationSystem:
     def __init__(self):
         self.is_running = False
         self.automation_config = self._load_automation_config()
+        self.scheduler = AsyncScheduler(
+            self.automation_config.get("scheduler_state_file", "automation_state.json")
+        )
         self.last_evaluation = None
         self.evaluation_history = []
         self.alert_thresholds = {
@@ -59,7 +61,10 @@ class QuantumAutomationSystem:
             "alert_notifications_enabled": True,
             "continuous_monitoring": True,
             "performance_optimization": True,
-            "quantum_tuning_enabled": True
+            "quantum_tuning_enabled": True,
+            "continuous_monitoring_interval_seconds": 30,
+            "schedule_jitter_seconds": 5,
+            "scheduler_state_file": "automation_state.json"
         }
         
         # Save default config
@@ -76,69 +81,52 @@ class QuantumAutomationSystem:
         
         # Schedule automated tasks
         self._schedule_automation_tasks()
+        self.scheduler.start()
+        logger.info("🔄 Automation scheduler started - Sacred Trinity monitoring active")
         
-        # Start main automation loop
-        await self._automation_main_loop()
+        # Run until stop_automation
+        await self.scheduler.wait()
     
     def _schedule_automation_tasks(self):
         """Schedule all automation tasks"""
+        config = self.automation_config
+        jitter = config.get("schedule_jitter_seconds", 0)
+        
         # Continuous evaluation
-        schedule.every(self.automation_config["evaluation_interval_minutes"]).minutes.do(
-            self._schedule_evaluation
+        self.scheduler.add_job(
+            "evaluation", self._run_automated_evaluation,
+            every=config["evaluation_interval_minutes"] * 60,
+            overlap=OverlapPolicy.SKIP, jitter=jitter
         )
         
-        # Health monitoring
-        schedule.every(self.automation_config["health_check_interval_minutes"]).minutes.do(
-            self._schedule_health_check
+        # Health monitoring (a stuck check is replaced by a fresh one)
+        self.scheduler.add_job(
+            "health_check", self._run_health_monitoring,
+            every=config["health_check_interval_minutes"] * 60,
+            overlap=OverlapPolicy.CANCEL_PREVIOUS, jitter=jitter
         )
         
         # Daily comprehensive audit
-        schedule.every().day.at("06:00").do(
-            self._schedule_comprehensive_audit
+        self.scheduler.add_job(
+            "comprehensive_audit", self._run_comprehensive_audit,
+            daily_at="06:00", overlap=OverlapPolicy.QUEUE
         )
         
         # Quantum tuning (every 4 hours)
-        schedule.every(4).hours.do(
-            self._schedule_quantum_tuning
+        self.scheduler.add_job(
+            "quantum_tuning", self._run_quantum_tuning,
+            every=4 * 60 * 60, overlap=OverlapPolicy.SKIP, jitter=jitter
         )
         
-        logger.info("📅 Automation tasks scheduled successfully")
-    
-    def _schedule_evaluation(self):
-        """Schedule evaluation task"""
-        asyncio.create_task(self._run_automated_evaluation())
-    
-    def _schedule_health_check(self):
-        """Schedule health check task"""
-        asyncio.create_task(self._run_health_monitoring())
-    
-    def _schedule_comprehensive_audit(self):
-        """Schedule comprehensive audit"""
-        asyncio.create_task(self._run_comprehensive_audit())
-    
-    def _schedule_quantum_tuning(self):
-        """Schedule quantum tuning"""
-        asyncio.create_task(self._run_quantum_tuning())
-    
-    async def _automation_main_loop(self):
-        """Main automation control loop"""
-        logger.info("🔄 Automation main loop started - Sacred Trinity monitoring active")
+        # Continuous monitoring check
+        if config["continuous_monitoring"]:
+            self.scheduler.add_job(
+                "continuous_monitoring", self._continuous_monitoring_check,
+                every=config.get("continuous_monitoring_interval_seconds", 30),
+                overlap=OverlapPolicy.SKIP
+            )
         
-        while self.is_running:
-            try:
-                # Run pending scheduled tasks
-                schedule.run_pending()
-                
-                # Continuous monitoring check
-                if self.automation_config["continuous_monitoring"]:
-                    await self._continuous_monitoring_check()
-                
-                # Wait before next iteration
-                await asyncio.sleep(30)  # Check every 30 seconds
-                
-            except Exception as e:
-                logger.error(f"❌ Automation loop error: {e}")
-                await asyncio.sleep(60)  # Wait longer on error
+        logger.info("📅 Automation tasks scheduled successfully")
     
     async def _run_automated_evaluation(self):
         """Execute automated evaluation"""
@@ -339,6 +327,7 @@ class QuantumAutomationSystem:
     async def stop_automation(self):
         """Stop automation system"""
         self.is_running = False
+        await self.scheduler.stop()
         logger.info("🛑 Quantum Automation System stopped")
     
     def get_automation_status(self) -> Dict[str, Any]:
@@ -348,6 +337,7 @@ class QuantumAutomationSystem:
             "last_evaluation": self.last_evaluation,
             "evaluation_count": len(self.evaluation_history),
             "config": self.automation_config,
+            "jobs": self.scheduler.metrics(),
             "uptime": "continuous" if self.is_running else "stopped"
         }
 
@@ -5,13 +5,23 @@ Provides direct decision-making capabilities based on predefined parameters and
 
 import logging
 import time
-from typing import Dict, Any, List, Optional
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Any, Iterator, List, Optional
 from datetime import datetime
 from enum import Enum
+
+import numpy as np
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
+# Number of most recent decisions kept in memory
+DECISION_HISTORY_SIZE = 1000
+
+# Largest batch accepted by /api/autonomous/decisions:batch
+MAX_DECISION_BATCH_SIZE = 10000
+
 
 class DecisionPriority(str, Enum):
     """Decision priority levels"""
@@ -21,6 +31,23 @@ class DecisionPriority(str, Enum):
     LOW = "low"
 
 
+# Priorities in increasing order of urgency
+PRIORITY_LEVELS = [
+    DecisionPriority.LOW,
+    DecisionPriority.MEDIUM,
+    DecisionPriority.HIGH,
+    DecisionPriority.CRITICAL
+]
+
+# Confidence adjustment applied for each priority
+PRIORITY_CONFIDENCE_BOOST = {
+    DecisionPriority.CRITICAL: 0.1,
+    DecisionPriority.HIGH: 0.05,
+    DecisionPriority.MEDIUM: 0.0,
+    DecisionPriority.LOW: -0.05
+}
+
+
 class DecisionType(str, Enum):
     """Types of autonomous decisions"""
     DEPLOYMENT = "deployment"
@@ -49,6 +76,11 @@ class DecisionContext(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(default=None)
 
 
+class DecisionBatchRequest(BaseModel):
+    """Batch of decision contexts evaluated together"""
+    decisions: List[DecisionContext] = Field(..., max_length=MAX_DECISION_BATCH_SIZE)
+
+
 class DecisionResult(BaseModel):
     """Result of autonomous decision"""
     decision_id: str
@@ -71,14 +103,111 @@ class DecisionResult(BaseModel):
         return self.metadata.get("priority", "medium") if self.metadata else "medium"
 
 
+_PRIORITY_INDEX = {priority: level for level, priority in enumerate(PRIORITY_LEVELS)}
+
+
+class _DecisionStats:
+    """Running aggregates over a set of decisions"""
+    __slots__ = ("count", "approved", "guardian_required", "confidence_sum")
+
+    def __init__(self):
+        self.count = 0
+        self.approved = 0
+        self.guardian_required = 0
+        self.confidence_sum = 0.0
+
+    def add(self, decision: DecisionResult):
+        self.count += 1
+        self.approved += decision.approved
+        self.guardian_required += decision.requires_guardian
+        self.confidence_sum += decision.confidence
+
+    def remove(self, decision: DecisionResult):
+        self.count -= 1
+        self.approved -= decision.approved
+        self.guardian_required -= decision.requires_guardian
+        # Reset rather than subtract down to zero so float error can't build up
+        self.confidence_sum = self.confidence_sum - decision.confidence if self.count else 0.0
+
+
+class DecisionHistory:
+    """
+    Fixed-size ring buffer of the most recent decisions
+    
+    Recording a decision overwrites the oldest slot once full instead of
+    copying the list, and per-type sub-indexes and running aggregates are
+    updated on insert and eviction, so metrics are O(1) and reading the
+    last N decisions (optionally of one type) is O(N).
+    """
+
+    def __init__(self, capacity: int = DECISION_HISTORY_SIZE):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._slots: List[Optional[DecisionResult]] = [None] * capacity
+        self._next = 0
+        self._size = 0
+        self._by_type: Dict[DecisionType, Deque[DecisionResult]] = {t: deque() for t in DecisionType}
+        self.stats = _DecisionStats()
+        self.stats_by_type: Dict[DecisionType, _DecisionStats] = {t: _DecisionStats() for t in DecisionType}
+
+    def append(self, decision: DecisionResult):
+        """Record a decision, evicting the oldest one when full"""
+        evicted = self._slots[self._next]
+        if evicted is not None:
+            # The oldest decision overall is also the oldest of its type
+            self._by_type[evicted.decision_type].popleft()
+            self.stats.remove(evicted)
+            self.stats_by_type[evicted.decision_type].remove(evicted)
+        else:
+            self._size += 1
+        
+        self._slots[self._next] = decision
+        self._next = (self._next + 1) % self.capacity
+        self._by_type[decision.decision_type].append(decision)
+        self.stats.add(decision)
+        self.stats_by_type[decision.decision_type].add(decision)
+
+    def recent(self, limit: int, decision_type: Optional[DecisionType] = None) -> List[DecisionResult]:
+        """
+        Get the most recent decisions, oldest first
+        
+        Args:
+            limit: Maximum number of decisions to return
+            decision_type: Only return decisions of this type
+            
+        Returns:
+            Up to limit decisions in the order they were made
+        """
+        if limit <= 0:
+            return []
+        
+        if decision_type is not None:
+            newest_first = reversed(self._by_type[decision_type])
+        else:
+            newest_first = (
+                self._slots[(self._next - 1 - i) % self.capacity] for i in range(self._size)
+            )
+        
+        decisions = list(islice(newest_first, limit))
+        decisions.reverse()
+        return decisions
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[DecisionResult]:
+        return iter(self.recent(self._size))
+
+
 class AIDecisionMatrix:
     """
     AI Decision Matrix for autonomous decision-making
     Implements configurable decision logic based on predefined parameters
     """
 
-    def __init__(self):
-        self.decision_history: List[DecisionResult] = []
+    def __init__(self, history_size: int = DECISION_HISTORY_SIZE):
+        self.decision_history = DecisionHistory(history_size)
         self.decision_rules = self._initialize_decision_rules()
         logger.info("✅ AI Decision Matrix initialized")
 
@@ -140,41 +269,172 @@ class AIDecisionMatrix:
         # Determine if decision requires guardian approval
         requires_guardian = self._requires_guardian_approval(context, rules, confidence)
         
-        # Generate reasoning
-        reasoning = self._generate_reasoning(context, confidence, requires_guardian)
-        
         # Determine approval
         approved = confidence >= confidence_threshold and not requires_guardian
         
-        # Generate recommended actions
-        actions = self._generate_actions(context, approved, requires_guardian)
-        
         # Create decision result
         decision_id = f"{context.decision_type.value}_{int(time.time()*1000)}"
-        result = DecisionResult(
+        result = self._build_result(decision_id, context, confidence, approved, requires_guardian)
+        
+        # Store in history (evicts the oldest decision once full)
+        self.decision_history.append(result)
+        
+        logger.info(f"✅ Decision made: {decision_id}, approved={approved}, confidence={confidence:.2f}")
+        return result
+
+    def make_decisions_batch(self, contexts: List[DecisionContext]) -> List[DecisionResult]:
+        """
+        Make many autonomous decisions at once
+        
+        Parameter values, weights and thresholds of all contexts are packed
+        into flat arrays so confidences and guardian-escalation flags are
+        computed vectorized; results match make_decision for each context.
+        
+        Args:
+            contexts: Decision contexts to evaluate
+            
+        Returns:
+            DecisionResults in the same order as contexts
+        """
+        if not contexts:
+            return []
+        
+        confidence, approved, requires_guardian = self._evaluate_batch(contexts)
+        
+        millis = int(time.time() * 1000)
+        actions_by_outcome: Dict[Any, List[str]] = {}
+        results = []
+        for i, (context, score, ok, escalate) in enumerate(
+            zip(contexts, confidence.tolist(), approved.tolist(), requires_guardian.tolist())
+        ):
+            # Actions only depend on the type and outcome
+            outcome = (context.decision_type, ok, escalate)
+            actions = actions_by_outcome.get(outcome)
+            if actions is None:
+                actions = actions_by_outcome[outcome] = self._generate_actions(context, ok, escalate)
+            
+            # Index suffix keeps ids unique within the batch
+            result = DecisionResult(
+                decision_id=f"{context.decision_type.value}_{millis}_{i}",
+                decision_type=context.decision_type,
+                approved=ok,
+                confidence=score,
+                reasoning=self._generate_reasoning(context, score, escalate),
+                actions=list(actions),
+                requires_guardian=escalate,
+                metadata=self._result_metadata(context)
+            )
+            self.decision_history.append(result)
+            results.append(result)
+        
+        logger.info(
+            f"✅ Batch of {len(results)} decisions made: {int(approved.sum())} approved, "
+            f"{int(requires_guardian.sum())} require guardian"
+        )
+        return results
+
+    def _evaluate_batch(self, contexts: List[DecisionContext]):
+        """
+        Vectorized _calculate_confidence and _requires_guardian_approval
+        
+        Returns:
+            Tuple of (confidence, approved, requires_guardian) arrays
+        """
+        n = len(contexts)
+        
+        # Pack every parameter into flat arrays tagged with its context index
+        counts = np.fromiter((len(c.parameters) for c in contexts), dtype=np.int64, count=n)
+        owner = np.repeat(np.arange(n), counts)
+        params = [p for c in contexts for p in c.parameters]
+        numeric = [isinstance(p.value, (int, float)) for p in params]
+        values = np.array(
+            [float(p.value) if is_numeric else 0.0 for p, is_numeric in zip(params, numeric)],
+            dtype=np.float64
+        )
+        numeric = np.array(numeric, dtype=bool)
+        # Missing thresholds become NaN
+        thresholds = np.array([p.threshold for p in params], dtype=np.float64)
+        weights = np.array([p.weight for p in params], dtype=np.float64)
+        
+        # Normalize parameter values to the 0-1 range; booleans without a
+        # threshold clamp to 0/1 like other numbers, non-numbers count as 0.5
+        has_threshold = ~np.isnan(thresholds)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scaled = np.where(
+                thresholds != 0,
+                np.minimum(1.0, values / thresholds),
+                (values > 0).astype(np.float64)
+            )
+        normalized = np.select(
+            [numeric & has_threshold, numeric],
+            [scaled, np.clip(values, 0.0, 1.0)],
+            0.5
+        )
+        
+        # Weighted average per context; no parameters or zero weight means 0.5
+        weighted_sum = np.bincount(owner, weights=normalized * weights, minlength=n)
+        total_weight = np.bincount(owner, weights=weights, minlength=n)
+        weighted = total_weight != 0
+        confidence = np.full(n, 0.5)
+        np.divide(weighted_sum, total_weight, out=confidence, where=weighted)
+        
+        priority_level = np.fromiter(
+            (_PRIORITY_INDEX[c.priority] for c in contexts), dtype=np.int64, count=n
+        )
+        boost = np.array([PRIORITY_CONFIDENCE_BOOST.get(p, 0.0) for p in PRIORITY_LEVELS])
+        confidence = np.where(weighted, np.clip(confidence + boost[priority_level], 0.0, 1.0), confidence)
+        
+        # Per-type rules, indexed by position in DecisionType
+        decision_types = list(DecisionType)
+        type_index = {t: i for i, t in enumerate(decision_types)}
+        confidence_threshold = np.empty(len(decision_types))
+        max_level = np.empty(len(decision_types), dtype=np.int64)
+        for i, decision_type in enumerate(decision_types):
+            rules = self.decision_rules.get(decision_type, {})
+            confidence_threshold[i] = rules.get("confidence_threshold", 0.8)
+            max_auto_approve = rules.get("max_auto_approve")
+            # Guardian overrides and types without an auto-approve limit always escalate
+            if decision_type == DecisionType.GUARDIAN_OVERRIDE or max_auto_approve is None:
+                max_level[i] = -1
+            else:
+                max_level[i] = _PRIORITY_INDEX[max_auto_approve]
+        
+        type_code = np.fromiter(
+            (type_index[c.decision_type] for c in contexts), dtype=np.int64, count=n
+        )
+        threshold = confidence_threshold[type_code]
+        requires_guardian = (priority_level > max_level[type_code]) | (confidence < threshold)
+        approved = (confidence >= threshold) & ~requires_guardian
+        
+        return confidence, approved, requires_guardian
+
+    def _build_result(
+        self,
+        decision_id: str,
+        context: DecisionContext,
+        confidence: float,
+        approved: bool,
+        requires_guardian: bool
+    ) -> DecisionResult:
+        """Create the DecisionResult for an evaluated context"""
+        return DecisionResult(
             decision_id=decision_id,
             decision_type=context.decision_type,
             approved=approved,
             confidence=confidence,
-            reasoning=reasoning,
-            actions=actions,
+            reasoning=self._generate_reasoning(context, confidence, requires_guardian),
+            actions=self._generate_actions(context, approved, requires_guardian),
             requires_guardian=requires_guardian,
-            metadata={
-                "parameters": [p.model_dump() for p in context.parameters],
-                "priority": context.priority.value,
-                "source": context.source
-            }
+            metadata=self._result_metadata(context)
         )
-        
-        # Store in history
-        self.decision_history.append(result)
-        
-        # Keep only last 1000 decisions
-        if len(self.decision_history) > 1000:
-            self.decision_history = self.decision_history[-1000:]
-        
-        logger.info(f"✅ Decision made: {decision_id}, approved={approved}, confidence={confidence:.2f}")
-        return result
+
+    def _result_metadata(self, context: DecisionContext) -> Dict[str, Any]:
+        """Metadata recorded with a decision"""
+        return {
+            "parameters": [p.model_dump() for p in context.parameters],
+            "priority": context.priority.value,
+            "source": context.source
+        }
 
     def _calculate_confidence(self, context: DecisionContext, rules: Dict[str, Any]) -> float:
         """Calculate confidence score based on parameters and rules"""
@@ -206,14 +466,8 @@ class AIDecisionMatrix:
         
         confidence = weighted_sum / total_weight
         
-        # Apply priority boost
-        priority_boost = {
-            DecisionPriority.CRITICAL: 0.1,
-            DecisionPriority.HIGH: 0.05,
-            DecisionPriority.MEDIUM: 0.0,
-            DecisionPriority.LOW: -0.05
-        }
-        confidence = min(1.0, confidence + priority_boost.get(context.priority, 0.0))
+        # Apply priority boost, keeping the score within 0-1
+        confidence = min(1.0, max(0.0, confidence + PRIORITY_CONFIDENCE_BOOST.get(context.priority, 0.0)))
         
         return confidence
 
@@ -233,15 +487,8 @@ class AIDecisionMatrix:
         if max_auto_approve is None:
             return True
         
-        priority_levels = [
-            DecisionPriority.LOW,
-            DecisionPriority.MEDIUM,
-            DecisionPriority.HIGH,
-            DecisionPriority.CRITICAL
-        ]
-        
-        current_level = priority_levels.index(context.priority)
-        max_level = priority_levels.index(max_auto_approve)
+        current_level = PRIORITY_LEVELS.index(context.priority)
+        max_level = PRIORITY_LEVELS.index(max_auto_approve)
         
         if current_level > max_level:
             return True
@@ -314,17 +561,13 @@ class AIDecisionMatrix:
         decision_type: Optional[DecisionType] = None,
         limit: int = 100
     ) -> List[DecisionResult]:
-        """Get decision history, optionally filtered by type"""
-        history = self.decision_history
-        
-        if decision_type:
-            history = [d for d in history if d.decision_type == decision_type]
-        
-        return history[-limit:]
+        """Get the last limit decisions, optionally filtered by type"""
+        return self.decision_history.recent(limit, decision_type)
 
     def get_decision_metrics(self) -> Dict[str, Any]:
         """Get metrics about decision making"""
-        if not self.decision_history:
+        stats = self.decision_history.stats
+        if not stats.count:
             return {
                 "total_decisions": 0,
                 "approval_rate": 0.0,
@@ -332,16 +575,13 @@ class AIDecisionMatrix:
                 "guardian_required_rate": 0.0
             }
         
-        total = len(self.decision_history)
-        approved = sum(1 for d in self.decision_history if d.approved)
-        guardian_required = sum(1 for d in self.decision_history if d.requires_guardian)
-        avg_confidence = sum(d.confidence for d in self.decision_history) / total
+        total = stats.count
         
         return {
             "total_decisions": total,
-            "approval_rate": approved / total,
-            "average_confidence": avg_confidence,
-            "guardian_required_rate": guardian_required / total,
+            "approval_rate": stats.approved / total,
+            "average_confidence": stats.confidence_sum / total,
+            "guardian_required_rate": stats.guardian_required / total,
             "by_type": self._get_metrics_by_type()
         }
 
@@ -349,13 +589,13 @@ class AIDecisionMatrix:
         """Get metrics broken down by decision type"""
         metrics_by_type = {}
         
-        for decision_type in DecisionType:
-            type_decisions = [d for d in self.decision_history if d.decision_type == decision_type]
-            if type_decisions:
+        for decision_type, stats in self.decision_history.stats_by_type.items():
+            if stats.count:
                 metrics_by_type[decision_type.value] = {
-                    "count": len(type_decisions),
-                    "approval_rate": sum(1 for d in type_decisions if d.approved) / len(type_decisions),
-                    "avg_confidence": sum(d.confidence for d in type_decisions) / len(type_decisions)
+                    "count": stats.count,
+                    "approval_rate": stats.approved / stats.count,
+                    "avg_confidence": stats.confidence_sum / stats.count,
+                    "guardian_required_rate": stats.guardian_required / stats.count
                 }
         
         return metrics_by_type
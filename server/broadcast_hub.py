@@ -0,0 +1,259 @@
+"""
+WebSocket Broadcast Hub
+Fan-out of shared frames to many WebSocket connections.
+
+Provides:
+- One frame computation and one JSON serialization per tick, shared by
+  every subscriber
+- Per-connection bounded queues: publishing never awaits a client, it only
+  appends to a deque and resolves the connection's waiter future
+- Slow-consumer handling: the oldest queued frame is dropped when a queue
+  is full, and connections that keep falling behind are evicted
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SendFunc = Callable[[str], Awaitable[None]]
+CloseFunc = Callable[[], Awaitable[None]]
+
+# WebSocket close code for connections evicted as too slow ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class Subscriber:
+    """A connection attached to a hub"""
+    
+    __slots__ = ("subscriber_id", "frames", "waiter", "close", "dropped", "pending_drops", "closed")
+    
+    def __init__(self, subscriber_id: str, close: Optional[CloseFunc] = None):
+        self.subscriber_id = subscriber_id
+        self.frames: Deque[str] = deque()
+        self.waiter: Optional[asyncio.Future] = None
+        self.close = close
+        self.dropped = 0
+        self.pending_drops = 0
+        self.closed = False
+    
+    def wake(self) -> None:
+        """Resume a serve loop waiting for frames"""
+        waiter = self.waiter
+        if waiter is not None:
+            self.waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class BroadcastHub:
+    """
+    Fan-out hub for one WebSocket stream
+    
+    Frames are serialized once by ``publish`` and pushed onto every
+    subscriber's bounded queue without awaiting; each connection drains its
+    own queue in ``serve``. When ``frame_factory`` is set, a ticker task
+    publishes a fresh frame every ``interval`` seconds while anyone is
+    subscribed, and new subscribers immediately receive the latest frame.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        frame_factory: Optional[Callable[[], Dict[str, Any]]] = None,
+        interval: float = 5.0,
+        queue_size: int = 16,
+        max_pending_drops: Optional[int] = None
+    ):
+        """
+        Initialize broadcast hub
+        
+        Args:
+            name: Hub name used in logs
+            frame_factory: Builds the periodic frame, or None for publish-only hubs
+            interval: Seconds between periodic frames
+            queue_size: Frames buffered per connection
+            max_pending_drops: Frames a connection may lose before its next
+                successful send before it is evicted (defaults to queue_size)
+        """
+        self.name = name
+        self.frame_factory = frame_factory
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_pending_drops = queue_size if max_pending_drops is None else max_pending_drops
+        
+        self.subscribers: Dict[str, Subscriber] = {}
+        self.latest_frame: Optional[str] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._next_id = 0
+        
+        self.stats = {
+            "frames_published": 0,
+            "frames_dropped": 0,
+            "evictions": 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self.subscribers)
+    
+    def subscribe(self, subscriber_id: Optional[str] = None, close: Optional[CloseFunc] = None) -> Subscriber:
+        """
+        Attach a connection
+        
+        Args:
+            subscriber_id: Connection identifier (generated if omitted)
+            close: Coroutine function that closes the connection on eviction
+            
+        Returns:
+            Subscriber handle to pass to ``serve``/``unsubscribe``
+        """
+        if subscriber_id is None:
+            self._next_id += 1
+            subscriber_id = f"{self.name}-{self._next_id}"
+        
+        subscriber = Subscriber(subscriber_id, close)
+        self.subscribers[subscriber_id] = subscriber
+        
+        if self.latest_frame is not None:
+            subscriber.frames.append(self.latest_frame)
+        self._ensure_ticker()
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Detach a connection and wake its serve loop so it can exit"""
+        if self.subscribers.get(subscriber.subscriber_id) is subscriber:
+            del self.subscribers[subscriber.subscriber_id]
+        if subscriber.closed:
+            return
+        
+        subscriber.closed = True
+        subscriber.frames.clear()
+        subscriber.wake()
+    
+    def publish(self, message: Dict[str, Any]) -> int:
+        """
+        Serialize a message once and queue it for every subscriber
+        
+        Args:
+            message: JSON-serializable message
+            
+        Returns:
+            Number of subscribers the frame was queued for
+        """
+        return self.publish_frame(json.dumps(message, separators=(",", ":")))
+    
+    def publish_frame(self, frame: str) -> int:
+        """Queue an already serialized frame for every subscriber"""
+        self.stats["frames_published"] += 1
+        delivered = 0
+        slow = []
+        
+        queue_size = self.queue_size
+        
+        for subscriber in self.subscribers.values():
+            frames = subscriber.frames
+            if len(frames) >= queue_size:
+                # Keep the newest data: drop the oldest queued frame
+                frames.popleft()
+                subscriber.dropped += 1
+                subscriber.pending_drops += 1
+                self.stats["frames_dropped"] += 1
+                if subscriber.pending_drops > self.max_pending_drops:
+                    slow.append(subscriber)
+                    continue
+            frames.append(frame)
+            subscriber.wake()
+            delivered += 1
+        
+        for subscriber in slow:
+            self._evict(subscriber)
+        
+        return delivered
+    
+    def _evict(self, subscriber: Subscriber) -> None:
+        """Disconnect a subscriber that cannot keep up"""
+        self.unsubscribe(subscriber)
+        self.stats["evictions"] += 1
+        logger.warning(
+            f"Evicting slow {self.name} subscriber {subscriber.subscriber_id} "
+            f"after {subscriber.dropped} dropped frames"
+        )
+        
+        if subscriber.close is not None:
+            asyncio.ensure_future(self._close_quietly(subscriber))
+    
+    @staticmethod
+    async def _close_quietly(subscriber: Subscriber) -> None:
+        try:
+            await subscriber.close()
+        except Exception:
+            pass
+    
+    async def serve(
+        self,
+        send: SendFunc,
+        subscriber_id: Optional[str] = None,
+        close: Optional[CloseFunc] = None
+    ) -> None:
+        """
+        Subscribe a connection and forward frames to it until it goes away
+        
+        Returns when the subscriber is evicted or unsubscribed; exceptions
+        raised by ``send`` (e.g. disconnects) propagate to the caller.
+        
+        Args:
+            send: Coroutine function sending one text frame to the connection
+            subscriber_id: Connection identifier
+            close: Coroutine function that closes the connection on eviction
+        """
+        subscriber = self.subscribe(subscriber_id, close)
+        loop = asyncio.get_running_loop()
+        try:
+            while not subscriber.closed:
+                if not subscriber.frames:
+                    subscriber.waiter = loop.create_future()
+                    await subscriber.waiter
+                    continue
+                await send(subscriber.frames.popleft())
+                subscriber.pending_drops = 0
+        finally:
+            self.unsubscribe(subscriber)
+    
+    def _ensure_ticker(self) -> None:
+        """Start the periodic frame task if this hub has one and it is idle"""
+        if self.frame_factory is None:
+            return
+        loop = asyncio.get_running_loop()
+        # A ticker left behind by a previous (closed) event loop never finishes
+        if self._ticker is None or self._ticker.done() or self._ticker.get_loop() is not loop:
+            self._ticker = loop.create_task(self._tick())
+    
+    async def _tick(self) -> None:
+        """Publish one frame per interval while anyone is subscribed"""
+        while self.subscribers:
+            try:
+                self.latest_frame = json.dumps(self.frame_factory(), separators=(",", ":"))
+                self.publish_frame(self.latest_frame)
+            except Exception as e:
+                logger.error(f"{self.name} frame generation failed: {e}")
+            await asyncio.sleep(self.interval)
+        
+        # Nobody is listening: do not replay a stale frame to the next client
+        self.latest_frame = None
+    
+    async def close(self) -> None:
+        """Stop the ticker and disconnect every subscriber"""
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+        
+        for subscriber in list(self.subscribers.values()):
+            self.unsubscribe(subscriber)
+        self.latest_frame = None
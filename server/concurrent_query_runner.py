@@ -0,0 +1,364 @@
+"""
+Concurrent Query Runner
+Bounded-parallelism execution of evaluation queries against the Sacred
+Trinity components.
+
+Queries are consumed lazily and routed to a bounded queue per component.
+Each component runs up to its own limit from its own queue, so a backlog
+for a slow component cannot starve the others. Each attempt has its own
+timeout; failed attempts are retried with exponential backoff and full
+jitter. Results are written to JSONL as they complete, so memory stays
+flat however many queries are run. The report gives p50/p95 latency per
+component.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from array import array
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPONENT_CONCURRENCY = 8
+DEFAULT_REQUEST_TIMEOUT = 15.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.25
+DEFAULT_MAX_BACKOFF = 5.0
+DEFAULT_MAX_QUEUED = 64
+
+# Errors worth another attempt: the component may be momentarily busy
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    ConnectionError
+)
+
+
+def iter_queries(filepath: str) -> Iterator[Dict[str, Any]]:
+    """Yield queries from a JSONL file one line at a time"""
+    with open(filepath, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def create_pooled_session(
+    concurrency: Optional[Dict[str, int]] = None,
+    default_concurrency: int = DEFAULT_COMPONENT_CONCURRENCY,
+    timeout: float = DEFAULT_REQUEST_TIMEOUT
+) -> aiohttp.ClientSession:
+    """
+    Create an aiohttp session whose connection pool matches the runner limits
+    
+    Each component is its own host:port, so the per-host limit is the
+    largest component limit and the pool holds enough for all of them.
+    
+    Args:
+        concurrency: Per-component concurrency limits
+        default_concurrency: Limit for components not listed
+        timeout: Total timeout per request in seconds
+        
+    Returns:
+        Session reusing keep-alive connections across queries
+    """
+    limits = list((concurrency or {}).values()) + [default_concurrency]
+    connector = aiohttp.TCPConnector(
+        limit=sum(limits) + default_concurrency * 3,
+        limit_per_host=max(limits),
+        keepalive_timeout=30
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout)
+    )
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(fraction * len(sorted_values) + 0.999999) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class ComponentStats:
+    """Latency and outcome counters for one component"""
+    
+    __slots__ = ("latencies", "succeeded", "failed", "retries")
+    
+    def __init__(self):
+        self.latencies = array('d')
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+    
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        total = self.succeeded + self.failed
+        return {
+            "total": total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "success_rate": self.succeeded / total if total else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1000
+        }
+
+
+class ConcurrentQueryRunner:
+    """
+    Runs queries concurrently with per-component limits, timeouts and retries
+    
+    ``execute`` performs one attempt for a query and returns its result
+    record. When every attempt fails, ``on_error`` turns the final exception
+    into the record that is written instead.
+    """
+    
+    def __init__(
+        self,
+        execute: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        on_error: Optional[Callable[[Dict[str, Any], BaseException], Dict[str, Any]]] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: int = DEFAULT_COMPONENT_CONCURRENCY,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        retry_on: Tuple[Type[BaseException], ...] = RETRYABLE_ERRORS,
+        retry_if: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        max_queued: int = DEFAULT_MAX_QUEUED
+    ):
+        """
+        Initialize runner
+        
+        Args:
+            execute: Coroutine function running one attempt of a query
+            on_error: Builds the record for a query whose attempts all failed
+                (defaults to the query with an "error" field)
+            concurrency: Per-component concurrency limits
+            default_concurrency: Limit for components not listed
+            timeout: Timeout per attempt in seconds
+            retries: Additional attempts after the first
+            backoff: Base delay before the first retry in seconds
+            max_backoff: Upper bound of the retry delay
+            retry_on: Exception types that are retried
+            retry_if: Predicate on a result record that asks for a retry,
+                for executors that report failures instead of raising
+            max_queued: Queries read ahead and waiting per component
+        """
+        self.execute = execute
+        self.on_error = on_error or self._default_error_record
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = default_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = retry_on
+        self.retry_if = retry_if
+        self.max_queued = max_queued
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.stats: Dict[str, ComponentStats] = {}
+    
+    @staticmethod
+    def _default_error_record(query_data: Dict[str, Any], error: BaseException) -> Dict[str, Any]:
+        return {**query_data, "error": str(error) or type(error).__name__}
+    
+    def _limit(self, component: str) -> int:
+        return self.concurrency.get(component, self.default_concurrency)
+    
+    def _semaphore(self, component: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(component)
+        if semaphore is None:
+            semaphore = self._semaphores[component] = asyncio.Semaphore(self._limit(component))
+        return semaphore
+    
+    def _component_stats(self, component: str) -> ComponentStats:
+        stats = self.stats.get(component)
+        if stats is None:
+            stats = self.stats[component] = ComponentStats()
+        return stats
+    
+    def _retry_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt``"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+    
+    async def run_query(self, query_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run one query with its component's limit, timeout and retries
+        
+        Args:
+            query_data: Query record with a "component" field
+            
+        Returns:
+            Result record from ``execute`` or ``on_error``
+        """
+        component = query_data.get("component", "unknown")
+        stats = self._component_stats(component)
+        
+        async with self._semaphore(component):
+            started = time.perf_counter()
+            attempt = 0
+            while True:
+                error = None
+                try:
+                    result = await asyncio.wait_for(self.execute(query_data), self.timeout)
+                except self.retry_on as e:
+                    error = e
+                except Exception as e:
+                    # Not retryable (e.g. unknown component)
+                    stats.failed += 1
+                    logger.error(f"❌ Query failed: {component} - {e}")
+                    result = self.on_error(query_data, e)
+                    break
+                
+                if error is None:
+                    if self.retry_if is None or not self.retry_if(result):
+                        stats.succeeded += 1
+                        break
+                    if attempt >= self.retries:
+                        stats.failed += 1
+                        break
+                elif attempt >= self.retries:
+                    stats.failed += 1
+                    logger.error(f"❌ Query failed: {component} - {type(error).__name__}: {error}")
+                    result = self.on_error(query_data, error)
+                    break
+                
+                attempt += 1
+                stats.retries += 1
+                await asyncio.sleep(self._retry_delay(attempt - 1))
+            
+            stats.latencies.append(time.perf_counter() - started)
+        return result
+    
+    async def run(
+        self,
+        queries: Iterable[Dict[str, Any]],
+        output_path: Optional[str] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+        ordered: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run queries, streaming each result as it completes
+        
+        Queries are pulled from ``queries`` into a queue per component, and
+        each component starts queries from its own queue up to its limit. A
+        queue holds at most ``max_queued`` queries; reading only pauses when
+        the next query belongs to a component whose queue is full, so a
+        generator over a large file is never fully materialized.
+        
+        Args:
+            queries: Query records (any iterable, consumed lazily)
+            output_path: JSONL file receiving one line per result
+            on_result: Callback receiving each result record
+            ordered: Deliver results in input order; completed results are
+                held until every earlier query has finished
+            
+        Returns:
+            Report with per-component counts and p50/p95 latency
+        """
+        self.stats = {}
+        self._semaphores = {}
+        started = time.perf_counter()
+        completed = 0
+        
+        queued: Dict[str, deque] = {}
+        running: Dict[str, int] = {}
+        pending: Dict[asyncio.Future, Tuple[int, str]] = {}
+        held: Dict[int, Dict[str, Any]] = {}
+        next_position = 0
+        next_delivery = 0
+        
+        def deliver(result: Dict[str, Any]):
+            nonlocal completed
+            completed += 1
+            if output is not None:
+                output.write(json.dumps(result, default=str) + "\n")
+            if on_result is not None:
+                on_result(result)
+        
+        output = open(output_path, 'w') if output_path else None
+        try:
+            query_iter = iter(queries)
+            waiting = None
+            exhausted = False
+            while True:
+                started_any = True
+                while started_any:
+                    # Read ahead until the next query's component queue is full
+                    while not exhausted:
+                        if waiting is None:
+                            try:
+                                waiting = (next_position, next(query_iter))
+                            except StopIteration:
+                                exhausted = True
+                                break
+                            next_position += 1
+                        component = waiting[1].get("component", "unknown")
+                        queue = queued.setdefault(component, deque())
+                        if len(queue) >= self.max_queued:
+                            break
+                        queue.append(waiting)
+                        waiting = None
+                    
+                    # Start queued queries where their component has capacity
+                    started_any = False
+                    for component, queue in queued.items():
+                        limit = self._limit(component)
+                        while queue and running.get(component, 0) < limit:
+                            position, query_data = queue.popleft()
+                            running[component] = running.get(component, 0) + 1
+                            pending[asyncio.ensure_future(self.run_query(query_data))] = (position, component)
+                            started_any = True
+                
+                if not pending:
+                    break
+                
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    position, component = pending.pop(task)
+                    running[component] -= 1
+                    if not ordered:
+                        deliver(task.result())
+                        continue
+                    held[position] = task.result()
+                    while next_delivery in held:
+                        deliver(held.pop(next_delivery))
+                        next_delivery += 1
+                if output is not None:
+                    output.flush()
+        finally:
+            for task in pending:
+                task.cancel()
+            if output is not None:
+                output.close()
+        
+        report = self.report(time.perf_counter() - started)
+        logger.info(
+            f"📊 Ran {completed} queries in {report['duration_seconds']:.2f}s "
+            f"({report['queries_per_second']:.1f}/s)"
+        )
+        return report
+    
+    def report(self, duration: float) -> Dict[str, Any]:
+        """Per-component latency percentiles and outcome counts"""
+        components = {component: stats.summary() for component, stats in sorted(self.stats.items())}
+        total = sum(summary["total"] for summary in components.values())
+        return {
+            "total": total,
+            "succeeded": sum(summary["succeeded"] for summary in components.values()),
+            "failed": sum(summary["failed"] for summary in components.values()),
+            "duration_seconds": duration,
+            "queries_per_second": total / duration if duration > 0 else 0.0,
+            "components": components
+        }
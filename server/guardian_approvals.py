@@ -3,9 +3,12 @@ Guardian Approval System
 Records and manages guardian approvals for autonomous decisions.
 """
 
+import atexit
 import json
 import os
+import threading
 import time
+from itertools import islice
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 from pydantic import BaseModel, Field
@@ -14,6 +17,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Action -> per-type stats counter
+_ACTION_STATS = {
+    "approve": "approved",
+    "reject": "rejected",
+    "modify": "modified"
+}
+
 
 class GuardianApproval(BaseModel):
     """Guardian approval record"""
@@ -32,46 +42,202 @@ class GuardianApproval(BaseModel):
 class GuardianApprovalSystem:
     """
     System for recording and managing guardian approvals for deployment decisions
+    
+    Approvals are appended as JSON lines to ``approvals.jsonl``; each append
+    is written through to the OS immediately and fsynced by a background
+    thread at most ``fsync_interval`` seconds later, so a burst of approvals
+    shares one fsync. Lookups use in-memory indexes by decision id,
+    decision type and action, and stats are kept as running counters.
+    
+    On startup the log is replayed; a record torn by a crash is dropped and
+    the log is compacted (rewritten without the damaged bytes) whenever
+    replay finds any. A legacy ``approvals.json`` is migrated on first load.
+    
+    Compaction is triggered by damage rather than by size or age: every
+    record is part of the approval history (a re-approval adds a record
+    instead of replacing one), so a clean log has nothing to drop. While
+    running, an append that fails part-way (e.g. disk full) leaves the
+    approval indexed in memory and the log flagged; the background thread
+    retries compaction until the log again matches memory.
     """
     
-    def __init__(self, storage_dir: str = ".guardian_approvals"):
+    def __init__(self, storage_dir: str = ".guardian_approvals", fsync_interval: float = 0.05):
         """
         Initialize the guardian approval system
         
         Args:
             storage_dir: Directory to store approval records
+            fsync_interval: Maximum seconds an appended approval waits for fsync
         """
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True)
-        self.approvals_file = self.storage_dir / "approvals.json"
+        self.log_file = self.storage_dir / "approvals.jsonl"
+        self.legacy_file = self.storage_dir / "approvals.json"
+        self.fsync_interval = fsync_interval
+        
         self.approvals: List[GuardianApproval] = []
+        self._by_decision: Dict[str, GuardianApproval] = {}
+        self._by_type: Dict[str, List[GuardianApproval]] = {}
+        self._by_action: Dict[str, List[GuardianApproval]] = {}
+        self._stats_by_type: Dict[str, Dict[str, int]] = {}
+        self._action_counts: Dict[str, int] = {}
+        
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._needs_compaction = False
+        self._closed = False
+        self._log = None
         self._load_approvals()
+        self._log = open(self.log_file, "ab")
+        
+        self._wake = threading.Event()
+        self._syncer = threading.Thread(
+            target=self._sync_loop,
+            name="guardian-approvals-fsync",
+            daemon=True
+        )
+        self._syncer.start()
+        atexit.register(self.close)
         logger.info(f"✅ Guardian Approval System initialized (storage: {self.storage_dir})")
     
+    def _index(self, approval: GuardianApproval):
+        """Add an approval to the in-memory indexes and running stats"""
+        self.approvals.append(approval)
+        self._by_decision[approval.decision_id] = approval
+        self._by_type.setdefault(approval.decision_type, []).append(approval)
+        self._by_action.setdefault(approval.action, []).append(approval)
+        self._action_counts[approval.action] = self._action_counts.get(approval.action, 0) + 1
+        
+        type_stats = self._stats_by_type.get(approval.decision_type)
+        if type_stats is None:
+            type_stats = self._stats_by_type[approval.decision_type] = {
+                "total": 0,
+                "approved": 0,
+                "rejected": 0,
+                "modified": 0
+            }
+        type_stats["total"] += 1
+        stat = _ACTION_STATS.get(approval.action)
+        if stat:
+            type_stats[stat] += 1
+    
     def _load_approvals(self):
-        """Load existing approvals from storage"""
-        if self.approvals_file.exists():
+        """Replay the approval log (or migrate the legacy JSON file)"""
+        needs_compaction = False
+        
+        if self.log_file.exists():
+            with open(self.log_file, "rb") as f:
+                for line in f:
+                    try:
+                        self._index(GuardianApproval.model_validate_json(line))
+                    except ValueError:
+                        # Torn or corrupt record, e.g. from a crash mid-write
+                        needs_compaction = True
+                        continue
+                    if not line.endswith(b"\n"):
+                        needs_compaction = True
+        elif self.legacy_file.exists():
             try:
-                with open(self.approvals_file, 'r') as f:
-                    data = json.load(f)
-                    self.approvals = [GuardianApproval(**item) for item in data]
-                logger.info(f"Loaded {len(self.approvals)} existing approvals")
+                with open(self.legacy_file, 'r') as f:
+                    for item in json.load(f):
+                        self._index(GuardianApproval(**item))
+                needs_compaction = True
             except Exception as e:
                 logger.error(f"Failed to load approvals: {e}")
-                self.approvals = []
-        else:
-            self.approvals = []
+        
+        if needs_compaction:
+            self.compact()
+            if self.legacy_file.exists():
+                self.legacy_file.rename(self.legacy_file.with_name("approvals.json.migrated"))
+        
+        if self.approvals:
+            logger.info(f"Loaded {len(self.approvals)} existing approvals")
+    
+    def compact(self):
+        """
+        Rewrite the log from the in-memory approvals
+        
+        The new log is written and fsynced next to the old one and then
+        atomically renamed over it, so a crash leaves one complete log.
+        """
+        temp_file = self.log_file.with_suffix(".jsonl.tmp")
+        with self._lock:
+            with open(temp_file, "wb") as f:
+                for approval in self.approvals:
+                    f.write(approval.model_dump_json().encode() + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.log_file)
+            
+            if self._log is not None:
+                self._log.close()
+                self._log = open(self.log_file, "ab")
+            self._dirty = False
+            self._needs_compaction = False
+        logger.info(f"Compacted approval log ({len(self.approvals)} approvals)")
+    
+    def _append(self, approval: GuardianApproval):
+        """
+        Index an approval and append it to the log
+        
+        Both happen under the log lock, so a concurrent compaction writes
+        each approval exactly once. The fsync follows within fsync_interval.
+        """
+        line = approval.model_dump_json().encode() + b"\n"
+        with self._lock:
+            self._index(approval)
+            try:
+                self._log.write(line)
+                self._log.flush()
+                self._dirty = True
+            except OSError as e:
+                # Possibly a partial line: rewrite the log from memory
+                self._needs_compaction = True
+                logger.error(f"Failed to append approval {approval.approval_id}, log will be compacted: {e}")
+        self._wake.set()
+    
+    def sync(self):
+        """Fsync appended approvals now"""
+        with self._lock:
+            if self._dirty and self._log is not None:
+                os.fsync(self._log.fileno())
+                self._dirty = False
+    
+    def _sync_loop(self):
+        while not self._closed:
+            # A pending compaction is retried every second until it succeeds
+            self._wake.wait(1.0 if self._needs_compaction else None)
+            self._wake.clear()
+            if self._closed:
+                break
+            # Let a burst of appends share one fsync
+            time.sleep(self.fsync_interval)
+            try:
+                if self._needs_compaction:
+                    self.compact()
+                else:
+                    self.sync()
+            except Exception as e:
+                logger.error(f"Failed to sync approvals: {e}")
     
-    def _save_approvals(self):
-        """Save approvals to storage"""
+    def close(self):
+        """Fsync pending approvals and close the log"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._syncer.join(timeout=5)
         try:
-            with open(self.approvals_file, 'w') as f:
-                data = [approval.model_dump() for approval in self.approvals]
-                json.dump(data, f, indent=2)
-            logger.info(f"Saved {len(self.approvals)} approvals to storage")
-        except Exception as e:
-            logger.error(f"Failed to save approvals: {e}")
-            raise
+            if self._needs_compaction:
+                self.compact()
+            else:
+                self.sync()
+        finally:
+            with self._lock:
+                self._log.close()
+                self._log = None
+            atexit.unregister(self.close)
+    
     def record_approval(
         self,
         decision_id: str,
@@ -113,8 +279,7 @@ class GuardianApprovalSystem:
             metadata=metadata or {}
         )
         
-        self.approvals.append(approval)
-        self._save_approvals()
+        self._append(approval)
         
         logger.info(
             f"🛡️ Guardian approval recorded: {approval_id} - "
@@ -133,10 +298,7 @@ class GuardianApprovalSystem:
         Returns:
             GuardianApproval if found, None otherwise
         """
-        for approval in reversed(self.approvals):
-            if approval.decision_id == decision_id:
-                return approval
-        return None
+        return self._by_decision.get(decision_id)
     
     def is_approved(self, decision_id: str) -> bool:
         """
@@ -168,13 +330,27 @@ class GuardianApprovalSystem:
         Returns:
             List of GuardianApproval records
         """
-        approvals = self.approvals
+        if limit <= 0:
+            return []
         
-        if decision_type:
-            approvals = [a for a in approvals if a.decision_type == decision_type]
+        if decision_type and action:
+            # Walk the smaller index backwards, filtering on the other field
+            by_type = self._by_type.get(decision_type, [])
+            by_action = self._by_action.get(action, [])
+            if len(by_type) <= len(by_action):
+                candidates = (a for a in reversed(by_type) if a.action == action)
+            else:
+                candidates = (a for a in reversed(by_action) if a.decision_type == decision_type)
+            approvals = list(islice(candidates, limit))
+            approvals.reverse()
+            return approvals
         
-        if action:
-            approvals = [a for a in approvals if a.action == action]
+        if decision_type:
+            approvals = self._by_type.get(decision_type, [])
+        elif action:
+            approvals = self._by_action.get(action, [])
+        else:
+            approvals = self.approvals
         
         return approvals[-limit:]
     
@@ -185,46 +361,19 @@ class GuardianApprovalSystem:
         Returns:
             Dictionary with approval statistics
         """
-        if not self.approvals:
-            return {
-                "total": 0,
-                "approved": 0,
-                "rejected": 0,
-                "modified": 0,
-                "approval_rate": 0.0,
-                "by_type": {}
-            }
-        
         total = len(self.approvals)
-        approved = sum(1 for a in self.approvals if a.action == "approve")
-        rejected = sum(1 for a in self.approvals if a.action == "reject")
-        modified = sum(1 for a in self.approvals if a.action == "modify")
-        
-        # Group by decision type
-        by_type = {}
-        for approval in self.approvals:
-            if approval.decision_type not in by_type:
-                by_type[approval.decision_type] = {
-                    "total": 0,
-                    "approved": 0,
-                    "rejected": 0,
-                    "modified": 0
-                }
-            by_type[approval.decision_type]["total"] += 1
-            if approval.action == "approve":
-                by_type[approval.decision_type]["approved"] += 1
-            elif approval.action == "reject":
-                by_type[approval.decision_type]["rejected"] += 1
-            elif approval.action == "modify":
-                by_type[approval.decision_type]["modified"] += 1
+        approved = self._action_counts.get("approve", 0)
         
         return {
             "total": total,
             "approved": approved,
-            "rejected": rejected,
-            "modified": modified,
+            "rejected": self._action_counts.get("reject", 0),
+            "modified": self._action_counts.get("modify", 0),
             "approval_rate": approved / total if total > 0 else 0.0,
-            "by_type": by_type
+            "by_type": {
+                decision_type: dict(counts)
+                for decision_type, counts in self._stats_by_type.items()
+            }
         }
 
 
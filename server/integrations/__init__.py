@@ -3,6 +3,7 @@ Pi Forge Quantum Genesis - Integration Modules
 Blockchain and external service integrations
 """
 
+from .v2_quote_engine import Quote, QuoteError, V2QuoteEngine
 from .zero_g_swap import ZeroGSwapClient
 
-__all__ = ["ZeroGSwapClient"]
+__all__ = ["Quote", "QuoteError", "V2QuoteEngine", "ZeroGSwapClient"]
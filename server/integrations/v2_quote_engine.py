@@ -0,0 +1,492 @@
+"""
+0G Aristotle Mainnet - Uniswap V2 Local Quote Engine
+Computes router quotes locally from batched, per-block pair reserves
+
+The router's getAmountsOut costs one eth_call per path. The engine instead
+reads the reserves of every pair it needs in a single Multicall3 round trip,
+caches them for the block they were read at, and runs the constant-product
+formula in integer math exactly as UniswapV2Library does. Quoting many
+paths, or searching the token graph for the best one, then costs at most one
+reserve round trip per block.
+
+Quotes at "latest" also need the head block number. It is read with
+eth_blockNumber and reused for ``block_ttl`` seconds, so a burst of quotes
+costs one head lookup; quotes within the TTL may lag a block behind.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# UniswapV2Library.getAmountOut: 0.3% fee on the input amount
+FEE_NUMERATOR = 997
+FEE_DENOMINATOR = 1000
+
+DEFAULT_MAX_HOPS = 3
+
+# Seconds to reuse the head block number for "latest" quotes
+DEFAULT_BLOCK_TTL = 1.0
+
+# Multicall3 is deployed at the same address on most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+ZERO_ADDRESS = "0x" + "00" * 20
+
+# getReserves() and getPair(address,address) selectors
+GET_RESERVES_SELECTOR = bytes.fromhex("0902f1ac")
+GET_PAIR_SELECTOR = bytes.fromhex("e6a43905")
+
+# Multicall3 ABI (tryAggregate only)
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {"internalType": "bool", "name": "requireSuccess", "type": "bool"},
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "tryAggregate",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+PairKey = Tuple[str, str]
+Reserves = Dict[PairKey, Tuple[int, int]]
+
+
+class QuoteError(ValueError):
+    """A quote the router would revert on"""
+
+
+@dataclass(frozen=True)
+class Quote:
+    """Amounts along a swap path, as returned by getAmountsOut"""
+    path: Tuple[str, ...]
+    amounts: Tuple[int, ...]
+    block_number: Optional[int] = None
+    
+    @property
+    def amount_out(self) -> int:
+        return self.amounts[-1]
+
+
+def pair_key(token_a: str, token_b: str) -> PairKey:
+    """Tokens of a pair in the factory's (token0, token1) order"""
+    if token_a.lower() == token_b.lower():
+        raise QuoteError("UniswapV2Library: IDENTICAL_ADDRESSES")
+    return (token_a, token_b) if token_a.lower() < token_b.lower() else (token_b, token_a)
+
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int) -> int:
+    """
+    Output amount for one hop, matching UniswapV2Library.getAmountOut
+    
+    Args:
+        amount_in: Input amount in wei
+        reserve_in: Pair reserve of the input token
+        reserve_out: Pair reserve of the output token
+    
+    Returns:
+        Output amount in wei, rounded down
+    
+    Raises:
+        QuoteError: If the input amount or either reserve is zero
+    """
+    if amount_in <= 0:
+        raise QuoteError("UniswapV2Library: INSUFFICIENT_INPUT_AMOUNT")
+    if reserve_in <= 0 or reserve_out <= 0:
+        raise QuoteError("UniswapV2Library: INSUFFICIENT_LIQUIDITY")
+    amount_in_with_fee = amount_in * FEE_NUMERATOR
+    numerator = amount_in_with_fee * reserve_out
+    denominator = reserve_in * FEE_DENOMINATOR + amount_in_with_fee
+    return numerator // denominator
+
+
+def _hop_reserves(reserves: Reserves, token_in: str, token_out: str) -> Tuple[int, int]:
+    key = pair_key(token_in, token_out)
+    pair_reserves = reserves.get(key)
+    if pair_reserves is None:
+        raise QuoteError(f"No pair for {token_in}/{token_out}")
+    reserve0, reserve1 = pair_reserves
+    return (reserve0, reserve1) if key[0] == token_in else (reserve1, reserve0)
+
+
+def get_amounts_out(amount_in: int, path: Sequence[str], reserves: Reserves) -> List[int]:
+    """
+    Amounts along a path, matching UniswapV2Router02.getAmountsOut
+    
+    Args:
+        amount_in: Input amount in wei
+        path: Token addresses, input first
+        reserves: (reserve0, reserve1) by pair_key
+    
+    Returns:
+        List of amounts including the input
+    
+    Raises:
+        QuoteError: If the path is invalid or a hop has no liquidity
+    """
+    if len(path) < 2:
+        raise QuoteError("UniswapV2Library: INVALID_PATH")
+    amounts = [amount_in]
+    for token_in, token_out in zip(path, path[1:]):
+        reserve_in, reserve_out = _hop_reserves(reserves, token_in, token_out)
+        amounts.append(get_amount_out(amounts[-1], reserve_in, reserve_out))
+    return amounts
+
+
+def find_best_path(
+    amount_in: int,
+    token_in: str,
+    token_out: str,
+    reserves: Reserves,
+    max_hops: int = DEFAULT_MAX_HOPS
+) -> Optional[Quote]:
+    """
+    Best path from token_in to token_out over the pairs in ``reserves``
+    
+    Every simple path of at most ``max_hops`` pairs is searched depth first,
+    sharing the amounts of common prefixes. On equal output the path with
+    fewer hops wins, since it costs less gas.
+    
+    Args:
+        amount_in: Input amount in wei
+        token_in: Input token address
+        token_out: Output token address
+        reserves: (reserve0, reserve1) by pair_key
+        max_hops: Maximum number of pairs in the path
+    
+    Returns:
+        Quote for the best path, or None if no path has liquidity
+    """
+    graph: Dict[str, List[str]] = {}
+    for (token0, token1), (reserve0, reserve1) in reserves.items():
+        if reserve0 > 0 and reserve1 > 0:
+            graph.setdefault(token0, []).append(token1)
+            graph.setdefault(token1, []).append(token0)
+    
+    best: Optional[Quote] = None
+    path = [token_in]
+    amounts = [amount_in]
+    
+    def visit(token: str) -> None:
+        nonlocal best
+        for neighbour in graph.get(token, ()):
+            if neighbour in path:
+                continue
+            reserve_in, reserve_out = _hop_reserves(reserves, token, neighbour)
+            amount = get_amount_out(amounts[-1], reserve_in, reserve_out)
+            if amount == 0:
+                continue
+            path.append(neighbour)
+            amounts.append(amount)
+            if neighbour == token_out:
+                if (best is None or amount > best.amount_out
+                        or (amount == best.amount_out and len(path) < len(best.path))):
+                    best = Quote(tuple(path), tuple(amounts))
+            elif len(path) <= max_hops:
+                visit(neighbour)
+            path.pop()
+            amounts.pop()
+    
+    if amount_in > 0 and token_in != token_out:
+        visit(token_in)
+    return best
+
+
+class V2QuoteEngine:
+    """
+    Quotes Uniswap V2 paths locally from batched pair reserves
+    
+    Pair addresses are resolved once, from the factory's CREATE2 init code
+    hash when given or with batched getPair calls otherwise, and cached for
+    good. Reserves are cached for the block they were read at; a quote at a
+    newer block refreshes every pair it needs in one round trip. The head
+    block behind "latest" is cached for ``block_ttl`` seconds.
+    
+    ``round_trips`` counts every RPC the engine makes: eth_blockNumber,
+    Multicall3 batches and single eth_calls.
+    """
+    
+    def __init__(
+        self,
+        w3: Any,
+        factory_address: str,
+        multicall_address: Optional[str] = MULTICALL3_ADDRESS,
+        pair_init_code_hash: Optional[str] = None,
+        routing_tokens: Iterable[str] = (),
+        max_hops: int = DEFAULT_MAX_HOPS,
+        block_ttl: float = DEFAULT_BLOCK_TTL
+    ):
+        """
+        Initialize the quote engine
+        
+        Args:
+            w3: Connected Web3 instance
+            factory_address: UniswapV2Factory contract address
+            multicall_address: Multicall3 address; reserves are read with one
+                eth_call per pair when it is empty or not deployed
+            pair_init_code_hash: Pair init code hash, to compute pair
+                addresses locally instead of asking the factory
+            routing_tokens: Intermediate tokens considered by best_path
+            max_hops: Default maximum number of pairs in a best_path route
+            block_ttl: Seconds to reuse the head block number for "latest";
+                0 reads it on every quote
+        """
+        self.w3 = w3
+        self.factory_address = w3.to_checksum_address(factory_address)
+        self.pair_init_code_hash = (
+            bytes.fromhex(pair_init_code_hash.removeprefix("0x")) if pair_init_code_hash else None
+        )
+        self.routing_tokens = [w3.to_checksum_address(token) for token in routing_tokens]
+        self.max_hops = max_hops
+        self.block_ttl = block_ttl
+        
+        self._multicall = None
+        self._multicall_checked = not multicall_address
+        self._multicall_address = multicall_address
+        
+        self._pairs: Dict[PairKey, str] = {}
+        self._missing_pairs: Set[PairKey] = set()
+        self._block_number: Optional[int] = None
+        self._reserves: Reserves = {}
+        self._head_block: Optional[int] = None
+        self._head_checked_at = 0.0
+        self.round_trips = 0
+    
+    def _checksum(self, tokens: Iterable[str]) -> List[str]:
+        return [self.w3.to_checksum_address(token) for token in tokens]
+    
+    def _multicall_contract(self):
+        """Multicall3 contract, or None once it is found not to be deployed"""
+        if not self._multicall_checked:
+            self._multicall_checked = True
+            address = self.w3.to_checksum_address(self._multicall_address)
+            if self.w3.eth.get_code(address):
+                self._multicall = self.w3.eth.contract(address=address, abi=MULTICALL3_ABI)
+            else:
+                logger.warning(f"⚠️ No Multicall3 at {address}, reading pair reserves one call at a time")
+        return self._multicall
+    
+    def _call_many(self, calls: List[Tuple[str, bytes]], block_number: int) -> List[Optional[bytes]]:
+        """
+        Run eth_calls at one block, in a single round trip when possible
+        
+        Args:
+            calls: (target address, calldata) pairs
+            block_number: Block to read state at
+        
+        Returns:
+            Return data per call, or None where the call failed
+        """
+        if not calls:
+            return []
+        multicall = self._multicall_contract()
+        if multicall is not None:
+            self.round_trips += 1
+            results = multicall.functions.tryAggregate(False, calls).call(block_identifier=block_number)
+            return [bytes(data) if success else None for success, data in results]
+        
+        results = []
+        for target, data in calls:
+            self.round_trips += 1
+            try:
+                results.append(bytes(self.w3.eth.call({"to": target, "data": data}, block_number)))
+            except Exception as e:
+                logger.debug(f"eth_call to {target} failed: {e}")
+                results.append(None)
+        return results
+    
+    def _current_block(self) -> int:
+        """Head block number, read at most once per block_ttl"""
+        now = time.monotonic()
+        if self._head_block is None or now - self._head_checked_at >= self.block_ttl:
+            self.round_trips += 1
+            self._head_block = self.w3.eth.block_number
+            self._head_checked_at = now
+        return self._head_block
+    
+    def _create2_pair_address(self, key: PairKey) -> str:
+        salt = self.w3.keccak(bytes.fromhex(key[0][2:] + key[1][2:]))
+        digest = self.w3.keccak(
+            b"\xff" + bytes.fromhex(self.factory_address[2:]) + salt + self.pair_init_code_hash
+        )
+        return self.w3.to_checksum_address(digest[12:])
+    
+    def _resolve_pairs(self, keys: Iterable[PairKey], block_number: int) -> None:
+        """Resolve pair addresses not seen before, in one round trip"""
+        unknown = [key for key in keys if key not in self._pairs and key not in self._missing_pairs]
+        if not unknown:
+            return
+        if self.pair_init_code_hash is not None:
+            for key in unknown:
+                self._pairs[key] = self._create2_pair_address(key)
+            return
+        
+        calls = [
+            (self.factory_address,
+             GET_PAIR_SELECTOR + bytes.fromhex(key[0][2:].rjust(64, "0") + key[1][2:].rjust(64, "0")))
+            for key in unknown
+        ]
+        for key, data in zip(unknown, self._call_many(calls, block_number)):
+            address = "0x" + data[12:32].hex() if data and len(data) >= 32 else ZERO_ADDRESS
+            if address == ZERO_ADDRESS:
+                # Pairs may be created later: only remembered for this block
+                self._missing_pairs.add(key)
+            else:
+                self._pairs[key] = self.w3.to_checksum_address(address)
+    
+    def reserves(self, keys: Iterable[PairKey], block_identifier: Any = "latest") -> Tuple[int, Reserves]:
+        """
+        Reserves of the given pairs at one block
+        
+        Pairs already read at that block come from the cache; the rest are
+        read together in one round trip. "latest" resolves to the cached head
+        block while it is younger than block_ttl. Pairs that do not exist or
+        have no code are left out.
+        
+        Args:
+            keys: Pairs as returned by pair_key
+            block_identifier: Block number, or "latest"
+        
+        Returns:
+            Block number and (reserve0, reserve1) by pair_key
+        """
+        block_number = self._current_block() if block_identifier == "latest" else int(block_identifier)
+        if block_number != self._block_number:
+            self._block_number = block_number
+            self._reserves = {}
+            self._missing_pairs = set()
+        
+        keys = list(dict.fromkeys(keys))
+        self._resolve_pairs(keys, block_number)
+        stale = [key for key in keys if key not in self._reserves and key in self._pairs]
+        calls = [(self._pairs[key], GET_RESERVES_SELECTOR) for key in stale]
+        results = self._call_many(calls, block_number) if calls else []
+        for key, data in zip(stale, results):
+            if data and len(data) >= 64:
+                self._reserves[key] = (int.from_bytes(data[:32], "big"), int.from_bytes(data[32:64], "big"))
+            else:
+                self._missing_pairs.add(key)
+                del self._pairs[key]
+        
+        return block_number, {key: self._reserves[key] for key in keys if key in self._reserves}
+    
+    def quote_paths(
+        self,
+        amount_in: int,
+        paths: Sequence[Sequence[str]],
+        block_identifier: Any = "latest"
+    ) -> List[Optional[Quote]]:
+        """
+        Quote several paths from one reserve snapshot
+        
+        Args:
+            amount_in: Input amount in wei
+            paths: Token address paths, input first
+            block_identifier: Block number, or "latest"
+        
+        Returns:
+            Quote per path, or None where the router would revert
+        """
+        paths = [self._checksum(path) for path in paths]
+        keys = [pair_key(a, b) for path in paths for a, b in zip(path, path[1:]) if a != b]
+        block_number, reserves = self.reserves(keys, block_identifier)
+        
+        quotes = []
+        for path in paths:
+            try:
+                amounts = get_amounts_out(amount_in, path, reserves)
+            except QuoteError:
+                quotes.append(None)
+                continue
+            quotes.append(Quote(tuple(path), tuple(amounts), block_number))
+        return quotes
+    
+    def quote(self, amount_in: int, path: Sequence[str], block_identifier: Any = "latest") -> Quote:
+        """
+        Quote one path, as the router's getAmountsOut would
+        
+        Args:
+            amount_in: Input amount in wei
+            path: Token address path, input first
+            block_identifier: Block number, or "latest"
+        
+        Returns:
+            Amounts along the path
+        
+        Raises:
+            QuoteError: Where the router would revert
+        """
+        path = self._checksum(path)
+        keys = [pair_key(a, b) for a, b in zip(path, path[1:])]
+        block_number, reserves = self.reserves(keys, block_identifier)
+        return Quote(tuple(path), tuple(get_amounts_out(amount_in, path, reserves)), block_number)
+    
+    def best_path(
+        self,
+        amount_in: int,
+        token_in: str,
+        token_out: str,
+        via: Optional[Iterable[str]] = None,
+        max_hops: Optional[int] = None,
+        block_identifier: Any = "latest"
+    ) -> Optional[Quote]:
+        """
+        Best path between two tokens through the routing tokens
+        
+        Reserves of every pair among the input, output and routing tokens
+        are read in one round trip, then searched locally.
+        
+        Args:
+            amount_in: Input amount in wei
+            token_in: Input token address
+            token_out: Output token address
+            via: Intermediate tokens (defaults to routing_tokens)
+            max_hops: Maximum number of pairs (defaults to max_hops)
+            block_identifier: Block number, or "latest"
+        
+        Returns:
+            Quote for the best path, or None if no path has liquidity
+        """
+        token_in, token_out = self._checksum((token_in, token_out))
+        intermediates = self.routing_tokens if via is None else self._checksum(via)
+        tokens = list(dict.fromkeys([token_in, token_out, *intermediates]))
+        keys = [pair_key(a, b) for i, a in enumerate(tokens) for b in tokens[i + 1:]]
+        
+        block_number, reserves = self.reserves(keys, block_identifier)
+        best = find_best_path(amount_in, token_in, token_out, reserves, max_hops or self.max_hops)
+        if best is None:
+            return None
+        return Quote(best.path, best.amounts, block_number)
+
+
+__all__ = [
+    "Quote",
+    "QuoteError",
+    "V2QuoteEngine",
+    "find_best_path",
+    "get_amount_out",
+    "get_amounts_out",
+    "pair_key"
+]
@@ -11,6 +11,8 @@ from web3 import Web3
 from web3.contract import Contract
 from eth_account import Account
 
+from .v2_quote_engine import MULTICALL3_ADDRESS, Quote, V2QuoteEngine
+
 # Router02 ABI (minimal interface for swaps)
 ROUTER_ABI = [
     {
@@ -114,7 +116,17 @@ class ZeroGSwapClient:
     Client for interacting with Uniswap V2 Router on 0G Aristotle Mainnet
     """
     
-    def __init__(self, rpc_url: str, router_address: str, w0g_address: str, private_key: Optional[str] = None):
+    def __init__(
+        self,
+        rpc_url: str,
+        router_address: str,
+        w0g_address: str,
+        private_key: Optional[str] = None,
+        factory_address: Optional[str] = None,
+        multicall_address: Optional[str] = MULTICALL3_ADDRESS,
+        pair_init_code_hash: Optional[str] = None,
+        routing_tokens: Optional[List[str]] = None
+    ):
         """
         Initialize the swap client
         
@@ -123,6 +135,13 @@ class ZeroGSwapClient:
             router_address: UniswapV2Router02 contract address
             w0g_address: W0G (Wrapped 0G) contract address
             private_key: Optional private key for signing transactions
+            factory_address: UniswapV2Factory address for local quotes
+                (read from the router when not given)
+            multicall_address: Multicall3 address used to batch reserve reads
+            pair_init_code_hash: Pair init code hash, to compute pair
+                addresses locally
+            routing_tokens: Intermediate tokens for best path search
+                (defaults to W0G)
         
         Raises:
             ValueError: If router_address or w0g_address are empty or invalid
@@ -143,6 +162,26 @@ class ZeroGSwapClient:
             self.account = Account.from_key(private_key)
         else:
             self.account = None
+        
+        self.factory_address = factory_address
+        self.multicall_address = multicall_address
+        self.pair_init_code_hash = pair_init_code_hash
+        self.routing_tokens = routing_tokens if routing_tokens is not None else [self.w0g_address]
+        self._quote_engine: Optional[V2QuoteEngine] = None
+    
+    @property
+    def quote_engine(self) -> V2QuoteEngine:
+        """Local quote engine, created on first use"""
+        if self._quote_engine is None:
+            factory_address = self.factory_address or self.router.functions.factory().call()
+            self._quote_engine = V2QuoteEngine(
+                self.w3,
+                factory_address,
+                multicall_address=self.multicall_address,
+                pair_init_code_hash=self.pair_init_code_hash,
+                routing_tokens=self.routing_tokens
+            )
+        return self._quote_engine
     
     def get_amounts_out(self, amount_in: int, path: List[str]) -> List[int]:
         """
@@ -159,6 +198,64 @@ class ZeroGSwapClient:
         amounts = self.router.functions.getAmountsOut(amount_in, checksum_path).call()
         return amounts
     
+    def quote_amounts_out(self, amount_in: int, path: List[str]) -> List[int]:
+        """
+        Get expected output amounts computed locally from pair reserves
+        
+        Matches get_amounts_out exactly, but reserves are batch-read and
+        cached per block. A quote costs an eth_blockNumber call at most once
+        per block_ttl, plus one reserve read per new block; it makes no
+        router call.
+        
+        Args:
+            amount_in: Input amount in wei
+            path: List of token addresses in swap path
+        
+        Returns:
+            List of amounts including input and expected outputs
+        
+        Raises:
+            QuoteError: If the router would revert for this path
+        """
+        return list(self.quote_engine.quote(amount_in, path).amounts)
+    
+    def quote_paths(self, amount_in: int, paths: List[List[str]]) -> List[Optional[Quote]]:
+        """
+        Quote several swap paths from one reserve snapshot
+        
+        Args:
+            amount_in: Input amount in wei
+            paths: Token address paths to compare
+        
+        Returns:
+            Quote per path, or None where the path has no liquidity
+        """
+        return self.quote_engine.quote_paths(amount_in, paths)
+    
+    def find_best_path(
+        self,
+        amount_in: int,
+        token_in: str,
+        token_out: str,
+        via: Optional[List[str]] = None,
+        max_hops: Optional[int] = None
+    ) -> Optional[Quote]:
+        """
+        Find the path with the highest output between two tokens
+        
+        Args:
+            amount_in: Input amount in wei
+            token_in: Input token address
+            token_out: Output token address
+            via: Intermediate tokens (defaults to routing_tokens)
+            max_hops: Maximum number of pairs in the path
+        
+        Returns:
+            Quote with the best path and its amounts, or None if no path
+            has liquidity
+        """
+        return self.quote_engine.best_path(amount_in, token_in, token_out, via=via, max_hops=max_hops)
+    
     def calculate_min_amount_out(self, amount_out: int, slippage: float = 0.05) -> int:
         """
         Calculate minimum amount out with slippage tolerance
@@ -401,7 +498,8 @@ def create_swap_client(
     rpc_url: Optional[str] = None,
     router_address: Optional[str] = None,
     w0g_address: Optional[str] = None,
-    private_key: Optional[str] = None
+    private_key: Optional[str] = None,
+    factory_address: Optional[str] = None
 ) -> ZeroGSwapClient:
     """
     Create swap client with environment variables as defaults
@@ -411,6 +509,7 @@ def create_swap_client(
         router_address: Override router address
         w0g_address: Override W0G address
         private_key: Optional private key for transactions
+        factory_address: Override factory address
     
     Returns:
         Configured ZeroGSwapClient instance
@@ -431,7 +530,10 @@ def create_swap_client(
         rpc_url=rpc_url or os.getenv("ZERO_G_RPC", "https://evmrpc.0g.ai"),
         router_address=final_router,
         w0g_address=final_w0g,
-        private_key=private_key
+        private_key=private_key,
+        factory_address=factory_address or os.getenv("ZERO_G_FACTORY") or None,
+        multicall_address=os.getenv("ZERO_G_MULTICALL", MULTICALL3_ADDRESS) or None,
+        pair_init_code_hash=os.getenv("ZERO_G_PAIR_INIT_CODE_HASH") or None
     )
 
 
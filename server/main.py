@@ -18,10 +18,17 @@ import httpx
 from fastapi import (Depends, FastAPI, HTTPException, Request, WebSocket,
                      WebSocketDisconnect, status)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel, EmailStr, Field
 
+from broadcast_hub import SLOW_CONSUMER_CLOSE_CODE, BroadcastHub
+from pi_api_client import PiNetworkAPIClient
+from rate_limiter import RateLimiter, RateLimitRule, create_rate_limit_backend
+from request_metrics import (PROMETHEUS_CONTENT_TYPE, PrometheusExposition,
+                             RequestMetrics)
+from system_sampler import get_system_sampler
+
 # Configure logging first
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -63,14 +70,15 @@ except ImportError as e:
 
 # Import autonomous decision tools
 try:
-    from autonomous_decision import (DecisionContext, DecisionParameter,
-                                     DecisionPriority, DecisionType,
-                                     get_decision_matrix)
+    from autonomous_decision import (DecisionBatchRequest, DecisionContext,
+                                     DecisionParameter, DecisionPriority,
+                                     DecisionType, get_decision_matrix)
     autonomous_decision_available = True
     logging.info("✅ Autonomous decision tools loaded")
 except ImportError as e:
     logging.warning(f"⚠️ Autonomous decision tools import failed: {e}")
     autonomous_decision_available = False
+    DecisionBatchRequest = None
     DecisionContext = None
     DecisionParameter = None
     DecisionPriority = None
@@ -315,47 +323,54 @@ class MemorialGenerationRequest(BaseModel):
 
 # --- CYBER SAMURAI GUARDIAN STATE ---
 # --- PI NETWORK API INTEGRATION HELPERS ---
+# Shared pooled client; opened on startup and closed on shutdown
+pi_api_client = PiNetworkAPIClient(
+    base_url=PI_NETWORK_CONFIG["api_endpoint"],
+    api_key=PI_NETWORK_CONFIG["api_key"],
+    timeout=30.0,
+    payment_cache_ttl=float(os.environ.get("PI_PAYMENT_CACHE_TTL", "2.0"))
+)
+
+# Host/process stats sampled in a worker thread; started on startup
+system_sampler = get_system_sampler()
+
+async def _await_pi_network(call) -> Dict[str, Any]:
+    """Await a Pi Network API call, mapping failures to HTTP errors"""
+    try:
+        return await call
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Pi Network API error: {e.response.status_code} - {e.response.text}")
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Pi Network API error: {e.response.text}"
+        )
+    except Exception as e:
+        logger.error(f"Pi Network API call failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Pi Network API unavailable: {str(e)}")
+
 async def call_pi_network_api(endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Dict[str, Any]:
-    """Make authenticated API calls to Pi Network"""
-    url = f"{PI_NETWORK_CONFIG['api_endpoint']}/{endpoint}"
-    headers = {"Authorization": f"Key {PI_NETWORK_CONFIG['api_key']}"}
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            if method == "GET":
-                response = await client.get(url, headers=headers)
-            elif method == "POST":
-                response = await client.post(url, headers=headers, json=data)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Pi Network API error: {e.response.status_code} - {e.response.text}")
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"Pi Network API error: {e.response.text}"
-            )
-        except Exception as e:
-            logger.error(f"Pi Network API call failed: {e}")
-            raise HTTPException(status_code=500, detail=f"Pi Network API unavailable: {str(e)}")
+    """Make authenticated API calls to Pi Network over the shared pooled client"""
+    if method == "GET":
+        return await _await_pi_network(pi_api_client.get(endpoint))
+    elif method == "POST":
+        return await _await_pi_network(pi_api_client.post(endpoint, data))
+    else:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Pi Network API unavailable: Unsupported HTTP method: {method}"
+        )
 
 async def approve_payment_with_pi_network(payment_id: str) -> Dict[str, Any]:
     """Approve payment with Pi Network API"""
-    return await call_pi_network_api(f"v2/payments/{payment_id}/approve", method="POST")
+    return await _await_pi_network(pi_api_client.approve_payment(payment_id))
 
 async def complete_payment_with_pi_network(payment_id: str, txid: str) -> Dict[str, Any]:
     """Complete payment with Pi Network API"""
-    return await call_pi_network_api(
-        f"v2/payments/{payment_id}/complete",
-        method="POST",
-        data={"txid": txid}
-    )
+    return await _await_pi_network(pi_api_client.complete_payment(payment_id, txid))
 
 async def get_payment_from_pi_network(payment_id: str) -> Dict[str, Any]:
-    """Get payment details from Pi Network API"""
-    return await call_pi_network_api(f"v2/payments/{payment_id}", method="GET")
+    """Get payment details from Pi Network API (coalesced and briefly cached)"""
+    return await _await_pi_network(pi_api_client.get_payment(payment_id))
 
 def verify_webhook_signature(payload: bytes, signature: str) -> bool:
     """Verify Pi Network webhook signature using HMAC"""
@@ -475,48 +490,21 @@ async def get_optional_user(request: Request):
 # RATE LIMITING AND SCALABILITY FEATURES
 # =============================================================================
 
-class RateLimiter:
-    """Simple in-memory rate limiter for API endpoints (for production use Redis)"""
-    def __init__(self, requests_per_minute: int = 60):
-        self.requests_per_minute = requests_per_minute
-        self.requests: Dict[str, List[float]] = defaultdict(list)
-        self._cleanup_interval = 60  # seconds
-        self._last_cleanup = time.time()
-    
-    def is_allowed(self, client_id: str) -> bool:
-        """Check if request is allowed for client"""
-        now = time.time()
-        
-        # Periodic cleanup of old entries
-        if now - self._last_cleanup > self._cleanup_interval:
-            self._cleanup()
-            self._last_cleanup = now
-        
-        # Get requests in the last minute
-        window_start = now - 60
-        client_requests = self.requests[client_id]
-        
-        # Remove old requests
-        self.requests[client_id] = [t for t in client_requests if t > window_start]
-        
-        # Check limit
-        if len(self.requests[client_id]) >= self.requests_per_minute:
-            return False
-        
-        # Record new request
-        self.requests[client_id].append(now)
-        return True
-    
-    def _cleanup(self):
-        """Remove stale entries"""
-        window_start = time.time() - 60
-        for client_id in list(self.requests.keys()):
-            self.requests[client_id] = [t for t in self.requests[client_id] if t > window_start]
-            if not self.requests[client_id]:
-                del self.requests[client_id]
-
-# Initialize rate limiter (60 requests per minute per IP)
-rate_limiter = RateLimiter(requests_per_minute=60)
+# Initialize rate limiter (60 requests per minute per IP by default, with
+# tighter classes for credential and payment routes). Set
+# RATE_LIMIT_BACKEND_URL=sqlite:///path to share limits across workers.
+rate_limiter = RateLimiter(
+    requests_per_minute=60,
+    routes=[
+        ("/token", RateLimitRule("auth", 10)),
+        ("/register", RateLimitRule("auth", 10)),
+        ("/api/payments", RateLimitRule("payments", 30)),
+        ("/api/verify-payment", RateLimitRule("payments", 30)),
+        ("/api/pi-webhooks", RateLimitRule("webhooks", 600)),
+        ("/health", RateLimitRule("health", 600)),
+    ],
+    backend=create_rate_limit_backend(os.environ.get("RATE_LIMIT_BACKEND_URL", "memory"))
+)
 
 # =============================================================================
 # UTILITY FUNCTIONS
@@ -550,26 +538,28 @@ def validate_enum(value: Optional[str], enum_class: type, param_name: str):
 
 # Connection tracking for scalability metrics
 class ConnectionTracker:
-    """Track active connections for load monitoring"""
+    """Track active connections, request rates and latency for load monitoring"""
     def __init__(self, max_connections: int = 10000):
         self.max_connections = max_connections
         self.active_ws_connections = 0
-        self.total_requests = 0
-        self.requests_per_second = 0
-        self._last_second = int(time.time())
-        self._current_second_requests = 0
+        self.requests = RequestMetrics()
+    
+    @property
+    def total_requests(self) -> int:
+        return self.requests.total_requests
+    
+    @property
+    def requests_per_second(self) -> int:
+        """Requests in the previous whole second"""
+        return self.requests.requests.last_second()
     
     def track_request(self):
         """Track a new request"""
-        self.total_requests += 1
-        current_second = int(time.time())
-        
-        if current_second != self._last_second:
-            self.requests_per_second = self._current_second_requests
-            self._current_second_requests = 1
-            self._last_second = current_second
-        else:
-            self._current_second_requests += 1
+        self.requests.record_arrival()
+    
+    def track_response(self, method: str, route: str, status_code: int, duration: float):
+        """Track a completed request's status and latency"""
+        self.requests.record_response(method, route, status_code, duration)
     
     def add_ws_connection(self):
         self.active_ws_connections += 1
@@ -578,10 +568,14 @@ class ConnectionTracker:
         self.active_ws_connections = max(0, self.active_ws_connections - 1)
     
     def get_metrics(self) -> Dict:
+        rates = self.requests.rates()
         return {
             "active_websocket_connections": self.active_ws_connections,
             "total_requests": self.total_requests,
             "requests_per_second": self.requests_per_second,
+            "requests_per_second_1m": round(rates["1m"], 3),
+            "requests_per_second_5m": round(rates["5m"], 3),
+            "requests_per_second_15m": round(rates["15m"], 3),
             "max_connections": self.max_connections,
             "capacity_utilization": round(self.active_ws_connections / self.max_connections * 100, 2)
         }
@@ -653,15 +647,30 @@ async def rate_limit_middleware(request: Request, call_next):
     """Apply rate limiting to all HTTP requests"""
     client_ip = _get_client_id(request)
     
-    if not rate_limiter.is_allowed(client_ip):
+    decision = await rate_limiter.acheck(client_ip, request.url.path)
+    if not decision.allowed:
         return JSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            content={"detail": "Rate limit exceeded. Please wait before making more requests."}
+            content={"detail": "Rate limit exceeded. Please wait before making more requests."},
+            headers={"Retry-After": str(max(1, int(decision.retry_after + 0.999)))}
         )
     
     connection_tracker.track_request()
-    response = await call_next(request)
-    return response
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep series bounded
+        route = request.scope.get("route")
+        connection_tracker.track_response(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            status_code,
+            time.perf_counter() - started
+        )
 
 # --- API ENDPOINTS --- 
 @app.get("/")
@@ -694,27 +703,54 @@ async def health_check():
 
 @app.get("/api/metrics")
 async def metrics_endpoint():
-    """Prometheus-compatible metrics endpoint"""
+    """Prometheus metrics endpoint (text exposition format)"""
     connection_metrics = connection_tracker.get_metrics()
+    request_metrics = connection_tracker.requests
     guardian_status = guardian.get_status()
     
-    return {
-        "service": "pi-forge-quantum-genesis",
-        "version": "3.3.0",
-        "uptime_seconds": time.time() - startup_time,
-        "connections": connection_metrics,
-        "guardian": {
-            "latency_ns": guardian_status["latency"]["latency_ns"],
-            "harmonic_stability": guardian_status["latency"]["harmonic_stability"],
-            "quantum_coherence": guardian_status["quantum_coherence"],
-            "total_alerts": guardian_status["total_alerts"]
-        },
-        "payments_processed": len(payment_records),
-        "websocket_connections": connection_metrics["active_websocket_connections"],
-        "requests_total": connection_metrics["total_requests"],
-        "requests_per_second": connection_metrics["requests_per_second"],
-        "timestamp": time.time()
-    }
+    exposition = PrometheusExposition()
+    exposition.metric(
+        "pi_forge_uptime_seconds", "gauge", "Seconds since application startup",
+        [((), time.time() - startup_time)]
+    ).metric(
+        "pi_forge_http_requests_total", "counter", "HTTP requests received",
+        [((), request_metrics.total_requests)]
+    ).metric(
+        "pi_forge_http_responses_total", "counter", "HTTP responses by method, route and status",
+        [
+            ((("method", method), ("route", route), ("status", code)), count)
+            for (method, route, code), count in sorted(request_metrics.status_counts.items())
+        ]
+    ).metric(
+        "pi_forge_http_requests_per_second", "gauge", "Average request rate over a trailing window",
+        [((("window", window),), rate) for window, rate in request_metrics.rates().items()]
+    ).histogram(
+        "pi_forge_http_request_duration_seconds", "HTTP request handling time by route",
+        [((("route", route),), histogram) for route, histogram in sorted(request_metrics.latency.items())]
+    ).metric(
+        "pi_forge_websocket_connections", "gauge", "Active WebSocket connections",
+        [((), connection_metrics["active_websocket_connections"])]
+    ).metric(
+        "pi_forge_websocket_max_connections", "gauge", "WebSocket connection capacity",
+        [((), connection_metrics["max_connections"])]
+    ).metric(
+        "pi_forge_payments_processed", "gauge", "Payment records held by this process",
+        [((), len(payment_records))]
+    ).metric(
+        "pi_forge_guardian_latency_ns", "gauge", "Guardian latency reading",
+        [((), guardian_status["latency"]["latency_ns"])]
+    ).metric(
+        "pi_forge_guardian_harmonic_stability", "gauge", "Guardian harmonic stability",
+        [((), guardian_status["latency"]["harmonic_stability"])]
+    ).metric(
+        "pi_forge_guardian_quantum_coherence_stable", "gauge", "1 when guardian coherence is stable",
+        [((), 1 if guardian_status["quantum_coherence"] == "stable" else 0)]
+    ).metric(
+        "pi_forge_guardian_alerts_total", "counter", "Guardian alerts raised",
+        [((), guardian_status["total_alerts"])]
+    )
+    
+    return Response(content=exposition.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.get("/ceremonial")
 async def ceremonial_interface():
@@ -866,8 +902,12 @@ async def complete_payment(payment: PaymentCompletionRequest):
         # Complete payment with Pi Network API
         completion_result = await complete_payment_with_pi_network(payment.payment_id, payment.txid)
         
-        # Determine resonance state based on payment amount
-        pi_payment = await get_payment_from_pi_network(payment.payment_id)
+        # Determine resonance state based on payment amount; the completion
+        # response already carries the payment, so only look it up if it doesn't
+        if "amount" in completion_result:
+            pi_payment = completion_result
+        else:
+            pi_payment = await get_payment_from_pi_network(payment.payment_id)
         amount = float(pi_payment.get("amount", 0))
         
         if amount >= 1.0:
@@ -968,6 +1008,9 @@ async def pi_payment_webhook(request: Request):
         
         logger.info(f"📨 Webhook received: {webhook_data.status} for payment {webhook_data.payment_id}")
         
+        # Payment state changed upstream; drop any cached lookup
+        pi_api_client.invalidate_payment(webhook_data.payment_id)
+        
         # Update payment status in database
         if supabase:
             update_data = {
@@ -998,11 +1041,8 @@ async def pi_payment_webhook(request: Request):
             "timestamp": time.time()
         }
         
-        for ws in connected_users.values():
-            try:
-                await ws.send_json(status_message)
-            except:
-                pass  # Ignore disconnected clients
+        # Queued per connection; a slow client cannot stall the webhook
+        collective_insight_hub.publish(status_message)
         
         return {"status": "received", "payment_id": webhook_data.payment_id}
         
@@ -1283,15 +1323,8 @@ async def audit_smart_contract(audit: SmartContractAudit, current_user=Depends(g
 
 # --- AUTONOMOUS DECISION ENDPOINTS ---
 
-@app.post("/api/autonomous/decision")
-async def make_autonomous_decision(context: DecisionContext):
-    """
-    Make an autonomous decision based on provided context and parameters.
-    Returns decision result with approval status and recommended actions.
-    """
-    decision_matrix = get_decision_matrix()
-    result = decision_matrix.make_decision(context)
-    
+def _decision_response(result) -> Dict[str, Any]:
+    """Serialize a DecisionResult for the autonomous decision endpoints"""
     return {
         "decision_id": result.decision_id,
         "decision_type": result.decision_type.value,
@@ -1304,6 +1337,34 @@ async def make_autonomous_decision(context: DecisionContext):
         "metadata": result.metadata
     }
 
+@app.post("/api/autonomous/decision")
+async def make_autonomous_decision(context: DecisionContext):
+    """
+    Make an autonomous decision based on provided context and parameters.
+    Returns decision result with approval status and recommended actions.
+    """
+    decision_matrix = get_decision_matrix()
+    result = decision_matrix.make_decision(context)
+    
+    return _decision_response(result)
+
+@app.post("/api/autonomous/decisions:batch")
+async def make_autonomous_decisions_batch(batch: DecisionBatchRequest):
+    """
+    Make many autonomous decisions in one request.
+    Confidences and guardian escalation are evaluated vectorized across the
+    batch; results are returned in the same order as the submitted contexts.
+    """
+    decision_matrix = get_decision_matrix()
+    results = decision_matrix.make_decisions_batch(batch.decisions)
+    
+    return {
+        "decisions": [_decision_response(result) for result in results],
+        "count": len(results),
+        "approved": sum(1 for result in results if result.approved),
+        "requires_guardian": sum(1 for result in results if result.requires_guardian)
+    }
+
 @app.get("/api/autonomous/decision-history")
 async def get_decision_history(
     decision_type: Optional[str] = None,
@@ -1493,7 +1554,7 @@ async def guardian_dashboard():
     guardian_monitor = get_guardian_monitor()
     
     pending_decisions = [
-        d for d in decision_matrix.decision_history[-50:]
+        d for d in decision_matrix.get_decision_history(limit=50)
         if d.requires_guardian and not d.approved
     ]
     
@@ -1536,6 +1597,33 @@ async def get_latest_monitoring_data(limit: int = 10):
         "timestamp": time.time()
     }
 
+@app.get("/api/monitoring/timeseries/{agent}")
+async def get_monitoring_timeseries(
+    agent: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    resolution: str = "raw",
+    fields: Optional[str] = None
+):
+    """
+    Get numeric monitoring fields of one agent over a time range.
+    resolution is raw, 1m or 1h; fields is a comma-separated list.
+    """
+    monitoring = get_monitoring_system()
+    monitoring_agent = monitoring.get_agent(agent)
+    if monitoring_agent is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown monitoring agent '{agent}'. Available: {list(monitoring.agents)}"
+        )
+    
+    try:
+        return monitoring_agent.query_data(
+            start, end, resolution, fields.split(",") if fields else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/api/monitoring/report-to-vercel")
 async def report_metrics_to_vercel(metrics: Dict[str, Any]):
     """Report metrics to Vercel serverless function"""
@@ -1645,6 +1733,44 @@ async def get_memorial_ai_status():
     }
 
 # --- SECURE WEBSOCKET (REMAINS CONCEPTUALLY SIMILAR) ---
+def _collective_insight_frame() -> Dict[str, Any]:
+    """Quantum telemetry frame shared by every collective insight connection"""
+    return {
+        "type": "quantum_pulse",
+        "collective_mood": random.choice(["optimistic", "neutral", "contemplative", "harmonious"]),
+        "qvm_amplitude": round(random.uniform(0.8, 1.2), 4),
+        "harmony_index": round(random.uniform(0.68, 0.76), 3),
+        "resonance_trend": round(random.uniform(-0.1, 0.1), 2),
+        "forecast_confidence": round(random.uniform(0.7, 0.95), 3),
+        "quantum_phase": random.choice(["foundation", "growth", "harmony", "transcendence"]),
+        "sovereign_actions": [
+            "Continue current resonance pattern",
+            "Monitor harmony fluctuations"
+        ],
+        "temporal_anomalies": [],
+        "connected_users": len(connected_users),
+        "guardian_status": guardian_metrics["threat_level"],
+        "timestamp": time.time()
+    }
+
+def _guardian_status_frame() -> Dict[str, Any]:
+    """Guardian status frame shared by every guardian alert connection"""
+    return {
+        "type": "guardian_status",
+        "latency_ns": guardian_metrics["latency_ns"],
+        "harmonic_stability": guardian_metrics["harmonic_stability"],
+        "threat_level": guardian_metrics["threat_level"],
+        "active_alerts": len(guardian_metrics["active_alerts"]),
+        "monitored_transactions": guardian_metrics["monitored_transactions"],
+        "status": "active",
+        "timestamp": time.time()
+    }
+
+# Each frame is computed and serialized once per tick, then queued for every
+# connection; connections that cannot keep up are evicted
+collective_insight_hub = BroadcastHub("collective-insight", _collective_insight_frame, interval=5.0)
+guardian_alert_hub = BroadcastHub("guardian-alerts", _guardian_status_frame, interval=10.0)
+
 @app.websocket("/ws/collective-insight")
 async def websocket_collective_insight(websocket: WebSocket, token: Optional[str] = None):
     """Real-time collective insight WebSocket with quantum telemetry"""
@@ -1664,36 +1790,20 @@ async def websocket_collective_insight(websocket: WebSocket, token: Optional[str
     logging.info(f"User {user_email} connected to collective insight WebSocket (ID: {connection_id})")
     
     try:
-        while True:
-            # Send real-time quantum telemetry
-            telemetry = {
-                "type": "quantum_pulse",
-                "collective_mood": random.choice(["optimistic", "neutral", "contemplative", "harmonious"]),
-                "qvm_amplitude": round(random.uniform(0.8, 1.2), 4),
-                "harmony_index": round(random.uniform(0.68, 0.76), 3),
-                "resonance_trend": round(random.uniform(-0.1, 0.1), 2),
-                "forecast_confidence": round(random.uniform(0.7, 0.95), 3),
-                "quantum_phase": random.choice(["foundation", "growth", "harmony", "transcendence"]),
-                "sovereign_actions": [
-                    "Continue current resonance pattern",
-                    "Monitor harmony fluctuations"
-                ],
-                "temporal_anomalies": [],
-                "connected_users": len(connected_users),
-                "guardian_status": guardian_metrics["threat_level"],
-                "timestamp": time.time()
-            }
-            await websocket.send_json(telemetry)
-            await asyncio.sleep(5)  # Send updates every 5 seconds
+        # Send real-time quantum telemetry (every 5 seconds) and payment updates
+        await collective_insight_hub.serve(
+            websocket.send_text,
+            connection_id,
+            close=lambda: websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        )
     except WebSocketDisconnect:
-        del connected_users[connection_id]
-        connection_tracker.remove_ws_connection()
         logging.info(f"User {user_email} disconnected from WebSocket")
     except Exception as e:
-        if connection_id in connected_users:
-            del connected_users[connection_id]
-            connection_tracker.remove_ws_connection()
         logging.warning(f"WebSocket error: {e}")
+    finally:
+        if connected_users.get(connection_id) is websocket:
+            del connected_users[connection_id]
+        connection_tracker.remove_ws_connection()
 
 @app.websocket("/ws/guardian-alerts")
 async def websocket_guardian_alerts(websocket: WebSocket):
@@ -1737,20 +1847,12 @@ async def websocket_guardian_alerts(websocket: WebSocket):
     # Wrap stream handling with a tracing span (no-op if tracing disabled)
     with trace_consciousness_stream(connection_id=str(id(websocket)), user_id=(token[:8] + "...") if token else None):
         try:
-            while True:
-                # Send guardian status updates
-                alert_data = {
-                    "type": "guardian_status",
-                    "latency_ns": guardian_metrics["latency_ns"],
-                    "harmonic_stability": guardian_metrics["harmonic_stability"],
-                    "threat_level": guardian_metrics["threat_level"],
-                    "active_alerts": len(guardian_metrics["active_alerts"]),
-                    "monitored_transactions": guardian_metrics["monitored_transactions"],
-                    "status": "active",
-                    "timestamp": time.time()
-                }
-                await websocket.send_json(alert_data)
-                await asyncio.sleep(10)
+            # Send guardian status updates (every 10 seconds)
+            await guardian_alert_hub.serve(
+                websocket.send_text,
+                str(id(websocket)),
+                close=lambda: websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+            )
         except WebSocketDisconnect:
             logging.info("Guardian alert WebSocket disconnected")
         except Exception as e:
@@ -1776,6 +1878,12 @@ async def startup_event():
     logger.info(f"🎯 Latency Target: <{guardian.latency_threshold_ns}ns")
     logger.info("🌌 Sacred Trinity entanglement complete - Mainnet Ready!")
     
+    # Open the pooled Pi Network API client
+    await pi_api_client.start()
+    
+    # Sample host stats in the background for diagnostics and monitoring
+    system_sampler.start()
+    
     # Start Pi Network background tasks
     try:
         from pi_network_router import pi_client
@@ -1795,10 +1903,20 @@ async def shutdown_event():
     try:
         from pi_network_router import pi_client
         await pi_client.stop_background_tasks()
+        pi_client.close()
         logger.info("✅ Pi Network background tasks stopped")
     except Exception as e:
         logger.warning(f"⚠️ Error stopping Pi Network background tasks: {e}")
     
+    # Close pooled Pi Network API connections
+    await pi_api_client.close()
+    system_sampler.stop()
+    rate_limiter.close()
+    
+    # Stop WebSocket broadcast tickers
+    await collective_insight_hub.close()
+    await guardian_alert_hub.close()
+    
     logger.info("👋 Shutdown complete")
 
 # --- MAIN ---
@@ -4,6 +4,7 @@ Pre-integrated agents for real-time data extraction and monitoring.
 """
 
 import logging
+import os
 import time
 import asyncio
 from typing import Dict, Any, List, Optional, Callable
@@ -12,6 +13,14 @@ from enum import Enum
 from pydantic import BaseModel, Field
 import aiohttp
 
+try:
+    from system_sampler import SystemSampler, get_system_sampler
+    from timeseries_store import TimeSeriesStore
+except ImportError:
+    # Imported as server.monitoring_agents
+    from .system_sampler import SystemSampler, get_system_sampler
+    from .timeseries_store import TimeSeriesStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,12 +53,13 @@ class MonitoringData(BaseModel):
 class MonitoringAgent:
     """Base class for monitoring agents"""
     
-    def __init__(self, agent_id: str, interval: float = 60.0):
+    def __init__(self, agent_id: str, interval: float = 60.0, store: Optional[TimeSeriesStore] = None):
         self.agent_id = agent_id
         self.interval = interval
         self.status = AgentStatus.INACTIVE
         self.last_check = 0.0
-        self.data_history: List[MonitoringData] = []
+        # Samples are kept in the time-series store under the agent id
+        self.store = store or TimeSeriesStore()
         self._running = False
     
     async def start(self):
@@ -61,11 +71,7 @@ class MonitoringAgent:
         while self._running:
             try:
                 data = await self.collect_data()
-                self.data_history.append(data)
-                
-                # Keep only last 1000 data points
-                if len(self.data_history) > 1000:
-                    self.data_history = self.data_history[-1000:]
+                self.record_data(data)
                 
                 self.last_check = time.time()
                 await asyncio.sleep(self.interval)
@@ -79,52 +85,64 @@ class MonitoringAgent:
         """Collect monitoring data - override in subclasses"""
         raise NotImplementedError("Subclasses must implement collect_data")
     
+    def record_data(self, data: MonitoringData):
+        """Store a sample, serialized once for every later read"""
+        self.store.append(self.agent_id, {
+            "agent_id": data.agent_id,
+            "metric_type": data.metric_type.value,
+            "value": data.value,
+            "timestamp": data.timestamp,
+            "metadata": data.metadata
+        })
+    
     def stop(self):
         """Stop the monitoring agent"""
         self._running = False
         self.status = AgentStatus.INACTIVE
         logger.info(f"🛑 Monitoring agent stopped: {self.agent_id}")
     
-    def get_latest_data(self, limit: int = 10) -> List[MonitoringData]:
-        """Get latest monitoring data"""
-        return self.data_history[-limit:]
+    def get_latest_data(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get latest monitoring data as stored (JSON-ready dicts, read-only)"""
+        return self.store.latest(self.agent_id, limit)
+    
+    def query_data(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        resolution: str = "raw",
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get numeric fields of this agent's samples in a time range"""
+        return self.store.query(self.agent_id, start, end, resolution, fields)
 
 
 class PerformanceMonitoringAgent(MonitoringAgent):
     """Agent for monitoring system performance"""
     
-    def __init__(self):
-        super().__init__("performance_monitor", interval=30.0)
+    def __init__(self, store: Optional[TimeSeriesStore] = None, sampler: Optional[SystemSampler] = None):
+        super().__init__("performance_monitor", interval=30.0, store=store)
+        self.sampler = sampler or get_system_sampler()
     
     async def collect_data(self) -> MonitoringData:
-        """Collect performance metrics"""
+        """Collect performance metrics from the latest system snapshot"""
         try:
-            import psutil
-            import os
-            
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            
-            # Use current working directory for cross-platform compatibility
-            try:
-                disk = psutil.disk_usage(os.getcwd())
-            except Exception:
-                # Fallback to root for Unix-like systems
-                disk = psutil.disk_usage('/')
+            snapshot = self.sampler.latest()
             
             value = {
-                "cpu_percent": cpu_percent,
-                "memory_percent": memory.percent,
-                "memory_available_mb": memory.available / (1024 * 1024),
-                "disk_percent": disk.percent,
-                "disk_free_gb": disk.free / (1024 * 1024 * 1024)
+                "cpu_percent": snapshot.cpu_percent,
+                "memory_percent": snapshot.memory_percent,
+                "memory_available_mb": snapshot.memory_available_mb,
+                "disk_percent": snapshot.disk_percent,
+                "disk_free_gb": snapshot.disk_free_gb
             }
             
+            healthy = snapshot.cpu_percent < 80 and snapshot.memory_percent < 85
             return MonitoringData(
                 agent_id=self.agent_id,
                 metric_type=MetricType.PERFORMANCE,
                 value=value,
-                metadata={"status": "healthy" if cpu_percent < 80 and memory.percent < 85 else "degraded"}
+                timestamp=snapshot.timestamp,
+                metadata={"status": "healthy" if healthy else "degraded"}
             )
         except Exception as e:
             logger.error(f"Performance monitoring error: {e}")
@@ -139,8 +157,8 @@ class PerformanceMonitoringAgent(MonitoringAgent):
 class SecurityMonitoringAgent(MonitoringAgent):
     """Agent for monitoring security metrics"""
     
-    def __init__(self):
-        super().__init__("security_monitor", interval=60.0)
+    def __init__(self, store: Optional[TimeSeriesStore] = None):
+        super().__init__("security_monitor", interval=60.0, store=store)
         self.failed_auth_attempts = 0
         self.suspicious_activities = 0
     
@@ -177,8 +195,8 @@ class SecurityMonitoringAgent(MonitoringAgent):
 class HealthMonitoringAgent(MonitoringAgent):
     """Agent for monitoring system health"""
     
-    def __init__(self):
-        super().__init__("health_monitor", interval=45.0)
+    def __init__(self, store: Optional[TimeSeriesStore] = None):
+        super().__init__("health_monitor", interval=45.0, store=store)
     
     async def collect_data(self) -> MonitoringData:
         """Collect health metrics"""
@@ -219,8 +237,8 @@ class HealthMonitoringAgent(MonitoringAgent):
 class DecisionMonitoringAgent(MonitoringAgent):
     """Agent for monitoring autonomous decisions"""
     
-    def __init__(self):
-        super().__init__("decision_monitor", interval=120.0)
+    def __init__(self, store: Optional[TimeSeriesStore] = None):
+        super().__init__("decision_monitor", interval=120.0, store=store)
         self.decisions_tracked = 0
         self.approvals = 0
         self.rejections = 0
@@ -258,19 +276,20 @@ class MonitoringAgentSystem:
     System to manage multiple monitoring agents
     """
     
-    def __init__(self):
+    def __init__(self, store: Optional[TimeSeriesStore] = None):
         self.agents: Dict[str, MonitoringAgent] = {}
         self.vercel_endpoint: Optional[str] = None
+        self.store = store or TimeSeriesStore()
         self._initialize_agents()
         logger.info("✅ Monitoring Agent System initialized")
     
     def _initialize_agents(self):
         """Initialize all monitoring agents"""
         self.agents = {
-            "performance": PerformanceMonitoringAgent(),
-            "security": SecurityMonitoringAgent(),
-            "health": HealthMonitoringAgent(),
-            "decision": DecisionMonitoringAgent()
+            "performance": PerformanceMonitoringAgent(self.store),
+            "security": SecurityMonitoringAgent(self.store),
+            "health": HealthMonitoringAgent(self.store),
+            "decision": DecisionMonitoringAgent(self.store)
         }
     
     async def start_all_agents(self):
@@ -301,16 +320,7 @@ class MonitoringAgentSystem:
     def get_all_latest_data(self, limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
         """Get latest data from all agents"""
         return {
-            agent_id: [
-                {
-                    "agent_id": data.agent_id,
-                    "metric_type": data.metric_type.value,
-                    "value": data.value,
-                    "timestamp": data.timestamp,
-                    "metadata": data.metadata
-                }
-                for data in agent.get_latest_data(limit)
-            ]
+            agent_id: agent.get_latest_data(limit)
             for agent_id, agent in self.agents.items()
         }
     
@@ -321,7 +331,7 @@ class MonitoringAgentSystem:
                 agent_id: {
                     "status": agent.status.value,
                     "last_check": agent.last_check,
-                    "data_points": len(agent.data_history),
+                    "data_points": self.store.count(agent.agent_id),
                     "interval": agent.interval
                 }
                 for agent_id, agent in self.agents.items()
@@ -365,5 +375,7 @@ def get_monitoring_system() -> MonitoringAgentSystem:
     """Get or create global monitoring agent system"""
     global _monitoring_system
     if _monitoring_system is None:
-        _monitoring_system = MonitoringAgentSystem()
+        # MONITORING_TIMESERIES_PATH keeps samples in segment files across restarts
+        path = os.environ.get("MONITORING_TIMESERIES_PATH") or None
+        _monitoring_system = MonitoringAgentSystem(TimeSeriesStore(path))
     return _monitoring_system
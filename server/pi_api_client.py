@@ -0,0 +1,240 @@
+"""
+Pi Network API Client
+Shared, connection-pooled HTTP client for the Pi Network platform API.
+
+Provides:
+- One keep-alive connection pool (HTTP/2 when the h2 package is installed)
+- Single-flight coalescing of concurrent identical GET requests
+- Short-TTL cache of payment lookups, invalidated by webhooks and by our
+  own approve/complete calls
+"""
+
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class PiNetworkAPIClient:
+    """
+    Pooled Pi Network API client
+    
+    The underlying ``httpx.AsyncClient`` is created lazily on first use (or by
+    ``start``) so it binds to the running event loop, and should be closed
+    with ``close`` when the application shuts down.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: float = 30.0,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        payment_cache_ttl: float = 2.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Initialize the Pi Network API client
+        
+        Args:
+            base_url: Pi Network API base URL
+            api_key: Server API key sent as ``Authorization: Key ...``
+            timeout: Request timeout in seconds
+            http2: Negotiate HTTP/2 when the h2 package is available
+            max_connections: Maximum pooled connections
+            max_keepalive_connections: Idle connections kept open for reuse
+            payment_cache_ttl: Seconds a payment lookup is served from cache
+            transport: Optional custom transport (used by tests)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.payment_cache_ttl = payment_cache_ttl
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._payment_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lookup_tokens: Dict[str, object] = {}
+        
+        self.stats = {
+            "requests": 0,
+            "coalesced": 0,
+            "cache_hits": 0,
+            "invalidations": 0
+        }
+        
+        if http2 and not HTTP2_AVAILABLE:
+            logger.info("h2 not installed - Pi Network API client using HTTP/1.1 keep-alive")
+    
+    async def start(self) -> httpx.AsyncClient:
+        """Create the pooled client if it does not exist yet"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Key {self.api_key}"},
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self._transport
+            )
+        return self._client
+    
+    async def close(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._inflight.clear()
+        self._payment_cache.clear()
+    
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a request over the pooled client
+        
+        Args:
+            method: HTTP method
+            endpoint: Path relative to the API base URL
+            data: JSON body for POST requests
+            
+        Returns:
+            Decoded JSON response
+            
+        Raises:
+            httpx.HTTPStatusError: On non-2xx responses
+        """
+        client = await self.start()
+        self.stats["requests"] += 1
+        response = await client.request(method, f"/{endpoint.lstrip('/')}", json=data)
+        response.raise_for_status()
+        return response.json()
+    
+    async def get(self, endpoint: str) -> Dict[str, Any]:
+        """
+        GET with single-flight coalescing
+        
+        Concurrent callers asking for the same endpoint share one request
+        and receive the same result (or exception).
+        
+        Args:
+            endpoint: Path relative to the API base URL
+            
+        Returns:
+            Decoded JSON response
+        """
+        task = self._inflight.get(endpoint)
+        if task is None:
+            # Run as its own task so a cancelled caller does not cancel the
+            # request for everyone else waiting on it
+            task = asyncio.ensure_future(self.request("GET", endpoint))
+            self._inflight[endpoint] = task
+            task.add_done_callback(lambda done: self._finish_inflight(endpoint, done))
+        else:
+            self.stats["coalesced"] += 1
+        
+        return await asyncio.shield(task)
+    
+    def _finish_inflight(self, endpoint: str, task: asyncio.Future) -> None:
+        """Forget a finished in-flight GET"""
+        if self._inflight.get(endpoint) is task:
+            del self._inflight[endpoint]
+        # Mark the exception retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+    
+    async def post(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """POST over the pooled client"""
+        return await self.request("POST", endpoint, data)
+    
+    async def get_payment(self, payment_id: str) -> Dict[str, Any]:
+        """
+        Get payment details, served from a short-TTL cache when fresh
+        
+        Args:
+            payment_id: Pi Network payment identifier
+            
+        Returns:
+            Payment details from Pi Network
+        """
+        cached = self._payment_cache.get(payment_id)
+        if cached is not None and cached[0] > time.monotonic():
+            self.stats["cache_hits"] += 1
+            return cached[1]
+        
+        # The token is dropped by invalidate_payment, so a lookup that was
+        # overtaken by an invalidation does not cache its stale result
+        token = object()
+        self._lookup_tokens[payment_id] = token
+        try:
+            payment = await self.get(f"v2/payments/{payment_id}")
+        finally:
+            current = self._lookup_tokens.get(payment_id) is token
+            if current:
+                del self._lookup_tokens[payment_id]
+        
+        if current:
+            self._cache_payment(payment_id, payment)
+        return payment
+    
+    async def approve_payment(self, payment_id: str) -> Dict[str, Any]:
+        """Approve a payment and refresh its cached state"""
+        self.invalidate_payment(payment_id)
+        result = await self.post(f"v2/payments/{payment_id}/approve")
+        self._cache_payment(payment_id, result)
+        return result
+    
+    async def complete_payment(self, payment_id: str, txid: str) -> Dict[str, Any]:
+        """Complete a payment and refresh its cached state"""
+        self.invalidate_payment(payment_id)
+        result = await self.post(f"v2/payments/{payment_id}/complete", {"txid": txid})
+        self._cache_payment(payment_id, result)
+        return result
+    
+    def invalidate_payment(self, payment_id: str) -> None:
+        """
+        Drop a cached payment lookup
+        
+        Called when Pi Network notifies us of a state change (webhooks) so the
+        next lookup goes to the API. In-flight lookups started before the
+        invalidation are not cached and are no longer joined by new callers.
+        
+        Args:
+            payment_id: Pi Network payment identifier
+        """
+        self._payment_cache.pop(payment_id, None)
+        self._lookup_tokens.pop(payment_id, None)
+        self._inflight.pop(f"v2/payments/{payment_id}", None)
+        self.stats["invalidations"] += 1
+    
+    def _cache_payment(self, payment_id: str, payment: Dict[str, Any]) -> None:
+        """Store a payment lookup if it looks like a payment object"""
+        if self.payment_cache_ttl <= 0 or not isinstance(payment, dict) or "amount" not in payment:
+            return
+        
+        self._payment_cache[payment_id] = (time.monotonic() + self.payment_cache_ttl, payment)
+        
+        # Lazily prune expired entries so the cache cannot grow without bound
+        if len(self._payment_cache) > 10000:
+            now = time.monotonic()
+            self._payment_cache = {
+                pid: entry for pid, entry in self._payment_cache.items() if entry[0] > now
+            }
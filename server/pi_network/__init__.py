@@ -10,6 +10,12 @@ from .client import PiNetworkClient
 from .auth import PiAuthManager
 from .payments import PiPaymentManager
 from .config import PiNetworkConfig
+from .storage import (
+    PiStateStore,
+    InMemoryStateStore,
+    SQLiteStateStore,
+    create_state_store
+)
 from .exceptions import (
     PiNetworkError,
     PiAuthenticationError,
@@ -23,6 +29,10 @@ __all__ = [
     "PiAuthManager", 
     "PiPaymentManager",
     "PiNetworkConfig",
+    "PiStateStore",
+    "InMemoryStateStore",
+    "SQLiteStateStore",
+    "create_state_store",
     "PiNetworkError",
     "PiAuthenticationError",
     "PiPaymentError",
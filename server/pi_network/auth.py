@@ -4,14 +4,16 @@ Handles user authentication and session management with Pi Network
 """
 
 import time
+import heapq
 import hashlib
 import hmac
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 
 from .config import PiNetworkConfig
 from .exceptions import PiAuthenticationError
+from .storage import PiStateStore, InMemoryStateStore, SESSIONS
 
 logger = logging.getLogger(__name__)
 
@@ -25,17 +27,42 @@ class PiAuthManager:
     - Session verification using HMAC signatures
     - Token validation and refresh
     - Secure session management
+    
+    Sessions are persisted through a state store, so a session created by
+    one worker is found by the others once it has been flushed.
+    
+    Sessions are also indexed by expiry in a min-heap with lazy deletion:
+    refreshing a session pushes a new entry and leaves the old one to be
+    skipped when popped. Cleanup therefore costs O(expired * log n) and the
+    active session count is O(1) once expired entries are drained.
     """
     
-    def __init__(self, config: PiNetworkConfig):
+    def __init__(
+        self,
+        config: PiNetworkConfig,
+        store: Optional[PiStateStore] = None,
+        sync_interval: float = 0.5
+    ):
         """
         Initialize Pi Authentication Manager
         
         Args:
             config: Pi Network configuration
+            store: State store for session persistence (defaults to in-memory)
+            sync_interval: Minimum seconds between pulls of external changes
         """
         self.config = config
+        self._store = store or InMemoryStateStore()
+        self.sync_interval = sync_interval
         self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        
+        # Read the cursor before loading so nothing written in between is missed
+        self._sync_cursor = self._store.current_cursor()
+        self._last_sync = time.monotonic()
+        for session_id, session in self._store.load(SESSIONS).items():
+            self._track(session_id, session)
+        
         logger.info(f"PiAuthManager initialized for {config.network}")
     
     def verify_session_signature(
@@ -107,7 +134,8 @@ class PiAuthManager:
             "metadata": session_data or {}
         }
         
-        self._sessions[session_id] = session
+        self._track(session_id, session)
+        self._store.put(SESSIONS, session_id, session)
         logger.info(f"User authenticated: {username} (UID: {pi_uid})")
         
         return {
@@ -128,7 +156,7 @@ class PiAuthManager:
         Returns:
             Session data if valid, None otherwise
         """
-        session = self._sessions.get(session_id)
+        session = self._lookup(session_id)
         
         if not session:
             logger.warning(f"Session not found: {session_id}")
@@ -137,7 +165,7 @@ class PiAuthManager:
         # Check expiration
         if time.time() > session["expires_at"]:
             logger.warning(f"Session expired: {session_id}")
-            del self._sessions[session_id]
+            self._remove(session_id)
             return None
         
         return session
@@ -152,9 +180,10 @@ class PiAuthManager:
         Returns:
             True if session was invalidated, False if not found
         """
-        if session_id in self._sessions:
-            username = self._sessions[session_id].get("username", "unknown")
-            del self._sessions[session_id]
+        session = self._lookup(session_id)
+        if session:
+            username = session.get("username", "unknown")
+            self._remove(session_id)
             logger.info(f"Session invalidated for user: {username}")
             return True
         return False
@@ -172,7 +201,10 @@ class PiAuthManager:
         """
         session = self.verify_session(session_id)
         if session:
-            self._sessions[session_id]["expires_at"] = time.time() + extend_seconds
+            session["expires_at"] = time.time() + extend_seconds
+            # Re-key: the previous heap entry goes stale and is skipped later
+            self._track(session_id, session)
+            self._store.put(SESSIONS, session_id, session)
             logger.debug(f"Session refreshed: {session_id}")
             return True
         return False
@@ -185,13 +217,8 @@ class PiAuthManager:
             Number of active sessions
         """
         # Clean up expired sessions first
-        current_time = time.time()
-        expired = [
-            sid for sid, session in self._sessions.items()
-            if current_time > session["expires_at"]
-        ]
-        for sid in expired:
-            del self._sessions[sid]
+        self._sync()
+        self._expire_sessions(time.time())
         
         return len(self._sessions)
     
@@ -215,16 +242,103 @@ class PiAuthManager:
         Returns:
             Number of sessions cleaned up
         """
-        current_time = time.time()
-        expired = [
-            sid for sid, session in self._sessions.items()
-            if current_time > session["expires_at"]
-        ]
-        
-        for sid in expired:
-            del self._sessions[sid]
+        self._sync()
+        expired = self._expire_sessions(time.time())
         
         if expired:
-            logger.info(f"Cleaned up {len(expired)} expired sessions")
+            logger.info(f"Cleaned up {expired} expired sessions")
+        
+        return expired
+    
+    def flush(self) -> int:
+        """
+        Flush buffered session changes to the state store
+        
+        Returns:
+            Number of records written
+        """
+        return self._store.flush()
+    
+    def _lookup(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a session locally, falling back to the state store
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            Session data if found, None otherwise
+        """
+        self._sync()
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._store.get(SESSIONS, session_id)
+            if session is not None:
+                self._track(session_id, session)
+        return session
+    
+    def _track(self, session_id: str, session: Dict[str, Any]) -> None:
+        """
+        Store a session locally and index it by expiry
+        
+        Args:
+            session_id: Session identifier
+            session: Session data
+        """
+        self._sessions[session_id] = session
+        heapq.heappush(self._expiry_heap, (session["expires_at"], session_id))
+        
+        # Refreshes leave stale entries behind; rebuild once they dominate
+        if len(self._expiry_heap) > 2 * len(self._sessions) + 64:
+            self._expiry_heap = [
+                (tracked["expires_at"], sid) for sid, tracked in self._sessions.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+    
+    def _expire_sessions(self, now: float) -> int:
+        """
+        Pop expired sessions off the expiry heap
+        
+        Args:
+            now: Current timestamp
+            
+        Returns:
+            Number of sessions removed
+        """
+        heap = self._expiry_heap
+        removed = 0
+        
+        while heap and heap[0][0] < now:
+            expires_at, session_id = heapq.heappop(heap)
+            session = self._sessions.get(session_id)
+            
+            # Stale entry: session already gone or re-keyed by a refresh
+            if session is None or session["expires_at"] != expires_at:
+                continue
+            
+            self._remove(session_id)
+            removed += 1
+        
+        return removed
+    
+    def _remove(self, session_id: str) -> None:
+        """Drop a session locally and from the state store"""
+        self._sessions.pop(session_id, None)
+        self._store.delete(SESSIONS, session_id)
+    
+    def _sync(self) -> None:
+        """Apply session changes flushed by other workers since the last sync"""
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
         
-        return len(expired)
+        changes, self._sync_cursor = self._store.changes_since(SESSIONS, self._sync_cursor)
+        for session_id, session in changes.items():
+            # Our own unflushed change is newer than anything in the store
+            if self._store.is_pending(SESSIONS, session_id):
+                continue
+            if session is None:
+                self._sessions.pop(session_id, None)
+            else:
+                self._track(session_id, session)
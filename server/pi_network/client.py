@@ -11,6 +11,7 @@ from datetime import datetime
 from .config import PiNetworkConfig
 from .auth import PiAuthManager
 from .payments import PiPaymentManager, PiPayment, PaymentStatus
+from .storage import create_state_store
 from .exceptions import PiNetworkError, PiConfigurationError
 
 logger = logging.getLogger(__name__)
@@ -41,8 +42,9 @@ class PiNetworkClient:
             config: Pi Network configuration (defaults to environment-based config)
         """
         self.config = config or PiNetworkConfig.from_env()
-        self.auth = PiAuthManager(self.config)
-        self.payments = PiPaymentManager(self.config)
+        self.store = create_state_store(self.config.state_store_url)
+        self.auth = PiAuthManager(self.config, self.store)
+        self.payments = PiPaymentManager(self.config, self.store)
         
         # Background tasks
         self._cleanup_task: Optional[asyncio.Task] = None
@@ -260,6 +262,10 @@ class PiNetworkClient:
         
         return health
     
+    def close(self):
+        """Flush pending state and close the state store"""
+        self.store.close()
+    
     # Background task management
     
     async def start_background_tasks(self):
@@ -293,6 +299,7 @@ class PiNetworkClient:
             except asyncio.CancelledError:
                 pass
         
+        self.store.flush()
         logger.info("Background tasks stopped")
     
     async def _cleanup_loop(self):
@@ -328,7 +335,7 @@ class PiNetworkClient:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
         # Synchronous cleanup
-        pass
+        self.store.flush()
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -23,6 +23,7 @@ class PiNetworkConfig:
         timeout: Request timeout in seconds
         max_retries: Maximum number of retry attempts
         verify_ssl: Verify SSL certificates
+        state_store_url: Payment/session state store ('memory' or 'sqlite:///path')
     """
     
     network: Literal["mainnet", "testnet"] = "mainnet"
@@ -33,6 +34,7 @@ class PiNetworkConfig:
     timeout: int = 30
     max_retries: int = 3
     verify_ssl: bool = True
+    state_store_url: str = "memory"
     
     # Safety configurations
     nft_mint_value: int = 0  # Must be 0 for testnet
@@ -62,6 +64,7 @@ class PiNetworkConfig:
             timeout=int(os.environ.get("PI_NETWORK_TIMEOUT", "30")),
             max_retries=int(os.environ.get("PI_NETWORK_MAX_RETRIES", "3")),
             verify_ssl=os.environ.get("PI_VERIFY_SSL", "true").lower() != "false",
+            state_store_url=os.environ.get("PI_STATE_STORE_URL", "memory"),
             nft_mint_value=int(os.environ.get("NFT_MINT_VALUE", "0")),
             app_environment=os.environ.get("APP_ENVIRONMENT", "testnet")
         )
@@ -133,6 +136,7 @@ class PiNetworkConfig:
             "timeout": self.timeout,
             "max_retries": self.max_retries,
             "verify_ssl": self.verify_ssl,
+            "state_store": self.state_store_url.split(":", 1)[0],
             "app_environment": self.app_environment,
             "is_production": self.is_production(),
             "is_testnet": self.is_testnet(),
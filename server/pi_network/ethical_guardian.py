@@ -11,7 +11,9 @@ This module integrates with the Cyber Samurai Guardian to provide:
 
 import time
 import logging
-from typing import Dict, Any, List, Optional
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 
@@ -59,6 +61,90 @@ class EthicalAuditResult:
         }
 
 
+class UserActivityIndex:
+    """
+    Sliding-window activity counter keyed by user
+    
+    Each user owns a deque of ``[bucket_start, count]`` pairs, one per
+    ``bucket_seconds`` slice of time. Recording appends to (or bumps) the
+    newest bucket and counting expires buckets off the left edge, so both
+    operations are O(1) amortized and memory is bounded by
+    ``window_seconds / bucket_seconds`` buckets per active user.
+    """
+    
+    def __init__(self, window_seconds: float = 3600, bucket_seconds: float = 1.0):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self._buckets: Dict[str, Deque[List[float]]] = {}
+        self._totals: Dict[str, int] = {}
+        self._last_sweep = time.time()
+    
+    def record(self, user_id: str, timestamp: Optional[float] = None) -> None:
+        """
+        Record one event for a user
+        
+        Args:
+            user_id: User identifier
+            timestamp: Event time (defaults to now)
+        """
+        now = time.time() if timestamp is None else timestamp
+        bucket_start = now - (now % self.bucket_seconds)
+        
+        buckets = self._buckets.get(user_id)
+        if buckets is None:
+            buckets = self._buckets[user_id] = deque()
+            self._totals[user_id] = 0
+        
+        if buckets and buckets[-1][0] == bucket_start:
+            buckets[-1][1] += 1
+        else:
+            buckets.append([bucket_start, 1])
+        self._totals[user_id] += 1
+        
+        self._maybe_sweep(now)
+    
+    def count(self, user_id: str, now: Optional[float] = None) -> int:
+        """
+        Count events for a user inside the sliding window
+        
+        Args:
+            user_id: User identifier
+            now: Reference time (defaults to now)
+            
+        Returns:
+            Number of events recorded within the last ``window_seconds``
+        """
+        buckets = self._buckets.get(user_id)
+        if buckets is None:
+            return 0
+        
+        self._expire(user_id, buckets, time.time() if now is None else now)
+        return self._totals.get(user_id, 0)
+    
+    def __len__(self) -> int:
+        """Number of users currently tracked"""
+        return len(self._buckets)
+    
+    def _expire(self, user_id: str, buckets: Deque[List[float]], now: float) -> None:
+        """Drop buckets that fell out of the window for one user"""
+        cutoff = now - self.window_seconds
+        while buckets and buckets[0][0] + self.bucket_seconds <= cutoff:
+            self._totals[user_id] -= int(buckets.popleft()[1])
+        
+        if not buckets:
+            del self._buckets[user_id]
+            del self._totals[user_id]
+    
+    def _maybe_sweep(self, now: float) -> None:
+        """Forget idle users once per window so the index stays bounded"""
+        if now - self._last_sweep < self.window_seconds:
+            return
+        
+        self._last_sweep = now
+        for user_id in list(self._buckets):
+            self._expire(user_id, self._buckets[user_id], now)
+
+
 class PiNetworkEthicalGuardian:
     """
     Ethical compliance guardian for Pi Network operations
@@ -68,10 +154,41 @@ class PiNetworkEthicalGuardian:
     - User authentication patterns
     - Session activity
     - Anomaly detection
+    
+    Audit history is retained up to ``max_history`` entries. Summary
+    statistics are served from cumulative aggregates maintained on every
+    insert, and velocity checks use per-user sliding-window indexes, so
+    audit cost does not grow with the number of historical audits.
     """
     
-    def __init__(self):
-        self.audit_history: List[EthicalAuditResult] = []
+    HIGH_RISK_LEVELS = (RiskLevel.HIGH, RiskLevel.CRITICAL)
+    
+    def __init__(self, max_history: int = 10000, velocity_window: float = 3600):
+        """
+        Initialize the ethical guardian
+        
+        Args:
+            max_history: Maximum number of audit results retained in memory
+            velocity_window: Window in seconds used for frequency checks
+        """
+        if max_history < 1:
+            raise ValueError("max_history must be at least 1")
+        
+        self.max_history = max_history
+        self.audit_history: Deque[EthicalAuditResult] = deque()
+        self.total_audits_recorded = 0
+        
+        # Running totals since startup; each retained audit keeps a snapshot
+        # so any "last N" window is a difference of two snapshots.
+        self._risk_levels = list(RiskLevel)
+        self._compliance_statuses = list(ComplianceStatus)
+        self._cumulative = self._empty_aggregate()
+        self._cumulative_history: Deque[Tuple[int, ...]] = deque()
+        self._high_risk_history: Deque[EthicalAuditResult] = deque()
+        
+        self._payment_activity = UserActivityIndex(window_seconds=velocity_window)
+        self._auth_activity = UserActivityIndex(window_seconds=velocity_window)
+        
         self.risk_thresholds = {
             RiskLevel.LOW: 0.2,
             RiskLevel.MEDIUM: 0.5,
@@ -161,7 +278,8 @@ class PiNetworkEthicalGuardian:
         )
         
         # Store in audit history
-        self.audit_history.append(audit_result)
+        self._record_audit(audit_result)
+        self._payment_activity.record(user_id, audit_result.audited_at)
         
         logger.info(
             f"Payment audited: {payment_id} | "
@@ -226,7 +344,8 @@ class PiNetworkEthicalGuardian:
             audited_at=time.time()
         )
         
-        self.audit_history.append(audit_result)
+        self._record_audit(audit_result)
+        self._auth_activity.record(user_id, audit_result.audited_at)
         
         return audit_result
     
@@ -240,9 +359,9 @@ class PiNetworkEthicalGuardian:
         Returns:
             Audit summary statistics
         """
-        recent_audits = self.audit_history[-limit:]
+        window = min(max(limit, 0), len(self.audit_history))
         
-        if not recent_audits:
+        if window == 0:
             return {
                 "total_audits": 0,
                 "risk_distribution": {},
@@ -250,28 +369,35 @@ class PiNetworkEthicalGuardian:
                 "high_risk_count": 0
             }
         
-        # Risk distribution
-        risk_dist = {level.value: 0 for level in RiskLevel}
-        for audit in recent_audits:
-            risk_dist[audit.risk_level.value] += 1
+        # Aggregate for the last `window` audits = latest snapshot minus the
+        # snapshot taken just before the window started.
+        latest = self._cumulative
+        if window < len(self._cumulative_history):
+            baseline = self._cumulative_history[-window - 1]
+        else:
+            baseline = self._aggregate_before_history()
+        totals = [after - before for after, before in zip(latest, baseline)]
         
-        # Compliance distribution
-        compliance_dist = {status.value: 0 for status in ComplianceStatus}
-        for audit in recent_audits:
-            compliance_dist[audit.compliance_status.value] += 1
+        risk_counts = totals[:len(self._risk_levels)]
+        compliance_counts = totals[len(self._risk_levels):-1]
+        score_units = totals[-1]
         
-        # High risk count
-        high_risk_count = sum(
-            1 for audit in recent_audits
-            if audit.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]
-        )
+        risk_dist = {
+            level.value: count
+            for level, count in zip(self._risk_levels, risk_counts)
+        }
+        compliance_dist = {
+            status.value: count
+            for status, count in zip(self._compliance_statuses, compliance_counts)
+        }
+        high_risk_count = sum(risk_dist[level.value] for level in self.HIGH_RISK_LEVELS)
         
         return {
-            "total_audits": len(recent_audits),
+            "total_audits": window,
             "risk_distribution": risk_dist,
             "compliance_distribution": compliance_dist,
             "high_risk_count": high_risk_count,
-            "average_risk_score": sum(a.risk_score for a in recent_audits) / len(recent_audits),
+            "average_risk_score": score_units / self._SCORE_SCALE / window,
             "timestamp": time.time()
         }
     
@@ -283,17 +409,63 @@ class PiNetworkEthicalGuardian:
             limit: Maximum number of results
             
         Returns:
-            List of high-risk audit results
+            List of high-risk audit results (newest first)
         """
-        high_risk = [
-            audit for audit in self.audit_history
-            if audit.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]
-        ]
-        
-        # Sort by timestamp (newest first)
-        high_risk.sort(key=lambda x: x.audited_at, reverse=True)
+        newest_first = islice(reversed(self._high_risk_history), max(limit, 0))
+        return [audit.to_dict() for audit in newest_first]
+    
+    # Risk scores are rounded to 4 decimals, so integer units keep the
+    # cumulative sums exact under subtraction.
+    _SCORE_SCALE = 10000
+    
+    def _empty_aggregate(self) -> Tuple[int, ...]:
+        """Zeroed aggregate: risk counts, compliance counts, score units"""
+        return (0,) * (len(self._risk_levels) + len(self._compliance_statuses) + 1)
+    
+    def _aggregate_before_history(self) -> Tuple[int, ...]:
+        """Cumulative aggregate as it stood before the oldest retained audit"""
+        if not self.audit_history:
+            return self._cumulative
+        
+        oldest = self.audit_history[0]
+        return tuple(
+            value - delta
+            for value, delta in zip(self._cumulative_history[0], self._audit_delta(oldest))
+        )
+    
+    def _audit_delta(self, audit: EthicalAuditResult) -> Tuple[int, ...]:
+        """Contribution of a single audit to the cumulative aggregate"""
+        delta = [0] * len(self._cumulative)
+        delta[self._risk_levels.index(audit.risk_level)] = 1
+        delta[len(self._risk_levels) + self._compliance_statuses.index(audit.compliance_status)] = 1
+        delta[-1] = int(round(audit.risk_score * self._SCORE_SCALE))
+        return tuple(delta)
+    
+    def _record_audit(self, audit: EthicalAuditResult) -> None:
+        """
+        Append an audit to history and update maintained aggregates
         
-        return [audit.to_dict() for audit in high_risk[:limit]]
+        Args:
+            audit: Audit result to store
+        """
+        self._cumulative = tuple(
+            value + delta
+            for value, delta in zip(self._cumulative, self._audit_delta(audit))
+        )
+        self.audit_history.append(audit)
+        self._cumulative_history.append(self._cumulative)
+        self.total_audits_recorded += 1
+        
+        if audit.risk_level in self.HIGH_RISK_LEVELS:
+            self._high_risk_history.append(audit)
+        
+        # Enforce retention; high-risk audits are a subsequence of history so
+        # an evicted high-risk audit is always the oldest one tracked.
+        while len(self.audit_history) > self.max_history:
+            evicted = self.audit_history.popleft()
+            self._cumulative_history.popleft()
+            if self._high_risk_history and self._high_risk_history[0] is evicted:
+                self._high_risk_history.popleft()
     
     def _classify_risk_level(self, risk_score: float) -> RiskLevel:
         """
@@ -325,16 +497,7 @@ class PiNetworkEthicalGuardian:
             Count of recent payments
         """
         # In production, query actual payment database
-        # For now, return simulated count based on audit history
-        cutoff_time = time.time() - 3600  # Last hour
-        
-        count = sum(
-            1 for audit in self.audit_history
-            if audit.transaction_id.startswith("pi_pay_") and
-            audit.audited_at > cutoff_time
-        )
-        
-        return count
+        return self._payment_activity.count(user_id)
     
     def _get_user_recent_auth_count(self, user_id: str) -> int:
         """
@@ -347,15 +510,7 @@ class PiNetworkEthicalGuardian:
             Count of recent authentications
         """
         # In production, query actual auth database
-        cutoff_time = time.time() - 3600  # Last hour
-        
-        count = sum(
-            1 for audit in self.audit_history
-            if f"auth_{user_id}" in audit.transaction_id and
-            audit.audited_at > cutoff_time
-        )
-        
-        return count
+        return self._auth_activity.count(user_id)
 
 
 # Global instance for application use
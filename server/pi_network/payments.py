@@ -6,6 +6,8 @@ Handles payment processing, verification, and tracking
 import time
 import hashlib
 import logging
+from decimal import Decimal
+from itertools import islice
 from typing import Optional, Dict, Any, List
 from enum import Enum
 from dataclasses import dataclass, asdict
@@ -13,6 +15,7 @@ from datetime import datetime
 
 from .config import PiNetworkConfig
 from .exceptions import PiPaymentError
+from .storage import PiStateStore, InMemoryStateStore, PAYMENTS
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +62,17 @@ class PiPayment:
             self.updated_at = self.created_at
         if self.metadata is None:
             self.metadata = {}
+    
+    def to_record(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable storage record"""
+        record = asdict(self)
+        record["status"] = self.status.value
+        return record
+    
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "PiPayment":
+        """Rebuild a payment from a storage record"""
+        return cls(**{**record, "status": PaymentStatus(record["status"])})
 
 
 class PiPaymentManager:
@@ -70,18 +84,55 @@ class PiPaymentManager:
     - Payment verification and completion
     - Payment status tracking
     - Transaction history
+    
+    Statistics are kept as running counters and each user's payments are
+    indexed by status in creation order, so both are maintained in O(1)
+    (amortized) per state transition instead of rescanning all payments.
+    
+    Payments are persisted through a state store. Changes flushed by other
+    workers sharing the store are pulled in at most every ``sync_interval``
+    seconds, and unknown payment IDs are read through from the store.
     """
     
-    def __init__(self, config: PiNetworkConfig):
+    def __init__(
+        self,
+        config: PiNetworkConfig,
+        store: Optional[PiStateStore] = None,
+        sync_interval: float = 0.5
+    ):
         """
         Initialize Pi Payment Manager
         
         Args:
             config: Pi Network configuration
+            store: State store for payment persistence (defaults to in-memory)
+            sync_interval: Minimum seconds between pulls of external changes
         """
         self.config = config
+        self._store = store or InMemoryStateStore()
+        self.sync_interval = sync_interval
         self._payments: Dict[str, PiPayment] = {}
         self._user_payments: Dict[str, List[str]] = {}
+        
+        # Secondary index: user -> status -> payment ids (an ordered set, in
+        # the order payments entered the status)
+        self._user_status_index: Dict[str, Dict[PaymentStatus, Dict[str, None]]] = {}
+        self._next_sequence = 0
+        
+        # Running statistics maintained on every state transition
+        self._status_counts: Dict[PaymentStatus, int] = {status: 0 for status in PaymentStatus}
+        self._completed_volume = Decimal("0")
+        
+        # Read the cursor before loading so nothing written in between is missed
+        self._sync_cursor = self._store.current_cursor()
+        self._last_sync = time.monotonic()
+        stored = sorted(
+            self._store.load(PAYMENTS).values(),
+            key=lambda record: record["created_at"]
+        )
+        for record in stored:
+            self._apply_record(record)
+        
         logger.info(f"PiPaymentManager initialized for {config.network}")
     
     def create_payment(
@@ -129,12 +180,8 @@ class PiPaymentManager:
         )
         
         # Store payment
-        self._payments[payment_id] = payment
-        
-        # Track user payments
-        if user_id not in self._user_payments:
-            self._user_payments[user_id] = []
-        self._user_payments[user_id].append(payment_id)
+        self._register(payment)
+        self._persist(payment)
         
         logger.info(f"Payment created: {payment_id} for {amount} Pi (user: {user_id})")
         
@@ -153,7 +200,7 @@ class PiPaymentManager:
         Raises:
             PiPaymentError: If payment not found or cannot be approved
         """
-        payment = self._payments.get(payment_id)
+        payment = self._lookup(payment_id)
         
         if not payment:
             raise PiPaymentError(
@@ -167,8 +214,9 @@ class PiPaymentManager:
                 details={"payment_id": payment_id, "status": payment.status}
             )
         
-        payment.status = PaymentStatus.APPROVED
+        self._transition(payment, PaymentStatus.APPROVED)
         payment.updated_at = time.time()
+        self._persist(payment)
         
         logger.info(f"Payment approved: {payment_id}")
         
@@ -192,7 +240,7 @@ class PiPaymentManager:
         Raises:
             PiPaymentError: If payment cannot be completed
         """
-        payment = self._payments.get(payment_id)
+        payment = self._lookup(payment_id)
         
         if not payment:
             raise PiPaymentError(
@@ -206,9 +254,10 @@ class PiPaymentManager:
                 details={"payment_id": payment_id, "status": payment.status}
             )
         
-        payment.status = PaymentStatus.COMPLETED
+        self._transition(payment, PaymentStatus.COMPLETED)
         payment.tx_hash = tx_hash
         payment.updated_at = time.time()
+        self._persist(payment)
         
         logger.info(f"Payment completed: {payment_id} (tx: {tx_hash})")
         
@@ -228,7 +277,7 @@ class PiPaymentManager:
         Raises:
             PiPaymentError: If payment cannot be cancelled
         """
-        payment = self._payments.get(payment_id)
+        payment = self._lookup(payment_id)
         
         if not payment:
             raise PiPaymentError(
@@ -242,10 +291,11 @@ class PiPaymentManager:
                 details={"payment_id": payment_id}
             )
         
-        payment.status = PaymentStatus.CANCELLED
+        self._transition(payment, PaymentStatus.CANCELLED)
         payment.updated_at = time.time()
         if reason:
             payment.metadata["cancellation_reason"] = reason
+        self._persist(payment)
         
         logger.info(f"Payment cancelled: {payment_id}")
         
@@ -261,7 +311,7 @@ class PiPaymentManager:
         Returns:
             Payment record if found, None otherwise
         """
-        return self._payments.get(payment_id)
+        return self._lookup(payment_id)
     
     def get_user_payments(
         self,
@@ -278,18 +328,20 @@ class PiPaymentManager:
             limit: Maximum number of payments to return
             
         Returns:
-            List of payment records
+            List of payment records, newest first: by creation, or with a
+            status filter by when they entered that status
         """
-        payment_ids = self._user_payments.get(user_id, [])
-        payments = [self._payments[pid] for pid in payment_ids if pid in self._payments]
+        limit = max(limit, 0)
+        self._sync()
         
-        # Filter by status if specified
+        # Both lists are kept in insertion order, so newest-first is a
+        # reverse walk that stops at the limit
         if status:
-            payments = [p for p in payments if p.status == status]
+            newest = reversed(self._user_status_index.get(user_id, {}).get(status, {}))
+        else:
+            newest = reversed(self._user_payments.get(user_id, []))
         
-        # Sort by creation time (newest first) and limit
-        payments.sort(key=lambda p: p.created_at, reverse=True)
-        return payments[:limit]
+        return [self._payments[pid] for pid in islice(newest, limit)]
     
     def verify_payment(self, payment_id: str, tx_hash: str) -> Dict[str, Any]:
         """
@@ -348,27 +400,134 @@ class PiPaymentManager:
         Returns:
             Payment statistics summary
         """
-        total_payments = len(self._payments)
-        
-        status_counts = {}
-        for status in PaymentStatus:
-            status_counts[status.value] = sum(
-                1 for p in self._payments.values() if p.status == status
-            )
-        
-        total_volume = sum(
-            p.amount for p in self._payments.values()
-            if p.status == PaymentStatus.COMPLETED
-        )
+        self._sync()
+        status_counts = {
+            status.value: count for status, count in self._status_counts.items()
+        }
         
         return {
-            "total_payments": total_payments,
+            "total_payments": len(self._payments),
             "status_breakdown": status_counts,
-            "completed_volume_pi": round(total_volume, 7),
+            "completed_volume_pi": round(float(self._completed_volume), 7),
             "unique_users": len(self._user_payments),
             "timestamp": time.time()
         }
     
+    def flush(self) -> int:
+        """
+        Flush buffered payment changes to the state store
+        
+        Returns:
+            Number of records written
+        """
+        return self._store.flush()
+    
+    def _lookup(self, payment_id: str) -> Optional[PiPayment]:
+        """
+        Find a payment locally, falling back to the state store
+        
+        Args:
+            payment_id: Payment identifier
+            
+        Returns:
+            Payment record if found, None otherwise
+        """
+        self._sync()
+        payment = self._payments.get(payment_id)
+        if payment is None:
+            record = self._store.get(PAYMENTS, payment_id)
+            if record is not None:
+                payment = self._apply_record(record)
+        return payment
+    
+    def _sync(self) -> None:
+        """Apply payment changes flushed by other workers since the last sync"""
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+        
+        changes, self._sync_cursor = self._store.changes_since(PAYMENTS, self._sync_cursor)
+        for payment_id, record in changes.items():
+            # Our own unflushed change is newer than anything in the store
+            if record is None or self._store.is_pending(PAYMENTS, payment_id):
+                continue
+            self._apply_record(record)
+    
+    def _apply_record(self, record: Dict[str, Any]) -> PiPayment:
+        """
+        Merge a stored payment record into local state and indexes
+        
+        Args:
+            record: Payment storage record
+            
+        Returns:
+            Local payment record
+        """
+        stored = PiPayment.from_record(record)
+        payment = self._payments.get(stored.payment_id)
+        if payment is None:
+            self._register(stored)
+            return stored
+        
+        self._transition(payment, stored.status)
+        payment.tx_hash = stored.tx_hash
+        payment.updated_at = stored.updated_at
+        payment.metadata = stored.metadata
+        return payment
+    
+    def _register(self, payment: PiPayment) -> None:
+        """Add a new payment to local state, counters and indexes"""
+        self._payments[payment.payment_id] = payment
+        
+        # Track user payments
+        if payment.user_id not in self._user_payments:
+            self._user_payments[payment.user_id] = []
+            self._user_status_index[payment.user_id] = {}
+        self._user_payments[payment.user_id].append(payment.payment_id)
+        
+        self._next_sequence += 1
+        self._status_counts[payment.status] += 1
+        if payment.status == PaymentStatus.COMPLETED:
+            self._completed_volume += Decimal(str(payment.amount))
+        self._index_add(payment)
+    
+    def _persist(self, payment: PiPayment) -> None:
+        """Hand the current payment state to the state store"""
+        self._store.put(PAYMENTS, payment.payment_id, payment.to_record())
+    
+    def _transition(self, payment: PiPayment, new_status: PaymentStatus) -> None:
+        """
+        Move a payment to a new status, updating counters and indexes
+        
+        Args:
+            payment: Payment record to update
+            new_status: Target payment status
+        """
+        old_status = payment.status
+        if old_status == new_status:
+            return
+        
+        self._index_remove(payment)
+        self._status_counts[old_status] -= 1
+        if old_status == PaymentStatus.COMPLETED:
+            self._completed_volume -= Decimal(str(payment.amount))
+        
+        payment.status = new_status
+        
+        self._index_add(payment)
+        self._status_counts[new_status] += 1
+        if new_status == PaymentStatus.COMPLETED:
+            self._completed_volume += Decimal(str(payment.amount))
+    
+    def _index_add(self, payment: PiPayment) -> None:
+        """Insert a payment into its user's status index"""
+        self._user_status_index[payment.user_id].setdefault(payment.status, {})[payment.payment_id] = None
+    
+    def _index_remove(self, payment: PiPayment) -> None:
+        """Remove a payment from its user's status index"""
+        self._user_status_index[payment.user_id][payment.status].pop(payment.payment_id, None)
+    
     def _generate_payment_id(self, user_id: str, amount: float) -> str:
         """
         Generate unique payment ID
@@ -380,6 +539,6 @@ class PiPaymentManager:
         Returns:
             Payment identifier
         """
-        data = f"{user_id}{amount}{time.time()}{self.config.app_id}"
+        data = f"{user_id}{amount}{time.time()}{self.config.app_id}{self._next_sequence}"
         hash_val = hashlib.sha256(data.encode()).hexdigest()
         return f"pi_pay_{hash_val[:16]}"
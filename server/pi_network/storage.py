@@ -0,0 +1,411 @@
+"""
+Pi Network State Storage
+Pluggable persistence for payment and session state
+
+Managers keep their working set in process memory and hand every change to
+a state store. The in-memory store keeps the historical single-process
+behaviour; the SQLite store persists state in WAL mode so it survives
+restarts and can be shared by several uvicorn workers on one host.
+
+SQLite writes are write-behind: changes are coalesced per key in a pending
+buffer and flushed in batches by a background thread, so the request path
+only pays for a dict assignment.
+"""
+
+import json
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from .exceptions import PiConfigurationError
+
+logger = logging.getLogger(__name__)
+
+# Record namespaces used by the managers
+PAYMENTS = "payments"
+SESSIONS = "sessions"
+
+Record = Dict[str, Any]
+
+
+class PiStateStore(ABC):
+    """
+    Storage backend interface for Pi Network manager state
+    
+    Records are JSON-serializable dictionaries grouped by namespace and
+    keyed by identifier. Deleting a key is visible to other processes via
+    ``changes_since`` until tombstones are compacted.
+    """
+    
+    @abstractmethod
+    def put(self, namespace: str, key: str, record: Record) -> None:
+        """Insert or replace a record"""
+    
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        """Delete a record"""
+    
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Record]:
+        """Fetch a single record, or None if it does not exist"""
+    
+    @abstractmethod
+    def load(self, namespace: str) -> Dict[str, Record]:
+        """Fetch every live record in a namespace"""
+    
+    def current_cursor(self) -> int:
+        """Change cursor to start ``changes_since`` from"""
+        return 0
+    
+    def changes_since(
+        self,
+        namespace: str,
+        cursor: int
+    ) -> Tuple[Dict[str, Optional[Record]], int]:
+        """
+        Fetch records changed by any process after a cursor
+        
+        Args:
+            namespace: Record namespace
+            cursor: Cursor returned by a previous call or ``current_cursor``
+            
+        Returns:
+            Tuple of changed records (None for deletions) and the new cursor
+        """
+        return {}, cursor
+    
+    def is_pending(self, namespace: str, key: str) -> bool:
+        """Check whether a local change to a key has not been flushed yet"""
+        return False
+    
+    def flush(self) -> int:
+        """
+        Write buffered changes to the backend
+        
+        Returns:
+            Number of records written
+        """
+        return 0
+    
+    def close(self) -> None:
+        """Flush outstanding changes and release resources"""
+        self.flush()
+
+
+class InMemoryStateStore(PiStateStore):
+    """
+    Process-local state store
+    
+    State lives only as long as the process, which matches the behaviour
+    of the managers before storage backends were introduced.
+    """
+    
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Record]] = {}
+    
+    def put(self, namespace: str, key: str, record: Record) -> None:
+        self._records.setdefault(namespace, {})[key] = record
+    
+    def delete(self, namespace: str, key: str) -> None:
+        self._records.get(namespace, {}).pop(key, None)
+    
+    def get(self, namespace: str, key: str) -> Optional[Record]:
+        return self._records.get(namespace, {}).get(key)
+    
+    def load(self, namespace: str) -> Dict[str, Record]:
+        return dict(self._records.get(namespace, {}))
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pi_state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT,
+    seq INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_pi_state_seq ON pi_state (namespace, seq);
+CREATE TABLE IF NOT EXISTS pi_state_sequence (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO pi_state_sequence (id, value) VALUES (1, 0);
+"""
+
+_SQLITE_UPSERT = """
+INSERT INTO pi_state (namespace, key, data, seq, updated_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (namespace, key) DO UPDATE SET
+    data = excluded.data,
+    seq = excluded.seq,
+    updated_at = excluded.updated_at
+"""
+
+
+class SQLiteStateStore(PiStateStore):
+    """
+    SQLite (WAL mode) state store with write-behind batching
+    
+    Every flushed row is stamped with a database-wide sequence number so
+    other workers sharing the file can pull just the rows that changed.
+    Deletions are written as tombstones (``data IS NULL``) and compacted
+    after ``tombstone_ttl`` seconds.
+    
+    Changes become visible to other processes after the next flush, which
+    happens every ``flush_interval`` seconds or as soon as ``batch_size``
+    keys are pending.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 256,
+        flush_interval: float = 0.25,
+        tombstone_ttl: float = 3600
+    ):
+        """
+        Initialize SQLite state store
+        
+        Args:
+            path: Database file path
+            batch_size: Pending keys that trigger an early flush
+            flush_interval: Maximum seconds a change stays buffered
+            tombstone_ttl: Seconds deletion markers are kept for other workers
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.tombstone_ttl = tombstone_ttl
+        
+        self._pending: Dict[Tuple[str, str], Optional[Record]] = {}
+        self._inflight: Dict[Tuple[str, str], Optional[Record]] = {}
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        
+        self._writer = self._connect()
+        self._writer.executescript(_SQLITE_SCHEMA)
+        self._reader = self._connect()
+        
+        self._closed = False
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name="pi-state-flusher",
+            daemon=True
+        )
+        self._flusher.start()
+        atexit.register(self.close)
+        
+        logger.info(f"SQLiteStateStore opened at {path}")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode with WAL enabled"""
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def put(self, namespace: str, key: str, record: Record) -> None:
+        self._buffer(namespace, key, record)
+    
+    def delete(self, namespace: str, key: str) -> None:
+        self._buffer(namespace, key, None)
+    
+    def _buffer(self, namespace: str, key: str, record: Optional[Record]) -> None:
+        """Coalesce a change into the pending buffer"""
+        with self._buffer_lock:
+            self._pending[(namespace, key)] = record
+            backlog = len(self._pending)
+        
+        if backlog >= self.batch_size:
+            self._wake.set()
+    
+    def get(self, namespace: str, key: str) -> Optional[Record]:
+        with self._buffer_lock:
+            for buffer in (self._pending, self._inflight):
+                if (namespace, key) in buffer:
+                    return buffer[(namespace, key)]
+        
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT data FROM pi_state WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+    
+    def load(self, namespace: str) -> Dict[str, Record]:
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT key, data FROM pi_state "
+                "WHERE namespace = ? AND data IS NOT NULL ORDER BY seq",
+                (namespace,)
+            ).fetchall()
+        
+        records = {key: json.loads(data) for key, data in rows}
+        
+        # Local changes not flushed yet win over the database
+        with self._buffer_lock:
+            for buffer in (self._inflight, self._pending):
+                for (ns, key), record in buffer.items():
+                    if ns != namespace:
+                        continue
+                    if record is None:
+                        records.pop(key, None)
+                    else:
+                        records[key] = record
+        
+        return records
+    
+    def current_cursor(self) -> int:
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT value FROM pi_state_sequence WHERE id = 1"
+            ).fetchone()
+        return row[0] if row else 0
+    
+    def changes_since(
+        self,
+        namespace: str,
+        cursor: int
+    ) -> Tuple[Dict[str, Optional[Record]], int]:
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT key, data, seq FROM pi_state "
+                "WHERE namespace = ? AND seq > ? ORDER BY seq",
+                (namespace, cursor)
+            ).fetchall()
+        
+        changes: Dict[str, Optional[Record]] = {}
+        for key, data, seq in rows:
+            changes[key] = None if data is None else json.loads(data)
+            cursor = seq
+        
+        return changes, cursor
+    
+    def is_pending(self, namespace: str, key: str) -> bool:
+        with self._buffer_lock:
+            return (namespace, key) in self._pending or (namespace, key) in self._inflight
+    
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._buffer_lock:
+                if not self._pending:
+                    return 0
+                self._inflight, self._pending = self._pending, {}
+                batch = self._inflight
+            
+            try:
+                self._write_batch(batch)
+            except sqlite3.Error:
+                # Put the batch back unless newer changes superseded it
+                with self._buffer_lock:
+                    for key, record in batch.items():
+                        self._pending.setdefault(key, record)
+                raise
+            finally:
+                with self._buffer_lock:
+                    self._inflight = {}
+        
+        return len(batch)
+    
+    def _write_batch(self, batch: Dict[Tuple[str, str], Optional[Record]]) -> None:
+        """Write a coalesced batch in a single IMMEDIATE transaction"""
+        now = time.time()
+        conn = self._writer
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            seq = conn.execute(
+                "SELECT value FROM pi_state_sequence WHERE id = 1"
+            ).fetchone()[0]
+            
+            rows = []
+            for (namespace, key), record in batch.items():
+                seq += 1
+                data = None if record is None else json.dumps(record, separators=(",", ":"))
+                rows.append((namespace, key, data, seq, now))
+            
+            conn.executemany(_SQLITE_UPSERT, rows)
+            conn.execute("UPDATE pi_state_sequence SET value = ? WHERE id = 1", (seq,))
+            conn.execute(
+                "DELETE FROM pi_state WHERE data IS NULL AND updated_at < ?",
+                (now - self.tombstone_ttl,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _flush_loop(self) -> None:
+        """Background flusher: runs every flush_interval or when woken"""
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"State store flush failed: {e}")
+    
+    def close(self) -> None:
+        if self._closed:
+            return
+        
+        self._closed = True
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        
+        try:
+            self.flush()
+        finally:
+            with self._flush_lock:
+                self._writer.close()
+            with self._read_lock:
+                self._reader.close()
+            atexit.unregister(self.close)
+            logger.info(f"SQLiteStateStore closed at {self.path}")
+
+
+def create_state_store(url: str) -> PiStateStore:
+    """
+    Create a state store from a URL
+    
+    Supported forms:
+        ``memory`` (or empty) - process-local in-memory store
+        ``sqlite:///path/to/state.db`` - SQLite store in WAL mode
+        
+    Args:
+        url: State store URL
+        
+    Returns:
+        Configured state store
+        
+    Raises:
+        PiConfigurationError: If the URL scheme is not supported
+    """
+    if not url or url == "memory":
+        return InMemoryStateStore()
+    
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        if not path:
+            raise PiConfigurationError("SQLite state store URL requires a file path")
+        return SQLiteStateStore(path)
+    
+    raise PiConfigurationError(
+        f"Unsupported state store URL: {url}. Use 'memory' or 'sqlite:///path'"
+    )
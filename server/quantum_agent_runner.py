@@ -20,25 +20,46 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 
+from concurrent_query_runner import (DEFAULT_COMPONENT_CONCURRENCY,
+                                     DEFAULT_REQUEST_TIMEOUT, DEFAULT_RETRIES,
+                                     ConcurrentQueryRunner,
+                                     create_pooled_session)
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SacredTrinityAgentRunner:
     """🤖 Automated response collection for Sacred Trinity evaluation"""
     
-    def __init__(self):
+    def __init__(self, concurrency: Optional[Dict[str, int]] = None,
+                 default_concurrency: int = DEFAULT_COMPONENT_CONCURRENCY,
+                 timeout: float = DEFAULT_REQUEST_TIMEOUT, retries: int = DEFAULT_RETRIES):
+        """
+        Initialize runner
+        
+        Args:
+            concurrency: Per-component limits on queries in flight
+            default_concurrency: Limit for components not listed
+            timeout: Timeout per query attempt in seconds
+            retries: Retries (with jittered backoff) after a failed attempt
+        """
         self.trinity_endpoints = {
             "fastapi": "http://localhost:8000",
             "flask": "http://localhost:5000", 
             "gradio": "http://localhost:7860"
         }
+        self.concurrency = concurrency
+        self.default_concurrency = default_concurrency
+        self.timeout = timeout
+        self.retries = retries
         self.session = None
         self.collected_responses = []
         self.health_status = {}
+        self.last_report: Optional[Dict[str, Any]] = None
         
     async def __aenter__(self):
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession()
+        self.session = create_pooled_session(self.concurrency, self.default_concurrency, self.timeout)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -46,27 +67,34 @@ class SacredTrinityAgentRunner:
         if self.session:
             await self.session.close()
     
-    async def run_comprehensive_collection(self, test_queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Run comprehensive response collection across Sacred Trinity"""
+    async def run_comprehensive_collection(self, test_queries: List[Dict[str, Any]],
+                                           output_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Run comprehensive response collection across Sacred Trinity
+        
+        Queries run concurrently within the per-component limits. Responses
+        are collected in the order of test_queries (each is held until the
+        queries before it have finished) and, with output_path, streamed to
+        a JSONL file in that order.
+        """
         logger.info("🌌 Initiating Sacred Trinity Response Collection...")
         
         # First check health of all components
         await self.check_trinity_health()
         
-        # Collect responses for each test query
-        for query_data in test_queries:
-            try:
-                response_data = await self.collect_component_response(query_data)
-                self.collected_responses.append(response_data)
-                
-                # Add small delay between requests
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(f"Failed to collect response for {query_data.get('test_id', 'unknown')}: {e}")
-                # Add error response to maintain dataset consistency
-                error_response = self._create_error_response(query_data, str(e))
-                self.collected_responses.append(error_response)
+        runner = ConcurrentQueryRunner(
+            self.collect_component_response,
+            on_error=lambda query_data, e: self._create_error_response(query_data, str(e)),
+            concurrency=self.concurrency,
+            default_concurrency=self.default_concurrency,
+            timeout=self.timeout,
+            retries=self.retries,
+            # Collectors report connection failures instead of raising
+            retry_if=lambda response: response["response_metadata"]["response_status"] == "failed"
+        )
+        self.last_report = await runner.run(
+            test_queries, output_path=output_path, on_result=self.collected_responses.append, ordered=True
+        )
         
         logger.info(f"✅ Collected {len(self.collected_responses)} responses from Sacred Trinity")
         return self.collected_responses
@@ -471,6 +499,7 @@ class SacredTrinityAgentRunner:
             "success_rate": successful_responses / total_responses if total_responses > 0 else 0,
             "component_breakdown": component_stats,
             "trinity_health": self.health_status,
+            "component_latency": self.last_report["components"] if self.last_report else {},
             "collection_timestamp": datetime.utcnow().isoformat()
         }
 
@@ -0,0 +1,367 @@
+"""
+Rate Limiting
+Fixed-memory GCRA rate limiter with per-route limit classes.
+
+Provides:
+- Generic Cell Rate Algorithm (GCRA): one float per client and limit class,
+  O(1) per request, no per-request timestamp lists
+- Route classes matched by longest path prefix (auth, payments, ...)
+- Sharded in-memory backend with incremental expiry sweeps
+- Optional SQLite backend so limits hold across uvicorn workers on one host,
+  checked off the event loop and failing open when the file stays locked
+"""
+
+import asyncio
+import logging
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """A named limit class: ``requests_per_minute`` with up to ``burst`` at once"""
+    name: str
+    requests_per_minute: int
+    burst: Optional[int] = None
+    # Derived GCRA parameters, precomputed because they are read per request
+    emission_interval: float = field(init=False, repr=False, compare=False)
+    tolerance: float = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        burst = self.burst if self.burst is not None else self.requests_per_minute
+        emission_interval = 60.0 / self.requests_per_minute
+        object.__setattr__(self, "emission_interval", emission_interval)
+        object.__setattr__(self, "tolerance", emission_interval * (max(1, burst) - 1))
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """Outcome of a rate limit check"""
+    allowed: bool
+    rule: str
+    remaining: int
+    retry_after: float
+
+
+def _gcra(tat: Optional[float], now: float, rule: RateLimitRule) -> Tuple[bool, float, float]:
+    """
+    Apply GCRA to a stored theoretical arrival time
+    
+    Args:
+        tat: Stored theoretical arrival time, or None for an unseen client
+        now: Current time in seconds
+        rule: Limit class
+        
+    Returns:
+        Tuple of (allowed, new theoretical arrival time, retry after seconds)
+    """
+    tat = now if tat is None or tat < now else tat
+    
+    if tat - now > rule.tolerance:
+        return False, tat, tat - now - rule.tolerance
+    
+    return True, tat + rule.emission_interval, 0.0
+
+
+def _remaining(tat: float, now: float, rule: RateLimitRule) -> int:
+    """Requests still available immediately after a decision"""
+    return max(0, int(math.floor((rule.tolerance - (tat - now)) / rule.emission_interval)) + 1)
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for GCRA state
+    
+    Each key maps to a single theoretical arrival time. A key whose time has
+    passed is equivalent to a missing key, so backends may drop it freely.
+    """
+    
+    # True when acquire may wait on I/O or locks; async callers then run it
+    # in a worker thread instead of on the event loop
+    blocking = False
+    
+    @abstractmethod
+    def acquire(self, key: str, rule: RateLimitRule, now: float) -> Tuple[bool, float, float]:
+        """
+        Atomically run GCRA for a key and store the result
+        
+        Returns:
+            Tuple of (allowed, theoretical arrival time, retry after seconds)
+        """
+    
+    def __len__(self) -> int:
+        return 0
+    
+    def close(self) -> None:
+        """Release resources"""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local backend
+    
+    Keys are spread over ``shards`` dictionaries. Expired keys are swept one
+    shard at a time, so cleanup cost is spread across requests instead of
+    walking every client at once.
+    """
+    
+    def __init__(self, shards: int = 64, sweep_interval: float = 1.0):
+        """
+        Initialize in-memory backend
+        
+        Args:
+            shards: Number of independent key shards
+            sweep_interval: Seconds between incremental shard sweeps
+        """
+        self._shards: List[Dict[str, float]] = [{} for _ in range(shards)]
+        self._shard_count = shards
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self._sweep_shard = 0
+    
+    def _shard(self, key: str) -> Dict[str, float]:
+        return self._shards[hash(key) % self._shard_count]
+    
+    def acquire(self, key: str, rule: RateLimitRule, now: float) -> Tuple[bool, float, float]:
+        if now >= self._next_sweep:
+            self._sweep(now)
+        
+        shard = self._shard(key)
+        allowed, tat, retry_after = _gcra(shard.get(key), now, rule)
+        if allowed:
+            shard[key] = tat
+        return allowed, tat, retry_after
+    
+    def _sweep(self, now: float) -> None:
+        """Drop keys whose theoretical arrival time has passed in one shard"""
+        shard = self._shards[self._sweep_shard]
+        expired = [key for key, tat in shard.items() if tat <= now]
+        for key in expired:
+            del shard[key]
+        
+        self._sweep_shard = (self._sweep_shard + 1) % len(self._shards)
+        self._next_sweep = now + self.sweep_interval
+    
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    tat REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    SQLite (WAL mode) backend shared by every worker using the same file
+    
+    Each check is a single IMMEDIATE transaction, so concurrent workers see
+    a consistent theoretical arrival time per key. Expired rows are deleted
+    every ``sweep_interval`` seconds.
+    
+    A check waits at most ``busy_timeout`` seconds for another worker's
+    write lock. If the lock is still held, the request is allowed rather
+    than stalled: rate limiting fails open.
+    """
+    
+    blocking = True
+    
+    def __init__(self, path: str, sweep_interval: float = 60.0, busy_timeout: float = 0.5):
+        """
+        Initialize SQLite backend
+        
+        Args:
+            path: Database file path
+            sweep_interval: Seconds between expired row sweeps
+            busy_timeout: Seconds to wait for the write lock before failing open
+        """
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self.busy_timeout = busy_timeout
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+        
+        self._conn = sqlite3.connect(
+            path,
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.executescript(_SQLITE_SCHEMA)
+    
+    def acquire(self, key: str, rule: RateLimitRule, now: float) -> Tuple[bool, float, float]:
+        with self._lock:
+            conn = self._conn
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"⚠️ Rate limit store busy, allowing request for {key}: {e}")
+                return True, now, 0.0
+            try:
+                row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                allowed, tat, retry_after = _gcra(row[0] if row else None, now, rule)
+                if allowed:
+                    conn.execute(
+                        "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                        "ON CONFLICT (key) DO UPDATE SET tat = excluded.tat",
+                        (key, tat)
+                    )
+                if now >= self._next_sweep:
+                    conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                    self._next_sweep = now + self.sweep_interval
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        
+        return allowed, tat, retry_after
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_rate_limit_backend(url: str) -> RateLimitBackend:
+    """
+    Create a rate limit backend from a URL
+    
+    Supported forms:
+        ``memory`` (or empty) - process-local sharded backend
+        ``sqlite:///path/to/limits.db`` - SQLite backend shared across workers
+        
+    Args:
+        url: Backend URL
+        
+    Returns:
+        Configured backend
+        
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if not url or url == "memory":
+        return InMemoryRateLimitBackend()
+    
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        if not path:
+            raise ValueError("SQLite rate limit URL requires a file path")
+        return SQLiteRateLimitBackend(path)
+    
+    raise ValueError(f"Unsupported rate limit backend URL: {url}. Use 'memory' or 'sqlite:///path'")
+
+
+class RateLimiter:
+    """
+    GCRA rate limiter with per-route limit classes
+    
+    Each client is limited independently in every limit class. A request
+    is matched to the class with the longest route prefix, falling back to
+    the default class.
+    """
+    
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        routes: Optional[Sequence[Tuple[str, RateLimitRule]]] = None,
+        backend: Optional[RateLimitBackend] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize rate limiter
+        
+        Args:
+            requests_per_minute: Limit for the default class
+            routes: (path prefix, rule) pairs for per-route limit classes
+            backend: State backend, in-memory by default
+            clock: Time source; must be shared wall-clock time for shared backends
+        """
+        self.default_rule = RateLimitRule("default", requests_per_minute)
+        self.routes = sorted(routes or [], key=lambda route: len(route[0]), reverse=True)
+        self.backend = backend if backend is not None else InMemoryRateLimitBackend()
+        self.clock = clock
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def requests_per_minute(self) -> int:
+        return self.default_rule.requests_per_minute
+    
+    def rule_for(self, path: str) -> RateLimitRule:
+        """Find the limit class for a request path"""
+        for prefix, rule in self.routes:
+            if path.startswith(prefix):
+                return rule
+        return self.default_rule
+    
+    def check(self, client_id: str, path: str = "") -> RateLimitDecision:
+        """
+        Check and record a request
+        
+        Args:
+            client_id: Client identifier (usually the client IP)
+            path: Request path used to pick the limit class
+            
+        Returns:
+            Decision with remaining requests and retry delay
+        """
+        rule = self.rule_for(path)
+        now = self.clock()
+        allowed, tat, retry_after = self.backend.acquire(f"{rule.name}:{client_id}", rule, now)
+        
+        return RateLimitDecision(
+            allowed=allowed,
+            rule=rule.name,
+            remaining=_remaining(tat, now, rule) if allowed else 0,
+            retry_after=retry_after
+        )
+    
+    async def acheck(self, client_id: str, path: str = "") -> RateLimitDecision:
+        """
+        Check and record a request without blocking the event loop
+        
+        Blocking backends run in a dedicated worker thread, so a locked
+        shared store delays only the requests waiting on it.
+        
+        Args:
+            client_id: Client identifier (usually the client IP)
+            path: Request path used to pick the limit class
+            
+        Returns:
+            Decision with remaining requests and retry delay
+        """
+        if not self.backend.blocking:
+            return self.check(client_id, path)
+        
+        if self._executor is None:
+            # One thread: the backend serializes checks on its connection anyway
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-limit")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.check, client_id, path)
+    
+    def is_allowed(self, client_id: str, path: str = "") -> bool:
+        """Check if request is allowed for client"""
+        rule = self.rule_for(path) if self.routes else self.default_rule
+        return self.backend.acquire(f"{rule.name}:{client_id}", rule, self.clock())[0]
+    
+    def close(self) -> None:
+        """Stop the worker thread and release the backend"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.backend.close()
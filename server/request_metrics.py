@@ -0,0 +1,291 @@
+"""
+Request Metrics
+Fixed-memory request rate and latency tracking with Prometheus exposition.
+
+Provides:
+- Ring buffer of per-second request buckets for 1m/5m/15m rates
+- HDR-style latency histograms (log2 ranges split into linear sub-buckets)
+- Prometheus text exposition format (version 0.0.4) rendering
+
+Everything here is updated from the event loop thread without locks; each
+record is a handful of list/dict operations with no allocation on the hot
+path once a route has been seen.
+"""
+
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Sequence[Tuple[str, str]]
+
+
+class SlidingWindowCounter:
+    """
+    Per-second event counts over a fixed horizon
+    
+    Buckets are reused in a ring indexed by ``second % horizon``; a bucket
+    whose stamp is stale is reset on first use, so no sweep is ever needed.
+    """
+    
+    def __init__(self, horizon_seconds: int = 900):
+        """
+        Initialize counter
+        
+        Args:
+            horizon_seconds: Longest window that can be queried
+        """
+        self.horizon_seconds = horizon_seconds
+        self._counts: List[int] = [0] * horizon_seconds
+        self._stamps: List[int] = [-1] * horizon_seconds
+    
+    def record(self, now: Optional[float] = None, count: int = 1) -> None:
+        """Count events in the current second"""
+        second = int(time.time() if now is None else now)
+        index = second % self.horizon_seconds
+        if self._stamps[index] != second:
+            self._stamps[index] = second
+            self._counts[index] = count
+        else:
+            self._counts[index] += count
+    
+    def total(self, window_seconds: int, now: Optional[float] = None) -> int:
+        """
+        Count events in the trailing window, including the current second
+        
+        Args:
+            window_seconds: Window length, at most ``horizon_seconds``
+            now: Current time (defaults to wall clock)
+            
+        Returns:
+            Number of events recorded in the window
+        """
+        window_seconds = min(window_seconds, self.horizon_seconds)
+        current = int(time.time() if now is None else now)
+        oldest = current - window_seconds
+        return sum(
+            count for stamp, count in zip(self._stamps, self._counts)
+            if oldest < stamp <= current
+        )
+    
+    def rate(self, window_seconds: int, now: Optional[float] = None) -> float:
+        """Average events per second over the trailing window"""
+        return self.total(window_seconds, now) / min(window_seconds, self.horizon_seconds)
+    
+    def last_second(self, now: Optional[float] = None) -> int:
+        """Events in the previous whole second"""
+        second = int(time.time() if now is None else now) - 1
+        index = second % self.horizon_seconds
+        return self._counts[index] if self._stamps[index] == second else 0
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear latency histogram
+    
+    Each power-of-two range above ``min_value`` is split into
+    ``sub_buckets`` equal buckets, so relative error stays below
+    ``1 / sub_buckets`` at every magnitude with a fixed number of counters.
+    Values below ``min_value`` go into the first bucket, values above the
+    top of the range into the last.
+    """
+    
+    def __init__(
+        self,
+        min_value: float = 0.0001,
+        max_value: float = 60.0,
+        sub_buckets: int = 8
+    ):
+        """
+        Initialize histogram
+        
+        Args:
+            min_value: Smallest distinguished value in seconds
+            max_value: Largest distinguished value in seconds
+            sub_buckets: Linear buckets per power of two
+        """
+        self.min_value = min_value
+        self.sub_buckets = sub_buckets
+        self.ranges = max(1, math.ceil(math.log2(max_value / min_value)))
+        self.counts: List[int] = [0] * (self.ranges * sub_buckets + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def _index(self, value: float) -> int:
+        if value < self.min_value:
+            return 0
+        mantissa, exponent = math.frexp(value / self.min_value)
+        # mantissa is in [0.5, 1): map it linearly onto the sub-buckets of
+        # the power-of-two range selected by exponent
+        index = (exponent - 1) * self.sub_buckets + int((mantissa * 2 - 1) * self.sub_buckets)
+        return min(index, len(self.counts) - 1)
+    
+    def bucket_upper_bound(self, index: int) -> float:
+        """Upper bound of a bucket (infinity for the overflow bucket)"""
+        if index >= len(self.counts) - 1:
+            return math.inf
+        power, sub = divmod(index, self.sub_buckets)
+        return self.min_value * (2 ** power) * (1 + (sub + 1) / self.sub_buckets)
+    
+    def record(self, value: float) -> None:
+        """Record one observation"""
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.sum += value
+    
+    def percentile(self, pct: float) -> float:
+        """
+        Estimate a percentile from the buckets
+        
+        Args:
+            pct: Percentile between 0 and 100
+            
+        Returns:
+            Upper bound of the bucket holding the percentile, or 0.0 if empty
+        """
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.bucket_upper_bound(index), self.min_value * 2 ** self.ranges)
+        return self.min_value * 2 ** self.ranges
+    
+    def cumulative_buckets(self) -> List[Tuple[float, int]]:
+        """
+        Cumulative counts at power-of-two boundaries, as Prometheus ``le`` buckets
+        
+        Only the boundaries between power-of-two ranges are exposed so the
+        bucket set stays small and stable between scrapes.
+        
+        Returns:
+            List of (upper bound, cumulative count) ending with +Inf
+        """
+        buckets = []
+        running = 0
+        for index, count in enumerate(self.counts[:-1]):
+            running += count
+            if (index + 1) % self.sub_buckets == 0:
+                buckets.append((self.bucket_upper_bound(index), running))
+        buckets.append((math.inf, self.count))
+        return buckets
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class PrometheusExposition:
+    """Builder for Prometheus text exposition format"""
+    
+    def __init__(self):
+        self._lines: List[str] = []
+    
+    def metric(
+        self,
+        name: str,
+        metric_type: str,
+        help_text: str,
+        samples: Iterable[Tuple[Labels, float]]
+    ) -> "PrometheusExposition":
+        """
+        Add a metric family
+        
+        Args:
+            name: Metric name
+            metric_type: counter, gauge, histogram or untyped
+            help_text: HELP line text
+            samples: (labels, value) pairs
+            
+        Returns:
+            The builder, for chaining
+        """
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return self
+    
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        histograms: Iterable[Tuple[Labels, LatencyHistogram]]
+    ) -> "PrometheusExposition":
+        """Add a histogram family with _bucket, _sum and _count series"""
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in histograms:
+            for bound, count in histogram.cumulative_buckets():
+                le = "+Inf" if bound == math.inf else repr(bound)
+                self._lines.append(
+                    f"{name}_bucket{_format_labels(list(labels) + [('le', le)])} {count}"
+                )
+            self._lines.append(f"{name}_sum{_format_labels(labels)} {repr(histogram.sum)}")
+            self._lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return self
+    
+    def render(self) -> str:
+        """Render the exposition text"""
+        return "\n".join(self._lines) + "\n"
+
+
+class RequestMetrics:
+    """
+    HTTP request rates, status counts and per-route latency histograms
+    
+    Routes should be route templates (``/api/payments/{id}``) rather than raw
+    paths so the number of series stays bounded.
+    """
+    
+    WINDOWS = (("1m", 60), ("5m", 300), ("15m", 900))
+    
+    def __init__(self, horizon_seconds: int = 900):
+        self.requests = SlidingWindowCounter(horizon_seconds)
+        self.total_requests = 0
+        self.status_counts: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[str, LatencyHistogram] = {}
+    
+    def record_arrival(self, now: Optional[float] = None) -> None:
+        """Count a request as soon as it arrives"""
+        self.total_requests += 1
+        self.requests.record(now)
+    
+    def record_response(self, method: str, route: str, status_code: int, duration: float) -> None:
+        """
+        Record a completed request
+        
+        Args:
+            method: HTTP method
+            route: Route template
+            status_code: Response status code
+            duration: Handling time in seconds
+        """
+        key = (method, route, str(status_code))
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+        
+        histogram = self.latency.get(route)
+        if histogram is None:
+            histogram = self.latency[route] = LatencyHistogram()
+        histogram.record(duration)
+    
+    def rates(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Requests per second over each window"""
+        return {name: self.requests.rate(seconds, now) for name, seconds in self.WINDOWS}
@@ -5,12 +5,17 @@ Provides automated diagnostics, healing, and real-time incident reporting.
 
 import logging
 import time
-import psutil
 from typing import Dict, Any, List, Optional, Callable
 from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel, Field
 
+try:
+    from system_sampler import SystemSampler, get_system_sampler
+except ImportError:
+    # Imported as server.self_healing
+    from .system_sampler import SystemSampler, get_system_sampler
+
 logger = logging.getLogger(__name__)
 
 
@@ -58,8 +63,10 @@ class SelfHealingSystem:
     Self-sustaining support system with automated diagnostics and healing
     """
 
-    def __init__(self):
+    def __init__(self, sampler: Optional[SystemSampler] = None):
         self.incident_history: List[IncidentReport] = []
+        # Host stats come from the background sampler so checks never block
+        self.sampler = sampler or get_system_sampler()
         self.healing_actions: Dict[str, Callable] = {}
         self.diagnostic_checks: Dict[str, Callable] = {}
         self._register_default_checks()
@@ -117,7 +124,7 @@ class SelfHealingSystem:
 
     def _check_cpu_usage(self) -> DiagnosticResult:
         """Check CPU usage"""
-        cpu_percent = psutil.cpu_percent(interval=1)
+        cpu_percent = self.sampler.latest().cpu_percent
         threshold = 80.0
         
         if cpu_percent >= 90.0:
@@ -143,8 +150,7 @@ class SelfHealingSystem:
 
     def _check_memory_usage(self) -> DiagnosticResult:
         """Check memory usage"""
-        memory = psutil.virtual_memory()
-        percent = memory.percent
+        percent = self.sampler.latest().memory_percent
         threshold = 85.0
         
         if percent >= 95.0:
@@ -170,15 +176,7 @@ class SelfHealingSystem:
 
     def _check_disk_usage(self) -> DiagnosticResult:
         """Check disk usage"""
-        try:
-            # Use current working directory for cross-platform compatibility
-            import os
-            disk = psutil.disk_usage(os.getcwd())
-        except Exception:
-            # Fallback to root for Unix-like systems
-            disk = psutil.disk_usage('/')
-        
-        percent = disk.percent
+        percent = self.sampler.latest().disk_percent
         threshold = 90.0
         
         if percent >= 95.0:
@@ -205,10 +203,9 @@ class SelfHealingSystem:
     def _check_process_health(self) -> DiagnosticResult:
         """Check current process health"""
         try:
-            process = psutil.Process()
-            cpu_percent = process.cpu_percent(interval=0.1)
-            memory_info = process.memory_info()
-            memory_mb = memory_info.rss / (1024 * 1024)
+            snapshot = self.sampler.latest()
+            cpu_percent = snapshot.process_cpu_percent
+            memory_mb = snapshot.process_memory_mb
             
             # Check if process is consuming too much resources
             if cpu_percent > 80.0 or memory_mb > 1024:
@@ -0,0 +1,155 @@
+"""
+System Sampler
+Background collection of host and process statistics.
+
+A worker thread samples CPU, memory, disk and process stats every
+``interval`` seconds and publishes each result as an immutable
+``SystemSnapshot``. Readers (self-healing diagnostics, the performance
+monitoring agent) just take the latest reference, so nothing on the event
+loop ever waits on ``psutil.cpu_percent(interval=...)``.
+
+CPU percentages are measured without blocking: psutil reports usage since
+the previous call, so each sample covers the time since the one before.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """Host and process statistics at one point in time"""
+    timestamp: float
+    cpu_percent: float
+    memory_percent: float
+    memory_available_mb: float
+    disk_percent: float
+    disk_free_gb: float
+    process_cpu_percent: float
+    process_memory_mb: float
+    
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was taken"""
+        return time.time() - self.timestamp
+
+
+class SystemSampler:
+    """
+    Samples system statistics on its own cadence in a worker thread
+    
+    Until ``start`` is called (or if the thread is not running), ``latest``
+    takes a fresh sample inline when the last one is older than
+    ``interval``; that path is non-blocking too, just not free.
+    """
+    
+    def __init__(self, interval: float = 5.0, disk_path: Optional[str] = None):
+        """
+        Initialize sampler
+        
+        Args:
+            interval: Seconds between samples
+            disk_path: Path whose filesystem is reported (defaults to the
+                current working directory, falling back to /)
+        """
+        self.interval = interval
+        self.disk_path = disk_path
+        self._process = psutil.Process()
+        self._latest: Optional[SystemSnapshot] = None
+        self._sample_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        # Prime the CPU counters so the first sample covers time since now
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+    
+    def _disk_usage(self):
+        try:
+            # Use current working directory for cross-platform compatibility
+            return psutil.disk_usage(self.disk_path or os.getcwd())
+        except Exception:
+            # Fallback to root for Unix-like systems
+            return psutil.disk_usage('/')
+    
+    def sample(self) -> SystemSnapshot:
+        """Take a sample now and publish it"""
+        with self._sample_lock:
+            memory = psutil.virtual_memory()
+            disk = self._disk_usage()
+            snapshot = SystemSnapshot(
+                timestamp=time.time(),
+                cpu_percent=psutil.cpu_percent(interval=None),
+                memory_percent=memory.percent,
+                memory_available_mb=memory.available / (1024 * 1024),
+                disk_percent=disk.percent,
+                disk_free_gb=disk.free / (1024 * 1024 * 1024),
+                process_cpu_percent=self._process.cpu_percent(interval=None),
+                process_memory_mb=self._process.memory_info().rss / (1024 * 1024)
+            )
+            self._latest = snapshot
+        return snapshot
+    
+    def latest(self) -> SystemSnapshot:
+        """
+        Latest published snapshot
+        
+        Returns:
+            The snapshot from the worker thread, or a fresh one taken inline
+            if the worker is not running and the last sample is stale
+        """
+        snapshot = self._latest
+        if snapshot is None or (snapshot.age >= self.interval and not self.running):
+            snapshot = self.sample()
+        return snapshot
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                # Keep serving the previous snapshot
+                logger.error(f"System sampling failed: {e}")
+    
+    def start(self) -> None:
+        """Start sampling in a daemon thread"""
+        if self.running:
+            return
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"✅ System sampler started (every {self.interval}s)")
+    
+    def stop(self) -> None:
+        """Stop the worker thread"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        logger.info("🛑 System sampler stopped")
+
+
+# Global sampler instance
+_system_sampler: Optional[SystemSampler] = None
+
+
+def get_system_sampler() -> SystemSampler:
+    """Get or create the global system sampler"""
+    global _system_sampler
+    if _system_sampler is None:
+        _system_sampler = SystemSampler(float(os.environ.get("SYSTEM_SAMPLE_INTERVAL", "5.0")))
+    return _system_sampler
@@ -0,0 +1,424 @@
+"""
+Monitoring Time-Series Store
+Compact columnar storage for monitoring agent samples.
+
+Provides:
+- Fixed-capacity ring per series: a timestamp array plus one float array
+  per numeric field, and the JSON-ready record of each sample
+- Automatic 1m and 1h rollups (count/min/max/mean/last per field),
+  maintained incrementally on append
+- Range queries over raw samples or rollups by binary search on time
+- Optional append-only JSONL segment files, replayed on startup so
+  history survives restarts
+
+Samples are appended from the event loop thread in time order, so
+nothing here takes locks.
+"""
+
+import json
+import logging
+import os
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+
+# Resolution name -> (bucket width in seconds, buckets kept)
+ROLLUPS = {
+    "1m": (60, 24 * 60),
+    "1h": (3600, 30 * 24)
+}
+
+ROLLUP_STATS = ("count", "min", "max", "mean", "last")
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def numeric_fields(value: Any) -> Dict[str, float]:
+    """
+    Numeric fields of a sample value
+    
+    Top-level int/float entries of a dict value are columns; a bare number
+    is stored as the "value" column. Booleans, strings and nested objects
+    only live in the stored record.
+    """
+    if isinstance(value, dict):
+        return {
+            name: float(v) for name, v in value.items()
+            if isinstance(v, (int, float)) and not isinstance(v, bool)
+        }
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {"value": float(value)}
+    return {}
+
+
+def _json_float(value: float) -> Optional[float]:
+    """NaN (missing) as None so query results are valid JSON"""
+    return None if value != value else value
+
+
+class ColumnarRing:
+    """
+    Fixed-capacity ring of timestamped rows stored column by column
+    
+    Columns are ``array('d')`` of the ring's capacity; a column that first
+    appears after rows were written is back-filled with NaN. Rows must be
+    pushed in non-decreasing time order so ranges can be binary searched.
+    """
+    
+    def __init__(self, capacity: int, keep_records: bool = False):
+        """
+        Initialize ring
+        
+        Args:
+            capacity: Number of rows kept
+            keep_records: Also keep an arbitrary object per row
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.timestamps = array("d", [0.0]) * capacity
+        self.columns: Dict[Any, array] = {}
+        self.records: Optional[List[Any]] = [None] * capacity if keep_records else None
+        self._next = 0
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def _slot(self, position: int) -> int:
+        """Physical slot of the row at a logical position (0 is the oldest)"""
+        return (self._next - self._size + position) % self.capacity
+    
+    def push(self, timestamp: float, values: Dict[Any, float], record: Any = None) -> None:
+        """Append a row, overwriting the oldest one when full"""
+        slot = self._next
+        self.timestamps[slot] = timestamp
+        for name, column in self.columns.items():
+            column[slot] = values.get(name, NAN)
+        for name in values.keys() - self.columns.keys():
+            column = array("d", [NAN]) * self.capacity
+            column[slot] = values[name]
+            self.columns[name] = column
+        if self.records is not None:
+            self.records[slot] = record
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+    
+    def _bisect(self, timestamp: float, right: bool) -> int:
+        """Logical position of the first row after (or at, unless right) timestamp"""
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            stamp = self.timestamps[self._slot(middle)]
+            if stamp < timestamp or (right and stamp == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def slots(self, start: Optional[float] = None, end: Optional[float] = None) -> List[int]:
+        """
+        Physical slots of rows with start <= timestamp <= end, oldest first
+        
+        Args:
+            start: Inclusive lower bound (None for the oldest row)
+            end: Inclusive upper bound (None for the newest row)
+            
+        Returns:
+            Slot indexes into timestamps, columns and records
+        """
+        first = 0 if start is None else self._bisect(start, right=False)
+        last = self._size if end is None else self._bisect(end, right=True)
+        return [self._slot(position) for position in range(first, last)]
+    
+    def latest_records(self, limit: int) -> List[Any]:
+        """The last limit records, oldest first"""
+        count = min(max(limit, 0), self._size)
+        return [self.records[self._slot(position)] for position in range(self._size - count, self._size)]
+
+
+class _Rollup:
+    """Open bucket and closed-bucket ring for one series at one resolution"""
+    
+    def __init__(self, width: int, capacity: int):
+        self.width = width
+        self.ring = ColumnarRing(capacity)
+        self.start: Optional[float] = None
+        # Field -> [count, min, max, sum, last]
+        self.fields: Dict[str, List[float]] = {}
+    
+    def add(self, timestamp: float, values: Dict[str, float]) -> None:
+        start = timestamp - timestamp % self.width
+        if self.start is None:
+            self.start = start
+        elif start > self.start:
+            self.close()
+            self.start = start
+        # Late samples fold into the open bucket
+        for name, value in values.items():
+            stats = self.fields.get(name)
+            if stats is None:
+                self.fields[name] = [1, value, value, value, value]
+            else:
+                stats[0] += 1
+                if value < stats[1]:
+                    stats[1] = value
+                if value > stats[2]:
+                    stats[2] = value
+                stats[3] += value
+                stats[4] = value
+    
+    def _row(self) -> Dict[Tuple[str, str], float]:
+        row = {}
+        for name, (count, low, high, total, last) in self.fields.items():
+            row[(name, "count")] = count
+            row[(name, "min")] = low
+            row[(name, "max")] = high
+            row[(name, "mean")] = total / count
+            row[(name, "last")] = last
+        return row
+    
+    def close(self) -> None:
+        if self.start is not None:
+            self.ring.push(self.start, self._row())
+        self.fields = {}
+    
+    def query(self, start: Optional[float], end: Optional[float]) -> Tuple[List[float], Dict[str, Dict[str, List]]]:
+        ring = self.ring
+        slots = ring.slots(start, end)
+        timestamps = [ring.timestamps[slot] for slot in slots]
+        names = {name for name, _ in ring.columns} | self.fields.keys()
+        fields = {
+            name: {
+                stat: [_json_float(ring.columns[(name, stat)][slot]) for slot in slots]
+                if (name, stat) in ring.columns else [None] * len(slots)
+                for stat in ROLLUP_STATS
+            }
+            for name in names
+        }
+        
+        # Include the bucket still being filled
+        if self.start is not None and (start is None or self.start >= start) and (end is None or self.start <= end):
+            timestamps.append(self.start)
+            row = self._row()
+            for name in names:
+                for stat in ROLLUP_STATS:
+                    fields[name][stat].append(row.get((name, stat)))
+        
+        return timestamps, fields
+
+
+class _Series:
+    """Raw ring and rollups of one series"""
+    
+    def __init__(self, capacity: int):
+        self.raw = ColumnarRing(capacity, keep_records=True)
+        self.rollups = {name: _Rollup(width, size) for name, (width, size) in ROLLUPS.items()}
+    
+    def add(self, timestamp: float, record: Dict[str, Any]) -> None:
+        values = numeric_fields(record.get("value"))
+        self.raw.push(timestamp, values, record)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, values)
+
+
+class TimeSeriesStore:
+    """
+    Monitoring samples by series, in memory with optional segment files
+    
+    With a directory configured, every append is also written as one JSON
+    line to the current segment file. Segments roll over at
+    ``segment_max_bytes`` and only the newest ``max_segments`` are kept;
+    on startup they are replayed oldest first to rebuild the rings and
+    rollups.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        capacity: int = 1000,
+        segment_max_bytes: int = 4 * 1024 * 1024,
+        max_segments: int = 16
+    ):
+        """
+        Initialize store
+        
+        Args:
+            path: Directory for segment files (None keeps history in memory only)
+            capacity: Raw samples kept per series
+            segment_max_bytes: Size at which a new segment file is started
+            max_segments: Segment files kept on disk
+        """
+        self.path = path
+        self.capacity = capacity
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+        self._series: Dict[str, _Series] = {}
+        self._segment = None
+        self._segment_number = 0
+        
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._replay()
+            self._open_segment(self._segment_number)
+    
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.path):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+    
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.path, f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}")
+    
+    def _replay(self) -> None:
+        """Rebuild series from the segment files on disk"""
+        replayed = 0
+        numbers = self._segment_numbers()
+        for number in numbers:
+            with open(self._segment_path(number), "r", encoding="utf-8") as segment:
+                for line in segment:
+                    try:
+                        entry = json.loads(line)
+                        self._add(entry["series"], entry["record"])
+                    except (ValueError, KeyError, TypeError):
+                        # Torn write at the end of a segment after a crash
+                        continue
+                    replayed += 1
+        if numbers:
+            self._segment_number = numbers[-1]
+            logger.info(f"✅ Replayed {replayed} monitoring samples from {len(numbers)} segments")
+    
+    def _open_segment(self, number: int) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_number = number
+        self._segment = open(self._segment_path(number), "a+", encoding="utf-8")
+        
+        # Terminate a torn last line so the next append starts a fresh one
+        size = self._segment.tell()
+        if size:
+            self._segment.seek(size - 1)
+            if self._segment.read(1) != "\n":
+                self._segment.write("\n")
+        
+        numbers = self._segment_numbers()
+        for old in numbers[:-self.max_segments]:
+            os.remove(self._segment_path(old))
+    
+    def _add(self, series: str, record: Dict[str, Any]) -> None:
+        store = self._series.get(series)
+        if store is None:
+            store = self._series[series] = _Series(self.capacity)
+        store.add(float(record["timestamp"]), record)
+    
+    def append(self, series: str, record: Dict[str, Any]) -> None:
+        """
+        Append a sample
+        
+        Args:
+            series: Series name (the monitoring agent id)
+            record: JSON-ready sample with at least a "timestamp" and a
+                "value"; numeric fields of the value become columns
+        """
+        self._add(series, record)
+        
+        if self._segment is not None:
+            self._segment.write(json.dumps({"series": series, "record": record}, separators=(",", ":")) + "\n")
+            self._segment.flush()
+            if self._segment.tell() >= self.segment_max_bytes:
+                self._open_segment(self._segment_number + 1)
+    
+    def series(self) -> List[str]:
+        """Names of all series"""
+        return list(self._series)
+    
+    def count(self, series: str) -> int:
+        """Raw samples held for a series"""
+        store = self._series.get(series)
+        return len(store.raw) if store else 0
+    
+    def latest(self, series: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Latest records of a series
+        
+        Records are returned as stored, so callers must not modify them.
+        
+        Args:
+            series: Series name
+            limit: Maximum number of records
+            
+        Returns:
+            Up to limit records, oldest first
+        """
+        store = self._series.get(series)
+        return store.raw.latest_records(limit) if store else []
+    
+    def query(
+        self,
+        series: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        resolution: str = "raw",
+        fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Numeric samples of a series in a time range
+        
+        Args:
+            series: Series name
+            start: Inclusive start time (None for the oldest sample)
+            end: Inclusive end time (None for the newest sample)
+            resolution: "raw", "1m" or "1h"
+            fields: Fields to return (None for all numeric fields)
+            
+        Returns:
+            Dict with "timestamps" and "fields". Raw fields map to a list
+            of values; rollup fields map each of count/min/max/mean/last to
+            a list. Missing values are None. Rollups start each bucket at
+            its bucket start time and include the bucket still filling.
+            
+        Raises:
+            ValueError: If resolution is unknown
+        """
+        if resolution != "raw" and resolution not in ROLLUPS:
+            raise ValueError(f"Unknown resolution '{resolution}'. Available: {['raw'] + list(ROLLUPS)}")
+        
+        store = self._series.get(series)
+        if store is None:
+            timestamps, values = [], {}
+        elif resolution == "raw":
+            ring = store.raw
+            slots = ring.slots(start, end)
+            timestamps = [ring.timestamps[slot] for slot in slots]
+            values = {
+                name: [_json_float(column[slot]) for slot in slots]
+                for name, column in ring.columns.items()
+            }
+        else:
+            timestamps, values = store.rollups[resolution].query(start, end)
+        
+        if fields is not None:
+            wanted = set(fields)
+            values = {name: column for name, column in values.items() if name in wanted}
+        
+        return {
+            "series": series,
+            "resolution": resolution,
+            "timestamps": timestamps,
+            "fields": values
+        }
+    
+    def close(self) -> None:
+        """Close the current segment file"""
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
@@ -13,8 +13,11 @@ Provides distributed tracing across:
 
 import os
 import logging
-from typing import Dict, Any
-from functools import wraps
+import random
+import time
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
+from functools import lru_cache, wraps
 
 # Initialize logger first to avoid reference errors
 logging.basicConfig(level=logging.INFO)
@@ -24,7 +27,7 @@ logger = logging.getLogger(__name__)
 try:
     from agent_framework.observability import setup_observability
     setup_observability(
-        otlp_endpoint="http://localhost:4317",  # AI Toolkit gRPC endpoint
+        otlp_endpoint=os.environ.get("OTLP_GRPC_ENDPOINT", "http://localhost:4317"),  # AI Toolkit gRPC endpoint
         enable_sensitive_data=True  # Enable capturing prompts and completions
     )
     agent_framework_available = True
@@ -65,13 +68,104 @@ except ImportError:
     ai_inference_available = False
     logger.warning("Azure AI Inference SDK not available")
 
+CONSCIOUSNESS_LEVELS = {
+    "foundation": "awakening",
+    "growth": "expanding",
+    "harmony": "synchronizing",
+    "transcendence": "unified"
+}
+
+_random = random.random
+
+def _clamp_ratio(ratio: float) -> float:
+    return min(max(float(ratio), 0.0), 1.0)
+
+class TraceSampler:
+    """
+    Head sampler for quantum spans with per-route ratios and error retention
+    
+    The decision is taken before a span is created, so a dropped operation
+    costs one dict lookup and one random draw. Operations nested in a
+    sampled span are always kept so traces stay complete. With
+    always_sample_errors, a dropped operation that raises still gets a span
+    recorded after the fact (tail sampling for errors).
+    """
+    
+    def __init__(self, ratio: float = 1.0, route_ratios: Optional[Dict[str, float]] = None,
+                 always_sample_errors: bool = True):
+        """
+        Initialize sampler
+        
+        Args:
+            ratio: Fraction of operations traced (0.0 to 1.0)
+            route_ratios: Per-operation overrides of ratio, e.g. {"health_check": 0.01}
+            always_sample_errors: Record spans for failed operations that were not sampled
+        """
+        self.ratio = _clamp_ratio(ratio)
+        self.route_ratios = {operation: _clamp_ratio(r) for operation, r in (route_ratios or {}).items()}
+        self.always_sample_errors = always_sample_errors
+    
+    @classmethod
+    def from_env(cls) -> "TraceSampler":
+        """
+        Build a sampler from TRACE_SAMPLE_RATE, TRACE_ROUTE_SAMPLE_RATES
+        ("operation=ratio,...") and TRACE_SAMPLE_ERRORS
+        """
+        route_ratios = {}
+        for item in os.environ.get("TRACE_ROUTE_SAMPLE_RATES", "").split(","):
+            operation, _, ratio = item.partition("=")
+            if operation.strip() and ratio.strip():
+                route_ratios[operation.strip()] = float(ratio)
+        return cls(
+            ratio=float(os.environ.get("TRACE_SAMPLE_RATE", "1.0")),
+            route_ratios=route_ratios,
+            always_sample_errors=os.environ.get("TRACE_SAMPLE_ERRORS", "true").lower() == "true"
+        )
+    
+    def ratio_for(self, operation: str) -> float:
+        """Sampling ratio applied to an operation"""
+        return self.route_ratios.get(operation, self.ratio)
+    
+    def should_sample(self, operation: str) -> bool:
+        """Decide whether to trace one call of an operation"""
+        ratio = self.route_ratios.get(operation, self.ratio)
+        if ratio >= 1.0 or (ratio > 0.0 and _random() < ratio):
+            return True
+        return trace.get_current_span().get_span_context().trace_flags.sampled
+
+@lru_cache(maxsize=1024)
+def span_attributes(component: str, quantum_phase: str = "foundation",
+                    operation: Optional[str] = None, function: Optional[str] = None) -> Mapping[str, Any]:
+    """
+    Frozen span attributes for a component/phase (and optionally operation)
+    
+    Built once per combination and shared by every span using it; the SDK
+    copies attributes into the span, so nothing is rebuilt per call.
+    """
+    attributes = {
+        "quantum.component": component,
+        "quantum.phase": quantum_phase,
+        "consciousness.level": CONSCIOUSNESS_LEVELS.get(quantum_phase, "quantum"),
+        "sacred.trinity.active": True
+    }
+    if operation is not None:
+        attributes["quantum.operation"] = operation
+    if function is not None:
+        attributes["function"] = function
+    return MappingProxyType(attributes)
+
 class QuantumTracingSystem:
     """Enhanced Sacred Trinity OpenTelemetry Tracing System with Agent Framework support"""
     
-    def __init__(self, service_name: str = "quantum-resonance-lattice"):
+    def __init__(self, service_name: str = "quantum-resonance-lattice",
+                 sampler: Optional[TraceSampler] = None, span_exporter=None):
         self.service_name = service_name
         self.agent_framework_enabled = agent_framework_available
         self.telemetry_enabled = os.environ.get("ENABLE_TELEMETRY", "true").lower() == "true"
+        self.sampler = sampler or TraceSampler.from_env()
+        self.span_exporter = span_exporter
+        self.provider: Optional[TracerProvider] = None
+        self._tracers: Dict[Optional[str], trace.Tracer] = {}
         
         if self.telemetry_enabled:
             self.setup_tracing()
@@ -96,23 +190,30 @@ class QuantumTracingSystem:
                 "quantum.phases": "foundation,growth,harmony,transcendence"
             })
             
-            # Setup tracer provider
+            # Setup tracer provider (sampling is decided by self.sampler
+            # before spans are created, so the provider records what it gets)
             provider = TracerProvider(resource=resource)
             
+            grpc_endpoint = os.environ.get("OTLP_GRPC_ENDPOINT", "http://localhost:4317")
+            http_endpoint = os.environ.get("OTLP_ENDPOINT", "http://localhost:4318").rstrip("/")
+            
             # Configure OTLP exporter for AI Toolkit (prefer gRPC for Agent Framework)
-            try:
-                from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter as GRPCExporter
-                otlp_exporter = GRPCExporter(
-                    endpoint="http://localhost:4317",  # AI Toolkit gRPC endpoint for Agent Framework
-                )
-                logger.info("🚀 Using gRPC OTLP exporter for Agent Framework compatibility")
-            except ImportError:
-                # Fallback to HTTP
-                otlp_exporter = OTLPSpanExporter(
-                    endpoint="http://localhost:4318/v1/traces",  # AI Toolkit HTTP endpoint
-                    headers={"Content-Type": "application/json"}
-                )
-                logger.info("📡 Using HTTP OTLP exporter as gRPC not available")
+            if self.span_exporter is not None:
+                otlp_exporter = self.span_exporter
+            else:
+                try:
+                    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter as GRPCExporter
+                    otlp_exporter = GRPCExporter(
+                        endpoint=grpc_endpoint,  # AI Toolkit gRPC endpoint for Agent Framework
+                    )
+                    logger.info("🚀 Using gRPC OTLP exporter for Agent Framework compatibility")
+                except ImportError:
+                    # Fallback to HTTP
+                    otlp_exporter = OTLPSpanExporter(
+                        endpoint=f"{http_endpoint}/v1/traces",  # AI Toolkit HTTP endpoint
+                        headers={"Content-Type": "application/json"}
+                    )
+                    logger.info("📡 Using HTTP OTLP exporter as gRPC not available")
             
             # Add batch span processor
             processor = BatchSpanProcessor(otlp_exporter)
@@ -120,6 +221,7 @@ class QuantumTracingSystem:
             
             # Set global tracer provider
             trace.set_tracer_provider(provider)
+            self.provider = provider
             
             # Instrument Azure AI SDKs with error handling
             if ai_projects_available:
@@ -139,7 +241,10 @@ class QuantumTracingSystem:
                     logger.warning(f"Azure AI Inference instrumentation failed: {e}")
             
             logger.info(f"🌌 Quantum Tracing System initialized for {self.service_name}")
-            logger.info("📡 OTLP endpoints: gRPC=localhost:4317, HTTP=localhost:4318")
+            logger.info(f"📡 OTLP endpoints: gRPC={grpc_endpoint}, HTTP={http_endpoint}")
+            logger.info(f"🎲 Trace sample rate {self.sampler.ratio} "
+                        f"(routes: {self.sampler.route_ratios or 'none'}, "
+                        f"errors always sampled: {self.sampler.always_sample_errors})")
             logger.info("🔍 Content recording enabled for full observability")
             if self.agent_framework_enabled:
                 logger.info("🤖 Agent Framework observability enabled with sensitive data capture")
@@ -152,46 +257,46 @@ class QuantumTracingSystem:
     
     def get_tracer(self, component: str = None) -> trace.Tracer:
         """Get tracer for specific Sacred Trinity component"""
-        tracer_name = f"{self.service_name}.{component}" if component else self.service_name
-        return trace.get_tracer(tracer_name)
+        tracer = self._tracers.get(component)
+        if tracer is None:
+            tracer_name = f"{self.service_name}.{component}" if component else self.service_name
+            provider = self.provider or trace.get_tracer_provider()
+            tracer = self._tracers[component] = provider.get_tracer(tracer_name)
+        return tracer
     
     def create_quantum_span(self, tracer: trace.Tracer, operation: str, 
                            component: str, quantum_phase: str = "foundation", **attributes) -> trace.Span:
-        """Create traced span for quantum operations with consciousness context"""
-        consciousness_level = self._get_consciousness_level(quantum_phase)
+        """
+        Create traced span for quantum operations with consciousness context
+        
+        Returns a non-recording span when the sampler drops the operation.
+        """
+        if not self.sampler.should_sample(operation):
+            return trace.INVALID_SPAN
+        base_attributes = span_attributes(component, quantum_phase, operation)
         span = tracer.start_span(
             name=f"quantum.{component}.{operation}",
-            attributes={
-                "quantum.component": component,
-                "quantum.operation": operation,
-                "quantum.phase": quantum_phase,
-                "consciousness.level": consciousness_level,
-                "sacred.trinity.active": True,
-                **attributes
-            }
+            attributes={**base_attributes, **attributes} if attributes else base_attributes
         )
         return span
     
     def _get_consciousness_level(self, quantum_phase: str) -> str:
         """Map quantum phases to consciousness levels"""
-        consciousness_map = {
-            "foundation": "awakening",
-            "growth": "expanding", 
-            "harmony": "synchronizing",
-            "transcendence": "unified"
-        }
-        return consciousness_map.get(quantum_phase, "quantum")
+        return CONSCIOUSNESS_LEVELS.get(quantum_phase, "quantum")
 
 # Global tracing system instance - lazy initialization
 _tracing_system = None
+_tracing_initialized = False
 _fastapi_tracer = None
 _flask_tracer = None
 _gradio_tracer = None
 
 def get_tracing_system():
     """Lazy initialization of tracing system"""
-    global _tracing_system, _fastapi_tracer, _flask_tracer, _gradio_tracer
-    if _tracing_system is None:
+    global _tracing_system, _tracing_initialized, _fastapi_tracer, _flask_tracer, _gradio_tracer
+    if not _tracing_initialized:
+        # Set first so a failed setup is not retried on every traced call
+        _tracing_initialized = True
         try:
             _tracing_system = QuantumTracingSystem()
             _fastapi_tracer = _tracing_system.get_tracer("fastapi")
@@ -206,6 +311,15 @@ def get_tracing_system():
             _gradio_tracer = None
     return _tracing_system, _fastapi_tracer, _flask_tracer, _gradio_tracer
 
+def set_tracing_system(system: Optional[QuantumTracingSystem]):
+    """Replace the global tracing system (None disables tracing)"""
+    global _tracing_system, _tracing_initialized, _fastapi_tracer, _flask_tracer, _gradio_tracer
+    _tracing_system = system
+    _tracing_initialized = True
+    _fastapi_tracer = system.get_tracer("fastapi") if system else None
+    _flask_tracer = system.get_tracer("flask") if system else None
+    _gradio_tracer = system.get_tracer("gradio") if system else None
+
 # Component-specific tracers - lazy loaded
 def fastapi_tracer():
     _, tracer, _, _ = get_tracing_system()
@@ -219,17 +333,50 @@ def gradio_tracer():
     _, _, _, tracer = get_tracing_system()
     return tracer
 
-def trace_fastapi_operation(operation: str):
-    """Decorator for tracing FastAPI operations"""
+def _active_system():
+    """Tracing system if spans are being recorded, else None (fast path)"""
+    system = _tracing_system if _tracing_initialized else get_tracing_system()[0]
+    if system is None or not system.telemetry_enabled:
+        return None
+    return system
+
+def _record_error_span(tracer: trace.Tracer, name: str, attributes: Mapping[str, Any],
+                       start_time: int, error: Exception):
+    """Record a span for a failed operation the head sampler dropped"""
+    span = tracer.start_span(name, attributes=attributes, start_time=start_time)
+    span.set_attribute("quantum.success", False)
+    span.set_attribute("quantum.error", str(error))
+    span.set_attribute("sampling.error_retained", True)
+    span.record_exception(error)
+    span.set_status(trace.Status(trace.StatusCode.ERROR))
+    span.end()
+
+def _operation_decorator(operation: str, component: str, is_async: bool):
+    """Build a sampled tracing decorator for one component"""
+    name = f"quantum.{component}.{operation}"
+    
     def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            system, tracer, _, _ = get_tracing_system()
-            if system and tracer:
-                with system.create_quantum_span(
-                    tracer, operation, "fastapi",
-                    **{"function": func.__name__}
-                ) as span:
+        attributes = span_attributes(component, "foundation", operation, func.__name__)
+        
+        if is_async:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                system = _active_system()
+                if system is None:
+                    return await func(*args, **kwargs)
+                tracer = system.get_tracer(component)
+                sampler = system.sampler
+                if not sampler.should_sample(operation):
+                    if not sampler.always_sample_errors:
+                        return await func(*args, **kwargs)
+                    start_time = time.time_ns()
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        _record_error_span(tracer, name, attributes, start_time, e)
+                        raise
+                span = tracer.start_span(name, attributes=attributes)
+                with trace.use_span(span, end_on_exit=True):
                     try:
                         result = await func(*args, **kwargs)
                         span.set_attribute("quantum.success", True)
@@ -238,46 +385,25 @@ def trace_fastapi_operation(operation: str):
                         span.set_attribute("quantum.success", False)
                         span.set_attribute("quantum.error", str(e))
                         raise
-            else:
-                return await func(*args, **kwargs)
-        return wrapper
-    return decorator
-
-def trace_flask_operation(operation: str):
-    """Decorator for tracing Flask operations"""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            system, _, tracer, _ = get_tracing_system()
-            if system and tracer:
-                with system.create_quantum_span(
-                    tracer, operation, "flask",
-                    **{"function": func.__name__}
-                ) as span:
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                system = _active_system()
+                if system is None:
+                    return func(*args, **kwargs)
+                tracer = system.get_tracer(component)
+                sampler = system.sampler
+                if not sampler.should_sample(operation):
+                    if not sampler.always_sample_errors:
+                        return func(*args, **kwargs)
+                    start_time = time.time_ns()
                     try:
-                        result = func(*args, **kwargs)
-                        span.set_attribute("quantum.success", True)
-                        return result
+                        return func(*args, **kwargs)
                     except Exception as e:
-                        span.set_attribute("quantum.success", False)
-                        span.set_attribute("quantum.error", str(e))
+                        _record_error_span(tracer, name, attributes, start_time, e)
                         raise
-            else:
-                return func(*args, **kwargs)
-        return wrapper
-    return decorator
-
-def trace_gradio_operation(operation: str):
-    """Decorator for tracing Gradio operations"""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            system, _, _, tracer = get_tracing_system()
-            if system and tracer:
-                with system.create_quantum_span(
-                    tracer, operation, "gradio",
-                    **{"function": func.__name__}
-                ) as span:
+                span = tracer.start_span(name, attributes=attributes)
+                with trace.use_span(span, end_on_exit=True):
                     try:
                         result = func(*args, **kwargs)
                         span.set_attribute("quantum.success", True)
@@ -286,11 +412,21 @@ def trace_gradio_operation(operation: str):
                         span.set_attribute("quantum.success", False)
                         span.set_attribute("quantum.error", str(e))
                         raise
-            else:
-                return func(*args, **kwargs)
         return wrapper
     return decorator
 
+def trace_fastapi_operation(operation: str):
+    """Decorator for tracing FastAPI operations"""
+    return _operation_decorator(operation, "fastapi", is_async=True)
+
+def trace_flask_operation(operation: str):
+    """Decorator for tracing Flask operations"""
+    return _operation_decorator(operation, "flask", is_async=False)
+
+def trace_gradio_operation(operation: str):
+    """Decorator for tracing Gradio operations"""
+    return _operation_decorator(operation, "gradio", is_async=False)
+
 # Quantum-specific span creation helpers
 def trace_authentication(user_id: str = None):
     """Trace authentication operations"""
@@ -47,6 +47,30 @@ def test_autonomous_decision_endpoint():
     print(f"✅ Decision endpoint: {data['decision_id']}, approved={data['approved']}, confidence={data['confidence']:.2f}")
 
 
+def test_decision_batch_endpoint():
+    """Test batch decision endpoint returns results in input order"""
+    print("Testing batch decision endpoint...")
+    
+    decisions = [
+        {
+            "decision_type": decision_type,
+            "priority": "medium",
+            "parameters": [{"name": "health_check", "value": True, "weight": 1.0}],
+            "source": "integration_test"
+        }
+        for decision_type in ["deployment", "monitoring", "guardian_override"]
+    ]
+    response = client.post("/api/autonomous/decisions:batch", json={"decisions": decisions})
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 3
+    assert [d["decision_type"] for d in data["decisions"]] == ["deployment", "monitoring", "guardian_override"]
+    assert data["decisions"][2]["requires_guardian"] is True
+    assert data["requires_guardian"] >= 1
+    print(f"✅ Batch decisions: {data['count']} made, {data['approved']} approved")
+
+
 def test_decision_history_endpoint():
     """Test decision history endpoint"""
     print("Testing decision history endpoint...")
@@ -160,6 +184,21 @@ def test_latest_monitoring_data():
     print(f"✅ Latest monitoring data retrieved")
 
 
+def test_monitoring_timeseries_endpoint():
+    """Test monitoring time-series range endpoint"""
+    print("Testing monitoring time-series endpoint...")
+    
+    response = client.get("/api/monitoring/timeseries/performance?resolution=1m")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["resolution"] == "1m"
+    assert "timestamps" in data and "fields" in data
+    
+    assert client.get("/api/monitoring/timeseries/unknown").status_code == 404
+    assert client.get("/api/monitoring/timeseries/performance?resolution=5m").status_code == 400
+    print(f"✅ Monitoring time-series: {len(data['timestamps'])} buckets")
+
+
 if __name__ == "__main__":
     print("\n" + "="*60)
     print("🔍 Testing Autonomous Handover API Endpoints")
@@ -167,6 +206,7 @@ if __name__ == "__main__":
     
     try:
         test_autonomous_decision_endpoint()
+        test_decision_batch_endpoint()
         test_decision_history_endpoint()
         test_decision_metrics_endpoint()
         test_health_diagnostics_endpoint()
@@ -175,6 +215,7 @@ if __name__ == "__main__":
         test_validate_decision_endpoint()
         test_monitoring_status_endpoint()
         test_latest_monitoring_data()
+        test_monitoring_timeseries_endpoint()
         
         print("\n" + "="*60)
         print("✅ All API endpoint tests passed!")
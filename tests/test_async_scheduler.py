@@ -0,0 +1,239 @@
+"""
+Async Scheduler Tests
+Tests for timer-heap scheduling, overlap policies, persisted run state and
+the automation system running on the scheduler
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add server directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "server"))
+
+from async_scheduler import AsyncScheduler, OverlapPolicy
+
+
+async def run_for(scheduler, seconds):
+    scheduler.start()
+    await asyncio.sleep(seconds)
+    await scheduler.stop()
+
+
+class Tracker:
+    """Job body recording start times and peak concurrency"""
+    
+    def __init__(self, duration=0.0, fail=False):
+        self.duration = duration
+        self.fail = fail
+        self.starts = []
+        self.active = 0
+        self.peak = 0
+        self.completed = 0
+    
+    async def __call__(self):
+        self.starts.append(time.time())
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.duration)
+            if self.fail:
+                raise RuntimeError("resonance lost")
+            self.completed += 1
+        finally:
+            self.active -= 1
+
+
+class TestScheduling:
+    """Tests for timing and validation"""
+    
+    def test_interval_runs_on_a_fixed_grid(self):
+        """Test runs start on time and run duration does not shift the schedule"""
+        tracker = Tracker(duration=0.02)
+        scheduler = AsyncScheduler()
+        job = scheduler.add_job("tick", tracker, every=0.05, run_immediately=True)
+        
+        asyncio.run(run_for(scheduler, 0.33))
+        
+        assert 6 <= len(tracker.starts) <= 8
+        first = tracker.starts[0]
+        for i, started in enumerate(tracker.starts):
+            assert started - (first + i * 0.05) == pytest.approx(0.0, abs=0.02)
+        assert job.stats.runs == tracker.completed
+    
+    def test_jobs_added_while_running_wake_the_scheduler(self):
+        """Test a job added after start runs without waiting for the next due job"""
+        early = Tracker()
+        scheduler = AsyncScheduler()
+        scheduler.add_job("slow", Tracker(), every=60)
+        
+        async def run():
+            scheduler.start()
+            await asyncio.sleep(0.01)
+            scheduler.add_job("early", early, every=60, run_immediately=True)
+            await asyncio.sleep(0.05)
+            await scheduler.stop()
+        
+        asyncio.run(run())
+        assert len(early.starts) == 1
+    
+    def test_invalid_schedules(self):
+        """Test schedules must be exactly one valid interval or daily time"""
+        scheduler = AsyncScheduler()
+        job = Tracker()
+        with pytest.raises(ValueError):
+            scheduler.add_job("none", job)
+        with pytest.raises(ValueError):
+            scheduler.add_job("both", job, every=5, daily_at="06:00")
+        with pytest.raises(ValueError):
+            scheduler.add_job("negative", job, every=-1)
+        with pytest.raises(ValueError):
+            scheduler.add_job("bad_time", job, daily_at="six")
+        
+        daily = scheduler.add_job("audit", job, daily_at="06:00")
+        assert 0 < daily.next_run - time.time() <= 24 * 60 * 60
+        with pytest.raises(ValueError):
+            scheduler.add_job("audit", job, every=5)
+
+
+class TestOverlapPolicies:
+    """Tests for jobs still running when they come due again"""
+    
+    def test_skip(self):
+        """Test overlapping runs are skipped and counted"""
+        tracker = Tracker(duration=0.12)
+        scheduler = AsyncScheduler()
+        job = scheduler.add_job("slow", tracker, every=0.05, run_immediately=True)
+        
+        asyncio.run(run_for(scheduler, 0.3))
+        
+        assert tracker.peak == 1
+        assert job.stats.skipped >= 2
+        assert job.metrics()["skipped"] == job.stats.skipped
+    
+    def test_queue(self):
+        """Test queued runs start when the previous run finishes"""
+        tracker = Tracker(duration=0.08)
+        scheduler = AsyncScheduler()
+        job = scheduler.add_job(
+            "queued", tracker, every=0.05, overlap=OverlapPolicy.QUEUE, run_immediately=True
+        )
+        
+        asyncio.run(run_for(scheduler, 0.3))
+        
+        assert tracker.peak == 1
+        # Runs follow each other back to back instead of being dropped
+        gaps = [b - a for a, b in zip(tracker.starts, tracker.starts[1:])]
+        assert all(gap == pytest.approx(0.08, abs=0.03) for gap in gaps[:2])
+        assert tracker.completed >= 3
+    
+    def test_cancel_previous(self):
+        """Test a new run cancels the one still in progress"""
+        tracker = Tracker(duration=1.0)
+        scheduler = AsyncScheduler()
+        job = scheduler.add_job(
+            "replaced", tracker, every=0.05, overlap=OverlapPolicy.CANCEL_PREVIOUS,
+            run_immediately=True
+        )
+        
+        asyncio.run(run_for(scheduler, 0.22))
+        
+        assert tracker.peak == 1
+        assert tracker.completed == 0
+        assert len(tracker.starts) >= 4
+        # Every run was cancelled: by its successor, or by stop()
+        assert job.stats.cancelled == len(tracker.starts)
+        assert job.stats.last_status == "cancelled"
+    
+    def test_max_concurrency(self):
+        """Test a job may overlap itself up to max_concurrency"""
+        tracker = Tracker(duration=0.12)
+        scheduler = AsyncScheduler()
+        scheduler.add_job("parallel", tracker, every=0.05, max_concurrency=2, run_immediately=True)
+        
+        asyncio.run(run_for(scheduler, 0.3))
+        assert tracker.peak == 2
+
+
+class TestRunState:
+    """Tests for failures, metrics and persisted state"""
+    
+    def test_failures_are_recorded_and_do_not_stop_the_job(self):
+        """Test exceptions are counted and the schedule continues"""
+        tracker = Tracker(fail=True)
+        scheduler = AsyncScheduler()
+        job = scheduler.add_job("flaky", tracker, every=0.05, run_immediately=True)
+        
+        asyncio.run(run_for(scheduler, 0.18))
+        
+        metrics = scheduler.metrics()["flaky"]
+        assert metrics["failures"] == len(tracker.starts) >= 3
+        assert metrics["last_status"] == "failed"
+        assert metrics["last_error"] == "RuntimeError: resonance lost"
+        assert metrics["duration_seconds"]["p95"] is not None
+        assert job.stats.runs == job.stats.failures
+    
+    def test_state_survives_restart(self, tmp_path):
+        """Test run state is persisted and the schedule resumes from it"""
+        state_path = tmp_path / "automation_state.json"
+        scheduler = AsyncScheduler(str(state_path))
+        scheduler.add_job("tick", Tracker(duration=0.001), every=0.05, run_immediately=True)
+        asyncio.run(run_for(scheduler, 0.12))
+        
+        saved = json.loads(state_path.read_text())["tick"]
+        assert saved["runs"] >= 2
+        assert saved["last_status"] == "success"
+        
+        # Resumes one interval after the persisted last run
+        restored = AsyncScheduler(str(state_path))
+        job = restored.add_job("tick", Tracker(), every=3600)
+        assert job.stats.runs == saved["runs"]
+        assert job.next_run == pytest.approx(saved["last_started"] + 3600)
+        
+        # An interval already elapsed since the last run is due immediately
+        overdue = AsyncScheduler(str(state_path)).add_job("tick", Tracker(), every=0.01)
+        assert overdue.next_run <= time.time()
+
+
+class TestAutomationScheduler:
+    """Tests for QuantumAutomationSystem on the scheduler"""
+    
+    def test_automation_runs_jobs_until_stopped(self, tmp_path, monkeypatch):
+        """Test automation schedules its jobs and exposes their metrics"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "automation_config.json").write_text(json.dumps({
+            "evaluation_interval_minutes": 60,
+            "health_check_interval_minutes": 10,
+            "auto_enhancement_enabled": True,
+            "alert_notifications_enabled": True,
+            "continuous_monitoring": True,
+            "performance_optimization": True,
+            "quantum_tuning_enabled": True,
+            "continuous_monitoring_interval_seconds": 0.05
+        }))
+        from automation_system import QuantumAutomationSystem
+        
+        async def run():
+            automation = QuantumAutomationSystem()
+            task = asyncio.create_task(automation.start_automation())
+            await asyncio.sleep(0.18)
+            status = automation.get_automation_status()
+            await automation.stop_automation()
+            await asyncio.wait_for(task, 1)
+            return status
+        
+        status = asyncio.run(run())
+        
+        assert set(status["jobs"]) == {
+            "evaluation", "health_check", "comprehensive_audit",
+            "quantum_tuning", "continuous_monitoring"
+        }
+        assert status["jobs"]["health_check"]["overlap_policy"] == "cancel_previous"
+        assert status["jobs"]["continuous_monitoring"]["runs"] >= 2
+        assert status["jobs"]["evaluation"]["runs"] == 0
+        state = json.loads((tmp_path / "automation_state.json").read_text())
+        assert state["continuous_monitoring"]["runs"] >= 2
@@ -446,5 +446,156 @@ def test_decision_history_retrieval():
     assert deployment_history[0].decision_type == DecisionType.DEPLOYMENT
 
 
+def test_decision_history_ring_buffer_eviction():
+    """Test the history keeps the newest decisions and aggregates track evictions"""
+    from server.autonomous_decision import (
+        AIDecisionMatrix,
+        DecisionContext,
+        DecisionParameter,
+        DecisionType,
+        DecisionPriority
+    )
+    
+    matrix = AIDecisionMatrix(history_size=5)
+    made = []
+    for i in range(12):
+        decision_type = DecisionType.MONITORING if i % 3 else DecisionType.DEPLOYMENT
+        context = DecisionContext(
+            decision_type=decision_type,
+            priority=DecisionPriority.LOW,
+            parameters=[DecisionParameter(name="health", value=0.5 + i / 24)],
+            source="test_suite"
+        )
+        made.append(matrix.make_decision(context))
+    
+    kept = made[-5:]
+    assert len(matrix.decision_history) == 5
+    assert list(matrix.decision_history) == kept
+    assert matrix.get_decision_history(limit=3) == kept[-3:]
+    assert matrix.get_decision_history(DecisionType.DEPLOYMENT) == [
+        d for d in kept if d.decision_type == DecisionType.DEPLOYMENT
+    ]
+    
+    # Running aggregates match a full rescan of the retained decisions
+    metrics = matrix.get_decision_metrics()
+    assert metrics["total_decisions"] == 5
+    assert metrics["approval_rate"] == sum(d.approved for d in kept) / 5
+    assert metrics["guardian_required_rate"] == sum(d.requires_guardian for d in kept) / 5
+    assert metrics["average_confidence"] == pytest.approx(sum(d.confidence for d in kept) / 5)
+    
+    monitoring = [d for d in kept if d.decision_type == DecisionType.MONITORING]
+    by_type = metrics["by_type"]["monitoring"]
+    assert by_type["count"] == len(monitoring)
+    assert by_type["avg_confidence"] == pytest.approx(
+        sum(d.confidence for d in monitoring) / len(monitoring)
+    )
+
+
+def _random_decision_contexts(count, seed=7):
+    """Decision contexts covering every parameter normalization path"""
+    import random
+    from server.autonomous_decision import (
+        DecisionContext,
+        DecisionParameter,
+        DecisionType,
+        DecisionPriority
+    )
+    
+    rng = random.Random(seed)
+    contexts = []
+    for i in range(count):
+        parameters = []
+        for j in range(rng.randint(0, 5)):
+            kind = rng.random()
+            if kind < 0.3:
+                value, threshold = rng.uniform(-0.5, 2.0), rng.choice([0.0, 0.5, 0.8, 1.0])
+            elif kind < 0.5:
+                value, threshold = rng.choice([True, False]), rng.choice([None, 0.5])
+            elif kind < 0.8:
+                value, threshold = rng.choice([rng.uniform(-0.5, 1.5), rng.randint(0, 2)]), None
+            else:
+                value, threshold = "n/a", None
+            parameters.append(DecisionParameter(
+                name=f"param_{j}",
+                value=value,
+                threshold=threshold,
+                weight=rng.choice([0.0, 0.25, 0.5, 1.0])
+            ))
+        contexts.append(DecisionContext(
+            decision_type=rng.choice(list(DecisionType)),
+            priority=rng.choice(list(DecisionPriority)),
+            parameters=parameters,
+            source="test_suite"
+        ))
+    return contexts
+
+
+def test_make_decisions_batch_matches_make_decision():
+    """Test batch decisions equal one-at-a-time decisions, in input order"""
+    from server.autonomous_decision import AIDecisionMatrix
+    
+    contexts = _random_decision_contexts(2000)
+    sequential = AIDecisionMatrix(history_size=5000)
+    batched = AIDecisionMatrix(history_size=5000)
+    
+    expected = [sequential.make_decision(context) for context in contexts]
+    results = batched.make_decisions_batch(contexts)
+    
+    assert len(results) == len(contexts)
+    assert len({r.decision_id for r in results}) == len(results)
+    for result, single in zip(results, expected):
+        assert result.decision_type == single.decision_type
+        assert result.confidence == single.confidence
+        assert result.approved == single.approved
+        assert result.requires_guardian == single.requires_guardian
+        assert result.reasoning == single.reasoning
+        assert result.actions == single.actions
+        assert result.metadata == single.metadata
+    
+    assert batched.get_decision_history(limit=len(results)) == results
+    assert batched.get_decision_metrics() == sequential.get_decision_metrics()
+    assert batched.make_decisions_batch([]) == []
+
+
+def test_make_decisions_batch_benchmark():
+    """Benchmark 10k decisions batched against one call per decision"""
+    import gc
+    import io
+    import logging
+    from server.autonomous_decision import AIDecisionMatrix
+    
+    contexts = _random_decision_contexts(10000)
+    
+    # Log at INFO like the server does
+    logger = logging.getLogger("server.autonomous_decision")
+    handler = logging.StreamHandler(io.StringIO())
+    previous_level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    gc.disable()
+    try:
+        matrix = AIDecisionMatrix(history_size=len(contexts))
+        start = time.perf_counter()
+        for context in contexts:
+            matrix.make_decision(context)
+        sequential_elapsed = time.perf_counter() - start
+        
+        matrix = AIDecisionMatrix(history_size=len(contexts))
+        start = time.perf_counter()
+        results = matrix.make_decisions_batch(contexts)
+        batch_elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+        logger.removeHandler(handler)
+        logger.setLevel(previous_level)
+    
+    print(
+        f"\n10k decisions: one at a time {sequential_elapsed * 1000:.1f}ms, "
+        f"batched {batch_elapsed * 1000:.1f}ms"
+    )
+    assert len(results) == len(contexts)
+    assert batch_elapsed < sequential_elapsed
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,240 @@
+"""
+Broadcast Hub Tests
+Tests for WebSocket fan-out: shared frames, bounded queues, slow-consumer
+eviction and a 10k-client load test
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add server directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "server"))
+
+from broadcast_hub import BroadcastHub
+
+
+class RecordingClient:
+    """Simulated WebSocket connection that records received frames"""
+    
+    def __init__(self, stuck=False):
+        self.frames = []
+        self.closed = False
+        self._release = asyncio.Event()
+        if not stuck:
+            self._release.set()
+    
+    async def send(self, frame):
+        await self._release.wait()
+        self.frames.append(frame)
+    
+    async def close(self):
+        self.closed = True
+
+
+async def settle(rounds=5):
+    """Let serve loops drain their queues"""
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+class TestBroadcastHub:
+    """Tests for hub fan-out semantics"""
+    
+    @pytest.mark.asyncio
+    async def test_frame_serialized_once_and_fanned_out(self):
+        """Test every subscriber receives the identical serialized frame"""
+        hub = BroadcastHub("test")
+        clients = [RecordingClient() for _ in range(5)]
+        tasks = [asyncio.create_task(hub.serve(client.send)) for client in clients]
+        await settle()
+        
+        assert hub.publish({"type": "payment_status_update", "payment_id": "p1"}) == 5
+        await settle()
+        
+        frames = {client.frames[0] for client in clients}
+        assert len(frames) == 1
+        assert json.loads(frames.pop())["payment_id"] == "p1"
+        assert all(frame is clients[0].frames[0] for client in clients for frame in client.frames)
+        
+        await hub.close()
+        await asyncio.gather(*tasks)
+        assert len(hub) == 0
+    
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_block_publish(self):
+        """Test publishing returns immediately while a client is stuck"""
+        hub = BroadcastHub("test", queue_size=4)
+        fast, stuck = RecordingClient(), RecordingClient(stuck=True)
+        tasks = [
+            asyncio.create_task(hub.serve(fast.send)),
+            asyncio.create_task(hub.serve(stuck.send, close=stuck.close))
+        ]
+        await settle()
+        
+        for i in range(3):
+            hub.publish({"seq": i})
+            await settle()
+        
+        assert [json.loads(frame)["seq"] for frame in fast.frames] == [0, 1, 2]
+        assert stuck.frames == []
+        
+        await hub.close()
+        stuck._release.set()
+        await asyncio.gather(*tasks)
+    
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_oldest_then_evicts(self):
+        """Test a lagging client loses old frames and is evicted when it stays stuck"""
+        hub = BroadcastHub("test", queue_size=2, max_pending_drops=3)
+        stuck = RecordingClient(stuck=True)
+        task = asyncio.create_task(hub.serve(stuck.send, "slow", close=stuck.close))
+        await settle()
+        
+        # First frame is taken by the blocked send, next two fill the queue
+        for i in range(3):
+            hub.publish({"seq": i})
+            await settle()
+        assert hub.stats["frames_dropped"] == 0
+        
+        for i in range(3, 6):
+            hub.publish({"seq": i})
+        assert hub.stats["frames_dropped"] == 3
+        assert "slow" in hub.subscribers
+        
+        hub.publish({"seq": 6})
+        await settle()
+        
+        assert hub.stats["evictions"] == 1
+        assert "slow" not in hub.subscribers
+        assert stuck.closed
+        
+        stuck._release.set()
+        await task
+        # Only the frame already being sent got through
+        assert [json.loads(frame)["seq"] for frame in stuck.frames] == [0]
+    
+    @pytest.mark.asyncio
+    async def test_ticker_builds_frame_once_per_tick(self):
+        """Test periodic frames are computed once regardless of subscriber count"""
+        calls = []
+        
+        def factory():
+            calls.append(time.time())
+            return {"type": "quantum_pulse", "tick": len(calls)}
+        
+        hub = BroadcastHub("test", factory, interval=0.05)
+        clients = [RecordingClient() for _ in range(50)]
+        tasks = [asyncio.create_task(hub.serve(client.send)) for client in clients]
+        await asyncio.sleep(0.12)
+        await hub.close()
+        await asyncio.gather(*tasks)
+        
+        assert 2 <= len(calls) <= 4
+        assert all(len(client.frames) == len(calls) for client in clients)
+    
+    @pytest.mark.asyncio
+    async def test_new_subscriber_gets_latest_frame(self):
+        """Test a late joiner is not left waiting for the next tick"""
+        hub = BroadcastHub("test", lambda: {"type": "quantum_pulse"}, interval=60)
+        first, late = RecordingClient(), RecordingClient()
+        tasks = [asyncio.create_task(hub.serve(first.send))]
+        await settle()
+        
+        tasks.append(asyncio.create_task(hub.serve(late.send)))
+        await settle()
+        
+        assert len(first.frames) == 1
+        assert late.frames == first.frames
+        
+        await hub.close()
+        await asyncio.gather(*tasks)
+    
+    @pytest.mark.asyncio
+    async def test_ticker_stops_without_subscribers(self):
+        """Test the ticker exits once the last subscriber leaves"""
+        hub = BroadcastHub("test", lambda: {}, interval=0.01)
+        client = RecordingClient()
+        subscriber = hub.subscribe(close=client.close)
+        await asyncio.sleep(0.02)
+        
+        hub.unsubscribe(subscriber)
+        await asyncio.sleep(0.03)
+        
+        assert hub._ticker.done()
+        assert hub.latest_frame is None
+
+
+class TestWebSocketEndpoints:
+    """Tests for the hub-backed WebSocket endpoints"""
+    
+    def test_collective_insight_receives_telemetry(self):
+        """Test the collective insight socket gets a quantum pulse on connect"""
+        from fastapi.testclient import TestClient
+        
+        from main import app
+        client = TestClient(app)
+        
+        with client.websocket_connect("/ws/collective-insight") as websocket:
+            frame = websocket.receive_json()
+        
+        assert frame["type"] == "quantum_pulse"
+        assert "harmony_index" in frame
+
+
+class TestBroadcastHubLoad:
+    """Load test: 10k simulated WebSocket clients"""
+    
+    CLIENTS = 10000
+    FRAMES = 5
+    
+    @pytest.mark.asyncio
+    async def test_ten_thousand_clients(self):
+        """Test fan-out to 10k clients with 1% stuck consumers"""
+        hub = BroadcastHub("load", queue_size=2, max_pending_drops=1)
+        clients = [RecordingClient(stuck=(i % 100 == 0)) for i in range(self.CLIENTS)]
+        tasks = [
+            asyncio.create_task(hub.serve(client.send, f"c{i}", close=client.close))
+            for i, client in enumerate(clients)
+        ]
+        await settle()
+        assert len(hub) == self.CLIENTS
+        
+        frame = {"type": "quantum_pulse", "harmony_index": 0.72, "payload": "x" * 256}
+        publish_times = []
+        start = time.perf_counter()
+        for seq in range(self.FRAMES):
+            frame["seq"] = seq
+            tick = time.perf_counter()
+            hub.publish(frame)
+            publish_times.append(time.perf_counter() - tick)
+            await settle(2)
+        await settle()
+        total = time.perf_counter() - start
+        
+        fast = [client for i, client in enumerate(clients) if i % 100]
+        stuck = [client for i, client in enumerate(clients) if i % 100 == 0]
+        
+        print(
+            f"\n10k clients: max publish {max(publish_times) * 1000:.1f}ms, "
+            f"{self.FRAMES} frames delivered in {total * 1000:.0f}ms, "
+            f"evicted {hub.stats['evictions']}"
+        )
+        
+        # Every healthy client saw every frame, in order
+        assert all(len(client.frames) == self.FRAMES for client in fast)
+        assert [json.loads(f)["seq"] for f in fast[0].frames] == list(range(self.FRAMES))
+        # Stuck clients were evicted instead of buffering without bound
+        assert all(client.closed for client in stuck)
+        assert hub.stats["evictions"] == len(stuck)
+        # Publishing is a synchronous enqueue: it never waits on clients
+        assert max(publish_times) < 0.5
+        
+        await hub.close()
+        for client in stuck:
+            client._release.set()
+        await asyncio.gather(*tasks)
@@ -0,0 +1,276 @@
+"""
+Concurrent Query Runner Tests
+Tests for bounded-parallelism query execution, retries, streaming output
+and the latency report
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Add server directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "server"))
+
+from concurrent_query_runner import ConcurrentQueryRunner, iter_queries, percentile
+
+
+def make_queries(count, components=("fastapi", "flask")):
+    return [
+        {"test_id": f"q{i}", "component": components[i % len(components)], "query": "health"}
+        for i in range(count)
+    ]
+
+
+class TestConcurrentQueryRunner:
+    """Tests for the runner itself, with an in-process executor"""
+    
+    def test_per_component_limits(self):
+        """Test each component never exceeds its semaphore and queries overlap"""
+        in_flight = {"fastapi": 0, "flask": 0}
+        peak = {"fastapi": 0, "flask": 0}
+        
+        async def execute(query_data):
+            component = query_data["component"]
+            in_flight[component] += 1
+            peak[component] = max(peak[component], in_flight[component])
+            await asyncio.sleep(0.01)
+            in_flight[component] -= 1
+            return {**query_data, "ok": True}
+        
+        runner = ConcurrentQueryRunner(execute, concurrency={"fastapi": 2, "flask": 5})
+        started = time.perf_counter()
+        report = asyncio.run(runner.run(make_queries(60)))
+        elapsed = time.perf_counter() - started
+        
+        assert peak == {"fastapi": 2, "flask": 5}
+        assert report["total"] == 60
+        assert report["succeeded"] == 60
+        # 30 fastapi queries two at a time, far below 60 sequential sleeps
+        assert elapsed < 60 * 0.01 / 2
+    
+    def test_retries_with_backoff(self):
+        """Test retryable errors are retried and the final failure is recorded"""
+        attempts = {}
+        
+        async def execute(query_data):
+            test_id = query_data["test_id"]
+            attempts[test_id] = attempts.get(test_id, 0) + 1
+            if test_id == "flaky" and attempts[test_id] < 3:
+                raise ConnectionError("connection reset")
+            if test_id == "down":
+                raise ConnectionError("connection refused")
+            return {**query_data, "ok": True}
+        
+        queries = [
+            {"test_id": "flaky", "component": "fastapi"},
+            {"test_id": "down", "component": "fastapi"},
+            {"test_id": "fine", "component": "flask"}
+        ]
+        results = []
+        runner = ConcurrentQueryRunner(execute, retries=2, backoff=0.001)
+        report = asyncio.run(runner.run(queries, on_result=results.append))
+        
+        assert attempts == {"flaky": 3, "down": 3, "fine": 1}
+        by_id = {result["test_id"]: result for result in results}
+        assert by_id["flaky"]["ok"] is True
+        assert by_id["down"]["error"] == "connection refused"
+        assert report["components"]["fastapi"]["retries"] == 4
+        assert report["components"]["fastapi"]["failed"] == 1
+        assert report["failed"] == 1
+    
+    def test_non_retryable_errors_fail_immediately(self):
+        """Test errors outside retry_on are not retried"""
+        attempts = []
+        
+        async def execute(query_data):
+            attempts.append(query_data["test_id"])
+            raise ValueError("Unknown component: carrier_pigeon")
+        
+        runner = ConcurrentQueryRunner(execute, retries=3, backoff=0.001)
+        results = []
+        asyncio.run(runner.run(make_queries(1), on_result=results.append))
+        assert attempts == ["q0"]
+        assert results[0]["error"] == "Unknown component: carrier_pigeon"
+    
+    def test_timeout_and_retry_if(self):
+        """Test attempts time out and retry_if retries reported failures"""
+        calls = {"slow": 0, "reported": 0}
+        
+        async def execute(query_data):
+            calls[query_data["test_id"]] += 1
+            if query_data["test_id"] == "slow":
+                await asyncio.sleep(1)
+            return {**query_data, "status": "failed" if calls["reported"] < 2 else "success"}
+        
+        queries = [
+            {"test_id": "slow", "component": "gradio"},
+            {"test_id": "reported", "component": "flask"}
+        ]
+        results = []
+        runner = ConcurrentQueryRunner(
+            execute, timeout=0.05, retries=1, backoff=0.001,
+            retry_if=lambda result: result["status"] == "failed"
+        )
+        report = asyncio.run(runner.run(queries, on_result=results.append))
+        
+        by_id = {result["test_id"]: result for result in results}
+        assert by_id["slow"]["error"] == "TimeoutError"
+        assert calls == {"slow": 2, "reported": 2}
+        assert by_id["reported"]["status"] == "success"
+        assert report["components"]["flask"]["succeeded"] == 1
+    
+    def test_streams_results_and_consumes_lazily(self, tmp_path):
+        """Test results reach the file as they complete while queries are pulled lazily"""
+        pulled = []
+        
+        def queries():
+            for query_data in make_queries(200):
+                pulled.append(query_data["test_id"])
+                yield query_data
+        
+        async def execute(query_data):
+            await asyncio.sleep(0.001)
+            return {**query_data, "ok": True}
+        
+        output_path = tmp_path / "responses.jsonl"
+        pulled_at_first_result = []
+        runner = ConcurrentQueryRunner(
+            execute, concurrency={"fastapi": 4, "flask": 4}, default_concurrency=2, max_queued=2
+        )
+        asyncio.run(runner.run(
+            queries(), output_path=str(output_path),
+            on_result=lambda result: pulled_at_first_result.append(len(pulled))
+        ))
+        
+        # Never more than in flight (4 + 4), queued (2 + 2) and the one
+        # query waiting for a queue slot ahead of completed results
+        assert pulled_at_first_result[0] <= 13
+        records = list(iter_queries(str(output_path)))
+        assert len(records) == 200
+        assert {record["test_id"] for record in records} == {f"q{i}" for i in range(200)}
+    
+    def test_slow_component_does_not_starve_others(self):
+        """Test a backlog for one component does not hold up queries behind it"""
+        first_result_at = {}
+        
+        async def execute(query_data):
+            await asyncio.sleep(0.1 if query_data["component"] == "gradio" else 0.001)
+            return {**query_data, "ok": True}
+        
+        # More gradio queries than the sum of all component limits
+        queries = make_queries(10, components=("gradio",)) + make_queries(5, components=("flask",))
+        runner = ConcurrentQueryRunner(execute, concurrency={"gradio": 2, "flask": 2}, default_concurrency=1)
+        started = time.perf_counter()
+        asyncio.run(runner.run(
+            queries,
+            on_result=lambda result: first_result_at.setdefault(
+                result["component"], time.perf_counter() - started
+            )
+        ))
+        
+        # Five gradio rounds take half a second; flask finishes in the first one
+        assert first_result_at["flask"] < 0.05
+        assert first_result_at["gradio"] >= 0.1
+    
+    def test_ordered_results_follow_input(self, tmp_path):
+        """Test ordered=True delivers results in input order"""
+        async def execute(query_data):
+            await asyncio.sleep(0.05 if query_data["component"] == "gradio" else 0.001)
+            return {**query_data, "ok": True}
+        
+        queries = make_queries(12, components=("gradio", "flask", "fastapi"))
+        output_path = tmp_path / "responses.jsonl"
+        results = []
+        runner = ConcurrentQueryRunner(execute)
+        asyncio.run(runner.run(queries, output_path=str(output_path), on_result=results.append, ordered=True))
+        
+        assert [result["test_id"] for result in results] == [f"q{i}" for i in range(12)]
+        assert [record["test_id"] for record in iter_queries(str(output_path))] == [f"q{i}" for i in range(12)]
+    
+    def test_percentile_report(self):
+        """Test nearest-rank percentiles"""
+        values = [float(i) for i in range(1, 101)]
+        assert percentile(values, 0.50) == 50.0
+        assert percentile(values, 0.95) == 95.0
+        assert percentile([7.0], 0.95) == 7.0
+        assert percentile([], 0.5) == 0.0
+
+
+class TestQuantumAgentRunner:
+    """Tests for the agent runner against a local HTTP component"""
+    
+    def test_run_quantum_queries_concurrently(self, tmp_path, monkeypatch):
+        """Test queries hit the component concurrently and stream to JSONL"""
+        from agent_runner import QuantumAgentRunner
+        
+        state = {"in_flight": 0, "peak": 0}
+        
+        async def health(request):
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            await asyncio.sleep(0.01)
+            state["in_flight"] -= 1
+            return web.json_response({"status": "healthy", "message": "Quantum Resonance Lattice Online"})
+        
+        queries_file = tmp_path / "queries.jsonl"
+        with open(queries_file, "w") as f:
+            for i in range(40):
+                f.write(json.dumps({"test_id": f"q{i}", "component": "fastapi", "query": "status"}) + "\n")
+            f.write(json.dumps({"test_id": "bad", "component": "carrier_pigeon", "query": "status"}) + "\n")
+        monkeypatch.chdir(tmp_path)
+        
+        async def run():
+            app = web.Application()
+            app.router.add_get("/", health)
+            async with TestServer(app) as server:
+                async with QuantumAgentRunner(concurrency={"fastapi": 4}, retries=0) as runner:
+                    runner.base_urls["fastapi"] = str(server.make_url("")).rstrip("/")
+                    responses_file = await runner.run_quantum_queries(str(queries_file))
+                    return responses_file, runner.last_report
+        
+        responses_file, report = asyncio.run(run())
+        
+        assert state["peak"] == 4
+        records = list(iter_queries(str(tmp_path / responses_file)))
+        assert len(records) == 41
+        ok = [record for record in records if record["component_status"] == "success"]
+        assert len(ok) == 40
+        assert "Quantum Resonance Lattice Online" in ok[0]["response"]
+        failed = next(record for record in records if record["test_id"] == "bad")
+        assert failed["response"] == "Error: Unknown component: carrier_pigeon"
+        
+        fastapi = report["components"]["fastapi"]
+        assert fastapi["succeeded"] == 40
+        assert 0 < fastapi["p50_ms"] <= fastapi["p95_ms"]
+    
+    def test_comprehensive_collection_keeps_input_order(self, tmp_path):
+        """Test collected responses line up with the test queries"""
+        from quantum_agent_runner import SacredTrinityAgentRunner
+        
+        delays = {"gradio": 0.05, "flask": 0.01, "fastapi": 0.001}
+        
+        async def collect(query_data):
+            await asyncio.sleep(delays[query_data["component"]])
+            return {**query_data, "response_metadata": {"response_status": "success"}}
+        
+        async def healthy():
+            return {}
+        
+        queries = make_queries(15, components=("gradio", "flask", "fastapi"))
+        output_path = tmp_path / "responses.jsonl"
+        
+        async def run():
+            runner = SacredTrinityAgentRunner(retries=0)
+            runner.check_trinity_health = healthy
+            runner.collect_component_response = collect
+            return await runner.run_comprehensive_collection(queries, output_path=str(output_path))
+        
+        responses = asyncio.run(run())
+        
+        assert [response["test_id"] for response in responses] == [query["test_id"] for query in queries]
+        assert [record["test_id"] for record in iter_queries(str(output_path))] == [q["test_id"] for q in queries]
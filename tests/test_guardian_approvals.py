@@ -6,6 +6,7 @@ import pytest
 import os
 import tempfile
 import shutil
+import time
 from pathlib import Path
 
 # Add parent directory to path
@@ -310,5 +311,159 @@ def test_approval_with_metadata(approval_system):
     assert approval.metadata["files_changed"] == 12
 
 
+def test_crash_recovery_truncated_log(temp_storage):
+    """Test a log truncated mid-record drops only the torn approval"""
+    system1 = GuardianApprovalSystem(storage_dir=temp_storage)
+    for i in range(3):
+        system1.record_approval(
+            decision_id=f"deployment_{i}",
+            decision_type="deployment",
+            guardian_id="test_guardian",
+            action="approve",
+            reasoning=f"Approval {i}"
+        )
+    system1.close()
+    
+    # Simulate a crash while the last record was being written
+    log_file = Path(temp_storage) / "approvals.jsonl"
+    data = log_file.read_bytes()
+    last_record = data.rstrip(b"\n").rfind(b"\n") + 1
+    log_file.write_bytes(data[:last_record + 40])
+    
+    system2 = GuardianApprovalSystem(storage_dir=temp_storage)
+    assert len(system2.approvals) == 2
+    assert system2.get_approval("deployment_2") is None
+    assert system2.get_approval_stats()["approved"] == 2
+    
+    # The torn bytes were compacted away, so appends land on a clean line
+    assert log_file.read_bytes().endswith(b"\n")
+    system2.record_approval(
+        decision_id="deployment_3",
+        decision_type="deployment",
+        guardian_id="test_guardian",
+        action="reject",
+        reasoning="After restart"
+    )
+    system2.close()
+    
+    system3 = GuardianApprovalSystem(storage_dir=temp_storage)
+    assert [a.decision_id for a in system3.approvals] == ["deployment_0", "deployment_1", "deployment_3"]
+    assert system3.is_approved("deployment_3") is False
+    system3.close()
+
+
+def test_failed_append_is_compacted_while_running(temp_storage):
+    """Test a partial append is repaired by compaction without a restart"""
+    system1 = GuardianApprovalSystem(storage_dir=temp_storage, fsync_interval=0.01)
+    system1.record_approval(
+        decision_id="deployment_0",
+        decision_type="deployment",
+        guardian_id="test_guardian",
+        action="approve",
+        reasoning="Before the disk filled up"
+    )
+    
+    class DiskFull:
+        """Writes half of each line, then fails like a full disk"""
+        def __init__(self, log):
+            self.log = log
+        
+        def write(self, data):
+            self.log.write(data[:len(data) // 2])
+            self.log.flush()
+            raise OSError(28, "No space left on device")
+        
+        def __getattr__(self, name):
+            return getattr(self.log, name)
+    
+    with system1._lock:
+        system1._log = DiskFull(system1._log)
+    approval = system1.record_approval(
+        decision_id="deployment_1",
+        decision_type="deployment",
+        guardian_id="test_guardian",
+        action="reject",
+        reasoning="During the outage"
+    )
+    assert system1.get_approval("deployment_1") == approval
+    
+    # The background thread rewrites the log and reopens a healthy handle
+    deadline = time.time() + 5
+    while system1._needs_compaction and time.time() < deadline:
+        time.sleep(0.01)
+    assert not system1._needs_compaction
+    system1.close()
+    
+    log_file = Path(temp_storage) / "approvals.jsonl"
+    assert len(log_file.read_bytes().splitlines()) == 2
+    system2 = GuardianApprovalSystem(storage_dir=temp_storage)
+    assert [a.decision_id for a in system2.approvals] == ["deployment_0", "deployment_1"]
+    assert system2.is_approved("deployment_1") is False
+    system2.close()
+
+
+def test_indexes_and_stats_match_full_scan(approval_system):
+    """Test indexed lookups and running stats agree with scanning all approvals"""
+    decision_types = ["deployment", "rollback", "scaling"]
+    actions = ["approve", "reject", "modify"]
+    for i in range(60):
+        approval_system.record_approval(
+            decision_id=f"decision_{i % 25}",
+            decision_type=decision_types[i % 3],
+            guardian_id="test_guardian",
+            action=actions[(i // 3) % 3],
+            reasoning=f"Approval {i}"
+        )
+    
+    approvals = approval_system.approvals
+    for decision_type in decision_types + [None]:
+        for action in actions + [None]:
+            expected = [
+                a for a in approvals
+                if (decision_type is None or a.decision_type == decision_type)
+                and (action is None or a.action == action)
+            ]
+            assert approval_system.get_all_approvals(decision_type, action, limit=4) == expected[-4:]
+    
+    for i in range(25):
+        latest = [a for a in approvals if a.decision_id == f"decision_{i}"][-1]
+        assert approval_system.get_approval(f"decision_{i}") is latest
+    
+    stats = approval_system.get_approval_stats()
+    assert stats["approved"] == sum(1 for a in approvals if a.action == "approve")
+    assert stats["by_type"]["rollback"] == {
+        "total": 20,
+        "approved": sum(1 for a in approvals if a.decision_type == "rollback" and a.action == "approve"),
+        "rejected": sum(1 for a in approvals if a.decision_type == "rollback" and a.action == "reject"),
+        "modified": sum(1 for a in approvals if a.decision_type == "rollback" and a.action == "modify")
+    }
+
+
+def test_legacy_json_migration(temp_storage):
+    """Test approvals from the old approvals.json file are migrated to the log"""
+    import json
+    legacy = [{
+        "approval_id": "approval_1",
+        "decision_id": "deployment_1",
+        "decision_type": "deployment",
+        "guardian_id": "test_guardian",
+        "action": "approve",
+        "reasoning": "Legacy approval",
+        "priority": "high",
+        "confidence": 0.9,
+        "timestamp": 1700000000.0,
+        "metadata": {}
+    }]
+    (Path(temp_storage) / "approvals.json").write_text(json.dumps(legacy, indent=2))
+    
+    system = GuardianApprovalSystem(storage_dir=temp_storage)
+    assert system.is_approved("deployment_1")
+    assert (Path(temp_storage) / "approvals.jsonl").exists()
+    assert not (Path(temp_storage) / "approvals.json").exists()
+    system.close()
+    
+    assert len(GuardianApprovalSystem(storage_dir=temp_storage).approvals) == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,257 @@
+"""
+Pi Network API Client Tests
+Tests for the pooled Pi Network API client: coalescing, caching and latency
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Add server directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "server"))
+
+from pi_api_client import PiNetworkAPIClient
+
+
+def make_stub_transport(calls, delay=0.0, status="pending"):
+    """Mock transport emulating the Pi Network payments API"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        if delay:
+            await asyncio.sleep(delay)
+        payment_id = request.url.path.split("/")[3]
+        payment_status = status
+        if request.url.path.endswith("/approve"):
+            payment_status = "approved"
+        elif request.url.path.endswith("/complete"):
+            payment_status = "completed"
+        return httpx.Response(
+            200,
+            json={"identifier": payment_id, "amount": 1.5, "status": payment_status}
+        )
+    return httpx.MockTransport(handler)
+
+
+class TestPiNetworkAPIClient:
+    """Tests for the pooled client"""
+    
+    @pytest.mark.asyncio
+    async def test_sends_api_key(self):
+        """Test requests carry the server API key"""
+        seen = []
+        
+        async def handler(request):
+            seen.append(request.headers["Authorization"])
+            return httpx.Response(200, json={})
+        
+        client = PiNetworkAPIClient("https://pi.test", "secret", transport=httpx.MockTransport(handler))
+        await client.get("v2/me")
+        await client.close()
+        
+        assert seen == ["Key secret"]
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_gets_are_coalesced(self):
+        """Test identical concurrent GETs share one upstream request"""
+        calls = []
+        client = PiNetworkAPIClient("https://pi.test", "key", transport=make_stub_transport(calls, delay=0.05))
+        
+        results = await asyncio.gather(*[client.get("v2/payments/p1") for _ in range(20)])
+        await client.close()
+        
+        assert len(calls) == 1
+        assert all(result["identifier"] == "p1" for result in results)
+        assert client.stats["coalesced"] == 19
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_errors_reach_all_waiters(self):
+        """Test a failed shared request raises for every waiter"""
+        async def handler(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(404, json={"error": "not_found"})
+        
+        client = PiNetworkAPIClient("https://pi.test", "key", transport=httpx.MockTransport(handler))
+        results = await asyncio.gather(
+            *[client.get("v2/payments/missing") for _ in range(3)],
+            return_exceptions=True
+        )
+        await client.close()
+        
+        assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+    
+    @pytest.mark.asyncio
+    async def test_payment_cache_and_invalidation(self):
+        """Test payment lookups are cached until invalidated"""
+        calls = []
+        client = PiNetworkAPIClient("https://pi.test", "key", transport=make_stub_transport(calls))
+        
+        await client.get_payment("p1")
+        await client.get_payment("p1")
+        assert len(calls) == 1
+        assert client.stats["cache_hits"] == 1
+        
+        client.invalidate_payment("p1")
+        await client.get_payment("p1")
+        assert len(calls) == 2
+        await client.close()
+    
+    @pytest.mark.asyncio
+    async def test_payment_cache_expires(self):
+        """Test cached lookups expire after the TTL"""
+        calls = []
+        client = PiNetworkAPIClient(
+            "https://pi.test", "key",
+            payment_cache_ttl=0.01,
+            transport=make_stub_transport(calls)
+        )
+        
+        await client.get_payment("p1")
+        await asyncio.sleep(0.02)
+        await client.get_payment("p1")
+        await client.close()
+        
+        assert len(calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_invalidation_during_lookup_is_not_cached(self):
+        """Test a lookup overtaken by a webhook does not cache stale data"""
+        calls = []
+        client = PiNetworkAPIClient("https://pi.test", "key", transport=make_stub_transport(calls, delay=0.05))
+        
+        lookup = asyncio.create_task(client.get_payment("p1"))
+        await asyncio.sleep(0.01)
+        client.invalidate_payment("p1")
+        await lookup
+        
+        await client.get_payment("p1")
+        await client.close()
+        
+        assert len(calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_complete_primes_payment_cache(self):
+        """Test completing a payment makes the next lookup free"""
+        calls = []
+        client = PiNetworkAPIClient("https://pi.test", "key", transport=make_stub_transport(calls))
+        
+        await client.approve_payment("p1")
+        await client.complete_payment("p1", "tx_1")
+        payment = await client.get_payment("p1")
+        await client.close()
+        
+        assert payment["status"] == "completed"
+        assert [method for method, _ in calls] == ["POST", "POST"]
+
+
+class StubPiServer:
+    """Minimal HTTP/1.1 keep-alive server emulating the Pi payments API"""
+    
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}"
+        return self
+    
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+    
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                length = 0
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b""):
+                        break
+                    name, _, value = header.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                
+                status = "completed" if path.endswith("/complete") else "approved"
+                body = json.dumps({"identifier": path.split("/")[3], "amount": 1.0, "status": status}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def per_call_round_trip(base_url, payment_id):
+    """Approve then complete with a fresh client per call (previous behaviour)"""
+    for method, endpoint, data in (
+        ("POST", f"v2/payments/{payment_id}/approve", None),
+        ("POST", f"v2/payments/{payment_id}/complete", {"txid": "tx"}),
+        ("GET", f"v2/payments/{payment_id}", None)
+    ):
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.request(method, f"{base_url}/{endpoint}", json=data)
+            response.raise_for_status()
+
+
+async def pooled_round_trip(client, payment_id):
+    """Approve then complete over the shared pooled client"""
+    await client.approve_payment(payment_id)
+    await client.complete_payment(payment_id, "tx")
+    await client.get_payment(payment_id)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class TestPiAPIClientPerformance:
+    """Benchmark approve→complete round trips against a local stub Pi API"""
+    
+    @pytest.mark.asyncio
+    async def test_pooled_round_trip_latency(self):
+        """Test pooled client p50/p99 beat a client-per-call baseline"""
+        server = await StubPiServer().start()
+        pooled = PiNetworkAPIClient(server.url, "key")
+        iterations = 40
+        
+        try:
+            baseline, shared = [], []
+            for i in range(iterations):
+                start = time.perf_counter()
+                await per_call_round_trip(server.url, f"base_{i}")
+                baseline.append(time.perf_counter() - start)
+                
+                start = time.perf_counter()
+                await pooled_round_trip(pooled, f"pool_{i}")
+                shared.append(time.perf_counter() - start)
+        finally:
+            await pooled.close()
+            await server.stop()
+        
+        report = {
+            "per_call_p50_ms": percentile(baseline, 50) * 1000,
+            "per_call_p99_ms": percentile(baseline, 99) * 1000,
+            "pooled_p50_ms": percentile(shared, 50) * 1000,
+            "pooled_p99_ms": percentile(shared, 99) * 1000
+        }
+        print(f"\napprove→complete round trip: {report}")
+        
+        # The pooled client skips client setup, the TCP handshake and the
+        # follow-up lookup, so it must be clearly faster at the median
+        assert report["pooled_p50_ms"] < report["per_call_p50_ms"]
+        assert statistics.median(shared) * 1.5 < statistics.median(baseline)
@@ -3,6 +3,10 @@ Pi Network Integration Module Tests
 Comprehensive test suite for Pi Network integration components
 """
 
+import gc
+import json
+import os
+import subprocess
 import pytest
 import time
 import asyncio
@@ -21,9 +25,19 @@ from pi_network import (
     PiNetworkError,
     PiAuthenticationError,
     PiPaymentError,
-    PiConfigurationError
+    PiConfigurationError,
+    InMemoryStateStore,
+    SQLiteStateStore,
+    create_state_store
 )
 from pi_network.payments import PaymentStatus
+from pi_network.ethical_guardian import (
+    PiNetworkEthicalGuardian,
+    UserActivityIndex,
+    EthicalAuditResult,
+    RiskLevel,
+    ComplianceStatus
+)
 
 
 class TestPiNetworkConfig:
@@ -227,14 +241,43 @@ class TestPiAuthManager:
         )
         session_id = result["session_id"]
         
-        # Manually expire it
-        auth._sessions[session_id]["expires_at"] = time.time() - 1
+        # Expire it through a refresh so the expiry index is re-keyed
+        auth.refresh_session(session_id, extend_seconds=-1)
         
         # Cleanup
         cleaned = auth.cleanup_expired_sessions()
         assert cleaned == 1
         assert auth.get_active_sessions_count() == 0
     
+    def test_refresh_rekeys_expiry_index(self):
+        """Test refreshed sessions survive cleanup of their old expiry"""
+        config = PiNetworkConfig()
+        auth = PiAuthManager(config)
+        
+        short = auth.authenticate_user("uid_short", "short", "token")["session_id"]
+        kept = auth.authenticate_user("uid_kept", "kept", "token")["session_id"]
+        
+        auth.refresh_session(short, extend_seconds=-1)
+        auth.refresh_session(kept, extend_seconds=7200)
+        
+        # Past the original one-hour expiry, only the short session goes
+        assert auth._expire_sessions(time.time() + 4000) == 1
+        assert auth.get_active_sessions_count() == 1
+        assert auth.verify_session(kept) is not None
+        assert auth.verify_session(short) is None
+    
+    def test_expiry_index_stays_bounded(self):
+        """Test repeated refreshes do not grow the expiry index unbounded"""
+        config = PiNetworkConfig()
+        auth = PiAuthManager(config)
+        
+        session_id = auth.authenticate_user("uid", "user", "token")["session_id"]
+        for _ in range(1000):
+            auth.refresh_session(session_id)
+        
+        assert len(auth._expiry_heap) <= 2 * auth.get_active_sessions_count() + 64
+        assert auth.verify_session(session_id) is not None
+    
     def test_verify_session_signature(self):
         """Test HMAC signature verification"""
         config = PiNetworkConfig()
@@ -413,6 +456,82 @@ class TestPiPaymentManager:
         assert stats["completed_volume_pi"] == 2.5
         assert stats["unique_users"] == 1
     
+    def test_payment_statistics_track_transitions(self):
+        """Test running statistics follow every state transition"""
+        config = PiNetworkConfig()
+        payments = PiPaymentManager(config)
+        
+        created = [
+            payments.create_payment(amount=0.1, memo="Test", user_id=f"user{i % 2}")
+            for i in range(5)
+        ]
+        payments.approve_payment(created[0].payment_id)
+        payments.complete_payment(created[0].payment_id, "tx_0")
+        payments.complete_payment(created[1].payment_id, "tx_1")
+        payments.approve_payment(created[2].payment_id)
+        payments.cancel_payment(created[2].payment_id)
+        payments.cancel_payment(created[3].payment_id)
+        
+        stats = payments.get_payment_statistics()
+        
+        assert stats["total_payments"] == 5
+        assert stats["status_breakdown"] == {
+            "pending": 1,
+            "approved": 0,
+            "completed": 2,
+            "cancelled": 2,
+            "failed": 0
+        }
+        assert stats["completed_volume_pi"] == 0.2
+        assert stats["unique_users"] == 2
+    
+    def test_get_user_payments_by_status_newest_first(self):
+        """Test status-filtered user history is newest first and limited"""
+        config = PiNetworkConfig()
+        payments = PiPaymentManager(config)
+        
+        created = [
+            payments.create_payment(amount=float(i + 1), memo=f"Payment {i}", user_id="test_user")
+            for i in range(6)
+        ]
+        payments.create_payment(amount=1.0, memo="Other", user_id="other_user")
+        for payment in created[::2]:
+            payments.complete_payment(payment.payment_id, "tx_hash")
+        
+        completed = payments.get_user_payments("test_user", PaymentStatus.COMPLETED)
+        assert [p.memo for p in completed] == ["Payment 4", "Payment 2", "Payment 0"]
+        
+        pending = payments.get_user_payments("test_user", PaymentStatus.PENDING, limit=2)
+        assert [p.memo for p in pending] == ["Payment 5", "Payment 3"]
+        
+        everything = payments.get_user_payments("test_user", limit=4)
+        assert [p.memo for p in everything] == ["Payment 5", "Payment 4", "Payment 3", "Payment 2"]
+        
+        assert payments.get_user_payments("missing_user", PaymentStatus.COMPLETED) == []
+    
+    def test_get_user_payments_by_status_follows_transition_order(self):
+        """Test status history is newest first by when payments entered the status"""
+        config = PiNetworkConfig()
+        payments = PiPaymentManager(config)
+        
+        created = [
+            payments.create_payment(amount=1.0, memo=f"Payment {i}", user_id="test_user")
+            for i in range(5)
+        ]
+        for i in (3, 0, 4, 1):
+            payments.complete_payment(created[i].payment_id, "tx_hash")
+        
+        completed = payments.get_user_payments("test_user", PaymentStatus.COMPLETED)
+        assert [p.memo for p in completed] == ["Payment 1", "Payment 4", "Payment 0", "Payment 3"]
+        
+        newest = payments.get_user_payments("test_user", PaymentStatus.COMPLETED, limit=2)
+        assert [p.memo for p in newest] == ["Payment 1", "Payment 4"]
+        assert payments.get_user_payments("test_user", PaymentStatus.COMPLETED, limit=0) == []
+        
+        # Unfiltered history stays in creation order
+        everything = payments.get_user_payments("test_user", limit=2)
+        assert [p.memo for p in everything] == ["Payment 4", "Payment 3"]
+    
     def test_verify_payment_testnet(self):
         """Test payment verification in testnet mode"""
         config = PiNetworkConfig(
@@ -551,6 +670,343 @@ class TestPiNetworkClient:
         assert verification is not None
 
 
+# Worker process used by the multi-worker consistency test. It reads one JSON
+# command per line from stdin and answers with one JSON line on stdout.
+STATE_WORKER_SCRIPT = """
+import json
+import sys
+
+sys.path.insert(0, sys.argv[1])
+
+from pi_network import PiNetworkClient, PiNetworkConfig
+
+config = PiNetworkConfig(state_store_url="sqlite:///" + sys.argv[2])
+client = PiNetworkClient(config)
+client.payments.sync_interval = 0
+client.auth.sync_interval = 0
+
+for line in sys.stdin:
+    command = json.loads(line)
+    op = command["op"]
+    result = None
+    if op == "create":
+        result = client.create_payment(command["amount"], "worker", command["user"]).payment_id
+    elif op == "authenticate":
+        result = client.authenticate_user(command["user"], command["user"], "token")["session_id"]
+    elif op == "approve":
+        result = client.approve_payment(command["payment_id"]).status.value
+    elif op == "complete":
+        result = client.complete_payment(command["payment_id"], command["tx_hash"]).status.value
+    elif op == "status":
+        payment = client.get_payment(command["payment_id"])
+        result = payment.status.value if payment else None
+    elif op == "session":
+        result = client.verify_session(command["session_id"]) is not None
+    elif op == "logout":
+        result = client.logout(command["session_id"])
+    elif op == "stats":
+        result = client.payments.get_payment_statistics()["status_breakdown"]
+    elif op == "flush":
+        result = client.store.flush()
+    print(json.dumps(result), flush=True)
+
+client.close()
+"""
+
+
+class StateWorker:
+    """Line-protocol handle on a worker subprocess sharing a state store"""
+    
+    def __init__(self, script_path, db_path):
+        server_dir = str(Path(__file__).parent.parent / "server")
+        self.process = subprocess.Popen(
+            [sys.executable, str(script_path), server_dir, str(db_path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True
+        )
+    
+    def call(self, op, **kwargs):
+        self.process.stdin.write(json.dumps({"op": op, **kwargs}) + "\n")
+        self.process.stdin.flush()
+        return json.loads(self.process.stdout.readline())
+    
+    def stop(self):
+        self.process.stdin.close()
+        self.process.wait(timeout=10)
+
+
+class TestStateStore:
+    """Tests for pluggable payment/session state stores"""
+    
+    def test_create_state_store(self, tmp_path):
+        """Test store selection from URL"""
+        assert isinstance(create_state_store("memory"), InMemoryStateStore)
+        assert isinstance(create_state_store(""), InMemoryStateStore)
+        
+        store = create_state_store(f"sqlite:///{tmp_path / 'state.db'}")
+        assert isinstance(store, SQLiteStateStore)
+        store.close()
+        
+        with pytest.raises(PiConfigurationError):
+            create_state_store("redis://localhost")
+    
+    def test_sqlite_write_behind_coalescing(self, tmp_path):
+        """Test repeated writes to a key collapse into one flushed row"""
+        store = SQLiteStateStore(str(tmp_path / "state.db"), flush_interval=60)
+        
+        for i in range(10):
+            store.put("payments", "pay_1", {"version": i})
+        store.put("payments", "pay_2", {"version": 0})
+        store.delete("payments", "pay_2")
+        
+        # Buffered writes are readable before the flush
+        assert store.is_pending("payments", "pay_1")
+        assert store.get("payments", "pay_1") == {"version": 9}
+        assert store.get("payments", "pay_2") is None
+        
+        assert store.flush() == 2
+        assert not store.is_pending("payments", "pay_1")
+        assert store.load("payments") == {"pay_1": {"version": 9}}
+        
+        changes, cursor = store.changes_since("payments", 0)
+        assert changes == {"pay_1": {"version": 9}, "pay_2": None}
+        assert store.changes_since("payments", cursor) == ({}, cursor)
+        store.close()
+    
+    def test_sqlite_background_flush(self, tmp_path):
+        """Test the background flusher persists without an explicit flush"""
+        db_path = str(tmp_path / "state.db")
+        store = SQLiteStateStore(db_path, flush_interval=0.05)
+        store.put("sessions", "s1", {"pi_uid": "u1"})
+        
+        deadline = time.time() + 5
+        while store.is_pending("sessions", "s1") and time.time() < deadline:
+            time.sleep(0.01)
+        
+        other = SQLiteStateStore(db_path)
+        assert other.get("sessions", "s1") == {"pi_uid": "u1"}
+        other.close()
+        store.close()
+    
+    def test_state_survives_restart(self, tmp_path):
+        """Test payments and sessions are restored from SQLite"""
+        config = PiNetworkConfig(state_store_url=f"sqlite:///{tmp_path / 'state.db'}")
+        
+        client = PiNetworkClient(config)
+        payment = client.create_payment(amount=3.0, memo="Persist", user_id="user1")
+        client.complete_payment(payment.payment_id, "tx_persist")
+        session = client.authenticate_user("uid1", "pioneer", "token")
+        client.close()
+        
+        restarted = PiNetworkClient(config)
+        restored = restarted.get_payment(payment.payment_id)
+        
+        assert restored.status == PaymentStatus.COMPLETED
+        assert restored.tx_hash == "tx_persist"
+        assert restarted.verify_session(session["session_id"])["username"] == "pioneer"
+        
+        stats = restarted.payments.get_payment_statistics()
+        assert stats["status_breakdown"]["completed"] == 1
+        assert stats["completed_volume_pi"] == 3.0
+        assert restarted.get_user_payments("user1")[0].payment_id == payment.payment_id
+        restarted.close()
+    
+    def test_multi_worker_consistency(self, tmp_path):
+        """Test two processes sharing one store observe each other's changes"""
+        script_path = tmp_path / "state_worker.py"
+        script_path.write_text(STATE_WORKER_SCRIPT)
+        db_path = tmp_path / "shared_state.db"
+        
+        worker_a = StateWorker(script_path, db_path)
+        worker_b = StateWorker(script_path, db_path)
+        try:
+            payment_id = worker_a.call("create", amount=2.0, user="pioneer")
+            session_id = worker_a.call("authenticate", user="pioneer")
+            assert worker_a.call("flush") == 2
+            
+            # Worker B reads through to the store for unknown keys
+            assert worker_b.call("status", payment_id=payment_id) == "pending"
+            assert worker_b.call("session", session_id=session_id) is True
+            
+            # Worker B advances the payment; worker A picks it up on sync
+            assert worker_b.call("approve", payment_id=payment_id) == "approved"
+            assert worker_b.call("complete", payment_id=payment_id, tx_hash="tx_b") == "completed"
+            worker_b.call("flush")
+            assert worker_a.call("status", payment_id=payment_id) == "completed"
+            
+            stats_a = worker_a.call("stats")
+            stats_b = worker_b.call("stats")
+            assert stats_a == stats_b
+            assert stats_a["completed"] == 1 and stats_a["pending"] == 0
+            
+            # Logout on worker A invalidates the session on worker B
+            assert worker_a.call("logout", session_id=session_id) is True
+            worker_a.call("flush")
+            assert worker_b.call("session", session_id=session_id) is False
+        finally:
+            worker_a.stop()
+            worker_b.stop()
+
+
+class TestEthicalGuardian:
+    """Tests for Pi Network ethical guardian indexes and aggregates"""
+    
+    def test_activity_index_window(self):
+        """Test sliding-window counts expire old events"""
+        index = UserActivityIndex(window_seconds=60)
+        
+        index.record("alice", timestamp=1000.0)
+        index.record("alice", timestamp=1000.5)
+        index.record("alice", timestamp=1030.0)
+        index.record("bob", timestamp=1030.0)
+        
+        assert index.count("alice", now=1030.0) == 3
+        assert index.count("bob", now=1030.0) == 1
+        assert index.count("alice", now=1075.0) == 1
+        assert index.count("alice", now=1100.0) == 0
+        assert index.count("carol", now=1100.0) == 0
+    
+    def test_activity_index_forgets_idle_users(self):
+        """Test idle users are dropped from the index"""
+        index = UserActivityIndex(window_seconds=60)
+        index.record("alice", timestamp=time.time() - 120)
+        
+        assert index.count("alice") == 0
+        assert len(index) == 0
+    
+    def test_payment_velocity_is_per_user(self):
+        """Test payment frequency only counts the auditing user"""
+        guardian = PiNetworkEthicalGuardian()
+        
+        for i in range(12):
+            guardian.audit_payment(f"pi_pay_{i}", 1.0, "busy_user")
+        
+        busy = guardian.audit_payment("pi_pay_busy", 1.0, "busy_user")
+        quiet = guardian.audit_payment("pi_pay_quiet", 1.0, "quiet_user")
+        
+        assert "High payment frequency detected" in busy.findings
+        assert "High payment frequency detected" not in quiet.findings
+    
+    def test_auth_velocity_matches_exact_user(self):
+        """Test auth frequency does not match users sharing a prefix"""
+        guardian = PiNetworkEthicalGuardian()
+        
+        for _ in range(6):
+            guardian.audit_authentication("user_1")
+        
+        assert guardian._get_user_recent_auth_count("user_1") == 6
+        assert guardian._get_user_recent_auth_count("user_") == 0
+    
+    def test_history_retention(self):
+        """Test audit history is bounded by max_history"""
+        guardian = PiNetworkEthicalGuardian(max_history=5)
+        
+        for i in range(12):
+            guardian.audit_payment(f"pi_pay_{i}", 1.0, f"user_{i}")
+        
+        assert len(guardian.audit_history) == 5
+        assert guardian.total_audits_recorded == 12
+        assert guardian.audit_history[0].transaction_id == "pi_pay_7"
+    
+    def test_audit_summary_matches_rescan(self):
+        """Test aggregate-served summary equals a direct rescan"""
+        guardian = PiNetworkEthicalGuardian(max_history=50)
+        
+        for i in range(80):
+            metadata = {"note": "suspicious"} if i % 7 == 0 else None
+            guardian.audit_payment(f"pi_pay_{i}", float(i * 3), f"user_{i % 4}", metadata)
+        
+        for limit in (1, 10, 49, 50, 100):
+            summary = guardian.get_audit_summary(limit)
+            recent = list(guardian.audit_history)[-limit:]
+            
+            assert summary["total_audits"] == len(recent)
+            for level in RiskLevel:
+                expected = sum(1 for a in recent if a.risk_level == level)
+                assert summary["risk_distribution"][level.value] == expected
+            for status in ComplianceStatus:
+                expected = sum(1 for a in recent if a.compliance_status == status)
+                assert summary["compliance_distribution"][status.value] == expected
+            assert summary["average_risk_score"] == pytest.approx(
+                sum(a.risk_score for a in recent) / len(recent)
+            )
+    
+    def test_audit_summary_empty(self):
+        """Test summary shape with no audits"""
+        guardian = PiNetworkEthicalGuardian()
+        
+        summary = guardian.get_audit_summary()
+        assert summary["total_audits"] == 0
+        assert summary["high_risk_count"] == 0
+    
+    def test_high_risk_audits_newest_first(self):
+        """Test high-risk audits are returned newest first and respect retention"""
+        guardian = PiNetworkEthicalGuardian(max_history=10)
+        
+        for i in range(15):
+            guardian.audit_payment(f"pi_pay_{i}", 500.0, "user", {"flag": "suspicious"})
+        
+        high_risk = guardian.get_high_risk_audits(limit=20)
+        
+        assert len(high_risk) == 10
+        assert high_risk[0]["transaction_id"] == "pi_pay_14"
+        assert high_risk[-1]["transaction_id"] == "pi_pay_5"
+        assert guardian.get_high_risk_audits(limit=3)[2]["transaction_id"] == "pi_pay_12"
+
+
+class TestEthicalGuardianPerformance:
+    """Benchmarks for ethical guardian audit latency"""
+    
+    @staticmethod
+    def _seed(guardian, count):
+        """Seed historical audits directly, bypassing scoring"""
+        now = time.time()
+        seed_audit = EthicalAuditResult(
+            transaction_id="pi_pay_seed",
+            risk_level=RiskLevel.LOW,
+            risk_score=0.02,
+            compliance_status=ComplianceStatus.COMPLIANT,
+            findings=[],
+            recommendations=[],
+            audited_at=now
+        )
+        for i in range(count):
+            guardian._record_audit(seed_audit)
+            guardian._payment_activity.record(f"seed_user_{i % 1000}", now)
+    
+    @staticmethod
+    def _time_audits(guardian, iterations=2000):
+        """Average nanoseconds per audit_payment call"""
+        # Like timeit, keep GC pauses over the seeded heap out of the timing
+        gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            for i in range(iterations):
+                guardian.audit_payment(f"pi_pay_bench_{i}", 5.0, f"bench_user_{i % 50}")
+            return (time.perf_counter_ns() - start) / iterations
+        finally:
+            gc.enable()
+    
+    def test_audit_latency_flat_with_history_size(self):
+        """Test audit latency stays flat from 1k to 1M historical audits"""
+        small = PiNetworkEthicalGuardian(max_history=1_000_000)
+        self._seed(small, 1_000)
+        large = PiNetworkEthicalGuardian(max_history=1_000_000)
+        self._seed(large, 1_000_000)
+        
+        # Warm up both instances before timing
+        self._time_audits(small, 200)
+        self._time_audits(large, 200)
+        
+        small_ns = self._time_audits(small)
+        large_ns = self._time_audits(large)
+        
+        # A linear scan would be ~1000x slower; allow generous noise margin
+        assert large_ns < small_ns * 3
+        assert large_ns < 1_000_000
+
+
 # Run tests
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
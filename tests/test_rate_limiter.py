@@ -0,0 +1,259 @@
+"""
+Rate Limiter Tests
+Tests for the GCRA rate limiter, route classes and shared SQLite backend
+"""
+
+import asyncio
+import gc
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+# Add server directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "server"))
+
+from rate_limiter import (InMemoryRateLimitBackend, RateLimiter,
+                          RateLimitRule, SQLiteRateLimitBackend,
+                          create_rate_limit_backend)
+
+
+class FakeClock:
+    """Manually advanced clock"""
+    
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter:
+    """Tests for GCRA limiting"""
+    
+    def test_allows_burst_then_limits(self):
+        """Test a client gets its full burst and is then limited"""
+        limiter = RateLimiter(requests_per_minute=60, clock=FakeClock())
+        
+        results = [limiter.is_allowed("1.2.3.4") for _ in range(61)]
+        
+        assert all(results[:60])
+        assert results[60] is False
+    
+    def test_replenishes_at_sustained_rate(self):
+        """Test capacity returns one request per emission interval"""
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=60, clock=clock)
+        for _ in range(60):
+            limiter.is_allowed("client")
+        
+        decision = limiter.check("client")
+        assert not decision.allowed
+        assert decision.retry_after == pytest.approx(1.0)
+        
+        clock.now += 1.0
+        assert limiter.is_allowed("client")
+        assert not limiter.is_allowed("client")
+    
+    def test_remaining_counts_down(self):
+        """Test decisions report remaining requests"""
+        limiter = RateLimiter(requests_per_minute=5, clock=FakeClock())
+        
+        remaining = [limiter.check("client").remaining for _ in range(5)]
+        
+        assert remaining == [4, 3, 2, 1, 0]
+    
+    def test_clients_are_independent(self):
+        """Test one client's usage does not affect another"""
+        limiter = RateLimiter(requests_per_minute=1, clock=FakeClock())
+        
+        assert limiter.is_allowed("a")
+        assert not limiter.is_allowed("a")
+        assert limiter.is_allowed("b")
+    
+    def test_route_classes(self):
+        """Test routes use the longest matching limit class"""
+        limiter = RateLimiter(
+            requests_per_minute=100,
+            routes=[
+                ("/api", RateLimitRule("api", 50)),
+                ("/api/payments", RateLimitRule("payments", 2)),
+            ],
+            clock=FakeClock()
+        )
+        
+        assert limiter.rule_for("/api/payments/approve").name == "payments"
+        assert limiter.rule_for("/api/metrics").name == "api"
+        assert limiter.rule_for("/").name == "default"
+        
+        assert limiter.is_allowed("client", "/api/payments/approve")
+        assert limiter.is_allowed("client", "/api/payments/complete")
+        assert not limiter.is_allowed("client", "/api/payments/approve")
+        # Other classes keep their own budget
+        assert limiter.is_allowed("client", "/api/metrics")
+        assert limiter.is_allowed("client", "/")
+    
+    def test_expired_keys_are_swept(self):
+        """Test idle clients are dropped so memory stays bounded"""
+        clock = FakeClock()
+        backend = InMemoryRateLimitBackend(shards=4, sweep_interval=0)
+        limiter = RateLimiter(requests_per_minute=60, backend=backend, clock=clock)
+        
+        for i in range(1000):
+            limiter.is_allowed(f"10.0.{i // 256}.{i % 256}")
+        assert len(backend) == 1000
+        
+        clock.now += 120
+        for _ in range(4):
+            limiter.is_allowed("late")
+        
+        assert len(backend) == 1
+    
+    def test_create_backend_from_url(self, tmp_path):
+        """Test backend URLs"""
+        assert isinstance(create_rate_limit_backend("memory"), InMemoryRateLimitBackend)
+        
+        backend = create_rate_limit_backend(f"sqlite:///{tmp_path / 'limits.db'}")
+        assert isinstance(backend, SQLiteRateLimitBackend)
+        backend.close()
+        
+        with pytest.raises(ValueError):
+            create_rate_limit_backend("redis://localhost")
+
+
+class TestSQLiteRateLimitBackend:
+    """Tests for limits shared between workers"""
+    
+    def test_limits_shared_between_workers(self, tmp_path):
+        """Test two limiters on one database share a client's budget"""
+        path = str(tmp_path / "limits.db")
+        clock = FakeClock()
+        worker_a = RateLimiter(requests_per_minute=10, backend=SQLiteRateLimitBackend(path), clock=clock)
+        worker_b = RateLimiter(requests_per_minute=10, backend=SQLiteRateLimitBackend(path), clock=clock)
+        
+        allowed = [
+            (worker_a if i % 2 else worker_b).is_allowed("client")
+            for i in range(12)
+        ]
+        
+        assert allowed.count(True) == 10
+        assert allowed[-2:] == [False, False]
+        
+        clock.now += 6
+        assert worker_a.is_allowed("client")
+        
+        worker_a.backend.close()
+        worker_b.backend.close()
+    
+    def test_expired_rows_are_swept(self, tmp_path):
+        """Test rows for idle clients are deleted"""
+        clock = FakeClock()
+        backend = SQLiteRateLimitBackend(str(tmp_path / "limits.db"), sweep_interval=0)
+        limiter = RateLimiter(requests_per_minute=60, backend=backend, clock=clock)
+        
+        for i in range(50):
+            limiter.is_allowed(f"client_{i}")
+        clock.now += 120
+        limiter.is_allowed("late")
+        
+        assert len(backend) == 1
+        backend.close()
+    
+    def test_locked_store_fails_open_off_event_loop(self, tmp_path):
+        """Test a held write lock neither stalls the event loop nor rejects requests"""
+        path = str(tmp_path / "limits.db")
+        backend = SQLiteRateLimitBackend(path, busy_timeout=0.3)
+        limiter = RateLimiter(requests_per_minute=1, backend=backend, clock=FakeClock())
+        
+        # Another worker holds the write lock
+        holder = sqlite3.connect(path, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        
+        async def check_while_ticking():
+            ticks = 0
+            
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            
+            ticker = asyncio.create_task(tick())
+            started = time.perf_counter()
+            decisions = [await limiter.acheck("client") for _ in range(2)]
+            elapsed = time.perf_counter() - started
+            ticker.cancel()
+            return decisions, ticks, elapsed
+        
+        decisions, ticks, elapsed = asyncio.run(check_while_ticking())
+        
+        # Both waited out busy_timeout, then failed open despite the 1/min limit
+        assert elapsed >= 0.5
+        assert [decision.allowed for decision in decisions] == [True, True]
+        # A check blocking the loop would leave the ticker no turns at all
+        assert ticks >= 10
+        
+        holder.execute("ROLLBACK")
+        holder.close()
+        assert limiter.is_allowed("client")
+        assert not limiter.is_allowed("client")
+        limiter.close()
+
+
+class ListRateLimiter:
+    """Previous timestamp-list implementation, kept as the benchmark baseline"""
+    
+    def __init__(self, requests_per_minute=60):
+        self.requests_per_minute = requests_per_minute
+        self.requests = defaultdict(list)
+    
+    def is_allowed(self, client_id, now):
+        window_start = now - 60
+        self.requests[client_id] = [t for t in self.requests[client_id] if t > window_start]
+        if len(self.requests[client_id]) >= self.requests_per_minute:
+            return False
+        self.requests[client_id].append(now)
+        return True
+
+
+class TestRateLimiterPerformance:
+    """Benchmark per-request cost with many active clients"""
+    
+    def test_gcra_faster_than_timestamp_lists(self):
+        """Test GCRA checks beat the list rebuild at 60 req/min across 20k IPs"""
+        clients = [f"10.{i // 65536}.{(i // 256) % 256}.{i % 256}" for i in range(20000)]
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=60, clock=clock)
+        baseline = ListRateLimiter(requests_per_minute=60)
+        
+        # Warm both limiters to a steady state of ~50 requests per client
+        for step in range(50):
+            clock.now += 1
+            for client in clients:
+                limiter.is_allowed(client)
+                baseline.is_allowed(client, clock.now)
+        
+        gc.disable()
+        try:
+            clock.now += 1
+            start = time.perf_counter()
+            for client in clients:
+                baseline.is_allowed(client, clock.now)
+            list_elapsed = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            for client in clients:
+                limiter.is_allowed(client)
+            gcra_elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        
+        print(
+            f"\n20k clients: timestamp lists {list_elapsed * 1000:.1f}ms, "
+            f"GCRA {gcra_elapsed * 1000:.1f}ms"
+        )
+        assert gcra_elapsed < list_elapsed
+        assert len(limiter.backend) == len(clients)
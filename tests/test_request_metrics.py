@@ -0,0 +1,181 @@
+"""
+Request Metrics Tests
+Tests for sliding-window request rates, latency histograms and the
+Prometheus /api/metrics endpoint
+"""
+
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add server directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "server"))
+
+from request_metrics import (LatencyHistogram, PrometheusExposition,
+                             RequestMetrics, SlidingWindowCounter)
+
+
+class TestSlidingWindowCounter:
+    """Tests for the per-second ring buffer"""
+    
+    def test_windows(self):
+        """Test trailing window totals and rates"""
+        counter = SlidingWindowCounter(horizon_seconds=900)
+        start = 1_000_000
+        
+        # 10 requests per second for 10 minutes
+        for second in range(600):
+            counter.record(start + second, count=10)
+        now = start + 599
+        
+        assert counter.total(60, now) == 600
+        assert counter.rate(60, now) == pytest.approx(10.0)
+        assert counter.rate(300, now) == pytest.approx(10.0)
+        assert counter.rate(900, now) == pytest.approx(600 * 10 / 900)
+        assert counter.last_second(now) == 10
+    
+    def test_stale_buckets_are_ignored(self):
+        """Test buckets from a previous lap of the ring do not count"""
+        counter = SlidingWindowCounter(horizon_seconds=60)
+        counter.record(1_000_000, count=5)
+        
+        assert counter.total(60, 1_000_000) == 5
+        assert counter.total(60, 1_000_060) == 0
+        
+        # Same ring slot one lap later starts from zero
+        counter.record(1_000_060)
+        assert counter.total(60, 1_000_060) == 1
+    
+    def test_idle_second_reports_zero(self):
+        """Test last_second does not report an old count after idling"""
+        counter = SlidingWindowCounter(horizon_seconds=60)
+        counter.record(1_000_000, count=7)
+        
+        assert counter.last_second(1_000_001) == 7
+        assert counter.last_second(1_000_005) == 0
+
+
+class TestLatencyHistogram:
+    """Tests for the HDR-style histogram"""
+    
+    def test_percentiles_within_relative_error(self):
+        """Test percentile estimates stay within the sub-bucket resolution"""
+        rng = random.Random(7)
+        samples = [rng.lognormvariate(-4, 1) for _ in range(20000)]
+        histogram = LatencyHistogram(sub_buckets=8)
+        for sample in samples:
+            histogram.record(sample)
+        
+        ordered = sorted(samples)
+        for pct in (50, 90, 99):
+            exact = ordered[math.ceil(len(ordered) * pct / 100) - 1]
+            estimate = histogram.percentile(pct)
+            assert exact <= estimate <= exact * (1 + 1 / 8) + 1e-12
+        
+        assert histogram.count == len(samples)
+        assert histogram.sum == pytest.approx(sum(samples))
+    
+    def test_out_of_range_values(self):
+        """Test tiny and huge values land in the edge buckets"""
+        histogram = LatencyHistogram(min_value=0.001, max_value=1.0)
+        histogram.record(0.0)
+        histogram.record(1000.0)
+        
+        assert histogram.counts[0] == 1
+        assert histogram.counts[-1] == 1
+    
+    def test_cumulative_buckets(self):
+        """Test Prometheus buckets are cumulative and end with +Inf"""
+        histogram = LatencyHistogram(min_value=0.001, max_value=1.0)
+        for value in (0.0005, 0.0015, 0.003, 0.5, 5.0):
+            histogram.record(value)
+        
+        buckets = histogram.cumulative_buckets()
+        bounds = [bound for bound, _ in buckets]
+        counts = [count for _, count in buckets]
+        
+        assert bounds[0] == pytest.approx(0.002)
+        assert bounds[-1] == math.inf
+        assert counts == sorted(counts)
+        assert counts[0] == 2
+        assert counts[-1] == 5
+        assert counts[-2] == 4
+
+
+class TestPrometheusExposition:
+    """Tests for text exposition rendering"""
+    
+    def test_render(self):
+        """Test metric families render HELP, TYPE and samples"""
+        histogram = LatencyHistogram(min_value=0.001, max_value=0.004)
+        histogram.record(0.0015)
+        
+        text = (
+            PrometheusExposition()
+            .metric("app_requests_total", "counter", "Requests", [((("route", '/a"b'),), 3)])
+            .histogram("app_latency_seconds", "Latency", [((("route", "/a"),), histogram)])
+            .render()
+        )
+        
+        lines = text.splitlines()
+        assert "# TYPE app_requests_total counter" in lines
+        assert 'app_requests_total{route="/a\\"b"} 3' in lines
+        assert "# TYPE app_latency_seconds histogram" in lines
+        assert 'app_latency_seconds_bucket{route="/a",le="0.002"} 1' in lines
+        assert 'app_latency_seconds_bucket{route="/a",le="+Inf"} 1' in lines
+        assert 'app_latency_seconds_count{route="/a"} 1' in lines
+        assert text.endswith("\n")
+
+
+class TestMetricsEndpoint:
+    """Tests for /api/metrics"""
+    
+    @pytest.fixture
+    def client(self):
+        from fastapi.testclient import TestClient
+        
+        from main import app
+        return TestClient(app)
+    
+    def test_exposes_prometheus_text(self, client):
+        """Test the endpoint serves parseable Prometheus text with route latency"""
+        client.get("/health")
+        response = client.get("/api/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        
+        body = response.text
+        assert "# TYPE pi_forge_http_request_duration_seconds histogram" in body
+        assert 'pi_forge_http_request_duration_seconds_count{route="/health"}' in body
+        assert 'pi_forge_http_responses_total{method="GET",route="/health",status="200"}' in body
+        assert 'pi_forge_http_requests_per_second{window="1m"}' in body
+        for line in body.splitlines():
+            if line and not line.startswith("#"):
+                name_and_labels, value = line.rsplit(" ", 1)
+                float(value.replace("+Inf", "inf"))
+
+
+class TestRequestMetricsPerformance:
+    """Benchmark the per-request recording cost"""
+    
+    def test_record_cost(self):
+        """Test recording stays in the low microseconds per request"""
+        metrics = RequestMetrics()
+        routes = [f"/api/route_{i}" for i in range(50)]
+        iterations = 100000
+        
+        start = time.perf_counter()
+        for i in range(iterations):
+            metrics.record_arrival()
+            metrics.record_response("GET", routes[i % 50], 200, 0.0005 + (i % 100) * 0.0001)
+        elapsed = time.perf_counter() - start
+        
+        per_request_us = elapsed / iterations * 1e6
+        print(f"\nrecord arrival+response: {per_request_us:.2f}us per request")
+        assert metrics.total_requests == iterations
+        assert per_request_us < 50
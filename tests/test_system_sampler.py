@@ -0,0 +1,134 @@
+"""
+System Sampler Tests
+Tests for background host sampling and the diagnostics and monitoring
+agents that read its snapshots
+"""
+
+import asyncio
+import dataclasses
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add server directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "server"))
+
+from monitoring_agents import PerformanceMonitoringAgent
+from self_healing import HealthStatus, SelfHealingSystem
+from system_sampler import SystemSampler, SystemSnapshot
+
+
+class FixedSampler:
+    """Sampler returning a prepared snapshot"""
+    
+    def __init__(self, **overrides):
+        values = {
+            "timestamp": time.time(),
+            "cpu_percent": 12.5,
+            "memory_percent": 40.0,
+            "memory_available_mb": 2048.0,
+            "disk_percent": 50.0,
+            "disk_free_gb": 100.0,
+            "process_cpu_percent": 1.0,
+            "process_memory_mb": 128.0
+        }
+        values.update(overrides)
+        self.snapshot = SystemSnapshot(**values)
+    
+    def latest(self):
+        return self.snapshot
+
+
+class TestSystemSampler:
+    """Tests for the sampler thread and snapshots"""
+    
+    def test_snapshots_are_immutable(self):
+        """Test published snapshots cannot be modified by readers"""
+        snapshot = SystemSampler(interval=60).latest()
+        
+        assert 0.0 <= snapshot.cpu_percent <= 100.0
+        assert snapshot.process_memory_mb > 0
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            snapshot.cpu_percent = 0.0
+    
+    def test_worker_publishes_on_its_own_cadence(self):
+        """Test the worker refreshes snapshots and stops cleanly"""
+        sampler = SystemSampler(interval=0.05)
+        sampler.start()
+        try:
+            first = sampler.latest()
+            time.sleep(0.3)
+            second = sampler.latest()
+            assert sampler.running
+            assert second.timestamp > first.timestamp
+        finally:
+            sampler.stop()
+        assert not sampler.running
+    
+    def test_latest_is_fast_while_running(self):
+        """Test readers take the published snapshot without sampling"""
+        sampler = SystemSampler(interval=60)
+        sampler.start()
+        try:
+            published = sampler.latest()
+            start = time.perf_counter()
+            for _ in range(10000):
+                assert sampler.latest() is published
+            elapsed = time.perf_counter() - start
+        finally:
+            sampler.stop()
+        
+        print(f"\n10k latest() reads: {elapsed * 1000:.2f}ms")
+        assert elapsed / 10000 < 50e-6
+    
+    def test_stale_snapshot_is_refreshed_without_worker(self):
+        """Test a stopped sampler samples inline once its snapshot is stale"""
+        sampler = SystemSampler(interval=0.01)
+        first = sampler.latest()
+        time.sleep(0.02)
+        assert sampler.latest().timestamp > first.timestamp
+
+
+class TestSnapshotReaders:
+    """Tests for diagnostics and agents reading snapshots"""
+    
+    def test_diagnostics_use_snapshot(self):
+        """Test checks grade the snapshot values"""
+        system = SelfHealingSystem(FixedSampler(cpu_percent=85.0, disk_percent=96.0))
+        results = {r.check_name: r for r in system.run_diagnostics()}
+        
+        assert results["cpu_usage"].status == HealthStatus.UNHEALTHY
+        assert results["cpu_usage"].value == 85.0
+        assert results["memory_usage"].status == HealthStatus.HEALTHY
+        assert results["disk_usage"].status == HealthStatus.CRITICAL
+        assert results["process_health"].value == {"cpu": 1.0, "memory_mb": 128.0}
+        assert {i.component for i in system.incident_history} == {"cpu_usage", "disk_usage"}
+    
+    def test_diagnostics_do_not_block(self):
+        """Test diagnostics no longer wait on psutil CPU intervals"""
+        sampler = SystemSampler(interval=60)
+        sampler.start()
+        try:
+            system = SelfHealingSystem(sampler)
+            start = time.perf_counter()
+            system.get_system_health()
+            elapsed = time.perf_counter() - start
+        finally:
+            sampler.stop()
+        
+        # Previously cpu_percent(interval=1) plus a 0.1s process sample
+        assert elapsed < 0.1
+    
+    def test_performance_agent_reads_snapshot(self):
+        """Test the performance agent reports the latest snapshot"""
+        sampler = FixedSampler(cpu_percent=90.0)
+        agent = PerformanceMonitoringAgent(sampler=sampler)
+        
+        data = asyncio.run(agent.collect_data())
+        
+        assert data.value["cpu_percent"] == 90.0
+        assert data.value["disk_free_gb"] == 100.0
+        assert data.timestamp == sampler.snapshot.timestamp
+        assert data.metadata == {"status": "degraded"}
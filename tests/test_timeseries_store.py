@@ -0,0 +1,192 @@
+"""
+Time-Series Store Tests
+Tests for the columnar monitoring store, rollups, segment persistence and
+the monitoring agents reading from it
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add server directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "server"))
+
+from monitoring_agents import MetricType, MonitoringAgentSystem, MonitoringData
+from timeseries_store import ColumnarRing, TimeSeriesStore
+
+START = 1_699_999_200.0  # on a whole hour
+
+
+def sample(timestamp, **value):
+    return {
+        "agent_id": "performance_monitor",
+        "metric_type": "performance",
+        "value": value,
+        "timestamp": timestamp,
+        "metadata": None
+    }
+
+
+class TestColumnarRing:
+    """Tests for the array-backed ring"""
+    
+    def test_wraps_and_keeps_newest_rows(self):
+        """Test the ring overwrites the oldest rows and slices by time"""
+        ring = ColumnarRing(capacity=5, keep_records=True)
+        for i in range(12):
+            ring.push(float(i), {"x": i * 10.0}, record=i)
+        
+        assert len(ring) == 5
+        assert ring.latest_records(3) == [9, 10, 11]
+        assert ring.latest_records(100) == [7, 8, 9, 10, 11]
+        assert [ring.timestamps[s] for s in ring.slots(8.0, 10.0)] == [8.0, 9.0, 10.0]
+        assert [ring.columns["x"][s] for s in ring.slots(start=10.5)] == [110.0]
+        assert ring.slots(end=3.0) == []
+    
+    def test_late_columns_are_backfilled(self):
+        """Test a field first seen later reads as missing for older rows"""
+        ring = ColumnarRing(capacity=4)
+        ring.push(1.0, {"a": 1.0})
+        ring.push(2.0, {"a": 2.0, "b": 5.0})
+        
+        slots = ring.slots()
+        b = [ring.columns["b"][s] for s in slots]
+        assert b[0] != b[0]  # NaN
+        assert b[1] == 5.0
+
+
+class TestTimeSeriesStore:
+    """Tests for queries and rollups"""
+    
+    def test_latest_returns_stored_records(self):
+        """Test latest data is served from the stored dicts without copying"""
+        store = TimeSeriesStore(capacity=3)
+        records = [sample(START + i, cpu_percent=i) for i in range(5)]
+        for record in records:
+            store.append("performance_monitor", record)
+        
+        latest = store.latest("performance_monitor", 2)
+        assert latest == records[-2:]
+        assert latest[0] is records[3]
+        assert store.count("performance_monitor") == 3
+        assert store.latest("unknown") == []
+    
+    def test_raw_range_query(self):
+        """Test raw queries return numeric fields in the time range only"""
+        store = TimeSeriesStore()
+        for i in range(10):
+            store.append("performance_monitor", sample(
+                START + i * 30, cpu_percent=float(i), status="healthy", nested={"a": 1}
+            ))
+        
+        result = store.query("performance_monitor", START + 60, START + 150)
+        assert result["timestamps"] == [START + 60, START + 90, START + 120, START + 150]
+        assert result["fields"] == {"cpu_percent": [2.0, 3.0, 4.0, 5.0]}
+        
+        # Booleans and missing values
+        store.append("flags", {"value": {"ok": True}, "timestamp": START})
+        store.append("flags", {"value": 3, "timestamp": START + 1})
+        assert store.query("flags")["fields"] == {"value": [None, 3.0]}
+    
+    def test_rollups(self):
+        """Test 1m and 1h buckets aggregate samples, including the open bucket"""
+        store = TimeSeriesStore()
+        # One sample every 20s for 2 hours: cpu 0, 1, 2, ...
+        for i in range(360):
+            store.append("performance_monitor", sample(START + i * 20, cpu_percent=float(i)))
+        
+        minutes = store.query("performance_monitor", resolution="1m")
+        assert len(minutes["timestamps"]) == 120
+        assert minutes["timestamps"][:2] == [START, START + 60]
+        first = {stat: values[0] for stat, values in minutes["fields"]["cpu_percent"].items()}
+        assert first == {"count": 3, "min": 0.0, "max": 2.0, "mean": 1.0, "last": 2.0}
+        
+        hours = store.query("performance_monitor", START + 3600, resolution="1h")
+        assert hours["timestamps"] == [START + 3600]
+        cpu = hours["fields"]["cpu_percent"]
+        assert cpu["count"] == [180]
+        assert cpu["mean"] == [pytest.approx(sum(range(180, 360)) / 180)]
+        assert cpu["max"] == [359.0]
+        
+        assert store.query("performance_monitor", fields=["missing"])["fields"] == {}
+        with pytest.raises(ValueError):
+            store.query("performance_monitor", resolution="5m")
+
+
+class TestSegmentPersistence:
+    """Tests for the append-only segment files"""
+    
+    def test_history_survives_restart(self, tmp_path):
+        """Test a new store replays samples and rollups from disk"""
+        path = str(tmp_path / "timeseries")
+        store = TimeSeriesStore(path)
+        for i in range(200):
+            store.append("performance_monitor", sample(START + i * 30, cpu_percent=float(i)))
+        store.close()
+        
+        # Simulate a crash in the middle of a write
+        segment = sorted(os.listdir(path))[-1]
+        with open(os.path.join(path, segment), "a") as f:
+            f.write('{"series": "performance_monitor", "rec')
+        
+        restored = TimeSeriesStore(path)
+        assert restored.latest("performance_monitor", 5) == store.latest("performance_monitor", 5)
+        assert restored.query("performance_monitor", resolution="1m") == store.query("performance_monitor", resolution="1m")
+        
+        # Appends continue after the replayed samples
+        restored.append("performance_monitor", sample(START + 200 * 30, cpu_percent=200.0))
+        restored.close()
+        assert TimeSeriesStore(path).count("performance_monitor") == 201
+    
+    def test_segments_rotate_and_expire(self, tmp_path):
+        """Test segments roll over at the size limit and old ones are removed"""
+        path = str(tmp_path / "timeseries")
+        store = TimeSeriesStore(path, segment_max_bytes=2048, max_segments=3)
+        for i in range(300):
+            store.append("performance_monitor", sample(START + i, cpu_percent=float(i)))
+        store.close()
+        
+        segments = sorted(os.listdir(path))
+        assert len(segments) == 3
+        
+        # Only the retained segments are replayed, newest samples included
+        restored = TimeSeriesStore(path)
+        latest = restored.latest("performance_monitor", 1)
+        assert latest[0]["value"]["cpu_percent"] == 299.0
+        assert restored.count("performance_monitor") < 300
+        restored.close()
+
+
+class TestMonitoringAgentsStore:
+    """Tests for monitoring agents backed by the store"""
+    
+    def test_agents_share_the_store(self, tmp_path):
+        """Test recorded samples are served by latest data, status and range queries"""
+        store = TimeSeriesStore(str(tmp_path / "timeseries"))
+        system = MonitoringAgentSystem(store)
+        agent = system.get_agent("performance")
+        
+        for i in range(3):
+            agent.record_data(MonitoringData(
+                agent_id=agent.agent_id,
+                metric_type=MetricType.PERFORMANCE,
+                value={"cpu_percent": 10.0 * i, "memory_percent": 50.0},
+                timestamp=START + i * 30,
+                metadata={"status": "healthy"}
+            ))
+        
+        latest = system.get_all_latest_data(limit=2)
+        assert latest["security"] == []
+        assert [d["value"]["cpu_percent"] for d in latest["performance"]] == [10.0, 20.0]
+        assert latest["performance"][0]["metric_type"] == "performance"
+        
+        assert system.get_system_status()["agents"]["performance"]["data_points"] == 3
+        assert agent.query_data(START + 30, fields=["cpu_percent"])["fields"] == {"cpu_percent": [10.0, 20.0]}
+        store.close()
+        
+        # Restarted system sees the same history
+        restored = MonitoringAgentSystem(TimeSeriesStore(str(tmp_path / "timeseries")))
+        assert restored.get_all_latest_data(limit=2) == latest
+        restored.store.close()
@@ -0,0 +1,205 @@
+"""
+Tracing Sampling Tests
+Tests for the head/tail trace sampler, frozen span attributes and the
+per-request overhead of traced endpoints
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+# Add server directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "server"))
+
+import tracing_system
+from tracing_system import (QuantumTracingSystem, TraceSampler, set_tracing_system,
+                            span_attributes, trace_fastapi_operation,
+                            trace_flask_operation)
+
+
+@pytest.fixture
+def install_tracing(monkeypatch):
+    """Install a tracing system exporting to memory; restored after the test"""
+    monkeypatch.setenv("ENABLE_TELEMETRY", "true")
+    for name in ("_tracing_system", "_tracing_initialized", "_fastapi_tracer",
+                 "_flask_tracer", "_gradio_tracer"):
+        monkeypatch.setattr(tracing_system, name, getattr(tracing_system, name))
+    
+    def install(sampler):
+        exporter = InMemorySpanExporter()
+        system = QuantumTracingSystem(sampler=sampler, span_exporter=exporter)
+        set_tracing_system(system)
+        
+        def finished_spans():
+            system.provider.force_flush()
+            return exporter.get_finished_spans()
+        return system, finished_spans
+    return install
+
+
+class TestTraceSampler:
+    """Tests for sampling decisions"""
+    
+    def test_ratios_and_route_overrides(self):
+        """Test the global ratio, per-route overrides and clamping"""
+        sampler = TraceSampler(ratio=0.25, route_ratios={"health_check": 0.0, "payment": 5})
+        
+        assert sampler.ratio_for("payment") == 1.0
+        assert all(sampler.should_sample("payment") for _ in range(100))
+        assert not any(sampler.should_sample("health_check") for _ in range(100))
+        
+        sampled = sum(sampler.should_sample("other") for _ in range(20000))
+        assert 4000 < sampled < 6000
+    
+    def test_from_env(self, monkeypatch):
+        """Test configuration from environment variables"""
+        monkeypatch.setenv("TRACE_SAMPLE_RATE", "0.1")
+        monkeypatch.setenv("TRACE_ROUTE_SAMPLE_RATES", "health_check=0.01, payment_processing=1")
+        monkeypatch.setenv("TRACE_SAMPLE_ERRORS", "false")
+        
+        sampler = TraceSampler.from_env()
+        assert sampler.ratio == 0.1
+        assert sampler.route_ratios == {"health_check": 0.01, "payment_processing": 1.0}
+        assert sampler.always_sample_errors is False
+    
+    def test_span_attributes_are_frozen_and_shared(self):
+        """Test attribute sets are built once and cannot be mutated"""
+        attributes = span_attributes("fastapi", "harmony", "health_check", "health_check")
+        assert attributes is span_attributes("fastapi", "harmony", "health_check", "health_check")
+        assert attributes["consciousness.level"] == "synchronizing"
+        assert attributes["quantum.operation"] == "health_check"
+        with pytest.raises(TypeError):
+            attributes["quantum.phase"] = "growth"
+
+
+class TestSampledDecorators:
+    """Tests for the tracing decorators under sampling"""
+    
+    def test_sampled_operations_record_spans(self, install_tracing):
+        """Test a fully sampled operation records a span with its attributes"""
+        _, finished_spans = install_tracing(TraceSampler(ratio=1.0))
+        
+        @trace_fastapi_operation("status")
+        async def status():
+            return {"status": "ok"}
+        
+        assert asyncio.run(status()) == {"status": "ok"}
+        spans = finished_spans()
+        assert [span.name for span in spans] == ["quantum.fastapi.status"]
+        assert spans[0].attributes["function"] == "status"
+        assert spans[0].attributes["quantum.success"] is True
+    
+    def test_dropped_operations_record_nothing(self, install_tracing):
+        """Test the no-op fast path records no span"""
+        _, finished_spans = install_tracing(TraceSampler(ratio=0.0))
+        
+        @trace_flask_operation("dashboard")
+        def dashboard():
+            return "ok"
+        
+        assert [dashboard() for _ in range(10)] == ["ok"] * 10
+        assert finished_spans() == ()
+    
+    def test_errors_are_always_sampled(self, install_tracing):
+        """Test a dropped operation that raises still gets an error span"""
+        _, finished_spans = install_tracing(TraceSampler(ratio=0.0))
+        
+        @trace_flask_operation("dashboard")
+        def dashboard():
+            raise RuntimeError("lattice offline")
+        
+        with pytest.raises(RuntimeError):
+            dashboard()
+        
+        spans = finished_spans()
+        assert len(spans) == 1
+        assert spans[0].attributes["quantum.error"] == "lattice offline"
+        assert spans[0].attributes["sampling.error_retained"] is True
+        assert spans[0].status.status_code == trace.StatusCode.ERROR
+        assert spans[0].start_time < spans[0].end_time
+    
+    def test_errors_dropped_when_disabled(self, install_tracing):
+        """Test always_sample_errors=False drops failed operations too"""
+        _, finished_spans = install_tracing(TraceSampler(ratio=0.0, always_sample_errors=False))
+        
+        @trace_flask_operation("dashboard")
+        def dashboard():
+            raise RuntimeError("lattice offline")
+        
+        with pytest.raises(RuntimeError):
+            dashboard()
+        assert finished_spans() == ()
+    
+    def test_children_follow_sampled_parent(self, install_tracing):
+        """Test operations inside a sampled span are kept despite their route ratio"""
+        system, finished_spans = install_tracing(
+            TraceSampler(ratio=1.0, route_ratios={"inner": 0.0})
+        )
+        
+        @trace_flask_operation("inner")
+        def inner():
+            return "ok"
+        
+        @trace_flask_operation("outer")
+        def outer():
+            return inner()
+        
+        outer()
+        inner()
+        spans = finished_spans()
+        assert sorted(span.name for span in spans) == ["quantum.flask.inner", "quantum.flask.outer"]
+        child = next(span for span in spans if span.name == "quantum.flask.inner")
+        parent = next(span for span in spans if span.name == "quantum.flask.outer")
+        assert child.parent.span_id == parent.context.span_id
+    
+    def test_create_quantum_span_respects_sampler(self, install_tracing):
+        """Test helper spans are non-recording when dropped"""
+        system, finished_spans = install_tracing(
+            TraceSampler(ratio=1.0, route_ratios={"payment_processing": 0.0})
+        )
+        
+        with tracing_system.trace_payment_processing("payment_1", 1.5) as span:
+            assert not span.is_recording()
+        with tracing_system.trace_authentication("user_1") as span:
+            assert span.is_recording()
+        
+        spans = finished_spans()
+        assert [span.name for span in spans] == ["quantum.fastapi.authentication"]
+        assert spans[0].attributes["user_id"] == "user_1"
+        assert spans[0].attributes["consciousness.level"] == "awakening"
+
+
+class TestTracingOverhead:
+    """Microbenchmark of per-request tracing overhead"""
+    
+    def test_health_check_overhead_by_sample_rate(self, install_tracing):
+        """Test decorated health_check overhead shrinks with the sample rate"""
+        from main import health_check
+        undecorated = health_check.__wrapped__
+        calls = 5000
+        
+        async def per_call(endpoint):
+            started = time.perf_counter()
+            for _ in range(calls):
+                await endpoint()
+            return (time.perf_counter() - started) / calls
+        
+        baseline = min(asyncio.run(per_call(undecorated)) for _ in range(3))
+        overhead = {}
+        for ratio in (0.0, 0.01, 0.1, 1.0):
+            _, finished_spans = install_tracing(TraceSampler(ratio=ratio))
+            elapsed = min(asyncio.run(per_call(health_check)) for _ in range(3))
+            overhead[ratio] = elapsed - baseline
+            finished_spans()
+        
+        print(f"\nhealth_check baseline: {baseline * 1e6:.2f}µs/request")
+        for ratio, extra in overhead.items():
+            print(f"  sample rate {ratio:>4}: +{extra * 1e6:.2f}µs/request")
+        
+        # Dropping spans is far cheaper than recording them all
+        assert overhead[0.0] < overhead[1.0] / 3
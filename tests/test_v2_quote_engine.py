@@ -0,0 +1,281 @@
+"""
+Tests for the local Uniswap V2 quote engine
+Tests integer quote math, best path search, batched per-block reserve reads,
+head block caching and exact parity with UniswapV2Router02 on an in-process EVM
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Import the engine module directly: the integrations package pulls in web3,
+# which only the CREATE2 and parity tests need
+sys.path.insert(0, str(Path(__file__).parent.parent / "server" / "integrations"))
+
+import v2_quote_engine
+from v2_quote_engine import (
+    GET_PAIR_SELECTOR, GET_RESERVES_SELECTOR, QuoteError, V2QuoteEngine, find_best_path,
+    get_amount_out, get_amounts_out, pair_key
+)
+
+# SushiSwap V2 factory, router and mock tokens (see "_source" in the file)
+UNISWAP_V2_FIXTURE = Path(__file__).parent / "fixtures" / "uniswap_v2.json"
+
+TOKEN_A = "0xaAaAaAaaAaAaAaaAaAAAAAAAAaaaAaAaAaaAaaAa"
+TOKEN_B = "0xbBbBBBBbbBBBbbbBbbBbbbbBBbBbbbbBbBbbBBbB"
+TOKEN_C = "0xCcCCccccCCCCcCCCCCCcCcCccCcCCCcCcccccccC"
+FACTORY = "0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f"
+ETHER = 10 ** 18
+
+
+class FakeEth:
+    """Head block for an engine whose eth_calls are stubbed"""
+    
+    def __init__(self, block_number):
+        self.head = block_number
+        self.reads = 0
+    
+    @property
+    def block_number(self):
+        self.reads += 1
+        return self.head
+
+
+class FakeWeb3:
+    """Just enough of Web3 for the engine, given checksummed addresses"""
+    
+    def __init__(self, block_number=100):
+        self.eth = FakeEth(block_number)
+    
+    @staticmethod
+    def to_checksum_address(address):
+        return address
+
+
+def stub_pairs(engine, pools):
+    """Answer the engine's getPair and getReserves calls from pools keyed by pair_key"""
+    addresses = {key: "0x" + str(i + 1) * 40 for i, key in enumerate(pools)}
+    pairs = {(token0.lower(), token1.lower()): address for (token0, token1), address in addresses.items()}
+    keys = {address: key for key, address in addresses.items()}
+    batches = []
+    
+    def call_many(calls, block_number):
+        results = []
+        for target, data in calls:
+            if data[:4] == GET_PAIR_SELECTOR:
+                assert target == FACTORY
+                address = pairs.get(("0x" + data[16:36].hex(), "0x" + data[48:68].hex()), "0x" + "00" * 20)
+                results.append(bytes(12) + bytes.fromhex(address[2:]))
+            else:
+                assert data == GET_RESERVES_SELECTOR
+                reserve0, reserve1 = pools[keys[target]]
+                results.append(reserve0.to_bytes(32, "big") + reserve1.to_bytes(32, "big") + bytes(32))
+        batches.append(("getPair" if calls[0][1][:4] == GET_PAIR_SELECTOR else "getReserves", len(calls)))
+        return results
+    
+    engine._call_many = call_many
+    return batches
+
+
+def test_get_amount_out_matches_library():
+    """Test values and reverts from the Uniswap V2 periphery test suite"""
+    assert get_amount_out(2, 100, 100) == 1
+    assert get_amount_out(10 ** 18, 5 * 10 ** 18, 10 * 10 ** 18) == 1662497915624478906
+    
+    with pytest.raises(QuoteError, match="INSUFFICIENT_INPUT_AMOUNT"):
+        get_amount_out(0, 100, 100)
+    with pytest.raises(QuoteError, match="INSUFFICIENT_LIQUIDITY"):
+        get_amount_out(2, 0, 100)
+
+
+def test_get_amounts_out_orders_reserves_by_token():
+    """Test each hop reads the reserves in the direction of the swap"""
+    reserves = {pair_key(TOKEN_B, TOKEN_A): (1000, 4000)}
+    
+    assert get_amounts_out(100, [TOKEN_A, TOKEN_B], reserves) == [100, 362]
+    assert get_amounts_out(100, [TOKEN_B, TOKEN_A], reserves) == [100, 24]
+    with pytest.raises(QuoteError, match="INVALID_PATH"):
+        get_amounts_out(100, [TOKEN_A], reserves)
+    with pytest.raises(QuoteError, match="No pair"):
+        get_amounts_out(100, [TOKEN_A, TOKEN_C], reserves)
+
+
+def test_find_best_path():
+    """Test the search prefers the highest output, then the fewest hops"""
+    reserves = {
+        pair_key(TOKEN_A, TOKEN_B): (1000 * ETHER, 1000 * ETHER),
+        pair_key(TOKEN_A, TOKEN_C): (1000 * ETHER, 5000 * ETHER),
+        pair_key(TOKEN_C, TOKEN_B): (5000 * ETHER, 1500 * ETHER)
+    }
+    
+    best = find_best_path(ETHER, TOKEN_A, TOKEN_B, reserves)
+    assert best.path == (TOKEN_A, TOKEN_C, TOKEN_B)
+    assert list(best.amounts) == get_amounts_out(ETHER, best.path, reserves)
+    
+    direct = find_best_path(ETHER, TOKEN_A, TOKEN_B, reserves, max_hops=1)
+    assert direct.path == (TOKEN_A, TOKEN_B)
+    
+    # Equal output through C, which is searched first: the direct pair wins
+    tied = {
+        pair_key(TOKEN_A, TOKEN_C): (ETHER, 10 * ETHER),
+        pair_key(TOKEN_C, TOKEN_B): (ETHER, 10 * ETHER),
+        pair_key(TOKEN_A, TOKEN_B): (100, 100)
+    }
+    assert get_amounts_out(2, [TOKEN_A, TOKEN_C, TOKEN_B], tied)[-1] == get_amounts_out(2, [TOKEN_A, TOKEN_B], tied)[-1]
+    assert find_best_path(2, TOKEN_A, TOKEN_B, tied).path == (TOKEN_A, TOKEN_B)
+    
+    assert find_best_path(ETHER, TOKEN_A, TOKEN_B, {pair_key(TOKEN_A, TOKEN_B): (0, 0)}) is None
+
+
+def test_create2_pair_address():
+    """Test pair addresses are computed like UniswapV2Library.pairFor"""
+    web3 = pytest.importorskip("web3")
+    engine = V2QuoteEngine(
+        web3.Web3(),
+        FACTORY,
+        multicall_address=None,
+        pair_init_code_hash="0x96e8ac4277198ff8b6f785478aa9a39f403cb768dd02cbee326c3e7da348845f"
+    )
+    usdc = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+    weth = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+    
+    assert engine._create2_pair_address(pair_key(weth, usdc)) == "0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc"
+
+
+def test_reserves_batched_and_cached_per_block():
+    """Test all pairs are read in one round trip and reused within a block"""
+    w3 = FakeWeb3(block_number=100)
+    engine = V2QuoteEngine(w3, FACTORY, multicall_address=None, routing_tokens=[TOKEN_C], block_ttl=0)
+    pools = {
+        pair_key(TOKEN_A, TOKEN_B): (1000 * ETHER, 1000 * ETHER),
+        pair_key(TOKEN_A, TOKEN_C): (1000 * ETHER, 5000 * ETHER),
+        pair_key(TOKEN_B, TOKEN_C): (1500 * ETHER, 5000 * ETHER)
+    }
+    batches = stub_pairs(engine, pools)
+    
+    best = engine.best_path(ETHER, TOKEN_A, TOKEN_B)
+    assert best.path == (TOKEN_A, TOKEN_C, TOKEN_B)
+    assert best.block_number == 100
+    assert batches == [("getPair", 3), ("getReserves", 3)]
+    
+    quotes = engine.quote_paths(ETHER, [[TOKEN_A, TOKEN_B], [TOKEN_A, TOKEN_C, TOKEN_B], [TOKEN_B, TOKEN_A]])
+    assert [quote.path[-1] for quote in quotes] == [TOKEN_B, TOKEN_B, TOKEN_A]
+    assert quotes[1].amounts == best.amounts
+    assert len(batches) == 2
+    
+    # A new block refreshes only the pairs quoted at it; pair addresses stay cached
+    w3.eth.head = 101
+    pools[pair_key(TOKEN_A, TOKEN_B)] = (1000 * ETHER, 2000 * ETHER)
+    assert engine.quote(ETHER, [TOKEN_A, TOKEN_B]).amount_out == get_amount_out(ETHER, 1000 * ETHER, 2000 * ETHER)
+    assert batches[2:] == [("getReserves", 1)]
+    
+    # With block_ttl=0 every "latest" quote looked up the head block
+    assert engine.round_trips == w3.eth.reads == 3
+
+
+def test_head_block_cached_for_ttl(monkeypatch):
+    """Test "latest" reuses the head block within block_ttl and counts each lookup"""
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(v2_quote_engine.time, "monotonic", lambda: clock["now"])
+    w3 = FakeWeb3(block_number=100)
+    engine = V2QuoteEngine(w3, FACTORY, multicall_address=None, block_ttl=1.0)
+    batches = stub_pairs(engine, {pair_key(TOKEN_A, TOKEN_B): (1000 * ETHER, 1000 * ETHER)})
+    
+    assert engine.quote(ETHER, [TOKEN_A, TOKEN_B]).block_number == 100
+    assert (w3.eth.reads, engine.round_trips) == (1, 1)
+    
+    # Within the TTL the new head is not seen yet, and nothing is re-read
+    w3.eth.head = 101
+    clock["now"] += 0.5
+    assert engine.quote(ETHER, [TOKEN_A, TOKEN_B]).block_number == 100
+    assert (w3.eth.reads, engine.round_trips) == (1, 1)
+    assert len(batches) == 2
+    
+    clock["now"] += 0.5
+    assert engine.quote(ETHER, [TOKEN_A, TOKEN_B]).block_number == 101
+    assert (w3.eth.reads, engine.round_trips) == (2, 2)
+    
+    # Explicit blocks never look up the head
+    assert engine.quote(ETHER, [TOKEN_A, TOKEN_B], block_identifier=101).block_number == 101
+    assert w3.eth.reads == 2
+
+
+@pytest.fixture
+def local_dex():
+    """Factory, router and three liquid pairs deployed on eth-tester"""
+    web3 = pytest.importorskip("web3")
+    pytest.importorskip("eth_tester")
+    artifacts = json.loads(UNISWAP_V2_FIXTURE.read_text())
+    w3 = web3.Web3(web3.Web3.EthereumTesterProvider())
+    owner = w3.eth.accounts[0]
+    
+    def deploy(name, *args):
+        abi, bytecode = artifacts[name]["abi"], artifacts[name]["bytecode"]
+        tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor(*args).transact({"from": owner})
+        address = w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"]
+        return w3.eth.contract(address=address, abi=abi)
+    
+    # The router hardcodes the pair init code hash of the mainnet factory,
+    # so the factory is deployed from its original creation data
+    tx_hash = w3.eth.send_transaction({"from": owner, "data": artifacts["factory"]["deployment_data"]})
+    factory = w3.eth.contract(
+        address=w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"],
+        abi=artifacts["factory"]["abi"]
+    )
+    weth = deploy("weth")
+    router = deploy("router", factory.address, weth.address)
+    
+    tokens = [deploy("token", f"Token {i}", f"TK{i}", 10 ** 6 * ETHER) for i in range(3)]
+    for token in tokens:
+        token.functions.approve(router.address, 2 ** 256 - 1).transact({"from": owner})
+    
+    deadline = int(time.time()) + 3600
+    for (a, b), (amount_a, amount_b) in {
+        (0, 1): (100 * ETHER, 80 * ETHER),
+        (0, 2): (50 * ETHER, 120 * ETHER),
+        (2, 1): (90 * ETHER, 70 * ETHER)
+    }.items():
+        router.functions.addLiquidity(
+            tokens[a].address, tokens[b].address, amount_a, amount_b, 0, 0, owner, deadline
+        ).transact({"from": owner})
+    
+    init_code_hash = bytes(factory.functions.pairCodeHash().call()).hex()
+    return w3, factory, router, [token.address for token in tokens], init_code_hash
+
+
+@pytest.mark.parametrize("use_init_code_hash", [False, True])
+def test_parity_with_router(local_dex, use_init_code_hash):
+    """Test local quotes equal router.getAmountsOut, reverts included, before and after swaps"""
+    from eth_tester.exceptions import TransactionFailed
+    
+    w3, factory, router, (a, b, c), init_code_hash = local_dex
+    engine = V2QuoteEngine(
+        w3, factory.address, multicall_address=None,
+        pair_init_code_hash=init_code_hash if use_init_code_hash else None,
+        routing_tokens=[c],
+        block_ttl=0
+    )
+    paths = [[a, b], [b, a], [a, c, b], [b, c, a], [c, a, b]]
+    
+    for _ in range(2):
+        for amount in (1, 997, 10 ** 15, 3 * ETHER, 40 * ETHER):
+            for path in paths:
+                try:
+                    expected = router.functions.getAmountsOut(amount, path).call()
+                except TransactionFailed:
+                    # A dust amount rounds to zero after the first hop
+                    with pytest.raises(QuoteError, match="INSUFFICIENT_INPUT_AMOUNT"):
+                        engine.quote(amount, path)
+                    continue
+                assert list(engine.quote(amount, path).amounts) == expected
+        
+        best = engine.best_path(ETHER, a, b)
+        assert best.amount_out == max(router.functions.getAmountsOut(ETHER, path).call()[-1] for path in ([a, b], [a, c, b]))
+        
+        # Move the price; the next block's quotes must follow it
+        router.functions.swapExactTokensForTokens(
+            7 * ETHER, 0, [a, c, b], w3.eth.accounts[0], int(time.time()) + 3600
+        ).transact({"from": w3.eth.accounts[0]})